@@ -0,0 +1,63 @@
+import uuid
+import logging
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from core.chat import get_gateway
+
+# Logging estruturado compartilhado com o dialogflow_automation (biblioteca padrão apenas)
+try:
+    from dialogflow_automation.core.json_logging import correlation_scope
+except ImportError:
+    correlation_scope = None
+
+logger = logging.getLogger(__name__)
+
+# Limite de caracteres do texto de uma consulta no detectIntent do Dialogflow ES
+MAX_MESSAGE_CHARS = 256
+# Chave, na sessão do Django, do ID da sessão do Dialogflow deste navegador
+SESSION_KEY = 'dialogflow_session_id'
+
+
+class ChatView(APIView):
+    """
+    Endpoint do chat do site (ChatInterface.tsx).
+    Recebe {"message": "..."} e retorna {"reply": "...", "intent": "..."}.
+    """
+    # Chat público: o navegador é identificado pela sessão do Django (cookie), sem login
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request, *args, **kwargs):
+        message = request.data.get('message') if isinstance(request.data, dict) else None
+        if not isinstance(message, str) or not message.strip():
+            return Response({"error": "Campo 'message' obrigatório."}, status=status.HTTP_400_BAD_REQUEST)
+
+        gateway = get_gateway()
+        if gateway is None:
+            return Response({"reply": "O chat está temporariamente indisponível."},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        session_id = self.get_session_id(request)
+        if correlation_scope is None:
+            return self.reply(gateway, session_id, message.strip()[:MAX_MESSAGE_CHARS])
+        with correlation_scope(session_id):
+            return self.reply(gateway, session_id, message.strip()[:MAX_MESSAGE_CHARS])
+
+    def get_session_id(self, request):
+        """Sessão do Dialogflow do navegador (criada na primeira mensagem)."""
+        session_id = request.session.get(SESSION_KEY)
+        if not session_id:
+            session_id = request.session[SESSION_KEY] = uuid.uuid4().hex
+        return session_id
+
+    def reply(self, gateway, session_id, message):
+        try:
+            reply = gateway.send(session_id, message)
+        except Exception as e:
+            logger.error("Erro ao consultar o Dialogflow: %s", e, exc_info=True)
+            return Response({"reply": "Desculpe, não consegui processar sua mensagem agora."},
+                            status=status.HTTP_502_BAD_GATEWAY)
+
+        logger.info("Chat respondido (intent: %s, origem: %s)", reply.intent, reply.source)
+        return Response({"reply": reply.text, "intent": reply.intent})
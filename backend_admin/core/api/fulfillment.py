@@ -2,9 +2,19 @@ import logging
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.conf import settings
 from django.db import transaction
 from core.models import Ticket
+from core.duplicates import duplicate_mode, find_duplicate, link_duplicate, merge_duplicate
+from core.entities import resolve_entity, triage_priority
+from core.metrics import observe_auth_failure
+from core.webhook_auth import get_webhook_auth, token_from_request
+
+# Logging estruturado compartilhado com o dialogflow_automation (biblioteca padrão apenas)
+try:
+    from dialogflow_automation.core.json_logging import correlation_scope, session_id_from_dialogflow
+except ImportError:
+    correlation_scope = None
+    session_id_from_dialogflow = None
 
 logger = logging.getLogger(__name__)
 
@@ -20,35 +30,61 @@ class DialogflowFulfillmentView(APIView):
     def post(self, request, *args, **kwargs):
         """
         Recebe POST do Dialogflow com intent e parâmetros.
+        Os logs da requisição levam o ID da sessão do Dialogflow como correlation_id.
         """
-        # 1. Validação de Segurança (Token no Header)
-        # O token deve ser configurado no Dialogflow Fulfillment headers
-        auth_header = request.headers.get(
-            'Authorization') or request.headers.get('x-dialogflow-token')
-        expected_token = getattr(settings, 'DIALOGFLOW_WEBHOOK_TOKEN', None)
-
-        # Se não houver token configurado no settings, loga aviso (mas bloqueia por segurança se for prod)
-        if not expected_token:
+        # O token é validado antes de ler o corpo: rejeitar uma enxurrada de requisições é barato
+        denied = self.authenticate(request)
+        if denied is not None:
+            return denied
+
+        if correlation_scope is None:
+            return self.handle_webhook(request)
+
+        session = request.data.get('session') if isinstance(request.data, dict) else None
+        with correlation_scope(session_id_from_dialogflow(session)):
+            return self.handle_webhook(request)
+
+    def authenticate(self, request):
+        """
+        Valida o token do header (configurado no Dialogflow Fulfillment headers).
+
+        Returns:
+            Response ou None: Resposta de erro, ou None se o token é válido.
+        """
+        auth = get_webhook_auth()
+        if not auth.configured:
+            # Sem token configurado, bloqueia por segurança
             logger.error(
                 "DIALOGFLOW_WEBHOOK_TOKEN não configurado no settings. Bloqueando requisição.")
             return Response({"error": "Server misconfiguration"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        if auth_header != expected_token:
-            logger.warning(
-                f"Tentativa de acesso não autorizado ao Webhook. Token recebido: {auth_header}")
+        token = token_from_request(request)
+        # O LoadSheddingMiddleware já verificou o token (um SHA-256 e as comparações por requisição)
+        valid = getattr(request, 'webhook_token_valid', None)
+        if valid is None:
+            valid = auth.verify(token)
+        if not valid:
+            reason = 'invalid' if token else 'missing'
+            observe_auth_failure(reason)
+            auth.log_failure(request, reason)
             return Response({"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED)
+        return None
 
-        # 2. Extração de Dados
+    def handle_webhook(self, request):
+        """
+        Roteia a intent recebida.
+        """
+        # 1. Extração de Dados
         data = request.data
         query_result = data.get('queryResult', {})
         intent_display_name = query_result.get('intent', {}).get('displayName')
         parameters = query_result.get('parameters', {})
 
         logger.info(
-            f"Webhook Dialogflow recebido. Intent: {intent_display_name}")
+            "Webhook Dialogflow recebido. Intent: %s", intent_display_name)
 
         try:
-            # 3. Roteamento de Intents
+            # 2. Roteamento de Intents
             if intent_display_name == 'abrir_chamado':
                 return self.handle_abrir_chamado(parameters)
 
@@ -58,7 +94,7 @@ class DialogflowFulfillmentView(APIView):
             })
 
         except Exception as e:
-            logger.error(f"Erro ao processar webhook: {str(e)}", exc_info=True)
+            logger.error("Erro ao processar webhook: %s", e, exc_info=True)
             return Response({
                 "fulfillmentText": "Desculpe, ocorreu um erro interno ao processar sua solicitação."
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -76,22 +112,27 @@ class DialogflowFulfillmentView(APIView):
             person_name = person_name_raw
 
         contact_info = params.get('contact_info', '')
-        department = params.get('department', '')
         ticket_title = params.get('ticket_title', '')
-        ticket_type = params.get('ticket_type', '')
-        category = params.get('category', '')
-        priority_raw = params.get('priority', 'Média')
         description_text = params.get('description', '')
         location = params.get('location', '')
 
-        # Mapeamento de Prioridade
-        priority_map = {
-            'Crítica': 'CRITICAL',
-            'Alta': 'HIGH',
-            'Média': 'MEDIUM',
-            'Baixa': 'LOW'
-        }
-        priority_db = priority_map.get(priority_raw, 'MEDIUM')
+        # Entidades KIND_MAP: resolve sinônimos brutos (ex: 'Urgente', 'Parou a empresa')
+        # para o valor canônico usando o índice compilado do intents.json
+        department_raw = params.get('department', '')
+        department = resolve_entity(
+            'Department', department_raw, default=department_raw)
+        ticket_type_raw = params.get('ticket_type', '')
+        ticket_type = resolve_entity(
+            'TicketType', ticket_type_raw, default=ticket_type_raw)
+        category_raw = params.get('category', '')
+        category = resolve_entity(
+            'TicketCategory', category_raw, default=category_raw)
+        priority_raw = params.get('priority', 'Média')
+
+        # Triagem: a prioridade informada é combinada com o título e a descrição
+        # (ex: 'Baixa' + 'servidor fora do ar' -> CRITICAL)
+        priority_db = triage_priority(f"{ticket_title}\n{description_text}", priority_raw)
+        priority_label = dict(Ticket.PRIORITY_CHOICES)[priority_db]
 
         # Construção da Descrição Completa
         full_description = (
@@ -103,6 +144,14 @@ class DialogflowFulfillmentView(APIView):
             f"Descrição do Usuário:\n{description_text}"
         )
 
+        # O mesmo problema já aberto (ex: o usuário repetiu o pedido no chatbot)
+        original, similarity = find_duplicate(full_description)
+        if original is not None and duplicate_mode() == 'merge':
+            merge_duplicate(original, full_description, priority_db)
+            return Response({
+                "fulfillmentText": f"Já existe um chamado aberto para este problema, com o protocolo #{original.id}. Acrescentamos as novas informações a ele."
+            })
+
         # Criação Atômica do Ticket
         with transaction.atomic():
             ticket = Ticket.objects.create(
@@ -112,10 +161,13 @@ class DialogflowFulfillmentView(APIView):
                 status='OPEN',
                 priority=priority_db
             )
+            if original is not None:
+                link_duplicate(ticket, original, similarity)
 
-        logger.info(f"Ticket #{ticket.id} criado via Dialogflow.")
+        logger.info("Ticket #%s criado via Dialogflow.", ticket.id)
 
         # Resposta para o Dialogflow
-        return Response({
-            "fulfillmentText": f"Seu chamado foi aberto com sucesso! O número do protocolo é #{ticket.id}. Nossa equipe de {department} analisará o caso com prioridade {priority_raw}."
-        })
+        fulfillment_text = f"Seu chamado foi aberto com sucesso! O número do protocolo é #{ticket.id}. Nossa equipe de {department} analisará o caso com prioridade {priority_label}."
+        if original is not None:
+            fulfillment_text += f" Ele foi vinculado ao chamado #{original.id}, aberto para o mesmo problema."
+        return Response({"fulfillmentText": fulfillment_text})
@@ -0,0 +1,25 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        # LOG_MODE=json/async: logs estruturados (JSON) no logger raiz; async escreve em segundo plano
+        from django.conf import settings
+        if settings.LOG_MODE != 'text':
+            try:
+                from dialogflow_automation.core.json_logging import configure_logging
+                configure_logging(settings.LOG_MODE)
+            except ImportError:
+                # Sem o dialogflow_automation no path, mantém o logging padrão do Django
+                pass
+
+        # Compila o índice de sinônimos das entidades na inicialização do processo,
+        # evitando o custo na primeira requisição do webhook
+        from core.entities import get_entity_index
+        get_entity_index()
+
+        # Registra os signals que mantêm o índice de chamados repetidos atualizado
+        import core.duplicates  # noqa: F401
@@ -0,0 +1,115 @@
+import os
+import gzip
+import json
+import logging
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from core.models import TICKET_FIELDS, ArchivedTicket, Ticket, TicketDuplicate
+
+logger = logging.getLogger(__name__)
+
+# Arquivamento dos chamados encerrados (comando archive_tickets).
+#
+# Os chamados resolvidos/fechados há mais de TICKET_ARCHIVE_DAYS saem da tabela de tickets para
+# ArchivedTicket em lotes (um lote por transação), mantendo o id. A leitura continua igual pelo
+# Ticket.objects.with_archive() e pelo detalhe da API. Opcionalmente, cada lote também é gravado
+# em JSON Lines compactado (gzip), um arquivo por mês de abertura.
+
+ARCHIVE_STATUSES = ('RESOLVED', 'CLOSED')
+
+EXPORT_FIELDS = TICKET_FIELDS + ('duplicate_of', 'archived_at')
+
+
+def archive_cutoff(days, now=None):
+    """Chamados sem alteração desde esta data podem ser arquivados."""
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def archivable_tickets(cutoff):
+    """
+    Chamados encerrados sem alteração desde `cutoff`, dos mais novos para os mais antigos.
+
+    Um original com repetições ainda ativas fica na tabela até elas também poderem ser
+    arquivadas. Como a repetição é sempre mais nova que o original, a ordem decrescente de id
+    arquiva a repetição (e o seu vínculo) antes do original.
+    """
+    live_duplicates = (TicketDuplicate.objects.filter(original=OuterRef('pk'))
+                       .exclude(ticket__status__in=ARCHIVE_STATUSES, ticket__updated_at__lt=cutoff))
+    return (Ticket.objects.filter(status__in=ARCHIVE_STATUSES, updated_at__lt=cutoff)
+            .exclude(Exists(live_duplicates))
+            .order_by('-id'))
+
+
+def batch_to_archive(cutoff, batch_size):
+    """
+    Próximo lote, travado até o fim da transação (skip_locked: duas execuções simultâneas não
+    disputam o mesmo lote no PostgreSQL).
+
+    Só a tabela de tickets entra no FROM: o PostgreSQL não aceita FOR UPDATE no lado anulável de
+    um LEFT JOIN, por isso o vínculo de repetição é lido em outra consulta.
+    """
+    return archivable_tickets(cutoff).select_for_update(skip_locked=True)[:batch_size]
+
+
+def archive_batch(cutoff, batch_size):
+    """
+    Move um lote de chamados para o arquivo em uma transação (SELECT ... FOR UPDATE, INSERT no
+    arquivo e DELETE).
+
+    Args:
+        cutoff (datetime): Data limite da última alteração.
+        batch_size (int): Máximo de chamados do lote.
+
+    Returns:
+        list: Chamados arquivados (ArchivedTicket); vazia quando não há mais o que arquivar.
+    """
+    with transaction.atomic():
+        tickets = list(batch_to_archive(cutoff, batch_size))
+        if not tickets:
+            return []
+        ids = [ticket.id for ticket in tickets]
+        originals = dict(TicketDuplicate.objects.filter(ticket_id__in=ids)
+                         .values_list('ticket_id', 'original_id'))
+        archived_at = timezone.now()
+        archived = ArchivedTicket.objects.bulk_create([
+            ArchivedTicket(duplicate_of=originals.get(ticket.id), archived_at=archived_at,
+                           **{field: getattr(ticket, field) for field in TICKET_FIELDS})
+            for ticket in tickets
+        ])
+        # Os vínculos de repetição destes chamados saem junto (ON DELETE CASCADE)
+        Ticket.objects.filter(id__in=ids).delete()
+    logger.info("%d chamados arquivados (ids %s a %s).", len(archived), tickets[-1].id, tickets[0].id)
+    return archived
+
+
+def export_path(export_dir, created_at):
+    """Arquivo de exportação do mês de abertura do chamado (ex: tickets-2025-01.jsonl.gz)."""
+    return os.path.join(export_dir, f"tickets-{timezone.localtime(created_at):%Y-%m}.jsonl.gz")
+
+
+def export_archived(archived, export_dir):
+    """
+    Acrescenta os chamados arquivados aos arquivos JSON Lines (gzip) do seu mês de abertura.
+    Cada chamada grava um novo membro gzip, então os arquivos podem receber vários lotes.
+
+    Returns:
+        dict: {caminho do arquivo: chamados gravados}.
+    """
+    by_path = {}
+    for ticket in archived:
+        by_path.setdefault(export_path(export_dir, ticket.created_at), []).append(ticket)
+
+    os.makedirs(export_dir, exist_ok=True)
+    written = {}
+    for path, tickets in sorted(by_path.items()):
+        with gzip.open(path, 'at', encoding='utf-8') as f:
+            for ticket in tickets:
+                row = {field: getattr(ticket, field) for field in EXPORT_FIELDS}
+                row['created_at'] = row['created_at'].isoformat()
+                row['updated_at'] = row['updated_at'].isoformat()
+                row['archived_at'] = row['archived_at'].isoformat()
+                f.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n')
+        written[path] = len(tickets)
+    return written
@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import logging
+import threading
+from functools import lru_cache
+from django.conf import settings
+from django.utils.module_loading import import_string
+from core.redis_client import get_redis
+
+# Gateway do chat do site (/api/chat/): envia as mensagens do navegador ao Dialogflow ES.
+#
+# - Um único SessionsClient por processo: o canal gRPC (TLS + HTTP/2) é aberto uma vez e
+#   reutilizado por todas as requisições do worker.
+# - Cada sessão do navegador (sessão do Django) corresponde a uma sessão do Dialogflow.
+# - Os contextos ativos retornados pelo Dialogflow ficam em cache (Redis, ou memória local sem
+#   REDIS_URL). Sem contexto ativo (nenhum fluxo de abertura de chamado em andamento), perguntas
+#   que o classificador local reconhece como 'duvida_tecnica' são respondidas pelo RAG no próprio
+#   processo, sem a ida ao Dialogflow e a volta pelo webhook.
+try:
+    from google.cloud import dialogflow_v2 as dialogflow
+except ImportError:
+    dialogflow = None
+
+# Classificador local de intenções do dialogflow_automation (opcional)
+try:
+    from dialogflow_automation.core.matcher import IntentMatcher
+    from dialogflow_automation.core.parser import ConfigParser
+except ImportError:
+    IntentMatcher = None
+    ConfigParser = None
+
+logger = logging.getLogger(__name__)
+
+# Intent respondida localmente pelo RAG
+RAG_INTENT = 'duvida_tecnica'
+
+
+class ChatReply:
+    """Resposta do gateway: texto, intent detectada e origem ('dialogflow' ou 'local')."""
+
+    __slots__ = ('text', 'intent', 'source', 'contexts')
+
+    def __init__(self, text, intent, source, contexts=()):
+        self.text = text
+        self.intent = intent
+        self.source = source
+        self.contexts = list(contexts)
+
+
+class LocalSessionStore:
+    """Estado das sessões em memória (por worker), com expiração. Usado quando não há Redis."""
+
+    def __init__(self, ttl, max_entries=10000, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            if entry[1] <= self.clock():
+                del self._entries[session_id]
+                return None
+            return entry[0]
+
+    def set(self, session_id, state):
+        with self._lock:
+            if len(self._entries) >= self.max_entries and session_id not in self._entries:
+                now = self.clock()
+                self._entries = {key: entry for key, entry in self._entries.items() if entry[1] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[session_id] = (state, self.clock() + self.ttl)
+
+
+class RedisSessionStore:
+    """
+    Estado das sessões no Redis (compartilhado entre workers e instâncias), com expiração.
+    Falhas do Redis são tratadas como cache vazio: o chat continua funcionando via Dialogflow.
+    """
+
+    def __init__(self, client, ttl, prefix='nexus:chat:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, session_id):
+        try:
+            raw = self.client.get(self.prefix + session_id)
+        except Exception as e:
+            logger.warning("Redis indisponível ao ler a sessão do chat: %s", e)
+            return None
+        return json.loads(raw) if raw else None
+
+    def set(self, session_id, state):
+        try:
+            self.client.set(self.prefix + session_id,
+                            json.dumps(state, separators=(',', ':')), ex=int(self.ttl))
+        except Exception as e:
+            logger.warning("Redis indisponível ao gravar a sessão do chat: %s", e)
+
+
+def build_session_store():
+    """Redis quando REDIS_URL estiver configurado; senão, memória local do worker."""
+    ttl = getattr(settings, 'CHAT_SESSION_TTL', 1200)
+    client = get_redis()
+    if client is None:
+        return LocalSessionStore(ttl)
+    return RedisSessionStore(client, ttl)
+
+
+class ChatGateway:
+    """Envia mensagens ao Dialogflow (detectIntent) e responde dúvidas técnicas localmente."""
+
+    def __init__(self, project_id, store, language_code='pt-BR', sessions_client=None,
+                 rag_handler=None, matcher=None, min_confidence=0.6, timeout=10.0):
+        """
+        Args:
+            project_id (str): Projeto do agente no Dialogflow.
+            store: LocalSessionStore ou RedisSessionStore.
+            language_code (str): Idioma das consultas.
+            sessions_client (SessionsClient, optional): Padrão: criado na primeira mensagem.
+            rag_handler (callable, optional): fn(pergunta, session_id=...) -> resposta. Sem ele,
+                todas as mensagens vão ao Dialogflow.
+            matcher (IntentMatcher, optional): Classificador local usado para reconhecer dúvidas técnicas.
+            min_confidence (float): Pontuação mínima do classificador para responder localmente.
+            timeout (float): Timeout do detectIntent, em segundos (inclui o webhook do agente).
+        """
+        self.project_id = project_id
+        self.store = store
+        self.language_code = language_code
+        self.rag_handler = rag_handler
+        self.matcher = matcher
+        self.min_confidence = min_confidence
+        self.timeout = timeout
+        self._client = sessions_client
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = dialogflow.SessionsClient()
+        return self._client
+
+    def send(self, session_id, text):
+        """
+        Processa uma mensagem do navegador.
+
+        Args:
+            session_id (str): ID da sessão do Dialogflow associada ao navegador.
+            text (str): Mensagem do usuário.
+
+        Returns:
+            ChatReply: Resposta a exibir no chat.
+
+        Raises:
+            google.api_core.exceptions.GoogleAPICallError: Se o detectIntent falhar.
+        """
+        state = self.store.get(session_id) or {}
+        if not state.get('contexts'):
+            reply = self.answer_locally(session_id, text)
+            if reply is not None:
+                return reply
+
+        result = self.detect_intent(session_id, text).query_result
+        # Contextos de sistema ('__system_counters__') não indicam fluxo em andamento
+        contexts = [
+            {'name': context.name.rsplit('/', 1)[-1], 'lifespan': context.lifespan_count}
+            for context in result.output_contexts
+            if context.lifespan_count > 0 and not context.name.rsplit('/', 1)[-1].startswith('__')
+        ]
+        self.store.set(session_id, {'contexts': contexts})
+        return ChatReply(result.fulfillment_text, result.intent.display_name, 'dialogflow', contexts)
+
+    def detect_intent(self, session_id, text):
+        session = self.client.session_path(self.project_id, session_id)
+        return self.client.detect_intent(
+            request={
+                'session': session,
+                'query_input': {'text': {'text': text, 'language_code': self.language_code}},
+            },
+            timeout=self.timeout,
+        )
+
+    def answer_locally(self, session_id, text):
+        """
+        Responde com o RAG no próprio processo quando a mensagem é uma dúvida técnica.
+
+        Returns:
+            ChatReply ou None se a mensagem deve ir ao Dialogflow.
+        """
+        if self.rag_handler is None or self.matcher is None:
+            return None
+        intent, score = self.matcher.predict_one(text)
+        if intent != RAG_INTENT or score < self.min_confidence:
+            return None
+        try:
+            answer = self.rag_handler(text, session_id=session_id)
+        except Exception as e:
+            logger.warning("Falha no RAG local, usando o Dialogflow: %s", e)
+            return None
+        logger.info("Dúvida técnica respondida localmente (confiança %.2f)", score)
+        return ChatReply(answer, intent, 'local')
+
+
+def load_rag_handler():
+    """Importa a função configurada em CHAT_RAG_HANDLER (ex: 'vertex_rag.process_rag_query')."""
+    path = getattr(settings, 'CHAT_RAG_HANDLER', None)
+    if not path:
+        return None
+    try:
+        return import_string(path)
+    except ImportError as e:
+        logger.warning("CHAT_RAG_HANDLER indisponível (%s): %s", path, e)
+        return None
+
+
+def load_intent_matcher():
+    """Treina o classificador local com as frases do intents.json (DIALOGFLOW_CONFIG_PATH)."""
+    if IntentMatcher is None:
+        logger.warning("dialogflow_automation não encontrado. Dúvidas técnicas irão ao Dialogflow.")
+        return None
+    config_path = getattr(settings, 'DIALOGFLOW_CONFIG_PATH', None)
+    try:
+        parser = ConfigParser(os.path.dirname(config_path))
+        return IntentMatcher.from_config(parser, os.path.basename(config_path))
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning("Não foi possível treinar o classificador a partir de %s: %s", config_path, e)
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_gateway():
+    """
+    Gateway compartilhado pelo processo (mesmo SessionsClient para todas as requisições).
+
+    Returns:
+        ChatGateway ou None se a biblioteca do Dialogflow ou DIALOGFLOW_PROJECT_ID não estiverem disponíveis.
+    """
+    project_id = getattr(settings, 'DIALOGFLOW_PROJECT_ID', None)
+    if dialogflow is None or not project_id:
+        logger.error("Chat indisponível: google-cloud-dialogflow ou DIALOGFLOW_PROJECT_ID ausentes.")
+        return None
+
+    rag_handler = load_rag_handler()
+    return ChatGateway(
+        project_id,
+        build_session_store(),
+        language_code=getattr(settings, 'DIALOGFLOW_LANGUAGE_CODE', 'pt-BR'),
+        rag_handler=rag_handler,
+        # O classificador só é treinado se houver RAG local para usar
+        matcher=load_intent_matcher() if rag_handler else None,
+        min_confidence=getattr(settings, 'CHAT_LOCAL_MIN_CONFIDENCE', 0.6),
+        timeout=getattr(settings, 'CHAT_DETECT_INTENT_TIMEOUT', 10.0),
+    )
@@ -0,0 +1,321 @@
+import re
+import time
+import zlib
+import random
+import logging
+import threading
+import unicodedata
+from functools import lru_cache
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from core.metrics import observe_duplicate
+from core.models import Ticket, TicketDuplicate
+
+logger = logging.getLogger(__name__)
+
+# Detecção de chamados repetidos (o mesmo problema aberto várias vezes pelo chatbot).
+#
+# Cada processo mantém um índice MinHash/LSH das descrições dos chamados em aberto. A assinatura
+# MinHash (NUM_PERMUTATIONS mínimos de hashes dos termos) é dividida em LSH_BANDS faixas; dois
+# textos viram candidatos se alguma faixa inteira coincidir, o que acontece com alta
+# probabilidade a partir de ~50% de termos em comum. Os candidatos são confirmados pela
+# similaridade de Jaccard exata, e só o que passa do limiar é conferido no banco.
+#
+# O índice é montado no primeiro uso (uma consulta), atualizado a cada save/delete neste
+# processo e, a cada DUPLICATE_INDEX_SYNC_SECONDS, com os chamados alterados por outros workers.
+
+DUPLICATE_SETTINGS = ('DUPLICATE_TICKETS', 'DUPLICATE_SIMILARITY', 'DUPLICATE_INDEX_SYNC_SECONDS')
+
+OPEN_STATUSES = ('OPEN', 'IN_PROGRESS')
+
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+# Descrições com menos termos que isso não são comparadas (ex: "Socorro!")
+MIN_TERMS = 2
+# Termos com os valores das permutações em cache (o cache é esvaziado ao encher)
+MAX_CACHED_TERMS = 50000
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# Valores de 30 bits: inteiros de um único dígito interno do CPython, mais rápidos de comparar
+_HASH_MASK = (1 << 30) - 1
+_WORD = re.compile(r"\w+")
+
+# Campos fixos da descrição montada por handle_abrir_chamado (iguais em todos os chamados)
+_FORM_FIELDS = re.compile(r"^(Tipo|Categoria|Contato|Localização):.*$", re.MULTILINE)
+_FORM_LABELS = re.compile(r"^(Título:|Descrição do Usuário:)", re.MULTILINE)
+
+STOPWORDS = frozenset("""
+a o as os um uma uns umas de do da dos das em no na nos nas ao aos para pra por pelo pela com
+e ou que se eu me meu minha meus minhas nosso nossa ele ela isso esse essa este esta estou
+ja foi tem ter ser sao era mas como quando onde porque muito mais bom dia tarde noite ola
+""".split())
+
+
+def duplicate_text(description):
+    """Parte da descrição usada na comparação (sem os campos fixos do formulário do webhook)."""
+    text = description or ''
+    if 'Descrição do Usuário:' in text:
+        text = _FORM_LABELS.sub('', _FORM_FIELDS.sub('', text))
+    return text
+
+
+def terms(description):
+    """
+    Termos comparados: palavras normalizadas (minúsculas, sem acentos), sem stopwords.
+
+    Returns:
+        frozenset: Termos distintos da descrição.
+    """
+    decomposed = unicodedata.normalize('NFKD', duplicate_text(description).casefold())
+    without_accents = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return frozenset(word for word in _WORD.findall(without_accents) if word not in STOPWORDS)
+
+
+def jaccard(first, second):
+    union = len(first | second)
+    return len(first & second) / union if union else 0.0
+
+
+class MinHashLSH:
+    """Índice LSH de assinaturas MinHash sobre conjuntos de termos, com remoção por chave."""
+
+    def __init__(self, num_permutations=NUM_PERMUTATIONS, bands=LSH_BANDS, seed=1):
+        if num_permutations % bands:
+            raise ValueError("num_permutations deve ser múltiplo de bands")
+        rng = random.Random(seed)
+        self.permutations = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                             for _ in range(num_permutations)]
+        self.bands = bands
+        self.rows = num_permutations // bands
+        self.buckets = {}
+        self.entries = {}
+        self._term_cache = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _term_hashes(self, term):
+        """Valor do termo em cada permutação (em cache: o vocabulário dos chamados se repete)."""
+        hashes = self._term_cache.get(term)
+        if hashes is None:
+            value = zlib.crc32(term.encode('utf-8'))
+            hashes = tuple((a * value + b) % _MERSENNE_PRIME & _HASH_MASK for a, b in self.permutations)
+            if len(self._term_cache) >= MAX_CACHED_TERMS:
+                self._term_cache.clear()
+            self._term_cache[term] = hashes
+        return hashes
+
+    def band_keys(self, term_set):
+        """Chaves das faixas da assinatura MinHash (uma por faixa)."""
+        # Mínimo de cada permutação sobre os termos, coluna a coluna
+        signature = list(map(min, zip(*[self._term_hashes(term) for term in term_set])))
+        return [(band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+                for band in range(self.bands)]
+
+    def add(self, key, term_set):
+        self.remove(key)
+        band_keys = self.band_keys(term_set)
+        self.entries[key] = (term_set, band_keys)
+        for band_key in band_keys:
+            self.buckets.setdefault(band_key, set()).add(key)
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for band_key in entry[1]:
+            bucket = self.buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[band_key]
+
+    def query(self, term_set, threshold):
+        """
+        Returns:
+            list: (similaridade de Jaccard, chave) dos itens acima do limiar; a maior similaridade
+            primeiro e, no empate, a menor chave (o chamado mais antigo).
+        """
+        candidates = set()
+        for band_key in self.band_keys(term_set):
+            candidates.update(self.buckets.get(band_key, ()))
+        matches = []
+        for key in candidates:
+            similarity = jaccard(term_set, self.entries[key][0])
+            if similarity >= threshold:
+                matches.append((similarity, key))
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return matches
+
+
+class DuplicateDetector:
+    """
+    Índice de chamados em aberto do processo e confirmação dos repetidos no banco.
+
+    Os chamados já vinculados como repetidos ficam fora do índice: um novo repetido é ligado
+    ao original, e não a outra cópia.
+    """
+
+    def __init__(self, threshold=0.6, sync_interval=5, clock=time.monotonic):
+        self.threshold = threshold
+        self.sync_interval = sync_interval
+        self.clock = clock
+        self.index = MinHashLSH()
+        self._built = False
+        self._synced_at = None
+        self._watermark = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            threshold=getattr(settings, 'DUPLICATE_SIMILARITY', 0.6),
+            sync_interval=getattr(settings, 'DUPLICATE_INDEX_SYNC_SECONDS', 5),
+        )
+
+    def _index_ticket(self, ticket_id, description, status):
+        ticket_terms = terms(description)
+        if status in OPEN_STATUSES and len(ticket_terms) >= MIN_TERMS:
+            self.index.add(ticket_id, ticket_terms)
+        else:
+            self.index.remove(ticket_id)
+
+    def refresh(self, force=False):
+        """Monta o índice (primeiro uso) ou aplica os chamados alterados desde a última leitura."""
+        now = self.clock()
+        with self._lock:
+            if self._built and not force and now - self._synced_at < self.sync_interval:
+                return
+            # Marca d'água lida antes da consulta: nada salvo durante a leitura fica de fora
+            watermark = timezone.now()
+            tickets = Ticket.objects.filter(duplicate_link__isnull=True)
+            if self._built:
+                tickets = tickets.filter(updated_at__gte=self._watermark)
+            else:
+                tickets = tickets.filter(status__in=OPEN_STATUSES)
+            for ticket_id, description, status in tickets.order_by().values_list('id', 'description', 'status'):
+                self._index_ticket(ticket_id, description, status)
+            if not self._built:
+                logger.info("Índice de chamados repetidos montado: %d chamados em aberto.", len(self.index))
+            self._built = True
+            self._synced_at = now
+            self._watermark = watermark
+
+    def update(self, ticket):
+        """Atualiza o índice após um save neste processo (nada a fazer se ainda não foi montado)."""
+        with self._lock:
+            if self._built:
+                self._index_ticket(ticket.id, ticket.description, ticket.status)
+
+    def remove(self, ticket_id):
+        with self._lock:
+            self.index.remove(ticket_id)
+
+    def find(self, description):
+        """
+        Procura um chamado em aberto com a mesma descrição (acima do limiar de similaridade).
+
+        Sem candidatos no índice, não consulta o banco. Os candidatos são relidos do banco em uma
+        consulta, pois o índice pode ter entradas antigas de outros workers.
+
+        Args:
+            description (str): Descrição do novo chamado.
+
+        Returns:
+            tuple: (Ticket original, similaridade) ou (None, 0.0).
+        """
+        query_terms = terms(description)
+        if len(query_terms) < MIN_TERMS:
+            return None, 0.0
+        self.refresh()
+        with self._lock:
+            matches = self.index.query(query_terms, self.threshold)
+        if not matches:
+            return None, 0.0
+
+        tickets = Ticket.objects.filter(
+            id__in=[ticket_id for _, ticket_id in matches], status__in=OPEN_STATUSES).order_by().in_bulk()
+        for _, ticket_id in matches:
+            ticket = tickets.get(ticket_id)
+            if ticket is None:
+                self.remove(ticket_id)
+                continue
+            similarity = jaccard(query_terms, terms(ticket.description))
+            if similarity >= self.threshold:
+                return ticket, similarity
+            self.update(ticket)
+        return None, 0.0
+
+
+@lru_cache(maxsize=1)
+def get_duplicate_detector():
+    """Detector compartilhado pelo processo (o índice é montado no primeiro find())."""
+    return DuplicateDetector.from_settings()
+
+
+def duplicate_mode():
+    """'link' (padrão: cria e vincula ao original), 'merge' (anexa ao original) ou 'off'."""
+    return getattr(settings, 'DUPLICATE_TICKETS', 'link')
+
+
+def find_duplicate(description):
+    """
+    Returns:
+        tuple: (Ticket original, similaridade) ou (None, 0.0); sempre (None, 0.0) com 'off'.
+    """
+    if duplicate_mode() == 'off':
+        return None, 0.0
+    return get_duplicate_detector().find(description)
+
+
+def link_duplicate(ticket, original, similarity):
+    """Registra o novo chamado como repetição do original e o tira do índice."""
+    TicketDuplicate.objects.create(ticket=ticket, original=original, similarity=round(similarity, 4))
+    get_duplicate_detector().remove(ticket.id)
+    observe_duplicate('link')
+    logger.info("Ticket #%s vinculado ao ticket #%s (similaridade %.2f).", ticket.id, original.id, similarity)
+
+
+def merge_duplicate(original, description, priority=None):
+    """
+    Anexa a descrição repetida ao chamado original, sem criar outro.
+    Se a nova prioridade for mais alta, o original é elevado a ela.
+
+    O original é relido com select_for_update dentro da transação: duas repetições simultâneas
+    (ou uma edição no painel) partiriam da mesma descrição em memória e a última gravação
+    apagaria a outra. `original` é atualizado com o que foi salvo.
+    """
+    with transaction.atomic():
+        ticket = Ticket.objects.select_for_update().get(pk=original.pk)
+        ticket.description = (
+            f"{ticket.description}\n\n"
+            f"--- Chamado repetido em {timezone.localtime():%d/%m/%Y %H:%M} ---\n{description}")
+        levels = [code for code, _ in Ticket.PRIORITY_CHOICES]
+        if priority in levels and levels.index(priority) > levels.index(ticket.priority):
+            ticket.priority = priority
+        ticket.save(update_fields=['description', 'priority', 'updated_at'])
+    original.description, original.priority = ticket.description, ticket.priority
+    original.updated_at = ticket.updated_at
+    observe_duplicate('merge')
+    logger.info("Chamado repetido anexado ao ticket #%s.", original.id)
+
+
+@receiver(post_save, sender=Ticket)
+def index_saved_ticket(sender, instance, **kwargs):
+    get_duplicate_detector().update(instance)
+
+
+@receiver(post_delete, sender=Ticket)
+def unindex_deleted_ticket(sender, instance, **kwargs):
+    get_duplicate_detector().remove(instance.id)
+
+
+@receiver(setting_changed)
+def reset_duplicate_detector(setting, **kwargs):
+    """Recria o detector quando os testes alteram os settings (override_settings)."""
+    if setting in DUPLICATE_SETTINGS:
+        get_duplicate_detector.cache_clear()
@@ -0,0 +1,128 @@
+import logging
+from functools import lru_cache
+from django.conf import settings
+from core.models import Ticket
+
+# Índice de sinônimos compartilhado com o dialogflow_automation (biblioteca padrão apenas)
+try:
+    from dialogflow_automation.core.entity_index import EntityIndex, normalize_text
+except ImportError:
+    EntityIndex = None
+    normalize_text = None
+
+# Triagem de prioridade pelo texto do chamado (NumPy opcional, usado só na reclassificação em lote)
+try:
+    from dialogflow_automation.core.triage import TriageModel
+except ImportError:
+    TriageModel = None
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_entity_index():
+    """
+    Compila (uma única vez por processo) o índice de sinônimos das entidades do intents.json.
+
+    Returns:
+        EntityIndex ou None se o módulo/configuração não estiverem disponíveis.
+    """
+    if EntityIndex is None:
+        logger.warning(
+            "dialogflow_automation não encontrado. Sinônimos de entidades não serão resolvidos localmente.")
+        return None
+
+    config_path = getattr(settings, 'DIALOGFLOW_CONFIG_PATH', None)
+    try:
+        index = EntityIndex.from_config(config_path)
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(
+            f"Não foi possível compilar o índice de entidades a partir de {config_path}: {e}")
+        return None
+
+    logger.info(
+        f"Índice de entidades carregado: {len(index.entity_types)} tipos.")
+    return index
+
+
+def resolve_entity(entity_type, raw_value, default=None):
+    """
+    Resolve um valor bruto (ex: 'urgente') para o valor canônico da entidade (ex: 'Crítica').
+    Sem índice disponível, retorna o próprio valor bruto (ou default se vazio).
+    """
+    index = get_entity_index()
+    if index is None:
+        return raw_value or default
+    return index.resolve(entity_type, raw_value, default=default)
+
+
+@lru_cache(maxsize=1)
+def _priority_codes_by_label():
+    """Mapeia os rótulos de Ticket.PRIORITY_CHOICES (valores canônicos da entidade) para os códigos."""
+    if normalize_text is None:
+        return {label: code for code, label in Ticket.PRIORITY_CHOICES}
+    return {normalize_text(label): code for code, label in Ticket.PRIORITY_CHOICES}
+
+
+def resolve_priority(raw_value, default='MEDIUM'):
+    """
+    Converte a prioridade informada pelo usuário no código do modelo Ticket.
+
+    Args:
+        raw_value (str): Valor recebido do Dialogflow (ex: 'Parou a empresa').
+        default (str): Código usado se a prioridade não for reconhecida.
+
+    Returns:
+        str: 'LOW', 'MEDIUM', 'HIGH' ou 'CRITICAL'.
+    """
+    canonical = resolve_entity('TicketPriority', raw_value)
+    if not isinstance(canonical, str):
+        return default
+    key = normalize_text(canonical) if normalize_text else canonical
+    return _priority_codes_by_label().get(key, default)
+
+
+@lru_cache(maxsize=1)
+def get_triage_model():
+    """
+    Compila (uma única vez por processo) o modelo de triagem: palavras-chave do
+    TRIAGE_KEYWORDS_PATH e sinônimos de TicketPriority do intents.json.
+
+    Returns:
+        TriageModel ou None se o módulo/configuração não estiverem disponíveis.
+    """
+    if TriageModel is None:
+        logger.warning(
+            "dialogflow_automation não encontrado. A prioridade dos chamados não será triada pelo texto.")
+        return None
+
+    config_path = getattr(settings, 'DIALOGFLOW_CONFIG_PATH', None)
+    keywords_path = getattr(settings, 'TRIAGE_KEYWORDS_PATH', None)
+    try:
+        model = TriageModel.from_files(config_path, keywords_path)
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"Não foi possível compilar o modelo de triagem: {e}")
+        return None
+
+    logger.info(f"Modelo de triagem carregado: {len(model.phrases)} frases.")
+    return model
+
+
+def triage_priority(text, raw_priority=None):
+    """
+    Prioridade do chamado a partir do texto (título e descrição) e da prioridade informada.
+
+    A descrição pode elevar ou rebaixar a prioridade escolhida pelo usuário. Sem o modelo,
+    vale apenas a prioridade informada (resolve_priority).
+
+    Args:
+        text (str): Título e descrição do chamado.
+        raw_priority (str): Valor recebido do Dialogflow (ex: 'Urgente').
+
+    Returns:
+        str: 'LOW', 'MEDIUM', 'HIGH' ou 'CRITICAL'.
+    """
+    model = get_triage_model()
+    if model is None:
+        return resolve_priority(raw_priority)
+    return model.classify(text, raw_priority)
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.archive import archivable_tickets, archive_batch, archive_cutoff, export_archived
+
+
+class Command(BaseCommand):
+    help = 'Move os chamados encerrados antigos para o arquivo em lotes (simulação por padrão)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--apply', action='store_true',
+            help='Arquiva os chamados (sem esta opção, apenas mostra quantos seriam arquivados)')
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'TICKET_ARCHIVE_DAYS', 90),
+            help='Arquiva os chamados resolvidos/fechados sem alteração há mais de N dias')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Chamados movidos por transação')
+        parser.add_argument(
+            '--export-dir', default=getattr(settings, 'TICKET_ARCHIVE_EXPORT_DIR', None),
+            help='Também grava os chamados arquivados em JSON Lines (gzip), um arquivo por mês')
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['days'])
+        if not options['apply']:
+            total = archivable_tickets(cutoff).count()
+            self.stdout.write(self.style.SUCCESS(
+                f'{total} chamados seriam arquivados (use --apply para arquivar).'))
+            return
+
+        total = 0
+        exported = {}
+        while True:
+            archived = archive_batch(cutoff, options['batch_size'])
+            if not archived:
+                break
+            total += len(archived)
+            if options['export_dir']:
+                for path, count in export_archived(archived, options['export_dir']).items():
+                    exported[path] = exported.get(path, 0) + count
+
+        for path, count in sorted(exported.items()):
+            self.stdout.write(f'  {path}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'{total} chamados arquivados.'))
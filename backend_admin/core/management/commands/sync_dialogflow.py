@@ -1,6 +1,5 @@
 import os
 import sys
-import json
 from pathlib import Path
 from django.core.management.base import BaseCommand
 from django.conf import settings
@@ -11,13 +10,19 @@ try:
 except ImportError:
     DialogflowClient = None
 
+# O loader de configuração não depende das bibliotecas do Google Cloud
+try:
+    from dialogflow_automation.core.parser import ConfigParser
+except ImportError:
+    ConfigParser = None
+
 
 class Command(BaseCommand):
     help = 'Sincroniza intenções e entidades com o Dialogflow a partir do arquivo JSON'
 
     def handle(self, *args, **options):
         # Verifica se o módulo foi importado corretamente
-        if DialogflowClient is None:
+        if DialogflowClient is None or ConfigParser is None:
             self.stdout.write(self.style.ERROR(
                 'Módulo dialogflow_automation não encontrado ou dependências ausentes.\n'
                 'Certifique-se de que o pacote google-cloud-dialogflow está instalado.'
@@ -60,37 +65,35 @@ class Command(BaseCommand):
 
             self.stdout.write(f'Lendo configuração de: {config_path}')
 
-            with open(config_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # Loader unificado do dialogflow_automation: lê e valida um registro por vez
+            config_parser = ConfigParser(str(config_path.parent))
 
             # 1. Sincronizar Entidades
-            entities_data = data.get('entities', [])
-            if entities_data:
+            entity_count = 0
+            for ent in config_parser.iter_entities(config_path.name):
                 self.stdout.write(
-                    f'Encontradas {len(entities_data)} entidades para sincronizar.')
-                for ent in entities_data:
-                    self.stdout.write(
-                        f'  - Sincronizando entidade: {ent["display_name"]}')
-                    client.create_entity_type(
-                        display_name=ent['display_name'],
-                        kind=ent['kind'],
-                        entities=ent['entities']
-                    )
+                    f'  - Sincronizando entidade: {ent["display_name"]}')
+                client.create_entity_type(
+                    display_name=ent['display_name'],
+                    kind=ent['kind'],
+                    entities=ent['entities']
+                )
+                entity_count += 1
+            self.stdout.write(f'{entity_count} entidades sincronizadas.')
 
             # 2. Sincronizar Intenções
-            intents_data = data.get('intents', [])
-            if intents_data:
+            intent_count = 0
+            for intent_data in config_parser.iter_intents(config_path.name):
                 self.stdout.write(
-                    f'Encontradas {len(intents_data)} intenções para sincronizar.')
-                for intent_data in intents_data:
-                    self.stdout.write(
-                        f'  - Sincronizando intenção: {intent_data["display_name"]}')
-                    client.create_intent(
-                        display_name=intent_data['display_name'],
-                        training_phrases_parts=intent_data['training_phrases'],
-                        message_texts=intent_data['messages'],
-                        parameters=intent_data.get('parameters', [])
-                    )
+                    f'  - Sincronizando intenção: {intent_data["display_name"]}')
+                client.create_intent(
+                    display_name=intent_data['display_name'],
+                    training_phrases_parts=intent_data['training_phrases'],
+                    message_texts=intent_data['messages'],
+                    parameters=intent_data.get('parameters', [])
+                )
+                intent_count += 1
+            self.stdout.write(f'{intent_count} intenções sincronizadas.')
 
             self.stdout.write(self.style.SUCCESS(
                 'Sincronização concluída com sucesso!'))
@@ -0,0 +1,69 @@
+from collections import Counter
+from django.core.management.base import BaseCommand
+from core.entities import get_triage_model
+from core.models import Ticket
+
+
+class Command(BaseCommand):
+    help = 'Reclassifica a prioridade dos chamados em aberto com a triagem local (simulação por padrão)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--apply', action='store_true',
+            help='Grava as novas prioridades (sem esta opção, apenas mostra o que mudaria)')
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Inclui chamados resolvidos e fechados')
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Chamados classificados e gravados por lote')
+
+    def handle(self, *args, **options):
+        model = get_triage_model()
+        if model is None:
+            self.stdout.write(self.style.ERROR(
+                'Modelo de triagem indisponível (dialogflow_automation ou configuração ausente).'))
+            return
+
+        tickets = Ticket.objects.only('id', 'description', 'priority').order_by('id')
+        if not options['all']:
+            tickets = tickets.filter(status__in=['OPEN', 'IN_PROGRESS'])
+
+        labels = dict(Ticket.PRIORITY_CHOICES)
+        batch_size = options['batch_size']
+        total = 0
+        transitions = Counter()
+        batch = []
+        for ticket in tickets.iterator(chunk_size=batch_size):
+            batch.append(ticket)
+            if len(batch) >= batch_size:
+                total += self.triage_batch(model, batch, labels, transitions, options['apply'])
+                batch = []
+        if batch:
+            total += self.triage_batch(model, batch, labels, transitions, options['apply'])
+
+        for (old, new), count in sorted(transitions.items()):
+            self.stdout.write(f'  {labels.get(old, old)} -> {labels[new]}: {count}')
+        changed = sum(transitions.values())
+        verb = 'alterados' if options['apply'] else 'seriam alterados (use --apply para gravar)'
+        self.stdout.write(self.style.SUCCESS(f'{total} chamados triados, {changed} {verb}.'))
+
+    def triage_batch(self, model, batch, labels, transitions, apply):
+        """
+        Classifica um lote de uma vez; a prioridade atual entra como a prioridade informada.
+
+        Returns:
+            int: Número de chamados do lote.
+        """
+        priorities = model.classify_batch(
+            [ticket.description for ticket in batch],
+            [labels.get(ticket.priority) for ticket in batch])
+        changed = []
+        for ticket, priority in zip(batch, priorities):
+            if priority != ticket.priority:
+                transitions[(ticket.priority, priority)] += 1
+                ticket.priority = priority
+                changed.append(ticket)
+        if apply and changed:
+            Ticket.objects.bulk_update(changed, ['priority'], batch_size=len(changed))
+        return len(batch)
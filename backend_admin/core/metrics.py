@@ -0,0 +1,173 @@
+import os
+import logging
+from django.db import DatabaseError
+from django.db.models import Min
+from django.utils import timezone
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from core.models import Ticket
+
+logger = logging.getLogger(__name__)
+
+# Métricas de desempenho do nexus_admin no formato do Prometheus.
+#
+# Com vários workers do gunicorn, cada processo tem sua própria memória: o prometheus_client
+# em modo multiprocesso grava os valores em arquivos mmap no diretório PROMETHEUS_MULTIPROC_DIR
+# (uma série por processo) e o endpoint /metrics soma todos eles na leitura.
+# A variável precisa estar definida antes da inicialização dos workers (ver gunicorn.conf.py).
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# Buckets de latência (segundos) de 5ms até o timeout do Dialogflow (5s) e além
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+# Buckets de consultas SQL por requisição: valores altos indicam N+1
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, float("inf"))
+
+REQUEST_DURATION = Histogram(
+    "nexus_http_request_duration_seconds",
+    "Duração das requisições HTTP por view",
+    ["view", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    "nexus_db_queries_per_request",
+    "Número de consultas SQL executadas por requisição",
+    ["view"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_DURATION = Histogram(
+    "nexus_db_query_duration_seconds",
+    "Tempo total gasto em SQL por requisição",
+    ["view"],
+    buckets=LATENCY_BUCKETS,
+)
+SHED_REQUESTS = Counter(
+    "nexus_requests_shed",
+    "Requisições de webhook descartadas por rate limit ou falta de capacidade",
+    ["view", "reason"],
+)
+WEBHOOK_AUTH_FAILURES = Counter(
+    "nexus_webhook_auth_failures",
+    "Requisições ao webhook do Dialogflow rejeitadas por token ausente ou inválido",
+    ["reason"],
+)
+DUPLICATE_TICKETS = Counter(
+    "nexus_duplicate_tickets",
+    "Chamados repetidos detectados na criação, por ação (vinculado ou anexado ao original)",
+    ["action"],
+)
+
+# Status que contam como fila de atendimento pendente
+BACKLOG_STATUSES = ("OPEN", "IN_PROGRESS")
+
+
+class TicketBacklogCollector:
+    """
+    Coletor calculado no momento da leitura do /metrics (não depende de qual worker atendeu).
+    Usa duas consultas agregadas, independentemente do número de tickets.
+    """
+
+    def collect(self):
+        # Falha do banco não pode derrubar a leitura dos histogramas
+        try:
+            yield from self._collect()
+        except DatabaseError as e:
+            logger.warning(f"Não foi possível calcular as métricas da fila de tickets: {e}")
+
+    def _collect(self):
+        tickets = GaugeMetricFamily(
+            "nexus_tickets",
+            "Quantidade de tickets por status e prioridade",
+            labels=["status", "priority"],
+        )
+        # Inclui os arquivados: o arquivamento não altera os totais
+        for (status, priority), total in sorted(Ticket.objects.totals_by_status_and_priority().items()):
+            tickets.add_metric([status, priority], total)
+        yield tickets
+
+        oldest = (Ticket.objects.filter(status__in=BACKLOG_STATUSES)
+                  .aggregate(oldest=Min("created_at"))["oldest"])
+        age = (timezone.now() - oldest).total_seconds() if oldest else 0
+        yield GaugeMetricFamily(
+            "nexus_ticket_backlog_oldest_age_seconds",
+            "Idade do ticket pendente (aberto ou em andamento) mais antigo",
+            value=age,
+        )
+
+
+# Registro separado para o coletor do banco: em modo multiprocesso ele não passa pelos arquivos mmap
+_backlog_registry = CollectorRegistry(auto_describe=False)
+_backlog_registry.register(TicketBacklogCollector())
+
+
+def observe_request(view, method, status, duration, query_count, query_duration):
+    """
+    Registra as medições de uma requisição.
+
+    Args:
+        view (str): Rótulo da view (ex: 'TicketViewSet.list').
+        method (str): Método HTTP.
+        status (int): Código de status da resposta.
+        duration (float): Duração total em segundos.
+        query_count (int): Consultas SQL executadas.
+        query_duration (float): Tempo total em SQL, em segundos.
+    """
+    REQUEST_DURATION.labels(view, method, str(status)).observe(duration)
+    DB_QUERIES.labels(view).observe(query_count)
+    DB_DURATION.labels(view).observe(query_duration)
+
+
+def observe_shed(view, reason):
+    """
+    Registra uma requisição descartada pelo LoadSheddingMiddleware.
+
+    Args:
+        view (str): Rótulo da view (ex: 'DialogflowFulfillmentView').
+        reason (str): 'global', 'token', 'session' (bucket sem fichas) ou 'concurrency'.
+    """
+    SHED_REQUESTS.labels(view, reason).inc()
+
+
+def observe_auth_failure(reason):
+    """
+    Registra uma requisição rejeitada pela autenticação do webhook.
+
+    Args:
+        reason (str): 'missing' (sem token) ou 'invalid' (token fora do conjunto ativo).
+    """
+    WEBHOOK_AUTH_FAILURES.labels(reason).inc()
+
+
+def observe_duplicate(action):
+    """
+    Registra um chamado repetido detectado na criação.
+
+    Args:
+        action (str): 'link' (criado e vinculado ao original) ou 'merge' (anexado ao original).
+    """
+    DUPLICATE_TICKETS.labels(action).inc()
+
+
+def render_metrics():
+    """
+    Gera o texto de exposição com as métricas de todos os workers e os gauges da fila.
+
+    Returns:
+        tuple: (conteúdo em bytes, content type).
+    """
+    if MULTIPROC_DIR:
+        # Registro novo a cada leitura, agregando os arquivos de todos os processos
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    output = generate_latest(registry) + generate_latest(_backlog_registry)
+    return output, CONTENT_TYPE_LATEST
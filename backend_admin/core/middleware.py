@@ -0,0 +1,247 @@
+import json
+import logging
+import time
+import hashlib
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+from core.metrics import observe_request, observe_shed
+from core.ratelimit import Bucket, ConcurrencyLimiter, build_token_buckets
+from core.webhook_auth import get_webhook_auth, token_from_request
+
+logger = logging.getLogger(__name__)
+
+# Rótulo usado quando a URL não corresponde a nenhuma view (ex: 404)
+UNMATCHED_VIEW = "unmatched"
+
+
+class QueryCounter:
+    """
+    Wrapper de execução do banco (connection.execute_wrapper) que conta as consultas
+    e soma o tempo gasto, sem depender de DEBUG=True.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def get_view_label(request):
+    """
+    Retorna um rótulo de baixa cardinalidade para a view que atendeu a requisição.
+
+    ViewSets incluem a ação (ex: 'TicketViewSet.list', 'TicketViewSet.retrieve');
+    APIViews usam o nome da classe (ex: 'DialogflowFulfillmentView').
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNMATCHED_VIEW
+
+    func = match.func
+    view_class = getattr(func, "cls", None) or getattr(func, "view_class", None)
+    if view_class is None:
+        return f"{func.__module__}.{func.__name__}"
+
+    actions = getattr(func, "actions", None)
+    action = actions.get(request.method.lower()) if actions else None
+    return f"{view_class.__name__}.{action}" if action else view_class.__name__
+
+
+class RequestMetricsMiddleware:
+    """
+    Mede a duração, o número de consultas SQL e o tempo em SQL de cada requisição,
+    por view, e publica nos histogramas de core/metrics.py.
+
+    Deve ser o primeiro middleware da lista para medir a cadeia completa.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Requisições acima deste limite são registradas no log (0 desativa)
+        self.slow_request_seconds = getattr(
+            settings, "METRICS_SLOW_REQUEST_SECONDS", 1.0)
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        view = get_view_label(request)
+        observe_request(view, request.method, response.status_code,
+                        duration, counter.count, counter.duration)
+
+        if self.slow_request_seconds and duration >= self.slow_request_seconds:
+            logger.warning(
+                "Requisição lenta: %s %s (%s) %.3fs, %d consultas SQL em %.3fs",
+                request.method, request.path, view, duration, counter.count, counter.duration)
+        return response
+
+
+def parse_rate(value):
+    """Converte 'fichas_por_segundo/rajada' (ex: '20/40') em (20.0, 40.0)."""
+    rate, _, burst = str(value).partition('/')
+    return float(rate), float(burst or rate)
+
+
+def hashed(value):
+    """Chave curta para tokens e sessões (o valor original não vai para o Redis)."""
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()[:16]
+
+
+def client_ip(request, trusted_proxies=0):
+    """
+    IP do cliente. Atrás de `trusted_proxies` proxies que acrescentam o endereço de quem os chamou
+    ao X-Forwarded-For (nginx, balanceador do Cloud Run), o cliente é o n-ésimo endereço a partir
+    do fim; os anteriores vêm do próprio cliente e não são confiáveis.
+    """
+    if trusted_proxies:
+        forwarded = [addr.strip() for addr in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+                     if addr.strip()]
+        if forwarded:
+            return forwarded[-min(trusted_proxies, len(forwarded))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class LoadSheddingMiddleware:
+    """
+    Rate limit e load shedding das rotas de webhook (WEBHOOK_PATH_PREFIXES: fulfillment do
+    Dialogflow e chat do site).
+
+    - Token buckets (Redis, compartilhados entre workers; sem Redis, por worker):
+      - um global por rota: uma enxurrada no chat público não consome as fichas do fulfillment;
+      - no fulfillment, um único bucket para tokens inválidos (tokens aleatórios não criam um
+        bucket cada) e um por sessão do Dialogflow, lida do corpo só com token válido;
+      - no chat, um por IP do cliente e um por cookie de sessão (se houver). O corpo do chat não
+        é usado como chave: um "session" aleatório a cada requisição escaparia do limite.
+    - No máximo WEBHOOK_MAX_IN_FLIGHT requisições simultâneas por rota de webhook e por processo,
+      com vagas separadas por rota (o chat não ocupa as vagas do fulfillment): as demais threads
+      do gunicorn ficam reservadas ao painel (/api/tickets/, login), que não é limitado.
+
+    O resultado da verificação do token fica em `request.webhook_token_valid`, para que a view
+    não precise verificá-lo de novo.
+
+    Requisições descartadas recebem na hora uma resposta degradada, em vez de esperar na fila:
+    o Dialogflow recebe um fulfillmentText (HTTP 200) e o chat recebe HTTP 429 com 'reply'.
+
+    Deve vir depois do CorsMiddleware: os preflights (OPTIONS) são respondidos por ele sem
+    consumir fichas, e o 429 do chat recebe os headers CORS (sem eles, o navegador esconde a
+    resposta do front-end).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'RATE_LIMIT_ENABLED', True)
+        self.prefixes = tuple(getattr(settings, 'WEBHOOK_PATH_PREFIXES', ()))
+        self.limits = {
+            'global': parse_rate(getattr(settings, 'RATE_LIMIT_GLOBAL', '40/80')),
+            'token': parse_rate(getattr(settings, 'RATE_LIMIT_INVALID_TOKEN', '1/10')),
+            'session': parse_rate(getattr(settings, 'RATE_LIMIT_PER_SESSION', '0.5/5')),
+            'client': parse_rate(getattr(settings, 'RATE_LIMIT_PER_CLIENT', '2/20')),
+        }
+        self.trusted_proxies = getattr(settings, 'RATE_LIMIT_TRUSTED_PROXIES', 0)
+        limit = getattr(settings, 'WEBHOOK_MAX_IN_FLIGHT', 1)
+        self.concurrency = {prefix: ConcurrencyLimiter(limit) for prefix in self.prefixes}
+        self.message = getattr(settings, 'LOAD_SHED_MESSAGE', 'Estamos com alto volume de atendimentos.')
+        # Criado na primeira requisição (dentro do worker, depois do fork do gunicorn)
+        self.buckets = None
+
+    def __call__(self, request):
+        if not self.enabled or request.method == 'OPTIONS' or not request.path.startswith(self.prefixes):
+            return self.get_response(request)
+
+        prefix = next(p for p in self.prefixes if request.path.startswith(p))
+        reason = self.check_rate(request, prefix)
+        if reason is None:
+            concurrency = self.concurrency[prefix]
+            if concurrency.try_acquire():
+                try:
+                    return self.get_response(request)
+                finally:
+                    concurrency.release()
+            reason = 'concurrency'
+        return self.shed(request, reason)
+
+    def request_buckets(self, request, prefix):
+        """Buckets aplicáveis: o global da rota e os do fulfillment ou do chat."""
+        buckets = [Bucket(f"webhook:global:{prefix}", *self.limits['global'])]
+        if self.is_fulfillment(request):
+            buckets.extend(self.fulfillment_buckets(request))
+        else:
+            buckets.append(Bucket(f"webhook:client:{hashed(client_ip(request, self.trusted_proxies))}",
+                                  *self.limits['client']))
+            session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+            if session:
+                buckets.append(Bucket(f"webhook:session:{hashed(session)}", *self.limits['session']))
+        return buckets
+
+    def fulfillment_buckets(self, request):
+        """
+        O token válido é um só (o configurado no Dialogflow), então não tem bucket próprio: ele
+        seria só um segundo limite global, mais apertado. Requisições sem token ou com token
+        inválido dividem um bucket pequeno e não chegam a ler o corpo.
+        """
+        token = token_from_request(request)
+        request.webhook_token_valid = bool(token) and get_webhook_auth().verify(token)
+        if not request.webhook_token_valid:
+            return [Bucket('webhook:token:invalid', *self.limits['token'])]
+        session = self.dialogflow_session(request)
+        return [Bucket(f"webhook:session:{hashed(session)}", *self.limits['session'])] if session else []
+
+    def dialogflow_session(self, request):
+        """Sessão do Dialogflow informada no corpo do webhook."""
+        if request.content_type != 'application/json' or not request.body:
+            return None
+        try:
+            body = json.loads(request.body)
+        except ValueError:
+            return None
+        if isinstance(body, dict) and isinstance(body.get('session'), str):
+            return body['session']
+        return None
+
+    def is_fulfillment(self, request):
+        """Rota do fulfillment do Dialogflow (a resolução fica em request.resolver_match)."""
+        if getattr(request, 'resolver_match', None) is None:
+            try:
+                request.resolver_match = resolve(request.path_info)
+            except Resolver404:
+                return False
+        return request.resolver_match.url_name == 'dialogflow_fulfillment'
+
+    def check_rate(self, request, prefix):
+        """
+        Returns:
+            str ou None: Nome do bucket sem fichas ('global', 'token', 'session' ou 'client'),
+            ou None.
+        """
+        if self.buckets is None:
+            self.buckets = build_token_buckets()
+        denied = self.buckets.acquire(self.request_buckets(request, prefix))
+        if denied is None:
+            return None
+        return denied.key.split(':')[1]
+
+    def shed(self, request, reason):
+        # O RequestMetricsMiddleware rotula o descarte com a view de destino (request.resolver_match)
+        fulfillment = self.is_fulfillment(request)
+        view = get_view_label(request)
+        observe_shed(view, reason)
+        logger.warning("Requisição descartada (%s): %s %s", reason, request.method, request.path)
+
+        if fulfillment:
+            # O Dialogflow exibe o fulfillmentText; um erro HTTP viraria a resposta padrão do agente
+            return JsonResponse({'fulfillmentText': self.message})
+        response = JsonResponse({'reply': self.message}, status=429)
+        response['Retry-After'] = '1'
+        return response
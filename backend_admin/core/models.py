@@ -1,4 +1,49 @@
+from collections import Counter
 from django.db import models
+from django.db.models import Count, Value
+
+# Campos comuns a Ticket e ArchivedTicket, na ordem das colunas (a união das duas tabelas
+# depende dela)
+TICKET_FIELDS = ('id', 'customer_name', 'company', 'description', 'status', 'priority',
+                 'created_at', 'updated_at')
+
+
+class TicketQuerySet(models.QuerySet):
+    """
+    Consultas de Ticket que também enxergam os chamados arquivados (ArchivedTicket).
+    A tabela ativa continua sendo a consulta padrão: o arquivo só entra quando pedido.
+    """
+
+    def with_archive(self, *args, **kwargs):
+        """
+        Chamados ativos e arquivados que atendem aos filtros, em uma consulta (UNION ALL).
+
+        Os filtros são aplicados às duas tabelas antes da união (depois dela o Django só
+        permite order_by, fatias e count). Os arquivados voltam como instâncias de Ticket com
+        `archived=True` e são somente leitura: salvá-las recriaria o chamado na tabela ativa.
+
+        Returns:
+            QuerySet: Chamados ordenados pelos mais recentes.
+        """
+        hot = self.filter(*args, **kwargs).only(*TICKET_FIELDS).annotate(archived=Value(False))
+        archived = (ArchivedTicket.objects.filter(*args, **kwargs).only(*TICKET_FIELDS)
+                    .annotate(archived=Value(True)))
+        return hot.order_by().union(archived.order_by(), all=True).order_by('-created_at', '-id')
+
+    def totals_by_status_and_priority(self):
+        """
+        Quantidade de chamados (ativos e arquivados) por (status, prioridade), em uma consulta.
+
+        Returns:
+            Counter: {(status, prioridade): total}.
+        """
+        hot = self.order_by().values('status', 'priority').annotate(total=Count('id'))
+        archived = (ArchivedTicket.objects.order_by().values('status', 'priority')
+                    .annotate(total=Count('id')))
+        totals = Counter()
+        for row in hot.union(archived, all=True):
+            totals[(row['status'], row['priority'])] += row['total']
+        return totals
 
 
 class Ticket(models.Model):
@@ -69,6 +114,11 @@ class Ticket(models.Model):
         verbose_name="Última Atualização"
     )
 
+    objects = TicketQuerySet.as_manager()
+
+    # Chamados da tabela ativa; os lidos por with_archive() recebem o valor da consulta
+    archived = False
+
     def __str__(self):
         # Representação em string do objeto (ex: Ticket #123 - Cliente X)
         return f"Ticket #{self.id} - {self.customer_name}"
@@ -81,6 +131,63 @@ class Ticket(models.Model):
         ordering = ['-created_at']
 
 
+class TicketDuplicate(models.Model):
+    """
+    Vínculo de um chamado com o chamado aberto que ele repete (detectado por core.duplicates).
+    Fica em tabela própria para não alterar a tabela de tickets.
+    """
+    ticket = models.OneToOneField(
+        Ticket, on_delete=models.CASCADE, related_name='duplicate_link',
+        verbose_name="Chamado repetido")
+    original = models.ForeignKey(
+        Ticket, on_delete=models.CASCADE, related_name='duplicates',
+        verbose_name="Chamado original")
+    # Similaridade de Jaccard entre os termos das duas descrições (0 a 1)
+    similarity = models.FloatField(verbose_name="Similaridade")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Ticket #{self.ticket_id} repete #{self.original_id}"
+
+    class Meta:
+        verbose_name = "Chamado Repetido"
+        verbose_name_plural = "Chamados Repetidos"
+
+
+class ArchivedTicket(models.Model):
+    """
+    Chamado resolvido/fechado movido para o arquivo pelo comando archive_tickets.
+    Mantém o id e os campos de Ticket (na mesma ordem, ver TICKET_FIELDS), para que a
+    tabela ativa fique pequena sem que a leitura dos chamados antigos mude.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    customer_name = models.CharField(max_length=255, verbose_name="Nome do Cliente")
+    company = models.CharField(max_length=255, verbose_name="Empresa", blank=True, null=True)
+    description = models.TextField(verbose_name="Descrição do Problema")
+    status = models.CharField(max_length=20, choices=Ticket.STATUS_CHOICES, verbose_name="Status")
+    priority = models.CharField(
+        max_length=20, choices=Ticket.PRIORITY_CHOICES, verbose_name="Prioridade")
+    created_at = models.DateTimeField(verbose_name="Data de Abertura")
+    updated_at = models.DateTimeField(verbose_name="Última Atualização")
+    # Chamado original, se este foi vinculado como repetido (o vínculo sai com o chamado)
+    duplicate_of = models.BigIntegerField(null=True, blank=True, verbose_name="Repetição do chamado")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Data de Arquivamento")
+
+    archived = True
+
+    def __str__(self):
+        return f"Ticket #{self.id} - {self.customer_name} (arquivado)"
+
+    class Meta:
+        verbose_name = "Chamado Arquivado"
+        verbose_name_plural = "Chamados Arquivados"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['status', 'priority']),
+        ]
+
+
 class Budget(models.Model):
     """
     Modelo simplificado para Orçamentos gerados pelo bot.
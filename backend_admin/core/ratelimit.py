@@ -0,0 +1,133 @@
+import time
+import logging
+import threading
+from core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Token bucket: cada bucket recebe `rate` fichas por segundo até o limite `burst`, e cada
+# requisição consome uma ficha. Vários buckets (global, por token, por sessão) são avaliados
+# juntos: a requisição só passa se houver ficha em todos, e só então todos são debitados.
+#
+# No Redis, a verificação é um script Lua (atômico para todos os workers e instâncias).
+# Retorna 0 se a requisição foi aceita ou o índice (1..n) do primeiro bucket sem fichas.
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[1 + 2 * i])
+    local burst = tonumber(ARGV[2 + 2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    if tokens < cost then
+        return i
+    end
+    levels[i] = tokens
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[1 + 2 * i])
+    local burst = tonumber(ARGV[2 + 2 * i])
+    redis.call('HSET', key, 'tokens', levels[i] - cost, 'ts', now)
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return 0
+"""
+
+
+class Bucket:
+    """Limite de um bucket: chave, fichas por segundo e capacidade (rajada)."""
+
+    __slots__ = ('key', 'rate', 'burst')
+
+    def __init__(self, key, rate, burst):
+        self.key = key
+        self.rate = float(rate)
+        self.burst = float(burst)
+
+
+class LocalTokenBuckets:
+    """Buckets na memória do worker (sem Redis, ou quando o Redis falha)."""
+
+    def __init__(self, max_keys=50000, clock=time.time):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, buckets, cost=1.0):
+        """
+        Returns:
+            Bucket ou None: O primeiro bucket sem fichas (None se a requisição foi aceita).
+        """
+        now = self.clock()
+        with self._lock:
+            levels = []
+            for bucket in buckets:
+                tokens, ts = self._state.get(bucket.key, (bucket.burst, now))
+                tokens = min(bucket.burst, tokens + max(0.0, now - ts) * bucket.rate)
+                if tokens < cost:
+                    return bucket
+                levels.append(tokens)
+            if len(self._state) > self.max_keys:
+                # Buckets cheios podem ser descartados sem mudar o resultado
+                self._state = {key: (tokens, ts) for key, (tokens, ts) in self._state.items()
+                               if now - ts < 60}
+            for bucket, tokens in zip(buckets, levels):
+                self._state[bucket.key] = (tokens - cost, now)
+        return None
+
+
+class RedisTokenBuckets:
+    """Buckets no Redis, compartilhados por todos os workers. Se o Redis falhar, usa os locais."""
+
+    def __init__(self, client, prefix='nexus:ratelimit:', fallback=None, clock=time.time):
+        self.client = client
+        self.prefix = prefix
+        self.fallback = fallback or LocalTokenBuckets(clock=clock)
+        self.clock = clock
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def acquire(self, buckets, cost=1.0):
+        args = [self.clock(), cost]
+        for bucket in buckets:
+            args.extend((bucket.rate, bucket.burst))
+        try:
+            denied = int(self._script(keys=[self.prefix + bucket.key for bucket in buckets], args=args))
+        except Exception as e:
+            logger.warning("Redis indisponível no rate limit, usando buckets locais: %s", e)
+            return self.fallback.acquire(buckets, cost)
+        return buckets[denied - 1] if denied else None
+
+
+def build_token_buckets():
+    """Redis quando REDIS_URL estiver configurado; senão, buckets locais do worker."""
+    client = get_redis()
+    if client is None:
+        return LocalTokenBuckets()
+    return RedisTokenBuckets(client)
+
+
+class ConcurrencyLimiter:
+    """
+    Limite de requisições simultâneas de uma classe de tráfego neste processo.
+    Não bloqueia: quem não consegue vaga é descartado na hora (load shedding).
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
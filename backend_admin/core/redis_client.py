@@ -0,0 +1,30 @@
+import logging
+from functools import lru_cache
+from django.conf import settings
+
+# Redis é opcional: sem REDIS_URL (ou sem a biblioteca) os recursos que dependem dele
+# usam um armazenamento em memória local a cada worker
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_redis():
+    """
+    Cliente Redis compartilhado pelo processo (o pool de conexões é reutilizado entre requisições).
+
+    Returns:
+        redis.Redis ou None se REDIS_URL não estiver configurado ou a biblioteca não estiver instalada.
+    """
+    url = getattr(settings, 'REDIS_URL', None)
+    if not url:
+        return None
+    if redis is None:
+        logger.warning("REDIS_URL configurado, mas a biblioteca redis não está instalada.")
+        return None
+    timeout = getattr(settings, 'REDIS_SOCKET_TIMEOUT', 0.5)
+    return redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
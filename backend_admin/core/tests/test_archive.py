@@ -0,0 +1,142 @@
+import os
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.archive import archivable_tickets, archive_cutoff, batch_to_archive
+from core.models import TICKET_FIELDS, ArchivedTicket, Ticket, TicketDuplicate
+
+
+def make_ticket(description, status='CLOSED', days_ago=200, **fields):
+    """Cria um chamado com updated_at no passado (auto_now não permite pelo save)."""
+    ticket = Ticket.objects.create(customer_name="Ana", description=description, status=status, **fields)
+    Ticket.objects.filter(id=ticket.id).update(updated_at=timezone.now() - timedelta(days=days_ago))
+    ticket.refresh_from_db()
+    return ticket
+
+
+class ArchiveTicketsCommandTest(TestCase):
+    def setUp(self):
+        self.old_closed = make_ticket("Impressora trocada", priority='HIGH', company="ACME")
+        self.old_resolved = make_ticket("VPN reconfigurada", status='RESOLVED')
+        self.recent_closed = make_ticket("Senha redefinida", days_ago=5)
+        self.old_open = make_ticket("Servidor lento", status='OPEN')
+
+    def test_archive_table_mirrors_ticket_columns(self):
+        """A união de with_archive() depende dos mesmos campos, na mesma ordem"""
+        archived_fields = tuple(field.name for field in ArchivedTicket._meta.concrete_fields)
+        self.assertEqual(tuple(field.name for field in Ticket._meta.concrete_fields), TICKET_FIELDS)
+        self.assertEqual(archived_fields[:len(TICKET_FIELDS)], TICKET_FIELDS)
+
+    def test_locked_batch_has_no_outer_join(self):
+        """
+        O PostgreSQL rejeita FOR UPDATE no lado anulável de um LEFT JOIN. O SQLite ignora o
+        FOR UPDATE, então o SQL é compilado como em um banco que o suporta.
+        """
+        features = {'has_select_for_update': True, 'has_select_for_update_skip_locked': True}
+        with patch.multiple(connection.features, **features):
+            sql, _ = batch_to_archive(archive_cutoff(90), 100).query.get_compiler(
+                connection=connection).as_sql()
+        self.assertIn('FOR UPDATE', sql)
+        self.assertNotIn('OUTER JOIN', sql.upper())
+
+    def test_dry_run_does_not_move_tickets(self):
+        out = StringIO()
+        call_command('archive_tickets', stdout=out)
+
+        self.assertIn('2 chamados seriam arquivados', out.getvalue())
+        self.assertEqual(Ticket.objects.count(), 4)
+        self.assertFalse(ArchivedTicket.objects.exists())
+
+    def test_apply_moves_old_closed_tickets_in_batches_and_exports(self):
+        with tempfile.TemporaryDirectory() as export_dir:
+            out = StringIO()
+            call_command('archive_tickets', '--apply', '--batch-size', '1',
+                         '--export-dir', export_dir, stdout=out)
+
+            self.assertIn('2 chamados arquivados', out.getvalue())
+            rows = []
+            for name in os.listdir(export_dir):
+                self.assertRegex(name, r'^tickets-\d{4}-\d{2}\.jsonl\.gz$')
+                with gzip.open(os.path.join(export_dir, name), 'rt', encoding='utf-8') as f:
+                    rows.extend(json.loads(line) for line in f)
+
+        self.assertEqual(sorted(row['id'] for row in rows), [self.old_closed.id, self.old_resolved.id])
+        self.assertEqual(set(Ticket.objects.values_list('id', flat=True)),
+                         {self.recent_closed.id, self.old_open.id})
+        archived = ArchivedTicket.objects.get(id=self.old_closed.id)
+        self.assertEqual((archived.description, archived.priority, archived.company),
+                         ("Impressora trocada", 'HIGH', "ACME"))
+        self.assertEqual(archived.updated_at, self.old_closed.updated_at)
+
+    def test_duplicates_are_archived_before_their_original(self):
+        original = self.old_closed
+        open_copy = make_ticket("Impressora trocada de novo", status='OPEN')
+        closed_copy = make_ticket("Impressora trocada mais uma vez")
+        TicketDuplicate.objects.create(ticket=open_copy, original=original, similarity=0.8)
+        TicketDuplicate.objects.create(ticket=closed_copy, original=original, similarity=0.7)
+
+        # O original fica na tabela enquanto tiver uma repetição em aberto
+        eligible = archivable_tickets(archive_cutoff(90))
+        self.assertNotIn(original.id, set(eligible.values_list('id', flat=True)))
+        call_command('archive_tickets', '--apply', '--batch-size', '1', stdout=StringIO())
+        self.assertTrue(Ticket.objects.filter(id=original.id).exists())
+        self.assertEqual(ArchivedTicket.objects.get(id=closed_copy.id).duplicate_of, original.id)
+
+        open_copy.status = 'CLOSED'
+        open_copy.save()
+        Ticket.objects.filter(id=open_copy.id).update(updated_at=timezone.now() - timedelta(days=200))
+        call_command('archive_tickets', '--apply', '--batch-size', '1', stdout=StringIO())
+        self.assertEqual(ArchivedTicket.objects.get(id=open_copy.id).duplicate_of, original.id)
+        self.assertFalse(Ticket.objects.filter(id=original.id).exists())
+        self.assertIsNone(ArchivedTicket.objects.get(id=original.id).duplicate_of)
+
+
+class ArchiveReadsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='agente', password='senha'))
+        self.archived = make_ticket("Impressora trocada", priority='LOW')
+        self.active = make_ticket("Servidor lento", status='OPEN', priority='HIGH')
+        call_command('archive_tickets', '--apply', stdout=StringIO())
+
+    def test_with_archive_filters_both_tables(self):
+        tickets = list(Ticket.objects.with_archive())
+        self.assertEqual([ticket.id for ticket in tickets], [self.active.id, self.archived.id])
+        self.assertIsInstance(tickets[1], Ticket)
+        self.assertEqual([ticket.archived for ticket in tickets], [False, True])
+
+        self.assertEqual(Ticket.objects.with_archive(status='CLOSED').get().id, self.archived.id)
+        self.assertEqual(Ticket.objects.with_archive(priority='HIGH').count(), 1)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_api_detail_and_list_include_archived_tickets(self):
+        detail = self.client.get(f'/api/tickets/{self.archived.id}/')
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.data['description'], "Impressora trocada")
+        self.assertTrue(detail.data['archived'])
+        self.assertFalse(self.client.get(f'/api/tickets/{self.active.id}/').data['archived'])
+
+        # Chamados arquivados são somente leitura
+        response = self.client.patch(f'/api/tickets/{self.archived.id}/', {'status': 'OPEN'}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get('/api/tickets/999999/').status_code, 404)
+
+        self.assertEqual(self.client.get('/api/tickets/').data['count'], 1)
+        listing = self.client.get('/api/tickets/', {'archived': 'include'}).data
+        self.assertEqual(listing['count'], 2)
+        self.assertEqual([row['id'] for row in listing['results']], [self.active.id, self.archived.id])
+
+    def test_stats_count_archived_tickets(self):
+        stats = self.client.get('/api/tickets/stats/').data
+        self.assertEqual(stats['total'], 2)
+        self.assertEqual(stats['by_status']['CLOSED'], 1)
+        self.assertEqual(stats['by_priority'], {'LOW': 1, 'MEDIUM': 0, 'HIGH': 1, 'CRITICAL': 0})
@@ -0,0 +1,142 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.chat import ChatGateway, LocalSessionStore, RedisSessionStore
+
+
+def detect_intent_response(text, intent, contexts=()):
+    """Resposta no formato do DetectIntentResponse (apenas os campos usados pelo gateway)."""
+    output_contexts = [
+        SimpleNamespace(name=f"projects/p/agent/sessions/s/contexts/{name}", lifespan_count=lifespan)
+        for name, lifespan in contexts
+    ]
+    return SimpleNamespace(query_result=SimpleNamespace(
+        fulfillment_text=text,
+        intent=SimpleNamespace(display_name=intent),
+        output_contexts=output_contexts,
+    ))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode()
+
+
+class ChatGatewayTest(SimpleTestCase):
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.session_path.side_effect = lambda project, session: f"projects/{project}/agent/sessions/{session}"
+        self.store = LocalSessionStore(ttl=60)
+        self.matcher = MagicMock()
+        self.matcher.predict_one.return_value = ('duvida_tecnica', 0.9)
+        self.rag = MagicMock(return_value="Reinicie pelo painel.")
+
+    def gateway(self, **kwargs):
+        options = {'sessions_client': self.client, 'rag_handler': self.rag, 'matcher': self.matcher}
+        options.update(kwargs)
+        return ChatGateway('nexus', self.store, **options)
+
+    def test_detect_intent_uses_dialogflow_session_and_caches_contexts(self):
+        self.client.detect_intent.return_value = detect_intent_response(
+            "Qual o seu nome?", 'abrir_chamado',
+            [('abrir_chamado-followup', 2), ('__system_counters__', 1), ('expirado', 0)])
+
+        reply = self.gateway(rag_handler=None).send('abc', "Quero abrir um chamado")
+
+        self.assertEqual((reply.text, reply.source), ("Qual o seu nome?", 'dialogflow'))
+        request = self.client.detect_intent.call_args.kwargs['request']
+        self.assertEqual(request['session'], "projects/nexus/agent/sessions/abc")
+        self.assertEqual(request['query_input']['text']['text'], "Quero abrir um chamado")
+        self.assertEqual(self.store.get('abc'), {'contexts': [{'name': 'abrir_chamado-followup', 'lifespan': 2}]})
+
+    def test_technical_question_is_answered_in_process(self):
+        reply = self.gateway().send('abc', "Como reinicio o servidor?")
+
+        self.assertEqual((reply.text, reply.source), ("Reinicie pelo painel.", 'local'))
+        self.rag.assert_called_once_with("Como reinicio o servidor?", session_id='abc')
+        self.client.detect_intent.assert_not_called()
+
+    def test_active_context_and_low_confidence_go_to_dialogflow(self):
+        self.client.detect_intent.return_value = detect_intent_response("Ok", 'abrir_chamado')
+        self.store.set('abc', {'contexts': [{'name': 'abrir_chamado-followup', 'lifespan': 2}]})
+        self.gateway().send('abc', "Como reinicio o servidor?")
+
+        self.matcher.predict_one.return_value = ('duvida_tecnica', 0.3)
+        self.gateway().send('outra', "servidor")
+
+        self.assertEqual(self.client.detect_intent.call_count, 2)
+        self.rag.assert_not_called()
+
+    def test_rag_failure_falls_back_to_dialogflow(self):
+        self.rag.side_effect = RuntimeError("Vertex AI indisponível")
+        self.client.detect_intent.return_value = detect_intent_response("Resposta do agente", 'duvida_tecnica')
+        self.assertEqual(self.gateway().send('abc', "Como reinicio?").source, 'dialogflow')
+
+
+class SessionStoreTest(SimpleTestCase):
+    def test_local_store_expires_entries(self):
+        clock = FakeClock()
+        store = LocalSessionStore(ttl=10, clock=clock)
+        store.set('abc', {'contexts': []})
+        self.assertEqual(store.get('abc'), {'contexts': []})
+        clock.now = 11
+        self.assertIsNone(store.get('abc'))
+
+    def test_redis_store_round_trip_and_errors(self):
+        store = RedisSessionStore(FakeRedis(), ttl=60)
+        store.set('abc', {'contexts': [{'name': 'c', 'lifespan': 1}]})
+        self.assertEqual(store.get('abc'), {'contexts': [{'name': 'c', 'lifespan': 1}]})
+
+        broken = MagicMock()
+        broken.get.side_effect = ConnectionError("recusada")
+        with self.assertLogs('core.chat', level='WARNING'):
+            self.assertIsNone(RedisSessionStore(broken, ttl=60).get('abc'))
+
+
+class ChatViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('chat')
+
+    def test_browser_keeps_the_same_dialogflow_session(self):
+        gateway = MagicMock()
+        gateway.send.return_value = SimpleNamespace(text="Olá!", intent='saudacao', source='dialogflow')
+        with patch('core.api.chat.get_gateway', return_value=gateway):
+            response = self.client.post(self.url, {'message': " Oi "}, format='json')
+            self.client.post(self.url, {'message': "Tudo bem?"}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'reply': "Olá!", 'intent': 'saudacao'})
+        first, second = gateway.send.call_args_list
+        self.assertEqual(first.args, (second.args[0], "Oi"))
+
+    def test_invalid_message_and_unavailable_gateway(self):
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, 400)
+        with patch('core.api.chat.get_gateway', return_value=None):
+            response = self.client.post(self.url, {'message': "Oi"}, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('reply', response.data)
+
+    def test_dialogflow_error_returns_reply_for_the_browser(self):
+        gateway = MagicMock()
+        gateway.send.side_effect = RuntimeError("deadline exceeded")
+        with patch('core.api.chat.get_gateway', return_value=gateway), self.assertLogs('core.api.chat', 'ERROR'):
+            response = self.client.post(self.url, {'message': "Oi"}, format='json')
+        self.assertEqual(response.status_code, 502)
+        self.assertIn('reply', response.data)
@@ -101,3 +101,38 @@ class SyncDialogflowCommandTest(TestCase):
             
             output = out.getvalue()
             self.assertIn('devem estar definidos no .env', output)
+
+
+class TriageTicketsCommandTest(TestCase):
+    def setUp(self):
+        from core.models import Ticket
+        self.outage = Ticket.objects.create(
+            customer_name="Ana", description="Servidor fora do ar, ninguém consegue trabalhar",
+            priority="LOW", status="OPEN")
+        self.question = Ticket.objects.create(
+            customer_name="Bia", description="Dúvida sobre o Excel, sem pressa",
+            priority="MEDIUM", status="IN_PROGRESS")
+        self.closed = Ticket.objects.create(
+            customer_name="Caio", description="Servidor fora do ar",
+            priority="LOW", status="CLOSED")
+
+    def test_dry_run_does_not_change_tickets(self):
+        """Sem --apply, apenas reporta as mudanças"""
+        from io import StringIO
+        out = StringIO()
+        call_command('triage_tickets', stdout=out)
+
+        self.assertIn('2 chamados triados, 2 seriam alterados', out.getvalue())
+        self.assertIn('Baixa -> Crítica: 1', out.getvalue())
+        self.outage.refresh_from_db()
+        self.assertEqual(self.outage.priority, "LOW")
+
+    def test_apply_updates_open_tickets_in_batches(self):
+        from io import StringIO
+        call_command('triage_tickets', '--apply', '--batch-size', '1', stdout=StringIO())
+
+        for ticket in (self.outage, self.question, self.closed):
+            ticket.refresh_from_db()
+        self.assertEqual(self.outage.priority, "CRITICAL")
+        self.assertEqual(self.question.priority, "LOW")
+        self.assertEqual(self.closed.priority, "LOW")
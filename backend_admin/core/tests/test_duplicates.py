@@ -0,0 +1,139 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.duplicates import (
+    DuplicateDetector,
+    MinHashLSH,
+    get_duplicate_detector,
+    merge_duplicate,
+    terms,
+)
+from core.models import Ticket, TicketDuplicate
+
+PRINTER = "A impressora do financeiro está quebrada e não liga"
+PRINTER_AGAIN = "Impressora do financeiro quebrada, não liga"
+
+
+class MinHashLSHTest(TestCase):
+    def test_similar_texts_are_found_and_removed(self):
+        index = MinHashLSH()
+        index.add(1, terms(PRINTER))
+        index.add(2, terms("VPN não conecta no notebook novo"))
+
+        matches = index.query(terms(PRINTER_AGAIN), threshold=0.6)
+        self.assertEqual([key for _, key in matches], [1])
+        self.assertEqual(index.query(terms("Troca do teclado da recepção"), threshold=0.6), [])
+
+        index.remove(1)
+        self.assertEqual(index.query(terms(PRINTER_AGAIN), threshold=0.6), [])
+        self.assertEqual(len(index), 1)
+
+    def test_form_fields_of_the_webhook_are_ignored(self):
+        """Os campos fixos da descrição do webhook não contam como termos em comum"""
+        description = ("Título: Impressora\nTipo: Incidente\nCategoria: Hardware\n"
+                       "Contato: \nLocalização: Sala 3\n\nDescrição do Usuário:\nNão liga")
+        self.assertEqual(terms(description), {"impressora", "nao", "liga"})
+
+
+@override_settings(DIALOGFLOW_WEBHOOK_TOKEN='test-token', DUPLICATE_INDEX_SYNC_SECONDS=3600)
+class DuplicateTicketsTest(TestCase):
+    def setUp(self):
+        get_duplicate_detector.cache_clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='agente', password='senha'))
+
+    def post_ticket(self, description, priority='MEDIUM'):
+        return self.client.post('/api/tickets/', {
+            "customer_name": "Ana", "description": description, "priority": priority}, format='json')
+
+    def test_api_links_repeated_ticket_to_the_original(self):
+        original = self.post_ticket(PRINTER).data
+        self.assertIsNone(original['duplicate_of'])
+
+        response = self.post_ticket(PRINTER_AGAIN)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['duplicate_of'], original['id'])
+        link = TicketDuplicate.objects.get(ticket_id=response.data['id'])
+        self.assertEqual(link.original_id, original['id'])
+
+        # Uma terceira repetição é ligada ao original, e não à cópia
+        third = self.post_ticket("Impressora quebrada do financeiro não liga")
+        self.assertEqual(third.data['duplicate_of'], original['id'])
+
+    def test_closed_and_different_tickets_are_not_duplicates(self):
+        first = self.post_ticket(PRINTER).data
+        self.assertIsNone(self.post_ticket("VPN não conecta no notebook novo").data['duplicate_of'])
+
+        ticket = Ticket.objects.get(id=first['id'])
+        ticket.status = 'CLOSED'
+        ticket.save()
+        self.assertIsNone(self.post_ticket(PRINTER_AGAIN).data['duplicate_of'])
+
+    @override_settings(DUPLICATE_TICKETS='merge')
+    def test_merge_appends_to_the_original_and_raises_priority(self):
+        original = self.post_ticket(PRINTER, priority='LOW').data
+
+        response = self.post_ticket(PRINTER_AGAIN, priority='HIGH')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], original['id'])
+        self.assertTrue(response.data['merged'])
+        self.assertEqual(Ticket.objects.count(), 1)
+        ticket = Ticket.objects.get(id=original['id'])
+        self.assertIn(PRINTER_AGAIN, ticket.description)
+        self.assertEqual(ticket.priority, 'HIGH')
+
+    def test_merge_starts_from_the_saved_description(self):
+        """Duas repetições a partir da mesma instância em memória não apagam uma à outra"""
+        ticket = Ticket.objects.create(customer_name="Ana", description=PRINTER, priority='LOW')
+        stale = Ticket.objects.get(id=ticket.id)
+
+        merge_duplicate(ticket, "primeira repetição", 'HIGH')
+        merge_duplicate(stale, "segunda repetição", 'MEDIUM')
+
+        saved = Ticket.objects.get(id=ticket.id)
+        self.assertIn("primeira repetição", saved.description)
+        self.assertIn("segunda repetição", saved.description)
+        self.assertEqual(saved.priority, 'HIGH')
+        self.assertEqual((stale.description, stale.priority), (saved.description, saved.priority))
+
+    def test_webhook_links_repeated_request(self):
+        url = reverse('dialogflow_fulfillment')
+        payload = {"queryResult": {
+            "intent": {"displayName": "abrir_chamado"},
+            "parameters": {"person_name": "Ana", "ticket_title": "Impressora", "priority": "Alta",
+                           "description": "A impressora do financeiro não liga"},
+        }}
+        first = self.client.post(url, payload, format='json', HTTP_AUTHORIZATION='test-token')
+        self.assertNotIn("vinculado", first.data['fulfillmentText'])
+        original = Ticket.objects.order_by('id').last()
+
+        second = self.client.post(url, payload, format='json', HTTP_AUTHORIZATION='test-token')
+        self.assertIn(f"vinculado ao chamado #{original.id}", second.data['fulfillmentText'])
+
+        with override_settings(DUPLICATE_TICKETS='merge'):
+            third = self.client.post(url, payload, format='json', HTTP_AUTHORIZATION='test-token')
+        self.assertIn(f"protocolo #{original.id}", third.data['fulfillmentText'])
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_index_syncs_tickets_saved_by_other_workers(self):
+        """Chamados criados sem passar por este processo entram no índice na sincronização"""
+        now = [0.0]
+        detector = DuplicateDetector(sync_interval=5, clock=lambda: now[0])
+        detector.refresh()
+        # bulk_create não dispara signals (como um INSERT feito por outro worker)
+        Ticket.objects.bulk_create([Ticket(customer_name="Bia", description=PRINTER)])
+        self.assertEqual(detector.find(PRINTER_AGAIN), (None, 0.0))
+
+        now[0] = 10.0
+        original, similarity = detector.find(PRINTER_AGAIN)
+        self.assertEqual(original.description, PRINTER)
+        self.assertGreaterEqual(similarity, 0.6)
+
+    def test_stale_index_entries_are_checked_against_the_database(self):
+        detector = DuplicateDetector()
+        detector.refresh()
+        detector.index.add(999, terms(PRINTER))
+        with self.assertNumQueries(1):
+            self.assertEqual(detector.find(PRINTER_AGAIN), (None, 0.0))
+        self.assertEqual(len(detector.index), 0)
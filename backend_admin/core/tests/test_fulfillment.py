@@ -1,24 +1,15 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 from core.models import Ticket
 import json
 
+@override_settings(DIALOGFLOW_WEBHOOK_TOKEN='test-token')
 class DialogflowFulfillmentTest(TestCase):
     def setUp(self):
         self.client = APIClient()
         self.url = reverse('dialogflow_fulfillment')
         self.token = 'test-token'
-        
-        # Override setting for test
-        from django.conf import settings
-        self.original_token = getattr(settings, 'DIALOGFLOW_WEBHOOK_TOKEN', None)
-        settings.DIALOGFLOW_WEBHOOK_TOKEN = self.token
-
-    def tearDown(self):
-        from django.conf import settings
-        if self.original_token:
-            settings.DIALOGFLOW_WEBHOOK_TOKEN = self.original_token
 
     def test_missing_token(self):
         """Teste de rejeição sem token"""
@@ -99,6 +90,68 @@ class DialogflowFulfillmentTest(TestCase):
         self.assertEqual(ticket.customer_name, "Maria")
         self.assertEqual(ticket.priority, "LOW")
 
+    def test_priority_synonyms_resolved(self):
+        """Sinônimos da entidade TicketPriority (intents.json) são resolvidos localmente"""
+        cases = {
+            "Urgente": "CRITICAL",
+            "parou a empresa": "CRITICAL",
+            "IMPORTANTE": "HIGH",
+            "media": "MEDIUM",
+            "Pode esperar": "LOW",
+            "valor desconhecido": "MEDIUM",
+        }
+        for raw, expected in cases.items():
+            with self.subTest(priority=raw):
+                payload = {
+                    "queryResult": {
+                        "intent": {"displayName": "abrir_chamado"},
+                        "parameters": {"person_name": "Ana", "priority": raw}
+                    }
+                }
+                response = self.client.post(
+                    self.url, payload, format='json', HTTP_AUTHORIZATION=self.token)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(Ticket.objects.order_by('id').last().priority, expected)
+
+    def test_entity_synonyms_in_description(self):
+        """Categoria e departamento informados por sinônimo aparecem com o valor canônico"""
+        payload = {
+            "queryResult": {
+                "intent": {"displayName": "abrir_chamado"},
+                "parameters": {
+                    "person_name": "Ana",
+                    "department": "Recursos Humanos",
+                    "category": "wi-fi",
+                    "priority": "Urgente"
+                }
+            }
+        }
+        response = self.client.post(
+            self.url, payload, format='json', HTTP_AUTHORIZATION=self.token)
+        ticket = Ticket.objects.last()
+        self.assertEqual(ticket.company, "RH")
+        self.assertIn("Categoria: Rede", ticket.description)
+        self.assertIn("prioridade Crítica", response.data['fulfillmentText'])
+
+    def test_description_triage_overrides_stated_priority(self):
+        """A descrição do problema eleva (ou rebaixa) a prioridade escolhida pelo usuário"""
+        cases = [
+            ("Baixa", "Servidor fora do ar, ninguém consegue trabalhar", "CRITICAL", "Crítica"),
+            ("Média", "Não é urgente, é só uma sugestão", "LOW", "Baixa"),
+        ]
+        for raw, description, expected, label in cases:
+            with self.subTest(description=description):
+                payload = {
+                    "queryResult": {
+                        "intent": {"displayName": "abrir_chamado"},
+                        "parameters": {"person_name": "Ana", "priority": raw, "description": description}
+                    }
+                }
+                response = self.client.post(
+                    self.url, payload, format='json', HTTP_AUTHORIZATION=self.token)
+                self.assertEqual(Ticket.objects.order_by('id').last().priority, expected)
+                self.assertIn(f"prioridade {label}", response.data['fulfillmentText'])
+
     def test_unhandled_intent(self):
         """Teste de intent desconhecida"""
         payload = {
@@ -116,3 +169,18 @@ class DialogflowFulfillmentTest(TestCase):
         )
         self.assertEqual(response.status_code, 200)
         self.assertIn("não tenho ação configurada", response.data['fulfillmentText'])
+
+    @override_settings(DIALOGFLOW_WEBHOOK_TOKEN='token-novo, test-token')
+    def test_rotation_accepts_old_and_new_tokens(self):
+        """Durante a rotação, o token antigo e o novo são aceitos"""
+        for token in ('test-token', 'token-novo', ):
+            response = self.client.post(self.url, {}, format='json', HTTP_X_DIALOGFLOW_TOKEN=token)
+            self.assertEqual(response.status_code, 200)
+        response = self.client.post(self.url, {}, format='json', HTTP_AUTHORIZATION='token-antigo')
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(DIALOGFLOW_WEBHOOK_TOKEN='')
+    def test_missing_configuration_blocks_requests(self):
+        """Sem token configurado, o webhook é bloqueado"""
+        response = self.client.post(self.url, {}, format='json', HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(response.status_code, 500)
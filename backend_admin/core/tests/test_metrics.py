@@ -0,0 +1,78 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+from core.models import Ticket
+
+
+def sample(name, labels):
+    """Valor atual de uma série do registro padrão (0 se ainda não existir)."""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class RequestMetricsMiddlewareTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='senha')
+        self.client.force_authenticate(self.user)
+
+    def test_records_duration_and_queries_per_viewset_action(self):
+        """A lista de tickets é registrada como TicketViewSet.list com suas consultas SQL"""
+        Ticket.objects.create(customer_name="Ana", description="Sem rede")
+        labels = {'view': 'TicketViewSet.list', 'method': 'GET', 'status': '200'}
+        before_requests = sample('nexus_http_request_duration_seconds_count', labels)
+        before_queries = sample('nexus_db_queries_per_request_sum', {'view': 'TicketViewSet.list'})
+
+        response = self.client.get('/api/tickets/')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(
+            sample('nexus_http_request_duration_seconds_count', labels), before_requests + 1)
+        # Paginação: COUNT + SELECT
+        self.assertGreaterEqual(
+            sample('nexus_db_queries_per_request_sum', {'view': 'TicketViewSet.list'}) - before_queries, 2)
+
+    def test_apiview_label_and_unmatched_urls(self):
+        labels = {'view': 'DialogflowFulfillmentView', 'method': 'POST', 'status': '401'}
+        before = sample('nexus_http_request_duration_seconds_count', labels)
+        self.client.post(reverse('dialogflow_fulfillment'), {}, format='json')
+        self.assertEqual(sample('nexus_http_request_duration_seconds_count', labels), before + 1)
+
+        labels = {'view': 'unmatched', 'method': 'GET', 'status': '404'}
+        before = sample('nexus_http_request_duration_seconds_count', labels)
+        self.client.get('/nao-existe/')
+        self.assertEqual(sample('nexus_http_request_duration_seconds_count', labels), before + 1)
+
+
+class MetricsEndpointTest(TestCase):
+    def test_exposes_histograms_and_backlog_gauges(self):
+        Ticket.objects.create(customer_name="A", description="x", status='OPEN', priority='HIGH')
+        Ticket.objects.create(customer_name="B", description="y", status='OPEN', priority='HIGH')
+        old = Ticket.objects.create(customer_name="C", description="z", status='IN_PROGRESS')
+        Ticket.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(hours=2))
+        Ticket.objects.create(customer_name="D", description="w", status='CLOSED')
+        # Garante uma série no histograma mesmo com este teste rodando isolado
+        self.client.get('/nao-existe/')
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+        body = response.content.decode()
+        self.assertIn('nexus_http_request_duration_seconds_bucket', body)
+        self.assertIn('nexus_tickets{priority="HIGH",status="OPEN"} 2.0', body)
+        self.assertIn('nexus_tickets{priority="MEDIUM",status="CLOSED"} 1.0', body)
+        age_line = next(line for line in body.splitlines()
+                        if line.startswith('nexus_ticket_backlog_oldest_age_seconds '))
+        self.assertGreaterEqual(float(age_line.split()[1]), 2 * 3600)
+
+    @override_settings(METRICS_TOKEN='segredo')
+    def test_token_protection(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer segredo')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer outro').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ção').status_code, 401)
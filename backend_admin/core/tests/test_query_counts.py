@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from core.models import Ticket
+from core.tests.utils import QueryCountAssertionsMixin
+
+# Volumes de dados testados: abaixo, igual e acima do tamanho da página
+DATASET_SIZES = (1, settings.REST_FRAMEWORK['PAGE_SIZE'], 60)
+
+WEBHOOK_TOKEN = 'test-token'
+
+
+def grow_tickets(size):
+    """Garante que existam `size` tickets no banco (cria apenas os que faltam)."""
+    missing = size - Ticket.objects.count()
+    Ticket.objects.bulk_create([
+        Ticket(customer_name=f"Cliente {i}", description="Carga",
+               status=('OPEN', 'IN_PROGRESS', 'RESOLVED')[i % 3],
+               priority=('LOW', 'MEDIUM', 'HIGH', 'CRITICAL')[i % 4])
+        for i in range(missing)
+    ])
+
+
+class TicketQueryCountTest(QueryCountAssertionsMixin, APITestCase):
+    """
+    Fixa o número máximo de consultas SQL de cada endpoint e garante que ele não cresce
+    com o número de tickets. Ao adicionar relações ao serializer (usuários, comentários...),
+    use select_related/prefetch_related para manter estes limites.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='agente', password='senha')
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_is_constant(self):
+        """Listagem paginada: COUNT + SELECT da página"""
+        self.assertConstantQueries(
+            lambda: self.client.get('/api/tickets/'), grow_tickets, DATASET_SIZES, limit=2)
+
+    def test_list_with_archive_is_constant(self):
+        """Listagem com os arquivados (UNION ALL das duas tabelas): COUNT + SELECT da página"""
+        self.assertConstantQueries(
+            lambda: self.client.get('/api/tickets/', {'archived': 'include'}),
+            grow_tickets, DATASET_SIZES, limit=2)
+
+    def test_detail_is_constant(self):
+        ticket = Ticket.objects.create(customer_name="Ana", description="Sem rede")
+        self.assertConstantQueries(
+            lambda: self.client.get(f'/api/tickets/{ticket.id}/'),
+            grow_tickets, DATASET_SIZES, limit=1)
+
+    @override_settings(DUPLICATE_TICKETS='off')
+    def test_create(self):
+        """Criação sem chamados repetidos: apenas o INSERT"""
+        payload = {"customer_name": "Novo", "description": "Sem rede",
+                   "status": "OPEN", "priority": "HIGH"}
+        self.assertConstantQueries(
+            lambda: self.client.post('/api/tickets/', payload, format='json'),
+            grow_tickets, DATASET_SIZES, limit=1)
+
+    @override_settings(DUPLICATE_INDEX_SYNC_SECONDS=3600)
+    def test_create_duplicate_is_constant(self):
+        """Chamado repetido: SELECT do original + savepoint + INSERT + INSERT do vínculo + release"""
+        payload = {"customer_name": "Novo", "description": "Sem rede no prédio",
+                   "status": "OPEN", "priority": "HIGH"}
+        self.client.post('/api/tickets/', payload, format='json')
+        self.assertConstantQueries(
+            lambda: self.client.post('/api/tickets/', payload, format='json'),
+            grow_tickets, DATASET_SIZES, limit=5)
+
+    def test_stats_is_constant(self):
+        """Indicadores do painel: uma única consulta agregada"""
+        self.assertConstantQueries(
+            lambda: self.client.get('/api/tickets/stats/'), grow_tickets, DATASET_SIZES, limit=1)
+
+    def test_stats_values(self):
+        grow_tickets(12)
+        response = self.client.get('/api/tickets/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 12)
+        self.assertEqual(response.data['by_status'],
+                         {'OPEN': 4, 'IN_PROGRESS': 4, 'RESOLVED': 4, 'CLOSED': 0})
+        self.assertEqual(response.data['by_priority'],
+                         {'LOW': 3, 'MEDIUM': 3, 'HIGH': 3, 'CRITICAL': 3})
+
+    @override_settings(DIALOGFLOW_WEBHOOK_TOKEN=WEBHOOK_TOKEN, DUPLICATE_TICKETS='off')
+    def test_fulfillment_is_constant(self):
+        """Webhook do Dialogflow: savepoint + INSERT + release (transaction.atomic)"""
+        payload = {"queryResult": {
+            "intent": {"displayName": "abrir_chamado"},
+            "parameters": {"person_name": "Ana", "department": "TI", "priority": "Alta",
+                           "description": "Sem rede"},
+        }}
+        self.client.force_authenticate(user=None)
+        self.assertConstantQueries(
+            lambda: self.client.post(reverse('dialogflow_fulfillment'), payload,
+                                     format='json', HTTP_AUTHORIZATION=WEBHOOK_TOKEN),
+            grow_tickets, DATASET_SIZES, limit=3)
+
+    def test_max_queries_reports_sql(self):
+        """A falha lista as consultas executadas"""
+        with self.assertRaises(AssertionError) as ctx:
+            with self.assertMaxQueries(1):
+                list(Ticket.objects.all())
+                list(User.objects.all())
+        self.assertIn('2 consultas executadas', str(ctx.exception))
+        self.assertIn('core_ticket', str(ctx.exception))
+
+    def test_constant_queries_detects_n_plus_one(self):
+        """Uma consulta por linha é detectada e o SQL da maior carga é listado"""
+        def n_plus_one():
+            for ticket_id in Ticket.objects.values_list('id', flat=True):
+                Ticket.objects.get(id=ticket_id)
+
+        with self.assertRaises(AssertionError) as ctx:
+            self.assertConstantQueries(n_plus_one, grow_tickets, (1, 5))
+        self.assertIn('possível N+1', str(ctx.exception))
+        self.assertIn('{1: 2, 5: 6}', str(ctx.exception))
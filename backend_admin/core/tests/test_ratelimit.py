@@ -0,0 +1,214 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.middleware import LoadSheddingMiddleware, client_ip
+from core.ratelimit import Bucket, ConcurrencyLimiter, LocalTokenBuckets, RedisTokenBuckets
+from core.webhook_auth import get_webhook_auth
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TokenBucketTest(SimpleTestCase):
+    def test_burst_then_refill(self):
+        clock = FakeClock()
+        buckets = LocalTokenBuckets(clock=clock)
+        session = [Bucket('s', rate=1, burst=2)]
+        self.assertIsNone(buckets.acquire(session))
+        self.assertIsNone(buckets.acquire(session))
+        self.assertEqual(buckets.acquire(session).key, 's')
+        clock.now += 1
+        self.assertIsNone(buckets.acquire(session))
+
+    def test_denied_request_does_not_consume_other_buckets(self):
+        clock = FakeClock()
+        buckets = LocalTokenBuckets(clock=clock)
+        global_bucket = Bucket('global', rate=1, burst=2)
+        self.assertEqual(buckets.acquire([global_bucket, Bucket('s', rate=1, burst=0)]).key, 's')
+        self.assertIsNone(buckets.acquire([global_bucket]))
+        self.assertIsNone(buckets.acquire([global_bucket]))
+
+    def test_redis_buckets_call_script_and_fall_back_on_errors(self):
+        client = MagicMock()
+        script = client.register_script.return_value
+        script.return_value = 2
+        buckets = RedisTokenBuckets(client, clock=FakeClock())
+        requested = [Bucket('global', 10, 20), Bucket('s', 1, 5)]
+        self.assertEqual(buckets.acquire(requested).key, 's')
+        self.assertEqual(script.call_args.kwargs['keys'], ['nexus:ratelimit:global', 'nexus:ratelimit:s'])
+        self.assertEqual(script.call_args.kwargs['args'], [1000.0, 1.0, 10.0, 20.0, 1.0, 5.0])
+
+        script.side_effect = ConnectionError("recusada")
+        with self.assertLogs('core.ratelimit', 'WARNING'):
+            self.assertIsNone(buckets.acquire(requested))
+
+    def test_concurrency_limiter(self):
+        limiter = ConcurrencyLimiter(1)
+        self.assertTrue(limiter.try_acquire())
+        self.assertFalse(limiter.try_acquire())
+        limiter.release()
+        self.assertTrue(limiter.try_acquire())
+
+
+@override_settings(DIALOGFLOW_WEBHOOK_TOKEN='test-token', RATE_LIMIT_PER_SESSION='0.001/2')
+class LoadSheddingMiddlewareTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.payload = {
+            'session': 'projects/p/agent/sessions/abc',
+            'queryResult': {'intent': {'displayName': 'saudacao'}, 'parameters': {}},
+        }
+
+    def post_webhook(self, payload=None):
+        return self.client.post(reverse('dialogflow_fulfillment'), payload or self.payload,
+                                format='json', HTTP_AUTHORIZATION='test-token')
+
+    def test_session_over_limit_gets_degraded_fulfillment(self):
+        self.assertNotIn('volume alto', self.post_webhook().data['fulfillmentText'])
+        self.post_webhook()
+        with self.assertLogs('core.middleware', 'WARNING'):
+            response = self.post_webhook()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('volume alto', response.json()['fulfillmentText'])
+
+        # Outra sessão continua sendo atendida
+        other = dict(self.payload, session='projects/p/agent/sessions/outra')
+        self.assertNotIn('volume alto', self.post_webhook(other).data['fulfillmentText'])
+
+    @override_settings(RATE_LIMIT_GLOBAL='0.001/1')
+    def test_chat_over_global_limit_gets_429(self):
+        with patch('core.api.chat.get_gateway', return_value=None):
+            self.client.post(reverse('chat'), {'message': 'Oi'}, format='json')
+            with self.assertLogs('core.middleware', 'WARNING'):
+                response = self.client.post(reverse('chat'), {'message': 'Oi'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertIn('reply', response.json())
+
+    @override_settings(RATE_LIMIT_GLOBAL='0.001/1')
+    def test_chat_flood_does_not_use_fulfillment_tokens(self):
+        """Cada rota tem o seu bucket global: o chat lotado não descarta o fulfillment"""
+        with patch('core.api.chat.get_gateway', return_value=None), self.assertLogs('core.middleware', 'WARNING'):
+            for _ in range(3):
+                self.client.post(reverse('chat'), {'message': 'Oi'}, format='json')
+        self.assertNotIn('volume alto', self.post_webhook().data['fulfillmentText'])
+
+    @override_settings(RATE_LIMIT_PER_CLIENT='0.001/2')
+    def test_chat_callers_are_keyed_by_client_ip(self):
+        """No chat, um "session" aleatório no corpo (ou a falta do cookie) não escapa do limite"""
+        def post_chat(i, ip='203.0.113.7'):
+            return self.client.post(reverse('chat'), {'message': 'Oi', 'session': f'aleatoria-{i}'},
+                                    format='json', HTTP_X_FORWARDED_FOR=f'10.0.0.{i}, {ip}')
+
+        with patch('core.api.chat.get_gateway', return_value=None):
+            self.assertNotEqual(post_chat(1).status_code, 429)
+            self.assertNotEqual(post_chat(2).status_code, 429)
+            with self.assertLogs('core.middleware', 'WARNING'):
+                self.assertEqual(post_chat(3).status_code, 429)
+            self.assertNotEqual(post_chat(4, ip='198.51.100.9').status_code, 429)
+
+    def test_client_ip_trusts_only_the_configured_proxies(self):
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='1.1.1.1, 203.0.113.7',
+                                       REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(client_ip(request, trusted_proxies=1), '203.0.113.7')
+        self.assertEqual(client_ip(request, trusted_proxies=0), '10.0.0.1')
+
+    @override_settings(RATE_LIMIT_INVALID_TOKEN='0.001/1')
+    def test_only_invalid_tokens_share_a_token_bucket(self):
+        """O token válido (sempre o mesmo no Dialogflow) é limitado só pelo global"""
+        for i in range(3):
+            other = dict(self.payload, session=f'projects/p/agent/sessions/{i}')
+            self.assertNotIn('volume alto', self.post_webhook(other).data['fulfillmentText'])
+
+        self.client.post(reverse('dialogflow_fulfillment'), self.payload, format='json',
+                         HTTP_AUTHORIZATION='errado-1')
+        with self.assertLogs('core.middleware', 'WARNING'):
+            response = self.client.post(reverse('dialogflow_fulfillment'), self.payload, format='json',
+                                        HTTP_AUTHORIZATION='errado-2')
+        self.assertIn('volume alto', response.json()['fulfillmentText'])
+
+    @override_settings(RATE_LIMIT_GLOBAL='0.001/1', CORS_ALLOWED_ORIGINS=['http://localhost:3000'])
+    def test_shed_chat_response_has_cors_headers(self):
+        """O 429 chega ao front-end (com CORS) e os preflights não consomem fichas"""
+        origin = {'HTTP_ORIGIN': 'http://localhost:3000'}
+        for _ in range(3):
+            preflight = self.client.options(reverse('chat'), HTTP_ACCESS_CONTROL_REQUEST_METHOD='POST', **origin)
+            self.assertEqual(preflight.status_code, 200)
+
+        with patch('core.api.chat.get_gateway', return_value=None):
+            self.assertNotEqual(self.client.post(reverse('chat'), {'message': 'Oi'}, format='json',
+                                                 **origin).status_code, 429)
+            with self.assertLogs('core.middleware', 'WARNING'):
+                response = self.client.post(reverse('chat'), {'message': 'Oi'}, format='json', **origin)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Access-Control-Allow-Origin'], 'http://localhost:3000')
+        self.assertIn('reply', response.json())
+
+    @override_settings(RATE_LIMIT_GLOBAL='0.001/1')
+    def test_dashboard_is_not_limited(self):
+        self.client.force_authenticate(User.objects.create_user(username='agente', password='senha'))
+        for _ in range(3):
+            self.assertEqual(self.client.get('/api/tickets/').status_code, 200)
+
+    def test_webhooks_beyond_in_flight_limit_are_shed(self):
+        """Sem vaga de concorrência, a requisição é descartada sem esperar e sem liberar vaga"""
+        with patch('core.middleware.ConcurrencyLimiter.try_acquire', return_value=False), \
+                patch('core.middleware.ConcurrencyLimiter.release') as release:
+            with self.assertLogs('core.middleware', 'WARNING'):
+                response = self.post_webhook()
+        self.assertIn('volume alto', response.json()['fulfillmentText'])
+        release.assert_not_called()
+
+    def test_default_limit_admits_concurrent_fulfillments_while_chat_is_busy(self):
+        """Com o limite padrão, duas chamadas simultâneas ao fulfillment passam com o chat lotado"""
+        busy_chats = settings.WEBHOOK_MAX_IN_FLIGHT
+        self.assertGreaterEqual(busy_chats, 2)
+        requests = [(reverse('chat'), f'chat-{i}') for i in range(busy_chats)]
+        requests += [(reverse('dialogflow_fulfillment'), f'projects/p/agent/sessions/{i}') for i in range(2)]
+        all_started = threading.Barrier(len(requests) + 1)
+        release = threading.Event()
+
+        def slow_view(request):
+            all_started.wait(timeout=5)
+            release.wait(timeout=5)
+            return JsonResponse({})
+
+        middleware = LoadSheddingMiddleware(slow_view)
+        factory = RequestFactory()
+
+        def call(path, session):
+            return middleware(factory.post(path, {'session': session}, content_type='application/json',
+                                           HTTP_AUTHORIZATION='test-token'))
+
+        with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+            futures = [pool.submit(call, path, session) for path, session in requests]
+            # Todas as requisições chegam à view ao mesmo tempo (nenhuma foi descartada)
+            all_started.wait(timeout=5)
+            release.set()
+            responses = [future.result() for future in futures]
+        self.assertEqual([response.status_code for response in responses], [200] * len(requests))
+
+    def test_token_is_verified_once_per_request(self):
+        """O fulfillment reaproveita a verificação do token feita pelo middleware"""
+        auth = get_webhook_auth()
+        with patch.object(auth, 'verify', wraps=auth.verify) as verify:
+            response = self.post_webhook()
+        self.assertEqual(response.status_code, 200)
+        verify.assert_called_once_with('test-token')
+
+        with patch.object(auth, 'verify', wraps=auth.verify) as verify:
+            response = self.client.post(reverse('dialogflow_fulfillment'), self.payload,
+                                        format='json', HTTP_AUTHORIZATION='errado')
+        self.assertEqual(response.status_code, 401)
+        verify.assert_called_once_with('errado')
@@ -0,0 +1,79 @@
+import os
+import tempfile
+from django.test import SimpleTestCase
+from django.test.client import RequestFactory
+from core.webhook_auth import LogThrottle, WebhookAuthenticator, parse_tokens
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class WebhookAuthenticatorTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        self.addCleanup(lambda: os.path.exists(self.path) and os.remove(self.path))
+
+    def write_tokens(self, text, mtime):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_parse_tokens(self):
+        self.assertEqual(parse_tokens("a, b\n# comentário\n\nc"), ['a', 'b', 'c'])
+        self.assertEqual(parse_tokens(None), [])
+
+    def test_verify(self):
+        auth = WebhookAuthenticator(tokens=['segredo'])
+        self.assertTrue(auth.verify('segredo'))
+        self.assertFalse(auth.verify('segred'))
+        self.assertFalse(auth.verify('segredo-mais-longo'))
+        self.assertFalse(auth.verify(None))
+        self.assertFalse(WebhookAuthenticator().configured)
+
+    def test_tokens_file_is_reloaded_after_interval(self):
+        self.write_tokens("antigo\n", mtime=1000)
+        auth = WebhookAuthenticator(tokens=['fixo'], tokens_file=self.path,
+                                    reload_interval=30, clock=self.clock)
+        self.assertTrue(auth.verify('antigo'))
+
+        # Rotação: o arquivo passa a ter o novo token
+        self.write_tokens("novo\n", mtime=2000)
+        self.clock.now = 10
+        self.assertTrue(auth.verify('antigo'))
+        self.clock.now = 31
+        with self.assertLogs('core.webhook_auth', 'INFO'):
+            self.assertTrue(auth.verify('novo'))
+        self.assertFalse(auth.verify('antigo'))
+        self.assertTrue(auth.verify('fixo'))
+
+        # Falha de leitura mantém os últimos tokens válidos
+        os.remove(self.path)
+        self.clock.now = 62
+        with self.assertLogs('core.webhook_auth', 'WARNING'):
+            self.assertTrue(auth.verify('novo'))
+
+    def test_failure_log_is_throttled(self):
+        auth = WebhookAuthenticator(tokens=['segredo'], log_interval=60, clock=self.clock)
+        request = RequestFactory().post('/api/dialogflow/webhook/')
+        with self.assertLogs('core.webhook_auth', 'WARNING') as logs:
+            for _ in range(5):
+                auth.log_failure(request, 'invalid')
+            self.clock.now = 61
+            auth.log_failure(request, 'missing')
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn('4 tentativa(s) suprimida(s)', logs.output[1])
+        self.assertNotIn('segredo', ''.join(logs.output))
+
+    def test_log_throttle(self):
+        throttle = LogThrottle(interval=10, clock=self.clock)
+        self.assertEqual(throttle.allow(), 0)
+        self.assertIsNone(throttle.allow())
+        self.clock.now = 10
+        self.assertEqual(throttle.allow(), 1)
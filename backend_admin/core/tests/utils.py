@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountAssertionsMixin:
+    """
+    Asserções sobre o número de consultas SQL, para TestCase/APITestCase.
+
+    - assertMaxQueries: falha se um bloco executar mais consultas que o limite.
+    - assertConstantQueries: falha se o número de consultas crescer com o volume de dados (N+1).
+
+    Em caso de falha, a mensagem lista o SQL capturado para facilitar o diagnóstico.
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, limit, using=DEFAULT_DB_ALIAS):
+        """
+        Uso: `with self.assertMaxQueries(2): self.client.get(url)`
+
+        Args:
+            limit (int): Número máximo de consultas permitido.
+            using (str): Alias do banco monitorado.
+        """
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > limit:
+            self.fail(
+                f"{executed} consultas executadas, máximo permitido: {limit}.\n"
+                f"{format_queries(context.captured_queries)}")
+
+    def count_queries(self, func, using=DEFAULT_DB_ALIAS):
+        """
+        Executa func e retorna (número de consultas, SQL capturado).
+        """
+        with CaptureQueriesContext(connections[using]) as context:
+            func()
+        return len(context.captured_queries), context.captured_queries
+
+    def assertConstantQueries(self, func, grow, sizes=(1, 10, 50), limit=None):
+        """
+        Garante que func executa o mesmo número de consultas para volumes de dados diferentes.
+
+        Args:
+            func (callable): Operação medida (ex: lambda: self.client.get(url)).
+            grow (callable): grow(n) garante que existam n linhas antes da medição.
+            sizes (tuple): Volumes testados, em ordem crescente.
+            limit (int, optional): Máximo de consultas permitido em qualquer volume.
+
+        Returns:
+            dict: {volume: número de consultas}.
+        """
+        counts = {}
+        queries_by_size = {}
+        for size in sizes:
+            grow(size)
+            counts[size], queries_by_size[size] = self.count_queries(func)
+
+        if len(set(counts.values())) > 1:
+            largest = sizes[-1]
+            self.fail(
+                f"O número de consultas cresce com os dados (possível N+1): {counts}.\n"
+                f"Consultas com {largest} linhas:\n{format_queries(queries_by_size[largest])}")
+        if limit is not None and counts[sizes[0]] > limit:
+            self.fail(
+                f"{counts[sizes[0]]} consultas executadas, máximo permitido: {limit}.\n"
+                f"{format_queries(queries_by_size[sizes[0]])}")
+        return counts
+
+
+def format_queries(captured_queries):
+    """Lista numerada do SQL capturado (para mensagens de falha)."""
+    return "\n".join(
+        f"{i}. {query['sql']}" for i, query in enumerate(captured_queries, start=1))
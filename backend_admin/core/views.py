@@ -1,16 +1,27 @@
+import hmac
 from rest_framework import viewsets, permissions, status
 from rest_framework import serializers
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from django.conf import settings
+from django.db import transaction
 from django.contrib.auth import authenticate, login, logout
+from django.http import Http404, HttpResponse
 from django.middleware.csrf import get_token
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.utils.decorators import method_decorator
-from .models import Ticket
+from .models import ArchivedTicket, Ticket
+from .duplicates import duplicate_mode, find_duplicate, link_duplicate, merge_duplicate
+from .metrics import render_metrics
 
 
 # Serializer define como o modelo Ticket é convertido para JSON e vice-versa
 class TicketSerializer(serializers.ModelSerializer):
+    # True nos chamados lidos do arquivo (ArchivedTicket)
+    archived = serializers.BooleanField(read_only=True)
+
     class Meta:
         model = Ticket
         fields = '__all__'  # Expõe todos os campos do modelo na API
@@ -29,19 +40,66 @@ class TicketViewSet(viewsets.ModelViewSet):
     # Exige autenticação para acessar os tickets
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        """Com ?archived=include, a listagem também traz os chamados arquivados."""
+        if self.action == 'list' and self.request.query_params.get('archived') == 'include':
+            return Ticket.objects.with_archive()
+        return super().get_queryset()
+
+    def retrieve(self, request, *args, **kwargs):
+        """Detalhe do chamado; um chamado arquivado continua acessível (somente leitura)."""
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            ticket = get_object_or_404(ArchivedTicket.objects.all(), pk=kwargs['pk'])
+            return Response(self.get_serializer(ticket).data)
+
     def create(self, request, *args, **kwargs):
         """
-        Sobrescreve o método create para adicionar logs ou lógica
-        customizada ao receber um novo chamado via API.
-        """
-        # Chama a implementação padrão de criação
-        response = super().create(request, *args, **kwargs)
+        Cria o chamado verificando se o mesmo problema já está aberto (core.duplicates).
 
-        # Aqui poderíamos adicionar lógica extra, como enviar um email
-        # para o suporte
-        # print(f"Novo ticket criado com ID: {response.data['id']}")
+        - DUPLICATE_TICKETS=link: cria e vincula ao original; a resposta traz 'duplicate_of'.
+        - DUPLICATE_TICKETS=merge: anexa a descrição ao original e responde 200 com ele.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        description = serializer.validated_data.get('description', '')
+
+        original, similarity = find_duplicate(description)
+        if original is not None and duplicate_mode() == 'merge':
+            merge_duplicate(original, description, serializer.validated_data.get('priority'))
+            return Response({**self.get_serializer(original).data, 'merged': True},
+                            status=status.HTTP_200_OK)
+
+        if original is None:
+            self.perform_create(serializer)
+        else:
+            with transaction.atomic():
+                self.perform_create(serializer)
+                link_duplicate(serializer.instance, original, similarity)
+
+        headers = self.get_success_headers(serializer.data)
+        return Response({**serializer.data, 'duplicate_of': original.id if original else None},
+                        status=status.HTTP_201_CREATED, headers=headers)
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """
+        Indicadores do painel: totais por status e por prioridade, incluindo os arquivados.
+        Uma única consulta agregada, independentemente do número de tickets.
+        Endpoint: /api/tickets/stats/
+        """
+        by_status = {code: 0 for code, _ in Ticket.STATUS_CHOICES}
+        by_priority = {code: 0 for code, _ in Ticket.PRIORITY_CHOICES}
+        for (status_code, priority), total in Ticket.objects.totals_by_status_and_priority().items():
+            by_status[status_code] = by_status.get(status_code, 0) + total
+            by_priority[priority] = by_priority.get(priority, 0) + total
 
-        return response
+        return Response({
+            'total': sum(by_status.values()),
+            'by_status': by_status,
+            'by_priority': by_priority,
+        })
 
 
 class LoginView(APIView):
@@ -86,3 +144,18 @@ class UserInfoView(APIView):
             'is_staff': request.user.is_staff,
             'is_superuser': request.user.is_superuser
         })
+
+
+def metrics_view(request):
+    """
+    Endpoint /metrics lido pelo Prometheus (histogramas por view e gauges da fila de tickets).
+    Se METRICS_TOKEN estiver configurado, exige o header 'Authorization: Bearer <token>'.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    # Comparação em tempo constante, como no token do webhook (core.webhook_auth)
+    received = request.headers.get('Authorization', '').encode('utf-8')
+    if token and not hmac.compare_digest(received, f"Bearer {token}".encode('utf-8')):
+        return HttpResponse(status=401)
+
+    content, content_type = render_metrics()
+    return HttpResponse(content, content_type=content_type)
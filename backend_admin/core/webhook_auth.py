@@ -0,0 +1,173 @@
+import os
+import hmac
+import time
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+AUTH_SETTINGS = ('DIALOGFLOW_WEBHOOK_TOKEN', 'DIALOGFLOW_WEBHOOK_TOKENS_FILE',
+                 'WEBHOOK_TOKENS_RELOAD_SECONDS', 'WEBHOOK_AUTH_LOG_INTERVAL')
+
+
+def token_from_request(request):
+    """Token enviado pelo Dialogflow (header configurado no Fulfillment)."""
+    return request.headers.get('Authorization') or request.headers.get('x-dialogflow-token')
+
+
+def parse_tokens(text):
+    """
+    Tokens separados por vírgula ou por linha. Linhas iniciadas com '#' são comentários.
+
+    Returns:
+        list: Tokens não vazios, na ordem em que aparecem.
+    """
+    tokens = []
+    for line in (text or '').splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        tokens.extend(token.strip() for token in line.split(',') if token.strip())
+    return tokens
+
+
+def digest(token):
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+
+class LogThrottle:
+    """Permite no máximo um log a cada `interval` segundos e conta os que foram suprimidos."""
+
+    def __init__(self, interval=60, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self.suppressed = 0
+        self._last = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Returns:
+            int ou None: Quantos logs foram suprimidos desde o último permitido, ou None se
+            este também deve ser suprimido.
+        """
+        now = self.clock()
+        with self._lock:
+            if self._last is not None and now - self._last < self.interval:
+                self.suppressed += 1
+                return None
+            self._last = now
+            suppressed, self.suppressed = self.suppressed, 0
+            return suppressed
+
+
+class WebhookAuthenticator:
+    """
+    Valida o token do webhook contra o conjunto de tokens ativos.
+
+    Os tokens vêm de DIALOGFLOW_WEBHOOK_TOKEN (um ou mais, separados por vírgula) e, para rotação
+    sem reiniciar os workers, do arquivo DIALOGFLOW_WEBHOOK_TOKENS_FILE (um por linha; ex: um
+    secret montado pelo Cloud Run/Kubernetes). O arquivo é relido quando muda, verificando o mtime
+    no máximo a cada `reload_interval` segundos.
+
+    Só os SHA-256 dos tokens ficam em memória. O token recebido é comparado com todos eles com
+    hmac.compare_digest (tempo constante e sem depender do tamanho do token), e a rejeição não lê
+    o corpo da requisição.
+    """
+
+    def __init__(self, tokens=(), tokens_file=None, reload_interval=30, log_interval=60,
+                 clock=time.monotonic):
+        self.static_digests = frozenset(digest(token) for token in tokens)
+        self.tokens_file = tokens_file
+        self.reload_interval = reload_interval
+        self.clock = clock
+        self.throttle = LogThrottle(log_interval, clock)
+        self._file_digests = frozenset()
+        self._file_mtime = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self.digests = self.static_digests
+        self.reload()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            tokens=parse_tokens(getattr(settings, 'DIALOGFLOW_WEBHOOK_TOKEN', None)),
+            tokens_file=getattr(settings, 'DIALOGFLOW_WEBHOOK_TOKENS_FILE', None),
+            reload_interval=getattr(settings, 'WEBHOOK_TOKENS_RELOAD_SECONDS', 30),
+            log_interval=getattr(settings, 'WEBHOOK_AUTH_LOG_INTERVAL', 60),
+        )
+
+    def reload(self, force=True):
+        """Relê o arquivo de tokens se ele mudou (ou se `force`, ignorando o intervalo)."""
+        if not self.tokens_file:
+            return
+        now = self.clock()
+        with self._lock:
+            if not force and self._checked_at is not None and now - self._checked_at < self.reload_interval:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.tokens_file).st_mtime_ns
+                if mtime == self._file_mtime:
+                    return
+                with open(self.tokens_file, encoding='utf-8') as f:
+                    tokens = parse_tokens(f.read())
+            except OSError as e:
+                # Mantém os últimos tokens válidos: uma falha de leitura não derruba o webhook
+                logger.warning("Não foi possível ler DIALOGFLOW_WEBHOOK_TOKENS_FILE: %s", e)
+                return
+            self._file_mtime = mtime
+            self._file_digests = frozenset(digest(token) for token in tokens)
+            self.digests = self.static_digests | self._file_digests
+            logger.info("Tokens do webhook recarregados: %d ativo(s).", len(self.digests))
+
+    @property
+    def configured(self):
+        self.reload(force=False)
+        return bool(self.digests)
+
+    def verify(self, token):
+        """
+        Args:
+            token (str): Token recebido no header (pode ser None).
+
+        Returns:
+            bool: True se o token está entre os ativos.
+        """
+        self.reload(force=False)
+        if not token:
+            return False
+        received = digest(token)
+        valid = False
+        # Compara com todos os tokens, sem interromper no primeiro acerto
+        for expected in self.digests:
+            valid |= hmac.compare_digest(received, expected)
+        return valid
+
+    def log_failure(self, request, reason):
+        """Log de acesso negado, limitado a um a cada WEBHOOK_AUTH_LOG_INTERVAL (o token não é logado)."""
+        suppressed = self.throttle.allow()
+        if suppressed is None:
+            return
+        logger.warning(
+            "Tentativa de acesso não autorizado ao Webhook (%s) de %s. %d tentativa(s) suprimida(s) do log.",
+            reason, request.META.get('REMOTE_ADDR'), suppressed)
+
+
+@lru_cache(maxsize=1)
+def get_webhook_auth():
+    """Autenticador compartilhado pelo processo (tokens carregados uma vez)."""
+    return WebhookAuthenticator.from_settings()
+
+
+@receiver(setting_changed)
+def reset_webhook_auth(setting, **kwargs):
+    """Recarrega os tokens quando os testes alteram os settings (override_settings)."""
+    if setting in AUTH_SETTINGS:
+        get_webhook_auth.cache_clear()
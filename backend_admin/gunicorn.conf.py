@@ -0,0 +1,25 @@
+# Configuração do Gunicorn (carregada automaticamente a partir do diretório de trabalho)
+import os
+import shutil
+
+# Diretório compartilhado pelos workers para as métricas do prometheus_client (modo multiprocesso)
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", "/tmp/nexus_metrics")
+
+workers = int(os.environ.get("GUNICORN_WORKERS", "4"))
+# Threads por worker: o chat e o webhook esperam o Dialogflow e o Vertex AI (I/O), não a CPU.
+# As vagas dos webhooks (WEBHOOK_MAX_IN_FLIGHT) são calculadas a partir deste valor
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+timeout = 0
+
+
+def on_starting(server):
+    # Remove arquivos de métricas de execuções anteriores antes de iniciar os workers
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Libera os arquivos do worker encerrado (gauges "live" deixam de contar esse processo)
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
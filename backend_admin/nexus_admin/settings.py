@@ -32,9 +32,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primeiro da lista para medir a cadeia completa (latência e consultas SQL por view)
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    # Rate limit e load shedding dos webhooks, antes de qualquer acesso ao banco. Depois do CORS:
+    # os preflights não consomem fichas e o 429 do chat chega ao navegador com os headers CORS
+    'core.middleware.LoadSheddingMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -148,5 +153,85 @@ else:
     ]
 
 # Dialogflow Webhook Security
+# Um ou mais tokens aceitos, separados por vírgula (rotação: o novo e o antigo ao mesmo tempo)
 DIALOGFLOW_WEBHOOK_TOKEN = os.environ.get(
     'DIALOGFLOW_WEBHOOK_TOKEN', 'nexus-secret-token')
+# Arquivo opcional com tokens adicionais (um por linha), relido quando muda, sem reiniciar os workers
+DIALOGFLOW_WEBHOOK_TOKENS_FILE = os.environ.get('DIALOGFLOW_WEBHOOK_TOKENS_FILE')
+WEBHOOK_TOKENS_RELOAD_SECONDS = float(os.environ.get('WEBHOOK_TOKENS_RELOAD_SECONDS', '30'))
+# No máximo um log de acesso não autorizado a cada N segundos (os demais são só contados)
+WEBHOOK_AUTH_LOG_INTERVAL = float(os.environ.get('WEBHOOK_AUTH_LOG_INTERVAL', '60'))
+
+# Configuração do Dialogflow (intents.json) usada para compilar o índice local de sinônimos de entidades
+DIALOGFLOW_CONFIG_PATH = os.environ.get(
+    'DIALOGFLOW_CONFIG_PATH',
+    str(BASE_DIR.parent / 'dialogflow_automation' / 'config' / 'intents.json'))
+
+# Chamados repetidos: link (cria e vincula ao chamado aberto parecido), merge (anexa a descrição
+# ao chamado aberto, sem criar outro) ou off. Similaridade de Jaccard mínima entre os termos.
+DUPLICATE_TICKETS = os.environ.get('DUPLICATE_TICKETS', 'link')
+DUPLICATE_SIMILARITY = float(os.environ.get('DUPLICATE_SIMILARITY', '0.6'))
+# Intervalo de leitura dos chamados alterados por outros workers no índice de cada processo
+DUPLICATE_INDEX_SYNC_SECONDS = float(os.environ.get('DUPLICATE_INDEX_SYNC_SECONDS', '5'))
+
+# Arquivamento (python manage.py archive_tickets): chamados resolvidos/fechados sem alteração há
+# mais de N dias saem da tabela ativa; exportação opcional em JSON Lines (gzip) por mês
+TICKET_ARCHIVE_DAYS = int(os.environ.get('TICKET_ARCHIVE_DAYS', '90'))
+TICKET_ARCHIVE_EXPORT_DIR = os.environ.get('TICKET_ARCHIVE_EXPORT_DIR')
+
+# Pesos das palavras-chave da triagem de prioridade (padrão: dialogflow_automation/config/triage.json)
+TRIAGE_KEYWORDS_PATH = os.environ.get('TRIAGE_KEYWORDS_PATH')
+
+# Redis (opcional): cache de sessões do chat. Sem REDIS_URL, cada worker usa memória local.
+REDIS_URL = os.environ.get('REDIS_URL')
+REDIS_SOCKET_TIMEOUT = float(os.environ.get('REDIS_SOCKET_TIMEOUT', '0.5'))
+
+# Chat do site (/api/chat/) -> Dialogflow ES (detectIntent)
+DIALOGFLOW_PROJECT_ID = os.environ.get('DIALOGFLOW_PROJECT_ID')
+DIALOGFLOW_LANGUAGE_CODE = os.environ.get('DIALOGFLOW_LANGUAGE_CODE', 'pt-BR')
+CHAT_DETECT_INTENT_TIMEOUT = float(os.environ.get('CHAT_DETECT_INTENT_TIMEOUT', '10'))
+# Validade (segundos) dos contextos em cache; o Dialogflow expira sessões após 20 minutos
+CHAT_SESSION_TTL = int(os.environ.get('CHAT_SESSION_TTL', '1200'))
+# Função do RAG chamada no próprio processo para 'duvida_tecnica' (ex: 'vertex_rag.process_rag_query',
+# com backend_functions no PYTHONPATH). Vazio: todas as mensagens passam pelo Dialogflow.
+CHAT_RAG_HANDLER = os.environ.get('CHAT_RAG_HANDLER')
+# Confiança mínima do classificador local para responder sem o Dialogflow
+CHAT_LOCAL_MIN_CONFIDENCE = float(os.environ.get('CHAT_LOCAL_MIN_CONFIDENCE', '0.6'))
+
+# Rate limit e load shedding dos webhooks (Dialogflow e chat). O painel não é limitado.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True') == 'True'
+WEBHOOK_PATH_PREFIXES = ('/api/dialogflow/', '/api/chat/')
+# Formato 'fichas_por_segundo/rajada'. O limite global vale para cada rota separadamente.
+RATE_LIMIT_GLOBAL = os.environ.get('RATE_LIMIT_GLOBAL', '40/80')
+# Fulfillment sem token ou com token inválido (um bucket para todos). O token válido não tem
+# bucket próprio: o Dialogflow usa sempre o mesmo, e o limite dele seria o global
+RATE_LIMIT_INVALID_TOKEN = os.environ.get('RATE_LIMIT_INVALID_TOKEN', '1/10')
+RATE_LIMIT_PER_SESSION = os.environ.get('RATE_LIMIT_PER_SESSION', '0.5/5')
+# Chat: por IP do cliente (vários usuários podem dividir o IP de uma empresa)
+RATE_LIMIT_PER_CLIENT = os.environ.get('RATE_LIMIT_PER_CLIENT', '2/20')
+# Proxies na frente do Django que acrescentam o IP ao X-Forwarded-For (nginx do docker-compose ou
+# balanceador do Cloud Run: 1). Com 0, usa o REMOTE_ADDR
+RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', '1'))
+# Requisições simultâneas por rota de webhook e por processo. Fulfillment e chat têm vagas
+# separadas: um detectIntent lento do chat (até CHAT_DETECT_INTENT_TIMEOUT) não ocupa a vaga do
+# fulfillment que o próprio Dialogflow chama em seguida. Padrão: as threads do gunicorn
+# (GUNICORN_THREADS, mesmo padrão do gunicorn.conf.py) menos as reservadas ao painel, divididas
+# entre as rotas
+GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', '8'))
+WEBHOOK_RESERVED_THREADS = int(os.environ.get('WEBHOOK_RESERVED_THREADS', '2'))
+WEBHOOK_MAX_IN_FLIGHT = int(os.environ.get(
+    'WEBHOOK_MAX_IN_FLIGHT',
+    max(1, (GUNICORN_THREADS - WEBHOOK_RESERVED_THREADS) // len(WEBHOOK_PATH_PREFIXES))))
+LOAD_SHED_MESSAGE = os.environ.get(
+    'LOAD_SHED_MESSAGE',
+    'Estamos com um volume alto de atendimentos. Por favor, tente novamente em instantes.')
+
+# Métricas (Prometheus)
+# Token opcional para proteger o endpoint /metrics (header 'Authorization: Bearer <token>')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+# Requisições mais lentas que este limite (segundos) são registradas no log
+METRICS_SLOW_REQUEST_SECONDS = float(
+    os.environ.get('METRICS_SLOW_REQUEST_SECONDS', '1.0'))
+
+# Logging: 'text' (padrão do Django), 'json' ou 'async' (JSON escrito por uma thread de fundo)
+LOG_MODE = os.environ.get('LOG_MODE', 'text').lower()
@@ -4,8 +4,9 @@ URL configuration for nexus_admin project.
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from core.views import TicketViewSet, LoginView, LogoutView, CSRFTokenView, UserInfoView
+from core.views import TicketViewSet, LoginView, LogoutView, CSRFTokenView, UserInfoView, metrics_view
 from core.api.fulfillment import DialogflowFulfillmentView
+from core.api.chat import ChatView
 
 # Configuração do Router da API
 router = DefaultRouter()
@@ -15,8 +16,11 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
     path('api/dialogflow/fulfillment/', DialogflowFulfillmentView.as_view(), name='dialogflow_fulfillment'),
+    path('api/chat/', ChatView.as_view(), name='chat'),
     path('api/auth/login/', LoginView.as_view(), name='api_login'),
     path('api/auth/logout/', LogoutView.as_view(), name='api_logout'),
     path('api/auth/csrf/', CSRFTokenView.as_view(), name='api_csrf'),
     path('api/auth/user/', UserInfoView.as_view(), name='api_user_info'),
+    # Sem barra final: é o caminho padrão lido pelo Prometheus
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -0,0 +1,56 @@
+# Cache das últimas respostas geradas pelo Gemini, usado como fallback quando o prazo do
+# webhook acaba antes da geração (ver deadline.py). Local a cada instância da função.
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from entities import normalize_text
+
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", "512"))
+# Validade das respostas em cache, em segundos
+ANSWER_CACHE_TTL = float(os.environ.get("ANSWER_CACHE_TTL", "3600"))
+
+
+class AnswerCache:
+    """
+    LRU com expiração, indexado pela versão do prompt e pela pergunta normalizada
+    (sem acentos, caixa e pontuação): respostas de prompts diferentes não se misturam.
+    """
+
+    def __init__(self, max_entries=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, query, version=None):
+        normalized = normalize_text(query or "")
+        return (version, normalized) if normalized else None
+
+    def get(self, query, version=None):
+        key = self.key(query, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            answer, expires_at = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return answer
+
+    def put(self, query, answer, version=None):
+        key = self.key(query, version)
+        if not key or not answer or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (answer, self.clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,291 @@
+# Pacote de respostas pré-calculadas ("answer pack") para quedas do Vertex AI Search ou do Gemini.
+#
+# Gerado offline a partir do histórico de perguntas respondidas (as N mais frequentes) e publicado
+# junto com a função. Quando a busca ou a geração falham ou o prazo acaba, process_rag_query
+# procura a pergunta aqui antes de recorrer a um trecho da busca ou a uma mensagem genérica.
+#
+# Formato do arquivo (little-endian), lido com mmap e sem desserialização:
+#   cabeçalho   magic "NXAP", versão (u16), reservado (u16), número de registros (u32)
+#   registros   (hash u64, offset da chave u32, tamanho da chave u32, offset da resposta u32,
+#               tamanho da resposta u32), ordenados por hash
+#   dados       chaves e respostas em UTF-8 (respostas repetidas são gravadas uma vez)
+#
+# A busca é binária sobre os registros: O(log n) leituras do arquivo mapeado, sem carregar as
+# respostas na memória do processo. Cada pergunta entra com duas chaves: o texto normalizado
+# (mesma normalização do answer_cache) e os termos relevantes ordenados, que cobrem variações
+# de ordem e pontuação como "Como reinicio o servidor?" e "Servidor: como reinicio?". As
+# negações ficam nos termos: "o servidor não reinicia" e "o servidor reinicia" têm chaves
+# diferentes e nunca recebem a resposta uma da outra.
+#
+# Para gerar (histórico em JSONL: {"question", "answer"[, "count"]} ou o queryResult do Dialogflow):
+#   python backend_functions/answer_pack.py build --source historico.jsonl --output backend_functions/answer_pack.bin
+#   python backend_functions/answer_pack.py lookup --pack backend_functions/answer_pack.bin "Como reinicio o servidor?"
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import logging
+import argparse
+import threading
+
+from entities import normalize_text
+from local_index import STOPWORDS
+
+ANSWER_PACK_PATH = os.environ.get(
+    "ANSWER_PACK_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "answer_pack.bin"))
+
+PACK_MAGIC = b"NXAP"
+# Versão 2: negações nos termos. Pacotes da versão 1 são recusados (precisam ser gerados de novo)
+PACK_FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHHI")
+RECORD = struct.Struct("<QIIII")
+
+# Palavras de negação mantidas nos termos, embora estejam em STOPWORDS (já sem acento)
+NEGATION_WORDS = frozenset(("nao", "sem", "nunca", "nem", "nenhum", "nenhuma", "jamais"))
+
+# Respostas iguais para muitas perguntas diferentes são mensagens genéricas (erro, "não encontrei")
+MAX_QUESTIONS_PER_ANSWER = 5
+
+
+def pack_keys(query):
+    """
+    Chaves de uma pergunta no pacote: texto normalizado e termos relevantes ordenados (sem as
+    stopwords, exceto as negações).
+
+    Returns:
+        list: Uma ou duas chaves (vazia se a pergunta não tiver texto).
+    """
+    normalized = normalize_text(query or "")
+    if not normalized:
+        return []
+    terms = " ".join(sorted({term for term in normalized.split()
+                             if term not in STOPWORDS or term in NEGATION_WORDS}))
+    keys = ["q:" + normalized]
+    if terms:
+        keys.append("t:" + terms)
+    return keys
+
+
+def key_hash(key):
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def read_history(path):
+    """
+    Lê o histórico de perguntas respondidas (JSONL ou lista JSON).
+
+    Aceita registros {"question", "answer", "count"} ou o queryResult de um WebhookResponse do
+    Dialogflow ({"queryText", "fulfillmentText"}, com ou sem o objeto "queryResult" em volta).
+
+    Yields:
+        tuple: (pergunta, resposta, contagem).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    stripped = text.lstrip()
+    records = json.loads(text) if stripped.startswith("[") else (
+        json.loads(line) for line in text.splitlines() if line.strip())
+    for record in records:
+        record = record.get("queryResult", record)
+        question = record.get("question") or record.get("queryText")
+        answer = record.get("answer") or record.get("fulfillmentText")
+        if question and answer:
+            yield question, answer, int(record.get("count", 1))
+
+
+def select_answers(history, top_n=500, max_questions_per_answer=MAX_QUESTIONS_PER_ANSWER):
+    """
+    Agrupa o histórico por pergunta normalizada e escolhe as `top_n` mais frequentes.
+
+    A resposta de cada pergunta é a mais recente do histórico (a última que aparece).
+
+    Returns:
+        list: (pergunta, resposta, contagem), da mais para a menos frequente.
+    """
+    grouped = {}
+    for question, answer, count in history:
+        keys = pack_keys(question)
+        if not keys:
+            continue
+        entry = grouped.setdefault(keys[0], [question, answer, 0])
+        entry[1] = answer
+        entry[2] += count
+
+    questions_per_answer = {}
+    for _, answer, _ in grouped.values():
+        questions_per_answer[answer] = questions_per_answer.get(answer, 0) + 1
+    selected = [tuple(entry) for entry in grouped.values()
+                if questions_per_answer[entry[1]] <= max_questions_per_answer]
+    selected.sort(key=lambda entry: (-entry[2], entry[0]))
+    return selected[:top_n]
+
+
+def build_pack(entries, path):
+    """
+    Grava o pacote (em um temporário renomeado no final: nunca há um arquivo pela metade).
+
+    Args:
+        entries (list): (pergunta, resposta, contagem), da mais para a menos frequente. Se duas
+            perguntas tiverem a mesma chave de termos, fica a mais frequente.
+        path (str): Arquivo de saída.
+
+    Returns:
+        int: Número de chaves gravadas.
+    """
+    data = bytearray()
+    answer_offsets = {}
+    records = {}
+    for question, answer, _ in entries:
+        if answer not in answer_offsets:
+            encoded = answer.encode("utf-8")
+            answer_offsets[answer] = (len(data), len(encoded))
+            data += encoded
+        for key in pack_keys(question):
+            if key not in records:
+                records[key] = answer_offsets[answer]
+
+    table = []
+    for key, (answer_offset, answer_length) in records.items():
+        encoded = key.encode("utf-8")
+        table.append((key_hash(encoded), encoded, len(data), answer_offset, answer_length))
+        data += encoded
+    table.sort(key=lambda row: (row[0], row[1]))
+
+    data_start = HEADER.size + RECORD.size * len(table)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(PACK_MAGIC, PACK_FORMAT_VERSION, 0, len(table)))
+        for hashed, encoded, key_offset, answer_offset, answer_length in table:
+            f.write(RECORD.pack(hashed, data_start + key_offset, len(encoded),
+                                data_start + answer_offset, answer_length))
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(table)
+
+
+class AnswerPack:
+    """Pacote de respostas aberto (em geral sobre um mmap do arquivo)."""
+
+    def __init__(self, buffer):
+        if len(buffer) < HEADER.size:
+            raise ValueError("Pacote de respostas vazio ou truncado")
+        magic, version, _, count = HEADER.unpack_from(buffer, 0)
+        if magic != PACK_MAGIC or version != PACK_FORMAT_VERSION:
+            raise ValueError(f"Formato de pacote de respostas não suportado: {magic!r} v{version}")
+        if len(buffer) < HEADER.size + RECORD.size * count:
+            raise ValueError("Pacote de respostas truncado")
+        self.buffer = buffer
+        self.count = count
+
+    @classmethod
+    def open(cls, path):
+        """
+        Mapeia o arquivo em memória (as páginas são lidas sob demanda e compartilhadas).
+
+        Raises:
+            OSError: Se o arquivo não puder ser aberto.
+            ValueError: Se o formato não for suportado.
+        """
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("Pacote de respostas vazio ou truncado")
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+
+    def __len__(self):
+        return self.count
+
+    def _record(self, index):
+        return RECORD.unpack_from(self.buffer, HEADER.size + RECORD.size * index)
+
+    def _get(self, key):
+        encoded = key.encode("utf-8")
+        target = key_hash(encoded)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle)[0] < target:
+                low = middle + 1
+            else:
+                high = middle
+        # Colisões de hash: confere a chave de cada registro com o mesmo hash
+        while low < self.count:
+            hashed, key_offset, key_length, answer_offset, answer_length = self._record(low)
+            if hashed != target:
+                break
+            if self.buffer[key_offset:key_offset + key_length] == encoded:
+                return self.buffer[answer_offset:answer_offset + answer_length].decode("utf-8")
+            low += 1
+        return None
+
+    def lookup(self, query):
+        """
+        Returns:
+            str ou None: Resposta pré-calculada para a pergunta.
+        """
+        for key in pack_keys(query):
+            answer = self._get(key)
+            if answer is not None:
+                return answer
+        return None
+
+
+class LazyAnswerPack:
+    """
+    Abre o pacote na primeira consulta (nada é lido no cold start). Sem arquivo, não responde.
+    """
+
+    def __init__(self, path=ANSWER_PACK_PATH):
+        self.path = path
+        self._pack = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return self._pack
+            try:
+                self._pack = AnswerPack.open(self.path)
+                logging.info("Pacote de respostas carregado: %s (%d chaves)", self.path, len(self._pack))
+            except FileNotFoundError:
+                logging.info("Pacote de respostas não encontrado: %s", self.path)
+            except (OSError, ValueError) as e:
+                logging.warning("Pacote de respostas inválido (%s): %s", self.path, e)
+            self._loaded = True
+            return self._pack
+
+    def lookup(self, query):
+        pack = self._pack if self._loaded else self._load()
+        return pack.lookup(query) if pack is not None else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera ou consulta o pacote de respostas de fallback")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Gera o pacote a partir do histórico")
+    build.add_argument("--source", required=True, help="Histórico de perguntas respondidas (JSONL ou JSON)")
+    build.add_argument("--output", default=ANSWER_PACK_PATH)
+    build.add_argument("--top", type=int, default=500, help="Perguntas mais frequentes incluídas")
+    build.add_argument("--max-questions-per-answer", type=int, default=MAX_QUESTIONS_PER_ANSWER,
+                       help="Respostas usadas por mais perguntas que isso são descartadas (genéricas)")
+    lookup = commands.add_parser("lookup", help="Consulta uma pergunta no pacote")
+    lookup.add_argument("--pack", default=ANSWER_PACK_PATH)
+    lookup.add_argument("query")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        entries = select_answers(read_history(args.source), args.top, args.max_questions_per_answer)
+        keys = build_pack(entries, args.output)
+        print(f"{len(entries)} perguntas ({keys} chaves, {os.path.getsize(args.output)} bytes) em {args.output}")
+        return 0
+
+    answer = AnswerPack.open(args.pack).lookup(args.query)
+    print(answer if answer is not None else "(sem resposta no pacote)")
+    return 0 if answer is not None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+# Montagem do contexto enviado ao Gemini a partir dos snippets do Vertex AI Search.
+#
+# 1. Remove snippets quase duplicados (ex: avisos e rodapés repetidos em vários documentos):
+#    cada snippet vira um conjunto de hashes de shingles (sequências de k palavras) e é
+#    descartado se quase todos os seus shingles já estiverem nos snippets mantidos.
+# 2. Ordena pela pontuação da busca (posição do resultado e do snippet).
+# 3. Corta no orçamento de tokens, estimado localmente (sem chamar o count_tokens da API).
+import os
+import re
+import zlib
+
+# Orçamento de tokens do contexto (apenas os snippets, sem as instruções do prompt)
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "1500"))
+# Fração dos shingles de um snippet já presentes no contexto a partir da qual ele é descartado
+DEDUP_THRESHOLD = float(os.environ.get("CONTEXT_DEDUP_THRESHOLD", "0.8"))
+# Tamanho dos shingles, em palavras
+SHINGLE_SIZE = 4
+# Sobra mínima de orçamento para incluir um snippet truncado (abaixo disso, é descartado)
+MIN_TRUNCATED_TOKENS = 40
+# Média de caracteres por token do Gemini em português (estimativa conservadora)
+CHARS_PER_TOKEN = 4
+
+_WORDS = re.compile(r"\w+")
+
+
+def estimate_tokens(text):
+    """
+    Estimativa rápida do número de tokens de um texto.
+
+    Usa o maior valor entre caracteres/4 e o número de palavras, o que acompanha o
+    tokenizador do Gemini para texto em português sem precisar de chamadas remotas.
+
+    Args:
+        text (str): Texto a estimar.
+
+    Returns:
+        int: Número aproximado de tokens.
+    """
+    if not text:
+        return 0
+    return max(len(text) // CHARS_PER_TOKEN, len(text.split()))
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """
+    Conjunto de hashes dos shingles (sequências de `size` palavras) do texto normalizado.
+    Textos curtos (menos palavras que `size`) geram um único shingle com o texto inteiro.
+    """
+    words = _WORDS.findall(text.lower())
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+
+def coverage(candidate, seen):
+    """Fração dos shingles do candidato que já aparecem em `seen`."""
+    if not candidate:
+        return 1.0
+    return len(candidate & seen) / len(candidate)
+
+
+class Snippet:
+    """Trecho recuperado pela busca, com a pontuação usada na ordenação."""
+
+    __slots__ = ("text", "score")
+
+    def __init__(self, text, score):
+        self.text = text
+        self.score = score
+
+
+class ContextResult:
+    """Contexto montado e as estatísticas da montagem (usadas nos spans)."""
+
+    def __init__(self, snippets, duplicates, over_budget, truncated):
+        self.snippets = snippets
+        self.duplicates = duplicates
+        self.over_budget = over_budget
+        self.truncated = truncated
+        self.text = "".join(s + "\n" for s in snippets)
+        self.tokens = estimate_tokens(self.text)
+
+
+def rank_score(result_rank, snippet_rank=0):
+    """
+    Pontuação de um snippet a partir da posição do resultado na busca (o Vertex AI Search
+    já devolve os resultados em ordem de relevância) e da posição do snippet no documento.
+    """
+    return 1.0 / (1 + result_rank) - snippet_rank * 1e-3
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Corta o texto no limite de tokens estimado, em fronteira de palavra."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars].rstrip() + "…"
+
+
+def build_context(snippets, token_budget=None, dedup_threshold=None):
+    """
+    Monta o contexto: remove quase duplicados, ordena pela pontuação e corta no orçamento.
+
+    Args:
+        snippets (list): Lista de Snippet (texto e pontuação).
+        token_budget (int, optional): Orçamento em tokens (padrão: CONTEXT_TOKEN_BUDGET).
+        dedup_threshold (float, optional): Cobertura mínima para descartar (padrão: DEDUP_THRESHOLD).
+
+    Returns:
+        ContextResult: Snippets mantidos, em ordem, e contadores de descarte.
+    """
+    token_budget = CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    dedup_threshold = DEDUP_THRESHOLD if dedup_threshold is None else dedup_threshold
+
+    # Ordenação estável: empates mantêm a ordem original da busca
+    ranked = sorted((s for s in snippets if s.text and s.text.strip()),
+                    key=lambda s: s.score, reverse=True)
+
+    # Deduplicação em ordem de pontuação: um snippet só entra se trouxer shingles novos.
+    # Comparar com a união dos mantidos também elimina trechos que só juntam repetições
+    # (ex: aviso de confidencialidade + rodapé) e custa O(total de palavras).
+    unique = []
+    seen = set()
+    duplicates = 0
+    for snippet in ranked:
+        snippet_shingles = shingles(snippet.text)
+        if coverage(snippet_shingles, seen) >= dedup_threshold:
+            duplicates += 1
+            continue
+        unique.append(snippet)
+        seen |= snippet_shingles
+
+    # Orçamento: inclui em ordem de pontuação; o primeiro que não couber pode ser truncado
+    selected = []
+    used = 0
+    over_budget = 0
+    truncated = 0
+    for snippet in unique:
+        cost = estimate_tokens(snippet.text)
+        remaining = token_budget - used
+        if cost <= remaining:
+            selected.append(snippet.text)
+            used += cost
+        elif remaining >= MIN_TRUNCATED_TOKENS and not truncated:
+            text = truncate_to_tokens(snippet.text, remaining)
+            selected.append(text)
+            used += estimate_tokens(text)
+            truncated = 1
+        else:
+            over_budget += 1
+
+    return ContextResult(selected, duplicates, over_budget, truncated)
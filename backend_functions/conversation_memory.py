@@ -0,0 +1,244 @@
+# Memória curta das conversas do RAG, por sessão do Dialogflow.
+#
+# Guarda as últimas perguntas e respostas e os trechos usados em cada uma. Ela é usada de duas
+# formas nas perguntas de continuação ("e no Windows?", "isso vale para o Linux também?"):
+# - reescrita da consulta: a busca recebe a pergunta anterior junto com a atual;
+# - reaproveitamento de trechos: se os trechos da conversa já cobrem os termos da nova pergunta,
+#   a busca é dispensada e o Gemini recebe os mesmos trechos.
+#
+# Sem REDIS_URL, a memória fica na instância (o Dialogflow pode mandar turnos seguidos da mesma
+# sessão para instâncias diferentes; com Redis, todas compartilham o mesmo estado). No Redis, cada
+# sessão é um único valor JSON compacto comprimido com zlib, que expira após MEMORY_TTL.
+import os
+import json
+import time
+import zlib
+import logging
+import threading
+from collections import OrderedDict
+
+from entities import normalize_text
+from local_index import PREFIX_CHARS, STOPWORDS
+from context_builder import Snippet, rank_score
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Turnos guardados por sessão (os mais antigos são descartados)
+MEMORY_MAX_TURNS = int(os.environ.get("MEMORY_MAX_TURNS", "4"))
+# Validade da memória sem novas mensagens, em segundos (sessões do Dialogflow duram 20 minutos)
+MEMORY_TTL = int(os.environ.get("MEMORY_TTL", "1200"))
+# Sessões mantidas em memória por instância quando não há Redis
+MEMORY_MAX_SESSIONS = int(os.environ.get("MEMORY_MAX_SESSIONS", "5000"))
+# Fração mínima dos termos da pergunta presentes nos trechos anteriores para dispensar a busca
+MEMORY_REUSE_MIN_COVERAGE = float(os.environ.get("MEMORY_REUSE_MIN_COVERAGE", "0.6"))
+REDIS_URL = os.environ.get("REDIS_URL")
+
+# Caracteres guardados de cada resposta (só entram no histórico do prompt)
+ANSWER_CHARS = 400
+# Perguntas com até esta quantidade de termos são tratadas como continuação ("e o firewall?")
+FOLLOW_UP_MAX_TERMS = 1
+# Palavras que remetem ao turno anterior (já normalizadas)
+FOLLOW_UP_MARKERS = frozenset(
+    "isso esse essa esses essas disso desse dessa nisso nesse nessa ele ela eles elas dele dela "
+    "nele nela aquilo mesmo mesma tambem entao ai outro outra".split())
+# Conectivos que, no início da frase, indicam continuação ("e no Windows?", "mas e se...")
+FOLLOW_UP_OPENERS = frozenset("e mas entao tambem".split())
+
+
+def snippet_id(text):
+    """Identificador curto e estável de um trecho (CRC32 do texto)."""
+    return f"{zlib.crc32(text.encode('utf-8')):08x}"
+
+
+def query_terms(text):
+    """Termos relevantes de um texto normalizado (sem stopwords nem marcadores de continuação)."""
+    return [w for w in normalize_text(text or "").split()
+            if w not in STOPWORDS and w not in FOLLOW_UP_MARKERS and w not in FOLLOW_UP_OPENERS]
+
+
+class Turn:
+    """Um turno da conversa: pergunta, resposta (resumida) e IDs dos trechos usados."""
+
+    __slots__ = ("query", "answer", "snippet_ids", "created_at")
+
+    def __init__(self, query, answer, snippet_ids, created_at):
+        self.query = query
+        self.answer = answer
+        self.snippet_ids = snippet_ids
+        self.created_at = created_at
+
+
+class MemoryPlan:
+    """Decisão para uma pergunta: consulta de busca, trechos reaproveitados e histórico."""
+
+    __slots__ = ("search_query", "snippets", "follow_up", "history")
+
+    def __init__(self, search_query, snippets=None, follow_up=False, history=()):
+        self.search_query = search_query
+        # Trechos da conversa que dispensam a busca (None: buscar normalmente)
+        self.snippets = snippets
+        self.follow_up = follow_up
+        self.history = list(history)
+
+
+class ConversationMemory:
+    """Turnos recentes de uma sessão e os textos dos trechos referenciados por eles."""
+
+    __slots__ = ("turns", "snippets", "max_turns")
+
+    def __init__(self, max_turns=MEMORY_MAX_TURNS):
+        self.max_turns = max_turns
+        self.turns = []
+        # ID -> texto, apenas dos trechos usados pelos turnos guardados
+        self.snippets = {}
+
+    def __len__(self):
+        return len(self.turns)
+
+    def add_turn(self, query, answer, snippet_texts, now=None):
+        """
+        Registra um turno, descartando o mais antigo quando o limite é atingido.
+
+        Args:
+            query (str): Pergunta do usuário.
+            answer (str): Resposta enviada.
+            snippet_texts (list): Textos dos trechos usados no prompt, em ordem de relevância.
+        """
+        ids = []
+        for text in snippet_texts:
+            key = snippet_id(text)
+            self.snippets[key] = text
+            ids.append(key)
+        self.turns.append(Turn(query, (answer or "")[:ANSWER_CHARS], ids, now or time.time()))
+        del self.turns[:-self.max_turns]
+        referenced = {key for turn in self.turns for key in turn.snippet_ids}
+        self.snippets = {key: text for key, text in self.snippets.items() if key in referenced}
+
+    def is_follow_up(self, query):
+        if not self.turns:
+            return False
+        words = normalize_text(query or "").split()
+        if not words:
+            return False
+        return (words[0] in FOLLOW_UP_OPENERS
+                or any(w in FOLLOW_UP_MARKERS for w in words)
+                or len(query_terms(query)) <= FOLLOW_UP_MAX_TERMS)
+
+    def plan(self, query, min_coverage=MEMORY_REUSE_MIN_COVERAGE):
+        """
+        Decide como responder uma pergunta com base na conversa.
+
+        Returns:
+            MemoryPlan: Perguntas novas são buscadas sem alteração e sem histórico. Continuações
+            levam o histórico e são buscadas junto com a pergunta anterior, ou respondidas com os
+            trechos do turno anterior quando eles já contêm pelo menos min_coverage dos termos
+            da pergunta.
+        """
+        if not self.is_follow_up(query):
+            return MemoryPlan(query)
+
+        last = self.turns[-1]
+        search_query = f"{last.query} {query}"
+        previous = [self.snippets[key] for key in last.snippet_ids if key in self.snippets]
+        # Compara prefixos (como o HashingEmbedder) para tolerar plural e flexões
+        terms = {w[:PREFIX_CHARS] for w in query_terms(query)}
+        if previous:
+            known = {w[:PREFIX_CHARS] for w in normalize_text(" ".join(previous)).split()}
+            if not terms or len(terms & known) / len(terms) >= min_coverage:
+                snippets = [Snippet(text, rank_score(rank)) for rank, text in enumerate(previous)]
+                return MemoryPlan(search_query, snippets, follow_up=True, history=self.turns)
+        return MemoryPlan(search_query, follow_up=True, history=self.turns)
+
+    def to_bytes(self):
+        """Serialização compacta (listas JSON sem espaços, comprimidas com zlib)."""
+        data = [[[t.query, t.answer, t.snippet_ids, round(t.created_at)] for t in self.turns],
+                self.snippets]
+        return zlib.compress(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, raw, max_turns=MEMORY_MAX_TURNS):
+        turns, snippets = json.loads(zlib.decompress(raw).decode("utf-8"))
+        memory = cls(max_turns)
+        memory.turns = [Turn(*turn) for turn in turns[-max_turns:]]
+        memory.snippets = snippets
+        return memory
+
+
+class LocalMemoryStore:
+    """Memórias na instância: LRU com expiração por inatividade."""
+
+    def __init__(self, ttl=MEMORY_TTL, max_sessions=MEMORY_MAX_SESSIONS, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            memory, expires_at = entry
+            if expires_at <= self.clock():
+                del self._entries[session_id]
+                return None
+            self._entries.move_to_end(session_id)
+            return memory
+
+    def put(self, session_id, memory):
+        with self._lock:
+            self._entries[session_id] = (memory, self.clock() + self.ttl)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+
+
+class RedisMemoryStore:
+    """
+    Memórias no Redis, compartilhadas entre instâncias. Erros do Redis são tratados como
+    memória vazia: a pergunta é respondida sem histórico.
+    """
+
+    def __init__(self, client, ttl=MEMORY_TTL, prefix="nexus:memory:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, session_id):
+        try:
+            raw = self.client.get(self.prefix + session_id)
+            return ConversationMemory.from_bytes(raw) if raw else None
+        except Exception as e:
+            logging.warning("Memória da conversa indisponível: %s", e)
+            return None
+
+    def put(self, session_id, memory):
+        try:
+            self.client.set(self.prefix + session_id, memory.to_bytes(), ex=int(self.ttl))
+        except Exception as e:
+            logging.warning("Falha ao gravar a memória da conversa: %s", e)
+
+
+def build_memory_store(url=None):
+    """Redis quando REDIS_URL estiver configurado (e a biblioteca instalada); senão, memória local."""
+    url = url or REDIS_URL
+    if url and redis is not None:
+        return RedisMemoryStore(redis.Redis.from_url(url, socket_timeout=0.3, socket_connect_timeout=0.3))
+    if url:
+        logging.warning("REDIS_URL configurado, mas a biblioteca redis não está instalada")
+    return LocalMemoryStore()
+
+
+def format_history(turns, max_turns=2):
+    """Texto dos últimos turnos para o campo {history} do prompt ('' sem histórico)."""
+    if not turns:
+        return ""
+    lines = ["Conversa anterior:"]
+    for turn in turns[-max_turns:]:
+        lines.append(f"Usuário: {turn.query}")
+        lines.append(f"Assistente: {turn.answer}")
+    return "\n".join(lines) + "\n\n"
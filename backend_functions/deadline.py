@@ -0,0 +1,176 @@
+# Prazos (deadlines) e chamadas "hedged" para as dependências remotas do webhook.
+#
+# O Dialogflow ES espera o webhook por cerca de 5 segundos; depois disso o usuário não recebe
+# resposta nenhuma. O prazo da requisição é criado na entrada do webhook e repassado à busca e à
+# geração, que deixam de esperar quando ele acaba (e o fluxo RAG responde com um fallback).
+#
+# Hedging: se a chamada não terminar até o p95 das latências recentes daquela operação, uma
+# segunda chamada idêntica é disparada e vale a que terminar primeiro. Como só ~5% das chamadas
+# passam do p95 e a proporção de chamadas extras é limitada (HEDGE_MAX_RATIO), o custo adicional
+# é pequeno e o p99 passa a depender do mais rápido de dois pedidos.
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Prazo total do webhook (margem para serializar a resposta dentro dos ~5s do Dialogflow)
+WEBHOOK_DEADLINE_SECONDS = float(os.environ.get("WEBHOOK_DEADLINE_SECONDS", "4.2"))
+# Proporção máxima de chamadas extras (hedges) em relação às chamadas originais
+HEDGE_MAX_RATIO = float(os.environ.get("HEDGE_MAX_RATIO", "0.1"))
+# Amostras necessárias antes de usar o p95 medido (antes disso, usa o atraso padrão)
+HEDGE_MIN_SAMPLES = 20
+# Número de latências recentes consideradas no p95
+LATENCY_WINDOW = 256
+# Threads compartilhadas pelas chamadas remotas (inclui as perdedoras, que terminam em segundo plano)
+MAX_WORKERS = int(os.environ.get("HEDGE_MAX_WORKERS", "16"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="remote-call")
+    return _executor
+
+
+class DeadlineExceeded(Exception):
+    """O prazo da requisição acabou antes de a operação terminar."""
+
+
+class Deadline:
+    """Instante limite de uma requisição, medido com relógio monotônico."""
+
+    def __init__(self, seconds, clock=time.monotonic):
+        self.clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self, operation):
+        """
+        Raises:
+            DeadlineExceeded: Se o prazo já tiver acabado.
+        """
+        if self.expired():
+            raise DeadlineExceeded(f"Prazo esgotado antes de {operation}")
+
+
+class LatencyTracker:
+    """Janela das latências recentes de uma operação, com percentis sob demanda."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, p):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100.0))]
+
+
+class Hedger:
+    """
+    Executa uma chamada remota respeitando o prazo e dispara uma cópia (hedge) quando a
+    primeira passa do p95 recente.
+    """
+
+    def __init__(self, name, default_delay, min_delay=0.05, max_ratio=HEDGE_MAX_RATIO,
+                 min_samples=HEDGE_MIN_SAMPLES, executor=None):
+        """
+        Args:
+            name (str): Nome da operação (logs e spans).
+            default_delay (float): Atraso do hedge, em segundos, enquanto não há amostras suficientes.
+            min_delay (float): Atraso mínimo do hedge, em segundos.
+            max_ratio (float): Proporção máxima de hedges por chamada (0 desativa o hedging).
+            min_samples (int): Amostras necessárias para usar o p95 medido.
+            executor (Executor, optional): Padrão: pool de threads compartilhado do módulo.
+        """
+        self.name = name
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_ratio = max_ratio
+        self.min_samples = min_samples
+        self.executor = executor
+        self.latencies = LatencyTracker()
+        self.calls = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def hedge_delay(self):
+        if len(self.latencies) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, self.latencies.percentile(95))
+
+    def _allow_hedge(self):
+        with self._lock:
+            if self.hedges < self.max_ratio * self.calls:
+                self.hedges += 1
+                return True
+            return False
+
+    def _timed(self, fn):
+        start = time.monotonic()
+        result = fn()
+        self.latencies.add(time.monotonic() - start)
+        return result
+
+    def call(self, fn, deadline, span=None):
+        """
+        Executa fn() até o fim do prazo, com no máximo um hedge.
+
+        Args:
+            fn (callable): Chamada remota sem argumentos (pode ser executada duas vezes).
+            deadline (Deadline): Prazo da requisição.
+            span (Span, optional): Recebe os atributos 'hedged' e 'hedge_won'.
+
+        Returns:
+            O resultado da primeira chamada concluída com sucesso.
+
+        Raises:
+            DeadlineExceeded: Se nenhuma chamada terminar dentro do prazo.
+            Exception: O erro da chamada, se todas falharem.
+        """
+        deadline.check(self.name)
+        executor = self.executor or get_executor()
+        with self._lock:
+            self.calls += 1
+
+        primary = executor.submit(self._timed, fn)
+        futures = [primary]
+        done, _ = wait(futures, timeout=min(self.hedge_delay(), deadline.remaining()))
+        if not done and not deadline.expired() and self._allow_hedge():
+            futures.append(executor.submit(self._timed, fn))
+        if span is not None:
+            span.set_attribute("hedged", len(futures) > 1)
+
+        pending = set(futures)
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded(f"{self.name} não terminou dentro do prazo")
+            for future in done:
+                if future.exception() is None:
+                    if span is not None and len(futures) > 1:
+                        span.set_attribute("hedge_won", future is not primary)
+                    return future.result()
+                error = error or future.exception()
+        raise error
@@ -0,0 +1,64 @@
+# Resolução local de sinônimos de entidades do Dialogflow (ex: "Urgente" -> "Crítica").
+# O índice é compilado a partir do intents.json pelo comando:
+#   python dialogflow_automation/main.py compile-entities --output backend_functions/entity_index.json
+# e distribuído junto com a Cloud Function, sendo carregado uma única vez no cold start.
+import os
+import json
+import logging
+# Cópia de dialogflow_automation/core/text_normalization.py (a mesma normalização do compilador)
+from text_normalization import normalize_text
+
+# Caminho do índice compilado (pode ser sobrescrito por variável de ambiente)
+ENTITY_INDEX_PATH = os.environ.get(
+    "ENTITY_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "entity_index.json"))
+
+# Valores canônicos da entidade TicketPriority -> códigos do modelo Ticket (Django)
+# Espelha Ticket.PRIORITY_CHOICES no backend_admin
+PRIORITY_CODES = {
+    "Baixa": "LOW",
+    "Média": "MEDIUM",
+    "Alta": "HIGH",
+    "Crítica": "CRITICAL",
+}
+
+
+def _load_index(path):
+    """Carrega o índice compilado; retorna um índice vazio se o arquivo não existir."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("entity_types", {})
+    except (OSError, ValueError) as e:
+        logging.warning("Índice de entidades indisponível (%s): %s", path, e)
+        return {}
+
+
+# Carregado uma única vez por instância
+_ENTITY_TYPES = _load_index(ENTITY_INDEX_PATH)
+
+
+def resolve_entity(entity_type, raw_value, default=None):
+    """
+    Resolve um valor bruto para o valor canônico da entidade em O(tamanho do valor).
+
+    Args:
+        entity_type (str): Nome da entidade, com ou sem '@' (ex: 'TicketPriority').
+        raw_value (str): Valor recebido do Dialogflow (ex: 'urgente').
+        default: Valor retornado se o sinônimo não for conhecido.
+
+    Returns:
+        str: Valor canônico (ex: 'Crítica') ou default.
+    """
+    if not isinstance(raw_value, str):
+        return default
+    synonyms = _ENTITY_TYPES.get(entity_type.lstrip("@"), {})
+    return synonyms.get(normalize_text(raw_value), default)
+
+
+def resolve_priority(raw_value, default="MEDIUM"):
+    """
+    Converte a prioridade informada pelo usuário no código usado pela API Django.
+
+    Returns:
+        str: 'LOW', 'MEDIUM', 'HIGH' ou 'CRITICAL'.
+    """
+    return PRIORITY_CODES.get(resolve_entity("TicketPriority", raw_value), default)
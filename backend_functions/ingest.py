@@ -0,0 +1,275 @@
+# Ingestão incremental de documentos no índice vetorial local (local_index.py).
+#
+# A cada execução:
+# 1. Percorre o diretório de documentos (uma cópia local ou montagem do bucket do Cloud Storage,
+#    ex: `gsutil -m rsync -r gs://bucket/docs docs/` ou gcsfuse) e compara tamanho e mtime de cada
+#    arquivo com o registro da execução anterior (documents.json no diretório do índice).
+# 2. Apenas os arquivos novos ou alterados são lidos e divididos em chunks, em um pool de processos.
+# 3. Cada chunk é identificado pelo SHA-256 do texto; chunks cujo hash já está no índice reutilizam
+#    o vetor gravado, e só os novos são embedados (também no pool de processos).
+# 4. Documentos removidos da origem saem do índice. Com IVF, os centroides anteriores são
+#    reaproveitados enquanto a fração de chunks novos for pequena (sem refazer o k-means).
+#
+# Uso:
+#   python backend_functions/ingest.py --source docs/ --index backend_functions/knowledge_index
+#   python backend_functions/ingest.py --source docs/ --index backend_functions/knowledge_index --full
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+
+from local_index import (
+    LocalIndex,
+    chunk_text,
+    get_embedder,
+    iter_documents,
+    read_document,
+    require_numpy,
+)
+
+# Registro dos documentos indexados (tamanho, mtime e hashes dos chunks de cada arquivo)
+DOCUMENTS_FILE = "documents.json"
+DOCUMENTS_FORMAT_VERSION = 1
+
+# Chunks por tarefa de embedding enviada ao pool
+EMBED_BATCH_SIZE = 256
+# Fração máxima de chunks novos para reaproveitar os centroides do IVF anterior
+CENTROID_REUSE_MAX_CHANGE = 0.2
+
+
+def chunk_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def parse_document(job):
+    """
+    Lê e divide um documento (executado nos processos do pool).
+
+    Args:
+        job (tuple): (caminho relativo, caminho absoluto, tamanho, mtime_ns).
+
+    Returns:
+        tuple: (caminho relativo, tamanho, mtime_ns, [(hash, texto), ...]); os chunks são None
+        quando a leitura falha.
+    """
+    relative_path, path, size, mtime_ns = job
+    try:
+        text = read_document(path)
+    except Exception as e:
+        logging.error("Falha ao ler %s: %s", path, e)
+        return relative_path, size, mtime_ns, None
+    chunks = [(chunk_hash(chunk), chunk) for chunk in chunk_text(text or "")]
+    return relative_path, size, mtime_ns, chunks
+
+
+def embed_batch(job):
+    """Embeda um lote de textos (executado nos processos do pool)."""
+    embedder_name, dim, texts = job
+    return get_embedder(embedder_name, dim).embed(texts)
+
+
+class IngestStats:
+    """Contadores de uma execução da ingestão."""
+
+    def __init__(self):
+        self.documents = 0
+        self.parsed = 0
+        self.failed = 0
+        self.removed = 0
+        self.chunks = 0
+        self.embedded = 0
+        self.reused = 0
+        self.centroids_reused = False
+        self.seconds = 0.0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def __str__(self):
+        return (f"{self.documents} documentos ({self.parsed} lidos, {self.failed} com falha, "
+                f"{self.removed} removidos), "
+                f"{self.chunks} chunks ({self.embedded} embedados, {self.reused} reaproveitados) "
+                f"em {self.seconds:.2f}s")
+
+
+class Ingestor:
+    """
+    Atualiza o índice local a partir de um diretório de documentos, reprocessando apenas
+    o que mudou desde a execução anterior.
+    """
+
+    def __init__(self, source_dir, index_dir, embedder=None, workers=None, full=False):
+        """
+        Args:
+            source_dir (str): Diretório com os documentos (.txt, .md, .pdf).
+            index_dir (str): Diretório do índice (criado se não existir).
+            embedder (HashingEmbedder, optional): Padrão: o do índice existente ou HashingEmbedder().
+            workers (int, optional): Processos do pool (padrão: os.cpu_count(); 1 desativa o pool).
+            full (bool): Ignora o índice existente e reconstrói tudo.
+        """
+        self.source_dir = source_dir
+        self.index_dir = index_dir
+        self.embedder = embedder
+        self.workers = workers or os.cpu_count() or 1
+        self.full = full
+
+    def _load_previous(self):
+        """Índice e registro de documentos anteriores (None, {} se não houver ou se incompatíveis)."""
+        if self.full:
+            return None, {}
+        try:
+            index = LocalIndex.load(self.index_dir)
+            with open(os.path.join(self.index_dir, DOCUMENTS_FILE), "r", encoding="utf-8") as f:
+                registry = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.info("Sem índice anterior utilizável em %s (%s); reconstruindo", self.index_dir, e)
+            return None, {}
+        if registry.get("version") != DOCUMENTS_FORMAT_VERSION:
+            return None, {}
+        if self.embedder and (self.embedder.name, self.embedder.dim) != (index.embedder.name, index.embedder.dim):
+            logging.info("Embedder alterado; reconstruindo o índice")
+            return None, {}
+        return index, registry.get("documents", {})
+
+    def _map(self, pool, func, jobs):
+        if pool is None:
+            return map(func, jobs)
+        return pool.map(func, jobs, chunksize=max(1, len(jobs) // (self.workers * 4)))
+
+    def run(self):
+        """
+        Executa a ingestão e grava o índice atualizado.
+
+        Returns:
+            IngestStats: Contadores da execução.
+        """
+        np = require_numpy()
+        start = time.perf_counter()
+        stats = IngestStats()
+        previous, previous_documents = self._load_previous()
+        embedder = self.embedder or (previous.embedder if previous else get_embedder())
+
+        # Linha do vetor já calculado e texto de cada chunk, pelo hash
+        previous_rows = {}
+        texts = {}
+        if previous is not None:
+            for row, chunk in enumerate(previous.chunks):
+                h = chunk.get("hash")
+                if h and h not in previous_rows:
+                    previous_rows[h] = row
+                    texts[h] = chunk["text"]
+
+        # 1. Arquivos novos ou alterados (tamanho/mtime); os demais reaproveitam os chunks anteriores
+        documents = {}
+        jobs = []
+        for relative_path, path in iter_documents(self.source_dir):
+            stat = os.stat(path)
+            stats.documents += 1
+            known = previous_documents.get(relative_path)
+            if (known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns
+                    and all(h in previous_rows for h in known["chunks"])):
+                documents[relative_path] = known
+            else:
+                jobs.append((relative_path, path, stat.st_size, stat.st_mtime_ns))
+        stats.removed = len(set(previous_documents) - set(documents) - {job[0] for job in jobs})
+
+        use_pool = self.workers > 1 and len(jobs) > 1
+        with ProcessPoolExecutor(self.workers) if use_pool else nullcontext() as pool:
+            # 2. Leitura e divisão em chunks no pool (resultados chegam em streaming, por documento)
+            new_texts = {}
+            for relative_path, size, mtime_ns, chunks in self._map(pool, parse_document, jobs):
+                if chunks is None:
+                    # A falha não entra no registro com o mtime atual: o arquivo é lido de novo na
+                    # próxima execução. Até lá, os chunks da versão anterior (se houver) continuam
+                    stats.failed += 1
+                    known = previous_documents.get(relative_path)
+                    if known and all(h in previous_rows for h in known["chunks"]):
+                        documents[relative_path] = known
+                    continue
+                stats.parsed += 1
+                for h, text in chunks:
+                    if h not in previous_rows:
+                        new_texts.setdefault(h, text)
+                    texts.setdefault(h, text)
+                documents[relative_path] = {
+                    "size": size, "mtime_ns": mtime_ns, "chunks": [h for h, _ in chunks]}
+
+            # 3. Embedding apenas dos chunks inéditos
+            new_hashes = list(new_texts)
+            batches = [(embedder.name, embedder.dim,
+                        [new_texts[h] for h in new_hashes[i:i + EMBED_BATCH_SIZE]])
+                       for i in range(0, len(new_hashes), EMBED_BATCH_SIZE)]
+            new_vectors = list(self._map(pool if len(batches) > 1 else None, embed_batch, batches))
+
+        new_rows = {h: i for i, h in enumerate(new_hashes)}
+        new_matrix = (np.concatenate(new_vectors) if new_vectors
+                      else np.zeros((0, embedder.dim), dtype=np.float32))
+
+        # 4. Monta a matriz final na ordem dos documentos, copiando os vetores reaproveitados
+        chunks = []
+        reused_rows = []
+        for relative_path in sorted(documents):
+            for h in documents[relative_path]["chunks"]:
+                chunks.append({"source": relative_path, "text": texts[h], "hash": h})
+        vectors = np.empty((len(chunks), embedder.dim), dtype=np.float32)
+        for i, chunk in enumerate(chunks):
+            h = chunk["hash"]
+            if h in new_rows:
+                vectors[i] = new_matrix[new_rows[h]]
+            else:
+                reused_rows.append((i, previous_rows[h]))
+        if reused_rows:
+            target, source = zip(*reused_rows)
+            # Leitura em ordem crescente de linha: acesso sequencial ao arquivo mapeado
+            order = np.argsort(source)
+            vectors[np.asarray(target)[order]] = previous.embeddings[np.asarray(source)[order]]
+
+        stats.chunks = len(chunks)
+        stats.embedded = len(new_hashes)
+        stats.reused = len(reused_rows)
+
+        centroids = None
+        if (previous is not None and previous.centroids is not None
+                and stats.embedded <= CENTROID_REUSE_MAX_CHANGE * max(1, stats.chunks)):
+            centroids = previous.centroids
+            stats.centroids_reused = True
+        index = LocalIndex.build(chunks, embedder, vectors=vectors, centroids=centroids)
+        index.save(self.index_dir)
+        self._save_registry(documents)
+
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    def _save_registry(self, documents):
+        path = os.path.join(self.index_dir, DOCUMENTS_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": DOCUMENTS_FORMAT_VERSION, "documents": documents},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Ingestão incremental de documentos no índice vetorial local")
+    parser.add_argument("--source", required=True, help="Diretório com .txt, .md e .pdf")
+    parser.add_argument("--index", required=True, help="Diretório do índice")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processos para leitura e embedding (padrão: número de CPUs)")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignora o índice existente e reconstrói tudo")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    stats = Ingestor(args.source, args.index, workers=args.workers, full=args.full).run()
+    print(stats)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,397 @@
+# Índice vetorial local da base de conhecimento (alternativa offline ao Vertex AI Search).
+#
+# Estrutura do diretório do índice:
+#   manifest.json    versão do formato, embedder, dimensão, número de chunks e parâmetros do IVF
+#   embeddings.npy   matriz float32 (chunks x dimensão) com vetores normalizados, aberta com mmap
+#   chunks.jsonl     um chunk por linha, na mesma ordem da matriz ({"source", "text", "hash"})
+#   ivf.npz          centroides e faixas de linhas de cada lista (apenas em índices com IVF)
+#
+# Busca aproximada (IVF): os vetores são agrupados por k-means esférico e as linhas da matriz
+# são gravadas ordenadas por grupo. A consulta compara apenas os `nprobe` grupos mais próximos,
+# lendo faixas contíguas do arquivo mapeado. Índices pequenos usam busca exata (produto
+# matriz-vetor), que já é mais rápida que uma chamada de rede.
+#
+# O índice é gerado e atualizado incrementalmente por ingest.py. Para consultar:
+#   python backend_functions/local_index.py --index backend_functions/knowledge_index "Como reinicio o servidor?"
+import os
+import re
+import sys
+import json
+import math
+import zlib
+import logging
+import argparse
+
+# numpy é importado no primeiro uso (require_numpy): no modo vertex o índice local não é usado
+# e o import pesaria no cold start da Cloud Function
+np = None
+
+# Leitura de PDFs (opcional; necessária apenas para indexar arquivos .pdf)
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+# Mesma normalização usada na resolução de entidades (minúsculas, sem acentos e pontuação)
+from entities import normalize_text
+
+INDEX_FORMAT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+CHUNKS_FILE = "chunks.jsonl"
+IVF_FILE = "ivf.npz"
+
+# Dimensão dos vetores do embedder local
+EMBEDDING_DIM = 512
+# Tamanho dos prefixos de palavra usados como atributo adicional pelo embedder
+PREFIX_CHARS = 5
+# Tamanho dos chunks em palavras e sobreposição entre chunks de um mesmo parágrafo longo
+CHUNK_WORDS = 120
+CHUNK_OVERLAP = 20
+# Abaixo deste número de chunks a busca é exata; acima, usa IVF com ~sqrt(n) listas
+IVF_MIN_VECTORS = 4096
+# Listas do IVF visitadas por consulta (mais listas = maior recall, mais lento)
+IVF_NPROBE = int(os.environ.get("LOCAL_INDEX_NPROBE", "8"))
+KMEANS_ITERATIONS = 10
+
+DOCUMENT_EXTENSIONS = (".txt", ".md", ".pdf")
+
+# Palavras sem valor de busca (sem acentos, como sai de normalize_text)
+STOPWORDS = frozenset(
+    "a ao aos as com como da das de do dos e em isso na nas no nos o os ou para pela pelas pelo "
+    "pelos por que se sem sua suas seu seus um uma umas uns ja nao mais mas muito meu minha "
+    "ser esta este estao foi ha qual quais quando onde".split())
+
+
+def require_numpy():
+    """Importa o numpy na primeira chamada; todas as entradas do índice passam por aqui."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError("O índice local requer o pacote numpy (pip install numpy).") from None
+        np = numpy
+    return np
+
+
+def normalize_rows(matrix):
+    """Normaliza cada linha para norma 1 (linhas nulas permanecem nulas)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+class HashingEmbedder:
+    """
+    Embedder local, determinístico e sem modelo: palavras, prefixos de palavras e bigramas
+    normalizados são projetados em `dim` posições por hash (feature hashing com sinal), com peso 1 + log(tf).
+
+    Não captura sinônimos como um modelo de embeddings, mas não exige rede nem GPU e
+    produz o mesmo vetor em qualquer máquina, o que permite indexar em um lugar e
+    consultar em outro.
+    """
+
+    name = "hashing-v1"
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+
+    def features(self, text):
+        words = [w for w in normalize_text(text).split() if w not in STOPWORDS]
+        # Prefixos aproximam flexões (plural, gênero, tempo verbal) sem um stemmer
+        prefixes = [f"{w[:PREFIX_CHARS]}~" for w in words if len(w) > PREFIX_CHARS]
+        return words + prefixes + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts):
+        """
+        Args:
+            texts (list): Textos a converter.
+
+        Returns:
+            numpy.ndarray: Matriz float32 (len(texts) x dim) com linhas normalizadas.
+        """
+        require_numpy()
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = {}
+            for feature in self.features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                counts[h] = counts.get(h, 0) + 1
+            for h, count in counts.items():
+                # O bit mais alto do hash define o sinal (reduz o viés das colisões)
+                sign = 1.0 if h & 0x80000000 else -1.0
+                matrix[row, h % self.dim] += sign * (1.0 + math.log(count))
+        return normalize_rows(matrix)
+
+
+# Embedders disponíveis, pelo nome gravado no manifest do índice
+EMBEDDERS = {HashingEmbedder.name: HashingEmbedder}
+
+
+def get_embedder(name=HashingEmbedder.name, dim=EMBEDDING_DIM):
+    if name not in EMBEDDERS:
+        raise ValueError(f"Embedder desconhecido: {name}")
+    return EMBEDDERS[name](dim)
+
+
+def chunk_text(text, max_words=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    """
+    Divide um documento em chunks de até `max_words` palavras.
+
+    Parágrafos curtos consecutivos são agrupados; parágrafos longos são divididos em janelas
+    com `overlap` palavras em comum, para não cortar uma resposta entre dois chunks.
+
+    Returns:
+        list: Textos dos chunks, com espaços normalizados.
+    """
+    chunks = []
+    current = []
+    step = max(1, max_words - overlap)
+    for paragraph in re.split(r"\n\s*\n", text or ""):
+        words = paragraph.split()
+        if not words:
+            continue
+        if current and len(current) + len(words) > max_words:
+            chunks.append(" ".join(current))
+            current = []
+        if len(words) <= max_words:
+            current.extend(words)
+            continue
+        for start in range(0, len(words), step):
+            chunks.append(" ".join(words[start:start + max_words]))
+            if start + max_words >= len(words):
+                break
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def read_document(path):
+    """
+    Lê o texto de um documento (.txt, .md ou .pdf).
+
+    Returns:
+        str: Texto extraído ou None se o formato não puder ser lido.
+    """
+    if path.lower().endswith(".pdf"):
+        if PdfReader is None:
+            logging.warning("pypdf não instalado; ignorando %s", path)
+            return None
+        reader = PdfReader(path)
+        return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def iter_documents(source_dir):
+    """Caminhos (relativo ao diretório, absoluto) dos documentos suportados, em ordem estável."""
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(DOCUMENT_EXTENSIONS):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, source_dir).replace(os.sep, "/"), path
+
+
+def assign_lists(vectors, centroids, batch_size=8192):
+    """Lista do IVF (centroide mais próximo) de cada vetor."""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), batch_size):
+        batch = np.asarray(vectors[start:start + batch_size])
+        assignments[start:start + batch_size] = np.argmax(batch @ centroids.T, axis=1)
+    return assignments
+
+
+def train_ivf(vectors, n_lists, iterations=KMEANS_ITERATIONS, seed=0):
+    """
+    K-means esférico (similaridade de cosseno) sobre vetores normalizados.
+
+    Returns:
+        tuple: (centroides normalizados, lista de cada vetor)
+    """
+    rng = np.random.default_rng(seed)
+    centroids = np.array(vectors[rng.choice(len(vectors), n_lists, replace=False)])
+    for _ in range(iterations):
+        assignments = assign_lists(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        # Listas vazias mantêm o centroide anterior
+        empty = ~sums.any(axis=1)
+        sums[empty] = centroids[empty]
+        centroids = normalize_rows(sums)
+    return centroids, assign_lists(vectors, centroids)
+
+
+class LocalIndex:
+    """
+    Índice vetorial em memória (ou mapeado do disco) com busca top-k por similaridade de cosseno.
+    """
+
+    def __init__(self, embeddings, chunks, embedder, centroids=None, offsets=None, nprobe=IVF_NPROBE):
+        self.embeddings = embeddings
+        self.chunks = chunks
+        self.embedder = embedder
+        self.centroids = centroids
+        self.offsets = offsets
+        self.nprobe = nprobe
+
+    def __len__(self):
+        return len(self.chunks)
+
+    @classmethod
+    def build(cls, chunks, embedder=None, vectors=None, ivf_min_vectors=IVF_MIN_VECTORS, seed=0,
+              centroids=None):
+        """
+        Constrói o índice a partir dos chunks.
+
+        Args:
+            chunks (list): Dicionários com pelo menos "text" (ex: {"source": ..., "text": ...}).
+            embedder (HashingEmbedder, optional): Padrão: HashingEmbedder().
+            vectors (numpy.ndarray, optional): Vetores já calculados, na ordem dos chunks.
+            ivf_min_vectors (int): Número mínimo de chunks para usar IVF.
+            seed (int): Semente do k-means (índices reprodutíveis).
+            centroids (numpy.ndarray, optional): Centroides de um índice anterior; quando
+                informados, os vetores são apenas reatribuídos às listas, sem novo k-means.
+
+        Returns:
+            LocalIndex: Índice em memória (use save() para gravar).
+        """
+        require_numpy()
+        embedder = embedder or HashingEmbedder()
+        chunks = list(chunks)
+        if vectors is None:
+            vectors = embedder.embed([chunk["text"] for chunk in chunks])
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(chunks), embedder.dim)
+
+        offsets = None
+        if len(chunks) < ivf_min_vectors:
+            centroids = None
+        else:
+            if centroids is None:
+                centroids, assignments = train_ivf(vectors, int(math.sqrt(len(chunks))), seed=seed)
+            else:
+                assignments = assign_lists(vectors, centroids)
+            n_lists = len(centroids)
+            # Linhas ordenadas por lista: cada lista vira uma faixa contígua da matriz
+            order = np.argsort(assignments, kind="stable")
+            vectors = vectors[order]
+            chunks = [chunks[i] for i in order]
+            offsets = np.concatenate(
+                ([0], np.cumsum(np.bincount(assignments, minlength=n_lists)))).astype(np.int64)
+        return cls(vectors, chunks, embedder, centroids, offsets)
+
+    def save(self, index_dir):
+        """
+        Grava o índice no diretório. Cada arquivo é escrito em um temporário e renomeado,
+        e o manifest por último, para que uma instância nunca leia um índice pela metade.
+        """
+        os.makedirs(index_dir, exist_ok=True)
+
+        def replace(name, write):
+            path = os.path.join(index_dir, name)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+
+        replace(EMBEDDINGS_FILE, lambda f: np.save(f, np.asarray(self.embeddings, dtype=np.float32)))
+        replace(CHUNKS_FILE, lambda f: f.writelines(
+            (json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8") for chunk in self.chunks))
+        ivf_path = os.path.join(index_dir, IVF_FILE)
+        if self.centroids is not None:
+            replace(IVF_FILE, lambda f: np.savez(f, centroids=self.centroids, offsets=self.offsets))
+        elif os.path.exists(ivf_path):
+            os.remove(ivf_path)
+
+        manifest = {
+            "version": INDEX_FORMAT_VERSION,
+            "embedder": self.embedder.name,
+            "dim": self.embedder.dim,
+            "chunks": len(self.chunks),
+            "ivf_lists": 0 if self.centroids is None else len(self.centroids),
+        }
+        replace(MANIFEST_FILE, lambda f: f.write(
+            json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")))
+
+    @classmethod
+    def load(cls, index_dir, mmap=True, nprobe=IVF_NPROBE):
+        """
+        Carrega um índice gravado com save().
+
+        Args:
+            index_dir (str): Diretório do índice.
+            mmap (bool): Mapeia a matriz de embeddings em vez de lê-la inteira para a memória
+                (as páginas são carregadas sob demanda e compartilhadas entre processos).
+            nprobe (int): Listas do IVF visitadas por consulta.
+
+        Raises:
+            ValueError: Se o formato ou o embedder do índice não forem suportados.
+        """
+        require_numpy()
+        with open(os.path.join(index_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Versão de índice não suportada: {manifest.get('version')}")
+        embedder = get_embedder(manifest["embedder"], manifest["dim"])
+
+        embeddings = np.load(os.path.join(index_dir, EMBEDDINGS_FILE),
+                             mmap_mode="r" if mmap else None)
+        with open(os.path.join(index_dir, CHUNKS_FILE), "r", encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f if line.strip()]
+        if len(chunks) != len(embeddings):
+            raise ValueError("Índice inconsistente: número de chunks diferente do de vetores")
+
+        centroids = offsets = None
+        if manifest.get("ivf_lists"):
+            with np.load(os.path.join(index_dir, IVF_FILE)) as ivf:
+                centroids, offsets = ivf["centroids"], ivf["offsets"]
+        return cls(embeddings, chunks, embedder, centroids, offsets, nprobe)
+
+    def search(self, query, k=5):
+        """
+        Busca os k chunks mais similares à consulta.
+
+        Returns:
+            list: Tuplas (similaridade, chunk), da mais para a menos similar.
+        """
+        if not len(self.chunks) or k <= 0:
+            return []
+        query_vector = self.embedder.embed([query])[0]
+        if not query_vector.any():
+            return []
+
+        if self.centroids is None:
+            row_ids = None
+            scores = np.asarray(self.embeddings @ query_vector)
+        else:
+            probe = np.argsort(self.centroids @ query_vector)[::-1][:self.nprobe]
+            ranges = [(int(self.offsets[i]), int(self.offsets[i + 1])) for i in probe]
+            row_ids = np.concatenate([np.arange(start, end) for start, end in ranges])
+            scores = np.concatenate([
+                np.asarray(self.embeddings[start:end] @ query_vector) for start, end in ranges])
+
+        k = min(k, len(scores))
+        if not k:
+            return []
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(float(scores[i]), self.chunks[i if row_ids is None else int(row_ids[i])])
+                for i in top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consulta o índice vetorial local")
+    parser.add_argument("--index", required=True, help="Diretório do índice")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("query")
+    args = parser.parse_args(argv)
+
+    for score, chunk in LocalIndex.load(args.index).search(args.query, args.k):
+        print(f"{score:.3f}  {chunk.get('source', '')}: {chunk['text'][:100]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
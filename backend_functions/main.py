@@ -3,11 +3,21 @@ import functions_framework
 from flask import jsonify
 import logging
 # Importação do módulo interno responsável pela lógica de RAG (Retrieval-Augmented Generation)
-from vertex_rag import process_rag_query, create_ticket_in_django
+from vertex_rag import process_rag_query, create_ticket_in_django, warm_up
+# Histogramas de latência expostos no formato Prometheus
+from telemetry import METRICS_TOKEN, metrics_authorized, tracer
+# Logging estruturado compartilhado com o backend Django e a CLI (cópia de dialogflow_automation)
+from json_logging import configure_logging, correlation_scope, session_id_from_dialogflow
+# Prazo da requisição (o Dialogflow espera o webhook por cerca de 5 segundos)
+from deadline import WEBHOOK_DEADLINE_SECONDS, Deadline
 
-# Configuração básica de logging para monitoramento no Google Cloud Logging
-# Define o nível de log como INFO para capturar eventos importantes
-logging.basicConfig(level=logging.INFO)
+# Configuração de logging para monitoramento no Google Cloud Logging
+# LOG_MODE=text (padrão), json ou async (JSON escrito por uma thread de fundo); nível via LOG_LEVEL (INFO)
+configure_logging()
+
+# SDKs do Google Cloud: carregados em segundo plano ao iniciar a instância (padrão), para que um
+# 'abrir_chamado' no cold start não espere por eles; ver SDK_WARMUP em vertex_rag.py
+warm_up()
 
 # Decorador do Functions Framework que marca a função 'dialogflow_webhook' como ponto de entrada HTTP
 # Isso permite que a função seja acionada por requisições HTTP (POST) do Dialogflow
@@ -17,11 +27,36 @@ def dialogflow_webhook(request):
     Função principal do Webhook para o Dialogflow ES.
     Recebe a requisição JSON do Dialogflow, identifica a Intent e executa a lógica apropriada.
     """
-    
+
+    # O prazo começa a contar na chegada da requisição e é repassado à busca e à geração
+    deadline = Deadline(WEBHOOK_DEADLINE_SECONDS)
+
+    # Exposição das métricas da instância (formato de texto do Prometheus), só com METRICS_TOKEN
+    if request.method == 'GET' and request.path.rstrip('/').endswith('/metrics'):
+        if not METRICS_TOKEN:
+            return jsonify({"error": "Não encontrado."}), 404
+        if not metrics_authorized(request.headers.get('Authorization')):
+            return jsonify({"error": "Não autorizado."}), 401
+        return tracer.render_metrics(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
     # Tenta processar o corpo da requisição como JSON
     # request.get_json(silent=True) retorna None se o corpo não for JSON válido, evitando erros abruptos
     request_json = request.get_json(silent=True)
-    
+
+    # Todos os logs desta requisição levam o ID da sessão do Dialogflow (correlation_id)
+    session = request_json.get('session') if isinstance(request_json, dict) else None
+    with correlation_scope(session_id_from_dialogflow(session)):
+        return handle_dialogflow_request(request_json, deadline)
+
+
+def handle_dialogflow_request(request_json, deadline=None):
+    """
+    Identifica a Intent do WebhookRequest do Dialogflow e executa a lógica apropriada.
+
+    Args:
+        request_json (dict): Corpo do WebhookRequest.
+        deadline (Deadline, optional): Prazo da requisição (padrão: WEBHOOK_DEADLINE_SECONDS).
+    """
     # Verifica se a requisição possui corpo JSON e se contém o campo 'queryResult'
     # 'queryResult' é o objeto padrão do Dialogflow contendo os detalhes da interação
     if request_json and 'queryResult' in request_json:
@@ -42,7 +77,8 @@ def dialogflow_webhook(request):
         user_query = query_result.get('queryText')
 
         # Loga a intenção recebida para fins de depuração e monitoramento
-        logging.info(f"Intent recebida: {intent_name}")
+        # Argumentos separados: a mensagem só é formatada se o nível estiver habilitado
+        logging.info("Intent recebida: %s", intent_name)
 
         # Estrutura de decisão para rotear a lógica baseada na Intent identificada
         
@@ -51,7 +87,9 @@ def dialogflow_webhook(request):
         if intent_name == 'duvida_tecnica':
             # Chama a função auxiliar process_rag_query importada de vertex_rag.py
             # Passa a query do usuário para buscar documentos e gerar resposta com Gemini
-            response_text = process_rag_query(user_query)
+            # A sessão do Dialogflow fixa a variante do prompt (testes A/B) durante a conversa
+            session_id = session_id_from_dialogflow(request_json.get('session'))
+            response_text = process_rag_query(user_query, deadline, session_id)
             
             # Retorna a resposta formatada no padrão esperado pelo Dialogflow
             return jsonify({
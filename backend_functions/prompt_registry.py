@@ -0,0 +1,204 @@
+# Registro versionado dos prompts do Gemini (templates + configuração do modelo).
+#
+# Os prompts ficam em prompts.json (publicado junto com a função) e são carregados e
+# pré-compilados uma única vez no cold start. Para trocar o prompt ou o modelo sem novo deploy,
+# aponte PROMPTS_PATH para outro arquivo (ex: um secret do Secret Manager montado como volume);
+# se ele não puder ser lido, o arquivo publicado é usado.
+#
+# Cada variante recebe uma versão: o hash do modelo, da configuração de geração, da instrução
+# de sistema e do template. Cache de respostas, spans e métricas usam essa versão, de modo que
+# respostas de prompts diferentes nunca se misturam. Com mais de uma variante (teste A/B), a
+# escolha é determinística por sessão: a mesma conversa sempre usa a mesma variante.
+import os
+import json
+import string
+import hashlib
+import logging
+
+BUNDLED_PROMPTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts.json")
+PROMPTS_PATH = os.environ.get("PROMPTS_PATH", BUNDLED_PROMPTS_PATH)
+
+# Prompt usado pelo fluxo RAG (vertex_rag.py) e os campos aceitos no seu template
+RAG_PROMPT_ID = "rag_answer"
+RAG_PROMPT_FIELDS = ("context", "question", "history")
+
+# Tamanho do hash de versão (hexadecimal)
+VERSION_LENGTH = 12
+
+
+def prompt_version(model, generation_config, system_instruction, template):
+    """Hash estável do que define o comportamento de uma variante."""
+    canonical = json.dumps([model, generation_config, system_instruction, template],
+                           sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:VERSION_LENGTH]
+
+
+def compile_template(template, allowed_fields):
+    """
+    Pré-compila um template no formato de str.format em segmentos (texto fixo, campo).
+
+    Args:
+        template (str): Ex: 'Contexto:\\n{context}'. Chaves literais são escritas como '{{' e '}}'.
+        allowed_fields (iterable): Campos aceitos no template.
+
+    Returns:
+        tuple: Pares (texto fixo, nome do campo ou None).
+
+    Raises:
+        ValueError: Se o template for inválido ou usar campos, conversões ou formatos não suportados.
+    """
+    allowed = set(allowed_fields)
+    segments = []
+    for literal, field, format_spec, conversion in string.Formatter().parse(template):
+        if field is not None:
+            if field not in allowed:
+                raise ValueError(f"Campo desconhecido no template: {{{field}}}")
+            if format_spec or conversion:
+                raise ValueError(f"Formato não suportado no campo {{{field}}}")
+        segments.append((literal, field))
+    return tuple(segments)
+
+
+class PromptVariant:
+    """Uma variante de um prompt, já compilada e com a sua versão."""
+
+    __slots__ = ("prompt_id", "name", "weight", "model", "generation_config",
+                 "system_instruction", "template", "version", "_segments")
+
+    def __init__(self, prompt_id, name, model, template, system_instruction="",
+                 generation_config=None, weight=100, fields=RAG_PROMPT_FIELDS):
+        self.prompt_id = prompt_id
+        self.name = name
+        self.weight = int(weight)
+        self.model = model
+        self.generation_config = dict(generation_config or {})
+        self.system_instruction = system_instruction or ""
+        self.template = template
+        self.version = prompt_version(model, self.generation_config, self.system_instruction, template)
+        self._segments = compile_template(template, fields)
+        if self.weight < 0:
+            raise ValueError(f"Peso negativo na variante {name}")
+
+    def render(self, include_system_instruction=True, **values):
+        """
+        Monta o texto do prompt.
+
+        Args:
+            include_system_instruction (bool): Prefixa a instrução de sistema. Use False quando
+                ela já estiver no cache de contexto do Gemini.
+            **values: Valores dos campos do template (ex: context=..., question=...).
+
+        Returns:
+            str: Prompt final. A instrução de sistema (fixa) vem sempre primeiro.
+        """
+        parts = [self.system_instruction, "\n\n"] if include_system_instruction and self.system_instruction else []
+        for literal, field in self._segments:
+            parts.append(literal)
+            if field is not None:
+                parts.append(str(values.get(field, "")))
+        return "".join(parts)
+
+    def __repr__(self):
+        return f"PromptVariant({self.prompt_id}/{self.name}@{self.version})"
+
+
+class PromptRegistry:
+    """Prompts disponíveis e a seleção (determinística por sessão) entre as suas variantes."""
+
+    def __init__(self, prompts, source=None):
+        """
+        Args:
+            prompts (dict): {prompt_id: [PromptVariant, ...]}. A primeira variante é o controle.
+            source (str, optional): Arquivo de origem (logs).
+
+        Raises:
+            ValueError: Se algum prompt não tiver variantes com peso positivo.
+        """
+        self.source = source
+        self._variants = {}
+        for prompt_id, variants in prompts.items():
+            active = [variant for variant in variants if variant.weight > 0]
+            if not active:
+                raise ValueError(f"O prompt {prompt_id} não tem variantes ativas")
+            self._variants[prompt_id] = (tuple(active), sum(variant.weight for variant in active))
+
+    @classmethod
+    def from_dict(cls, data, source=None):
+        prompts = {}
+        for prompt_id, spec in data.get("prompts", {}).items():
+            fields = spec.get("fields", RAG_PROMPT_FIELDS)
+            prompts[prompt_id] = [
+                PromptVariant(prompt_id, variant["name"], variant["model"], variant["template"],
+                              system_instruction=variant.get("system_instruction", ""),
+                              generation_config=variant.get("generation_config"),
+                              weight=variant.get("weight", 100), fields=fields)
+                for variant in spec.get("variants", [])
+            ]
+        return cls(prompts, source)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Raises:
+            OSError: Se o arquivo não puder ser lido.
+            ValueError: Se o JSON ou algum template for inválido.
+            KeyError: Se faltar um campo obrigatório de variante.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f), source=path)
+
+    def variants(self, prompt_id):
+        return self._variants[prompt_id][0]
+
+    def get(self, prompt_id, name):
+        for variant in self.variants(prompt_id):
+            if variant.name == name:
+                return variant
+        raise KeyError(f"Variante {name} não encontrada em {prompt_id}")
+
+    def select(self, prompt_id, session_id=None):
+        """
+        Escolhe a variante de um prompt para uma sessão, proporcionalmente aos pesos.
+
+        Args:
+            prompt_id (str): Ex: 'rag_answer'.
+            session_id (str, optional): ID da sessão do Dialogflow. Sem sessão, usa o controle.
+
+        Returns:
+            PromptVariant: Sempre a mesma variante para o mesmo par (prompt, sessão).
+        """
+        variants, total = self._variants[prompt_id]
+        if len(variants) == 1 or not session_id:
+            return variants[0]
+        digest = hashlib.sha256(f"{prompt_id}:{session_id}".encode("utf-8")).digest()
+        bucket = int.from_bytes(digest[:8], "big") % total
+        for variant in variants:
+            bucket -= variant.weight
+            if bucket < 0:
+                return variant
+        return variants[-1]
+
+    def versions(self):
+        """{prompt_id: {variante: versão}} (logs de cold start e depuração)."""
+        return {prompt_id: {variant.name: variant.version for variant in variants}
+                for prompt_id, (variants, _) in self._variants.items()}
+
+
+def load_registry(path=PROMPTS_PATH):
+    """
+    Carrega o registro de PROMPTS_PATH; se falhar, usa o prompts.json publicado com a função.
+
+    Raises:
+        OSError, ValueError, KeyError: Se nem o arquivo publicado puder ser carregado.
+    """
+    if path != BUNDLED_PROMPTS_PATH:
+        try:
+            return PromptRegistry.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            logging.error("Prompts inválidos em %s, usando os publicados: %s", path, e)
+    return PromptRegistry.load(BUNDLED_PROMPTS_PATH)
+
+
+# Carregado e compilado uma única vez por instância
+registry = load_registry()
+logging.info("Prompts carregados de %s: %s", registry.source, registry.versions())
@@ -0,0 +1,154 @@
+# Recuperação de trechos para o RAG: interface comum e implementações plugáveis.
+#
+# Modo escolhido pela variável de ambiente RETRIEVER_MODE:
+# - vertex: apenas Vertex AI Search (padrão; comportamento anterior).
+# - local:  apenas o índice vetorial local (LOCAL_INDEX_DIR), sem chamadas ao GCP (dev e CI).
+# - tiered: consulta o índice local primeiro e só chama o Vertex AI Search quando o melhor
+#           trecho local fica abaixo de LOCAL_MIN_SCORE. Se o Vertex AI Search falhar (ou não
+#           responder dentro do prazo), os trechos locais encontrados são usados como fallback.
+import os
+import time
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+from context_builder import Snippet
+from local_index import LocalIndex
+
+RETRIEVER_MODE = os.environ.get("RETRIEVER_MODE", "vertex").lower()
+# Diretório do índice local (gerado por ingest.py e publicado junto com a função)
+LOCAL_INDEX_DIR = os.environ.get(
+    "LOCAL_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_index"))
+# Similaridade de cosseno mínima do melhor trecho local para dispensar a busca remota
+LOCAL_MIN_SCORE = float(os.environ.get("LOCAL_MIN_SCORE", "0.35"))
+# Espera antes de tentar carregar de novo um índice local que falhou; dobra a cada falha
+# seguida, até LOCAL_INDEX_RETRY_MAX (segundos)
+LOCAL_INDEX_RETRY_SECONDS = float(os.environ.get("LOCAL_INDEX_RETRY_SECONDS", "5"))
+LOCAL_INDEX_RETRY_MAX = float(os.environ.get("LOCAL_INDEX_RETRY_MAX", "300"))
+
+
+class RetrievalResult:
+    """Trechos recuperados e a origem (usados nos spans)."""
+
+    def __init__(self, snippets, tier, results=None):
+        self.snippets = snippets
+        self.tier = tier
+        # Documentos (Vertex AI Search) ou chunks (índice local) retornados
+        self.results = len(snippets) if results is None else results
+
+
+class Retriever(ABC):
+    """Interface dos recuperadores de trechos."""
+
+    name = "base"
+
+    @abstractmethod
+    def retrieve(self, query, k=5, deadline=None):
+        """
+        Args:
+            query (str): Pergunta do usuário.
+            k (int): Número de resultados desejados.
+            deadline (Deadline, optional): Prazo da requisição (recuperadores remotos param de
+                esperar quando ele acaba e levantam DeadlineExceeded).
+
+        Returns:
+            RetrievalResult: Snippets (context_builder.Snippet) com a pontuação de relevância.
+        """
+
+
+class LocalRetriever(Retriever):
+    """
+    Busca no índice vetorial local. O índice é carregado (com mmap) na primeira consulta;
+    se não existir ou for inválido, o recuperador retorna listas vazias e tenta carregar de
+    novo após um intervalo crescente (uma falha de E/S passageira não o desativa até o restart).
+    """
+
+    name = "local"
+
+    def __init__(self, index_dir=LOCAL_INDEX_DIR, index=None, retry_seconds=LOCAL_INDEX_RETRY_SECONDS,
+                 retry_max=LOCAL_INDEX_RETRY_MAX, clock=time.monotonic):
+        self.index_dir = index_dir
+        self._index = index
+        self.retry_seconds = retry_seconds
+        self.retry_max = retry_max
+        self._clock = clock
+        self._failures = 0
+        self._retry_at = None
+        self._lock = threading.Lock()
+
+    def _can_load(self):
+        return self._index is None and (self._retry_at is None or self._clock() >= self._retry_at)
+
+    def get_index(self):
+        if self._can_load():
+            with self._lock:
+                if self._can_load():
+                    try:
+                        self._index = LocalIndex.load(self.index_dir)
+                        logging.info("Índice local carregado: %d chunks (%s)",
+                                     len(self._index), self.index_dir)
+                    except (OSError, ValueError, RuntimeError) as e:
+                        delay = min(self.retry_seconds * 2 ** self._failures, self.retry_max)
+                        self._failures += 1
+                        self._retry_at = self._clock() + delay
+                        logging.warning("Índice local indisponível (%s), nova tentativa em %.0fs: %s",
+                                        self.index_dir, delay, e)
+        return self._index
+
+    def retrieve(self, query, k=5, deadline=None):
+        index = self.get_index()
+        if index is None:
+            return RetrievalResult([], self.name)
+        snippets = [Snippet(chunk["text"], score) for score, chunk in index.search(query, k)]
+        return RetrievalResult(snippets, self.name)
+
+
+class TieredRetriever(Retriever):
+    """Índice local como camada rápida na frente de um recuperador remoto."""
+
+    name = "tiered"
+
+    def __init__(self, local, remote, min_score=LOCAL_MIN_SCORE):
+        self.local = local
+        self.remote = remote
+        self.min_score = min_score
+
+    def retrieve(self, query, k=5, deadline=None):
+        try:
+            local_result = self.local.retrieve(query, k, deadline)
+        except Exception as e:
+            logging.warning("Falha no índice local, usando a busca remota: %s", e)
+            local_result = RetrievalResult([], self.local.name)
+
+        snippets = local_result.snippets
+        if snippets and snippets[0].score >= self.min_score:
+            return local_result
+
+        try:
+            return self.remote.retrieve(query, k, deadline)
+        except Exception as e:
+            if not snippets:
+                raise
+            logging.warning("Falha na busca remota, usando %d trechos locais: %s", len(snippets), e)
+            return local_result
+
+
+def build_retriever(remote, mode=None, index_dir=None):
+    """
+    Monta o recuperador configurado em RETRIEVER_MODE.
+
+    Args:
+        remote (Retriever): Recuperador remoto (Vertex AI Search).
+        mode (str, optional): 'vertex', 'local' ou 'tiered'. Padrão: RETRIEVER_MODE.
+        index_dir (str, optional): Diretório do índice local. Padrão: LOCAL_INDEX_DIR.
+    """
+    mode = mode or RETRIEVER_MODE
+    if mode == "vertex":
+        return remote
+    local = LocalRetriever(index_dir or LOCAL_INDEX_DIR)
+    if mode == "local":
+        return local
+    if mode == "tiered":
+        return TieredRetriever(local, remote)
+    logging.warning("RETRIEVER_MODE desconhecido (%s); usando Vertex AI Search", mode)
+    return remote
@@ -0,0 +1,131 @@
+# Coalescência de chamadas idênticas simultâneas ("single-flight").
+#
+# Em incidentes, muitos usuários fazem a mesma pergunta em poucos segundos. Com single-flight,
+# a primeira requisição de uma chave (pergunta normalizada + versão do prompt) executa a busca e
+# a geração, e as que chegam enquanto ela está em andamento esperam e recebem o mesmo resultado.
+# Nada é guardado depois que a chamada termina (para isso existe o answer_cache).
+import asyncio
+import threading
+
+from deadline import DeadlineExceeded
+
+
+class _Call:
+    """Chamada em andamento: resultado (ou erro) compartilhado com quem chegar depois."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Single-flight para threads (uma chamada em andamento por chave e por instância)."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        # Execuções reais e requisições atendidas pelo resultado de outra
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key, fn, deadline=None):
+        """
+        Executa fn() uma única vez para chamadas simultâneas com a mesma chave.
+
+        Args:
+            key: Chave da chamada (hashable).
+            fn (callable): Chamada sem argumentos.
+            deadline (Deadline, optional): Prazo de quem espera o resultado de outra requisição.
+
+        Returns:
+            tuple: (resultado, True se veio da chamada de outra requisição).
+
+        Raises:
+            DeadlineExceeded: Se o prazo acabar antes de a chamada compartilhada terminar.
+            Exception: O erro de fn(), repassado a todas as requisições que a aguardavam.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            return call.result, False
+
+        if not call.done.wait(deadline.remaining() if deadline is not None else None):
+            raise DeadlineExceeded("Chamada compartilhada não terminou dentro do prazo")
+        if call.error is not None:
+            raise call.error
+        return call.result, True
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """Single-flight para asyncio (um event loop). A chamada roda numa task compartilhada."""
+
+    def __init__(self):
+        self._tasks = {}
+        self.executions = 0
+        self.shared = 0
+
+    async def do(self, key, coro_fn, deadline=None):
+        """
+        Aguarda coro_fn() uma única vez para chamadas simultâneas com a mesma chave.
+
+        Se a requisição que iniciou a chamada for cancelada, a task continua para as demais.
+
+        Args:
+            key: Chave da chamada (hashable).
+            coro_fn (callable): Função sem argumentos que retorna uma coroutine.
+            deadline (Deadline, optional): Prazo desta requisição.
+
+        Returns:
+            tuple: (resultado, True se veio da chamada de outra requisição).
+
+        Raises:
+            DeadlineExceeded: Se o prazo acabar antes de a chamada terminar.
+        """
+        task = self._tasks.get(key)
+        shared = task is not None
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(coro_fn())
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+            self.executions += 1
+        else:
+            self.shared += 1
+
+        try:
+            result = await asyncio.wait_for(
+                asyncio.shield(task), deadline.remaining() if deadline is not None else None)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("Chamada compartilhada não terminou dentro do prazo") from None
+        return result, shared
+
+    def _finish(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Marca a exceção como lida mesmo que todas as requisições tenham desistido
+            task.exception()
+
+    def in_flight(self):
+        return len(self._tasks)
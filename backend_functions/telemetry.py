@@ -0,0 +1,300 @@
+# Instrumentação de latência do webhook RAG (spans + histogramas).
+#
+# - Spans seguem o modelo de dados do OpenTelemetry (trace_id/span_id em hex, tempos em
+#   nanossegundos Unix, atributos e status) e podem ser exportados para o log estruturado
+#   (Cloud Logging / Cloud Trace) ou para memória (testes).
+# - Durações alimentam histogramas no formato de exposição do Prometheus.
+# - Com TRACING_ENABLED desligado, span() devolve um objeto nulo compartilhado: nenhum
+#   relógio é lido, nenhum objeto é alocado e nenhuma métrica é registrada.
+import os
+import hmac
+import json
+import time
+import random
+import logging
+import threading
+from contextlib import contextmanager
+
+# Habilita a instrumentação (desligada por padrão para custo zero)
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "false").lower() == "true"
+# Exportador de spans: 'log' (JSON no logging) ou 'memory' (testes)
+TRACING_EXPORTER = os.environ.get("TRACING_EXPORTER", "log")
+# Token exigido em GET /metrics ('Authorization: Bearer <token>'). A função é pública: sem o
+# token configurado, a rota fica desativada (404)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# Buckets padrão (segundos) adequados ao orçamento de ~5s do Dialogflow
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1,
+                           0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Buckets para contagens (tokens, caracteres de contexto)
+DEFAULT_SIZE_BUCKETS = (10, 50, 100, 250, 500, 1000,
+                        2500, 5000, 10000, 25000)
+
+
+class _NoopSpan:
+    """Span nulo usado quando a instrumentação está desligada."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Span finalizado/ativo compatível com o modelo de dados do OpenTelemetry."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "start_time_unix_nano",
+                 "end_time_unix_nano", "attributes", "status", "_start_perf")
+
+    def __init__(self, name, trace_id, parent_span_id, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_span_id = parent_span_id
+        self.attributes = dict(attributes)
+        self.status = "UNSET"
+        self.start_time_unix_nano = time.time_ns()
+        self.end_time_unix_nano = None
+        self._start_perf = time.perf_counter()
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration_seconds(self):
+        if self.end_time_unix_nano is None:
+            return None
+        return (self.end_time_unix_nano - self.start_time_unix_nano) / 1e9
+
+    def to_dict(self):
+        """Representação no formato OTLP/JSON simplificado."""
+        return {
+            "name": self.name,
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id,
+            "startTimeUnixNano": self.start_time_unix_nano,
+            "endTimeUnixNano": self.end_time_unix_nano,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+class InMemorySpanExporter:
+    """Exportador local que guarda os spans finalizados (usado em testes)."""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def get_finished_spans(self, name=None):
+        with self._lock:
+            return [s for s in self.spans if name is None or s.name == name]
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+
+class LoggingSpanExporter:
+    """
+    Exporta cada span como uma linha JSON no logging.
+    O campo 'logging.googleapis.com/trace' permite correlacionar no Cloud Logging.
+    """
+
+    def __init__(self, logger_name="telemetry"):
+        self.logger = logging.getLogger(logger_name)
+
+    def export(self, span):
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(json.dumps(
+                {"span": span.to_dict(), "logging.googleapis.com/trace": span.trace_id}, default=str))
+
+
+class Histogram:
+    """
+    Histograma cumulativo no estilo Prometheus, com rótulos.
+    Seguro para uso concorrente entre threads da mesma instância.
+    """
+
+    def __init__(self, name, description, label_names=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [contagens por bucket..., +Inf], soma
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            series[1] += value
+
+    def snapshot(self):
+        """Retorna {rótulos: (contagens cumulativas por bucket, contagem total, soma)}."""
+        with self._lock:
+            result = {}
+            for key, (counts, total) in self._series.items():
+                cumulative, running = [], 0
+                for count in counts:
+                    running += count
+                    cumulative.append(running)
+                result[key] = (cumulative, running, total)
+            return result
+
+    def render(self):
+        """Gera o texto no formato de exposição do Prometheus."""
+        lines = [f"# HELP {self.name} {self.description}",
+                 f"# TYPE {self.name} histogram"]
+        for key, (cumulative, count, total) in sorted(self.snapshot().items()):
+            base = [f'{n}="{v}"' for n, v in zip(self.label_names, key)]
+            for bound, value in zip(self.buckets + ("+Inf",), cumulative):
+                labels = ",".join(base + [f'le="{bound}"'])
+                lines.append(f"{self.name}_bucket{{{labels}}} {value}")
+            suffix = f"{{{','.join(base)}}}" if base else ""
+            lines.append(f"{self.name}_count{suffix} {count}")
+            lines.append(f"{self.name}_sum{suffix} {total}")
+        return "\n".join(lines)
+
+
+class Tracer:
+    """
+    Cria spans aninhados (por thread) e registra suas durações em histogramas.
+    """
+
+    def __init__(self, enabled=TRACING_ENABLED, exporter=None):
+        self.enabled = enabled
+        self.exporter = exporter or _build_exporter(TRACING_EXPORTER)
+        self._local = threading.local()
+        self.span_duration = Histogram(
+            "rag_span_duration_seconds",
+            "Duração das etapas do webhook RAG",
+            label_names=("span", "status"))
+        self.sizes = Histogram(
+            "rag_payload_size",
+            "Tamanhos observados (tokens, snippets, caracteres de contexto)",
+            label_names=("metric",),
+            buckets=DEFAULT_SIZE_BUCKETS)
+        # Geração e tokens por versão de prompt (ver prompt_registry.py), para comparar variantes
+        self.prompt_generation = Histogram(
+            "rag_prompt_generation_seconds",
+            "Duração da geração do Gemini por versão de prompt",
+            label_names=("prompt", "version", "status"))
+        self.prompt_tokens = Histogram(
+            "rag_prompt_tokens",
+            "Tokens de entrada e saída do Gemini por versão de prompt",
+            label_names=("prompt", "version", "kind"),
+            buckets=DEFAULT_SIZE_BUCKETS)
+
+    def span(self, name, **attributes):
+        """
+        Abre um span. Uso: `with tracer.span("rag.search", page_size=5) as span: ...`
+
+        Com a instrumentação desligada retorna NOOP_SPAN (custo praticamente nulo).
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return self._span(name, attributes)
+
+    @contextmanager
+    def _span(self, name, attributes):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        parent = stack[-1] if stack else None
+        trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        span = Span(name, trace_id, parent.span_id if parent else None, attributes)
+        stack.append(span)
+        try:
+            yield span
+            if span.status == "UNSET":
+                span.status = "OK"
+        except Exception as e:
+            span.status = "ERROR"
+            span.attributes["exception.type"] = type(e).__name__
+            raise
+        finally:
+            stack.pop()
+            elapsed = time.perf_counter() - span._start_perf
+            span.end_time_unix_nano = span.start_time_unix_nano + int(elapsed * 1e9)
+            self.span_duration.observe(elapsed, span=name, status=span.status)
+            self.exporter.export(span)
+
+    def record_size(self, metric, value):
+        """Registra um tamanho (ex: tokens do prompt) no histograma de tamanhos."""
+        if self.enabled and value is not None:
+            self.sizes.observe(value, metric=metric)
+
+    def record_generation(self, variant, seconds, status):
+        """Registra a duração de uma geração com a variante de prompt (PromptVariant) usada."""
+        if self.enabled:
+            self.prompt_generation.observe(seconds, prompt=variant.prompt_id,
+                                           version=variant.version, status=status)
+
+    def record_prompt_tokens(self, variant, kind, value):
+        """Registra tokens ('prompt' ou 'output') de uma geração com a variante usada."""
+        if self.enabled and value is not None:
+            self.prompt_tokens.observe(value, prompt=variant.prompt_id,
+                                       version=variant.version, kind=kind)
+
+    def render_metrics(self):
+        """Métricas de todos os histogramas no formato de exposição do Prometheus."""
+        histograms = (self.span_duration, self.sizes, self.prompt_generation, self.prompt_tokens)
+        return "\n".join(histogram.render() for histogram in histograms) + "\n"
+
+
+def _build_exporter(kind):
+    if kind == "memory":
+        return InMemorySpanExporter()
+    return LoggingSpanExporter()
+
+
+def metrics_authorized(authorization, token=None):
+    """
+    Verifica o header Authorization de GET /metrics em tempo constante.
+
+    Args:
+        authorization (str): Valor do header (None se ausente).
+        token (str, optional): Token esperado (padrão: METRICS_TOKEN).
+
+    Returns:
+        bool: False também quando não há token configurado (rota desativada).
+    """
+    token = token if token is not None else METRICS_TOKEN
+    if not token:
+        return False
+    return hmac.compare_digest((authorization or "").encode("utf-8"), f"Bearer {token}".encode("utf-8"))
+
+
+# Tracer global da instância (configurado por variáveis de ambiente)
+tracer = Tracer()
@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+# Os módulos da Cloud Function são importados diretamente (layout plano do diretório)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Mock das bibliotecas do Google Cloud antes de importar vertex_rag
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.cloud", MagicMock())
+sys.modules.setdefault("google.cloud.discoveryengine_v1", MagicMock())
+sys.modules.setdefault("vertexai", MagicMock())
+sys.modules.setdefault("vertexai.generative_models", MagicMock())
+
+import vertex_rag
+from answer_cache import AnswerCache
+from answer_pack import AnswerPack, LazyAnswerPack, build_pack, read_history, select_answers
+from deadline import Deadline, Hedger
+from telemetry import InMemorySpanExporter, Tracer
+
+RESTART = "Acesse o painel, abra Servidores e clique em Reiniciar."
+VPN = "Instale o cliente da VPN pelo portal e entre com o usuário da rede."
+
+
+class TestAnswerPack(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, "answer_pack.bin")
+
+    def build(self, entries):
+        build_pack(entries, self.path)
+        pack = AnswerPack.open(self.path)
+        self.addCleanup(pack.buffer.close)
+        return pack
+
+    def test_lookup_normalized_and_reordered_questions(self):
+        pack = self.build([("Como reinicio o servidor?", RESTART, 10), ("Como configuro a VPN?", VPN, 3)])
+        self.assertEqual(len(pack), 4)
+        self.assertEqual(pack.lookup("como reinicio o servidor"), RESTART)
+        self.assertEqual(pack.lookup("COMO REINICIO O SERVIDOR?!"), RESTART)
+        self.assertEqual(pack.lookup("Servidor: como reinicio?"), RESTART)
+        self.assertEqual(pack.lookup("Como configuro a VPN"), VPN)
+        self.assertIsNone(pack.lookup("Como troco a senha?"))
+        self.assertIsNone(pack.lookup(""))
+
+    def test_negation_is_part_of_the_key(self):
+        """Sem a negação na chave, a pergunta oposta receberia a resposta errada"""
+        not_restarting = "Verifique os logs do serviço antes de reiniciar."
+        pack = self.build([("O servidor não reinicia", not_restarting, 5), ("Como reinicio o servidor?", RESTART, 10)])
+        self.assertIsNone(pack.lookup("o servidor reinicia"))
+        self.assertEqual(pack.lookup("Não reinicia, o servidor"), not_restarting)
+        self.assertIsNone(pack.lookup("Como nunca reinicio o servidor?"))
+
+    def test_repeated_answers_are_stored_once(self):
+        self.build([("Como reinicio o servidor?", RESTART, 2), ("Reiniciar o servidor", RESTART, 1)])
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read().count(RESTART.encode("utf-8")), 1)
+
+    def test_invalid_files_are_rejected(self):
+        with open(self.path, "wb") as f:
+            f.write(b"XXXX" + bytes(8))
+        with self.assertRaises(ValueError):
+            AnswerPack.open(self.path)
+        self.assertIsNone(LazyAnswerPack(os.path.join(self.tmp, "ausente.bin")).lookup("pergunta"))
+
+    def test_select_top_questions_from_history(self):
+        history_path = os.path.join(self.tmp, "historico.jsonl")
+        records = [
+            {"question": "Como reinicio o servidor?", "answer": "Resposta antiga"},
+            {"queryResult": {"queryText": "como reinicio o servidor", "fulfillmentText": RESTART}},
+            {"question": "Como configuro a VPN?", "answer": VPN},
+            {"question": "Pergunta rara", "answer": "Rara", "count": 1},
+        ]
+        # A mesma mensagem genérica para várias perguntas diferentes não entra no pacote
+        records += [{"question": f"Pergunta {i}", "answer": "Desculpe, não encontrei."} for i in range(6)]
+        with open(history_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+        selected = select_answers(read_history(history_path), top_n=2)
+        self.assertEqual([(answer, count) for _, answer, count in selected], [(RESTART, 2), (VPN, 1)])
+
+
+class TestRagAnswerPackFallback(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        path = os.path.join(self.tmp, "answer_pack.bin")
+        build_pack([("Como reinicio o servidor?", RESTART, 10)], path)
+
+        self.exporter = InMemorySpanExporter()
+        self.patches = {
+            "tracer": Tracer(enabled=True, exporter=self.exporter),
+            "answer_cache": AnswerCache(),
+            "answer_pack": LazyAnswerPack(path),
+            "search_hedger": Hedger("rag.search", default_delay=1.0, max_ratio=0),
+            "generate_hedger": Hedger("rag.generate", default_delay=1.0, max_ratio=0),
+        }
+        self.originals = {name: getattr(vertex_rag, name) for name in self.patches}
+        for name, value in self.patches.items():
+            setattr(vertex_rag, name, value)
+
+        result = MagicMock()
+        result.document.derived_struct_data = {"snippets": [{"snippet": "Reinicie pelo painel."}]}
+        self.search = vertex_rag.discoveryengine.SearchServiceClient.return_value.search
+        self.search.reset_mock(side_effect=True)
+        self.search.return_value.results = [result]
+        self.generate = vertex_rag.GenerativeModel.return_value.generate_content
+        self.generate.reset_mock(side_effect=True)
+
+    def tearDown(self):
+        for name, value in self.originals.items():
+            setattr(vertex_rag, name, value)
+        self.search.side_effect = None
+        self.generate.side_effect = None
+
+    def test_gemini_outage_returns_precomputed_answer(self):
+        self.generate.side_effect = RuntimeError("503 Service Unavailable")
+        with self.assertLogs(level="ERROR"):
+            answer = vertex_rag.process_rag_query("como reinicio o servidor", Deadline(3.0))
+        self.assertEqual(answer, RESTART)
+        fallback = self.exporter.get_finished_spans("rag.fallback")[0]
+        self.assertEqual(fallback.attributes["source"], "answer_pack")
+
+    def test_search_outage_without_pack_answer_keeps_error_message(self):
+        self.search.side_effect = RuntimeError("403 Permission denied")
+        with self.assertLogs(level="ERROR"):
+            answer = vertex_rag.process_rag_query("Como troco a senha?", Deadline(3.0))
+        self.assertEqual(answer, vertex_rag.SEARCH_ERROR_MESSAGE)
+        self.generate.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
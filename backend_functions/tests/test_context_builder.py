@@ -0,0 +1,120 @@
+import json
+import os
+import sys
+import unittest
+
+# Os módulos da Cloud Function são importados diretamente (layout plano do diretório)
+FUNCTIONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FUNCTIONS_DIR)
+
+from context_builder import (
+    MIN_TRUNCATED_TOKENS,
+    Snippet,
+    build_context,
+    estimate_tokens,
+    rank_score,
+    shingles,
+)
+
+RECORDED_QUERIES = os.path.join(
+    os.path.dirname(FUNCTIONS_DIR), "benchmarks", "data", "recorded_queries.json")
+
+BOILERPLATE = ("Este documento é de uso interno da Nexus. Não distribua sem autorização "
+               "prévia da equipe de TI.")
+
+
+class TestContextBuilder(unittest.TestCase):
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("a" * 400), 100)
+        # Muitas palavras curtas: conta pelo menos um token por palavra
+        self.assertEqual(estimate_tokens("a b c d e f"), 6)
+
+    def test_shingles_are_normalized(self):
+        self.assertEqual(shingles("Reinicie o Servidor, agora!"), shingles("reinicie o servidor agora"))
+        self.assertEqual(len(shingles("um dois")), 1)
+
+    def test_near_duplicates_are_removed(self):
+        """Avisos repetidos com pequenas variações entram apenas uma vez"""
+        result = build_context([
+            Snippet("Reinicie pelo painel em Serviços > Arquivos.", rank_score(0)),
+            Snippet(f"{BOILERPLATE} Revisão 3.", rank_score(0, 1)),
+            Snippet(f"{BOILERPLATE} Revisão 4.", rank_score(1)),
+            Snippet(f"Nota: {BOILERPLATE}", rank_score(2)),
+        ])
+        self.assertEqual(result.duplicates, 2)
+        self.assertEqual(result.text.count("uso interno"), 1)
+
+    def test_snippet_combining_kept_boilerplate_is_removed(self):
+        first = "Em caso de dúvidas, abra um chamado no portal de suporte."
+        result = build_context([
+            Snippet(BOILERPLATE, 1.0),
+            Snippet(first, 0.9),
+            Snippet(f"{BOILERPLATE} {first}", 0.5),
+        ])
+        self.assertEqual(result.snippets, [BOILERPLATE, first])
+        self.assertEqual(result.duplicates, 1)
+
+    def test_orders_by_score_and_keeps_search_order_on_ties(self):
+        result = build_context([
+            Snippet("terceiro resultado sobre impressoras", rank_score(2)),
+            Snippet("primeiro resultado sobre a VPN", rank_score(0)),
+            Snippet("segundo trecho do primeiro resultado", rank_score(0, 1)),
+            Snippet("empate A com texto diferente", 0.1),
+            Snippet("empate B com outro texto", 0.1),
+        ])
+        self.assertEqual(result.snippets, [
+            "primeiro resultado sobre a VPN",
+            "segundo trecho do primeiro resultado",
+            "terceiro resultado sobre impressoras",
+            "empate A com texto diferente",
+            "empate B com outro texto",
+        ])
+
+    def test_budget_truncates_one_snippet_and_drops_the_rest(self):
+        snippets = [Snippet(" ".join(f"doc{i}palavra{j}" for j in range(200)), 1.0 - i * 0.1)
+                    for i in range(3)]
+        budget = estimate_tokens(snippets[0].text) + MIN_TRUNCATED_TOKENS + 10
+
+        result = build_context(snippets, token_budget=budget)
+
+        self.assertEqual(len(result.snippets), 2)
+        self.assertEqual(result.truncated, 1)
+        self.assertEqual(result.over_budget, 1)
+        self.assertTrue(result.snippets[1].endswith("…"))
+        self.assertLessEqual(result.tokens, budget + len(result.snippets))
+
+    def test_small_remaining_budget_is_not_used_for_truncation(self):
+        text = " ".join(f"palavra{i}" for i in range(100))
+        other = " ".join(f"outra{i}" for i in range(100))
+        result = build_context([Snippet(text, 1.0), Snippet(other, 0.5)],
+                               token_budget=estimate_tokens(text) + MIN_TRUNCATED_TOKENS - 1)
+        self.assertEqual(result.snippets, [text])
+        self.assertEqual((result.truncated, result.over_budget), (0, 1))
+
+    def test_empty_snippets_are_ignored(self):
+        result = build_context([Snippet("", 1.0), Snippet("   ", 0.5)])
+        self.assertEqual(result.text, "")
+        self.assertEqual(result.tokens, 0)
+
+    def test_recorded_queries_keep_expected_facts(self):
+        """Com o orçamento padrão, o contexto encolhe sem perder os fatos da resposta"""
+        with open(RECORDED_QUERIES, "r", encoding="utf-8") as f:
+            queries = json.load(f)["queries"]
+
+        for item in queries:
+            with self.subTest(query=item["query"]):
+                snippets = [Snippet(text, rank_score(rank, position))
+                            for rank, texts in enumerate(item["results"])
+                            for position, text in enumerate(texts)]
+                legacy = "".join(s.text + "\n" for s in snippets)
+
+                result = build_context(snippets, token_budget=1500)
+
+                self.assertLess(result.tokens, estimate_tokens(legacy))
+                for fact in item["expected_facts"]:
+                    self.assertIn(fact, result.text)
+
+
+if __name__ == "__main__":
+    unittest.main()
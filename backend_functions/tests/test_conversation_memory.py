@@ -0,0 +1,158 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+# Os módulos da Cloud Function são importados diretamente (layout plano do diretório)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Mock das bibliotecas do Google Cloud antes de importar vertex_rag
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.cloud", MagicMock())
+sys.modules.setdefault("google.cloud.discoveryengine_v1", MagicMock())
+sys.modules.setdefault("vertexai", MagicMock())
+sys.modules.setdefault("vertexai.generative_models", MagicMock())
+
+import vertex_rag
+from answer_cache import AnswerCache
+from conversation_memory import (ConversationMemory, LocalMemoryStore, RedisMemoryStore,
+                                 format_history)
+from deadline import Deadline
+from telemetry import InMemorySpanExporter, Tracer
+
+RESTART = "Para reiniciar o servidor, acesse o painel e clique em Reiniciar. O processo leva dois minutos."
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+class TestConversationMemory(unittest.TestCase):
+    def test_ring_keeps_last_turns_and_their_snippets(self):
+        memory = ConversationMemory(max_turns=2)
+        memory.add_turn("p1", "r1", ["trecho 1"])
+        memory.add_turn("p2", "r2", ["trecho 2"])
+        memory.add_turn("p3", "r3", ["trecho 2", "trecho 3"])
+        self.assertEqual([turn.query for turn in memory.turns], ["p2", "p3"])
+        self.assertEqual(sorted(memory.snippets.values()), ["trecho 2", "trecho 3"])
+
+    def test_new_question_is_searched_unchanged(self):
+        memory = ConversationMemory()
+        memory.add_turn("Como reinicio o servidor?", "Pelo painel.", [RESTART])
+        plan = memory.plan("Como configuro a VPN no notebook?")
+        self.assertFalse(plan.follow_up)
+        self.assertIsNone(plan.snippets)
+        self.assertEqual(plan.search_query, "Como configuro a VPN no notebook?")
+
+    def test_follow_up_reuses_snippets_when_they_cover_the_question(self):
+        memory = ConversationMemory()
+        memory.add_turn("Como reinicio o servidor?", "Pelo painel.", [RESTART])
+
+        plan = memory.plan("E isso leva quantos minutos?")
+        self.assertTrue(plan.follow_up)
+        self.assertEqual([s.text for s in plan.snippets], [RESTART])
+
+        plan = memory.plan("E no Windows?")
+        self.assertIsNone(plan.snippets)
+        self.assertEqual(plan.search_query, "Como reinicio o servidor? E no Windows?")
+        self.assertIn("Usuário: Como reinicio o servidor?", format_history(plan.history))
+
+    def test_compressed_round_trip(self):
+        memory = ConversationMemory()
+        memory.add_turn("Como reinicio o servidor?", "Pelo painel. " * 100, [RESTART] * 3, now=10.0)
+        raw = memory.to_bytes()
+        restored = ConversationMemory.from_bytes(raw)
+        self.assertEqual(restored.turns[0].query, "Como reinicio o servidor?")
+        self.assertEqual(len(restored.turns[0].answer), 400)
+        self.assertEqual(list(restored.snippets.values()), [RESTART])
+        self.assertLess(len(raw), 300)
+
+
+class TestMemoryStores(unittest.TestCase):
+    def test_local_store_ttl_and_lru(self):
+        clock = FakeClock()
+        store = LocalMemoryStore(ttl=10, max_sessions=2, clock=clock)
+        for session in ("a", "b", "c"):
+            store.put(session, ConversationMemory())
+        self.assertIsNone(store.get("a"))
+        self.assertIsNotNone(store.get("c"))
+        clock.now = 11
+        self.assertIsNone(store.get("c"))
+
+    def test_redis_store(self):
+        store = RedisMemoryStore(FakeRedis(), ttl=60)
+        memory = ConversationMemory()
+        memory.add_turn("p", "r", ["t"])
+        store.put("abc", memory)
+        self.assertEqual(store.get("abc").turns[0].query, "p")
+
+        broken = MagicMock()
+        broken.get.side_effect = ConnectionError("recusada")
+        with self.assertLogs(level="WARNING"):
+            self.assertIsNone(RedisMemoryStore(broken).get("abc"))
+
+
+class TestRagMemory(unittest.TestCase):
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        self.patches = {
+            "tracer": Tracer(enabled=True, exporter=self.exporter),
+            "answer_cache": AnswerCache(),
+            "memory_store": LocalMemoryStore(),
+        }
+        self.originals = {name: getattr(vertex_rag, name) for name in self.patches}
+        for name, value in self.patches.items():
+            setattr(vertex_rag, name, value)
+
+        result = MagicMock()
+        result.document.derived_struct_data = {"snippets": [{"snippet": RESTART}]}
+        self.search = vertex_rag.discoveryengine.SearchServiceClient.return_value.search
+        self.search.reset_mock(side_effect=True)
+        self.search.return_value.results = [result]
+
+        generation = MagicMock()
+        generation.text = "Pelo painel, em dois minutos."
+        generation.usage_metadata = None
+        self.generate = vertex_rag.GenerativeModel.return_value.generate_content
+        self.generate.reset_mock(side_effect=True)
+        self.generate.return_value = generation
+
+    def tearDown(self):
+        for name, value in self.originals.items():
+            setattr(vertex_rag, name, value)
+
+    def test_follow_up_skips_retrieval_and_sends_history(self):
+        vertex_rag.process_rag_query("Como reinicio o servidor?", Deadline(3.0), "sessao-1")
+        vertex_rag.process_rag_query("E isso leva quantos minutos?", Deadline(3.0), "sessao-1")
+
+        self.assertEqual(self.search.call_count, 1)
+        prompt = self.generate.call_args.args[0]
+        self.assertIn("Usuário: Como reinicio o servidor?", prompt)
+        self.assertIn(RESTART, prompt)
+        memory_span = self.exporter.get_finished_spans("rag.memory")[-1]
+        self.assertEqual(memory_span.attributes["reused_snippets"], 1)
+
+    def test_sessions_do_not_share_memory(self):
+        vertex_rag.process_rag_query("Como reinicio o servidor?", Deadline(3.0), "sessao-1")
+        vertex_rag.process_rag_query("E isso leva quantos minutos?", Deadline(3.0), "sessao-2")
+        self.assertEqual(self.search.call_count, 2)
+        self.assertNotIn("Conversa anterior", self.generate.call_args.args[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
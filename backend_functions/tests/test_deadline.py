@@ -0,0 +1,183 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+# Os módulos da Cloud Function são importados diretamente (layout plano do diretório)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Mock das bibliotecas do Google Cloud antes de importar vertex_rag
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.cloud", MagicMock())
+sys.modules.setdefault("google.cloud.discoveryengine_v1", MagicMock())
+sys.modules.setdefault("vertexai", MagicMock())
+sys.modules.setdefault("vertexai.generative_models", MagicMock())
+
+import vertex_rag
+from answer_cache import AnswerCache
+from deadline import Deadline, DeadlineExceeded, Hedger, LatencyTracker
+from telemetry import InMemorySpanExporter, Tracer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline(unittest.TestCase):
+    def test_remaining_and_expired(self):
+        clock = FakeClock()
+        deadline = Deadline(2.0, clock=clock)
+        self.assertEqual(deadline.remaining(), 2.0)
+        clock.now += 2.5
+        self.assertEqual(deadline.remaining(), 0.0)
+        self.assertTrue(deadline.expired())
+        with self.assertRaises(DeadlineExceeded):
+            deadline.check("busca")
+
+    def test_latency_percentile(self):
+        tracker = LatencyTracker(window=100)
+        for i in range(1, 101):
+            tracker.add(i / 1000.0)
+        self.assertEqual(tracker.percentile(95), 0.096)
+        self.assertIsNone(LatencyTracker().percentile(95))
+
+
+class TestHedger(unittest.TestCase):
+    def test_fast_call_is_not_hedged(self):
+        hedger = Hedger("op", default_delay=0.5)
+        calls = []
+        result = hedger.call(lambda: calls.append(1) or "ok", Deadline(1.0))
+        self.assertEqual(result, "ok")
+        self.assertEqual((len(calls), hedger.hedges), (1, 0))
+
+    def test_slow_primary_is_hedged_and_hedge_wins(self):
+        hedger = Hedger("op", default_delay=0.02)
+        first_call = threading.Event()
+
+        def call():
+            if not first_call.is_set():
+                first_call.set()
+                time.sleep(0.5)
+                return "lenta"
+            return "hedge"
+
+        span = MagicMock()
+        start = time.monotonic()
+        self.assertEqual(hedger.call(call, Deadline(2.0), span), "hedge")
+        self.assertLess(time.monotonic() - start, 0.4)
+        span.set_attribute.assert_any_call("hedged", True)
+        span.set_attribute.assert_any_call("hedge_won", True)
+
+    def test_hedge_ratio_is_capped(self):
+        hedger = Hedger("op", default_delay=0.0, min_delay=0.0, max_ratio=0.1)
+        for _ in range(20):
+            hedger.call(lambda: time.sleep(0.005), Deadline(1.0))
+        self.assertLessEqual(hedger.hedges, 2)
+
+    def test_hedge_delay_follows_p95(self):
+        hedger = Hedger("op", default_delay=1.0, min_samples=10)
+        self.assertEqual(hedger.hedge_delay(), 1.0)
+        for i in range(1, 21):
+            hedger.latencies.add(i / 100.0)
+        self.assertEqual(hedger.hedge_delay(), 0.2)
+
+    def test_deadline_exceeded(self):
+        hedger = Hedger("op", default_delay=0.01, max_ratio=0)
+        with self.assertRaises(DeadlineExceeded):
+            hedger.call(lambda: time.sleep(0.3), Deadline(0.05))
+
+    def test_error_is_raised_when_all_calls_fail(self):
+        hedger = Hedger("op", default_delay=0.5)
+
+        def fail():
+            raise ValueError("503")
+
+        with self.assertRaises(ValueError):
+            hedger.call(fail, Deadline(1.0))
+
+
+class TestAnswerCache(unittest.TestCase):
+    def test_normalized_key_ttl_and_lru(self):
+        clock = FakeClock()
+        cache = AnswerCache(max_entries=2, ttl=10, clock=clock)
+        cache.put("Como reinicio o servidor?", "Pelo painel.")
+        self.assertEqual(cache.get("como reinicio o SERVIDOR"), "Pelo painel.")
+
+        cache.put("b", "2")
+        cache.put("c", "3")
+        self.assertIsNone(cache.get("Como reinicio o servidor?"))
+        self.assertEqual(cache.get("b"), "2")
+
+        clock.now += 11
+        self.assertIsNone(cache.get("c"))
+
+
+class TestRagDeadline(unittest.TestCase):
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        self.patches = {
+            "tracer": Tracer(enabled=True, exporter=self.exporter),
+            "answer_cache": AnswerCache(),
+            "search_hedger": Hedger("rag.search", default_delay=1.0, max_ratio=0),
+            "generate_hedger": Hedger("rag.generate", default_delay=1.0, max_ratio=0),
+        }
+        self.originals = {name: getattr(vertex_rag, name) for name in self.patches}
+        for name, value in self.patches.items():
+            setattr(vertex_rag, name, value)
+
+        result = MagicMock()
+        result.document.derived_struct_data = {"snippets": [{"snippet": "Reinicie pelo painel."}]}
+        self.search_client = MagicMock()
+        self.search_client.search.return_value.results = [result]
+        vertex_rag.discoveryengine.SearchServiceClient.return_value = self.search_client
+
+        self.generation = MagicMock()
+        self.generation.text = "Resposta completa"
+        self.generation.usage_metadata = None
+        self.generate = vertex_rag.GenerativeModel.return_value.generate_content
+        self.generate.reset_mock(side_effect=True)
+        self.generate.return_value = self.generation
+
+    def tearDown(self):
+        for name, value in self.originals.items():
+            setattr(vertex_rag, name, value)
+        self.generate.side_effect = None
+        self.search_client.search.side_effect = None
+
+    def slow_generation(self, *args, **kwargs):
+        time.sleep(0.3)
+        return self.generation
+
+    def test_search_receives_remaining_time_as_timeout(self):
+        vertex_rag.process_rag_query("pergunta", Deadline(3.0))
+        timeout = self.search_client.search.call_args.kwargs["timeout"]
+        self.assertTrue(0 < timeout <= 3.0)
+
+    def test_slow_generation_returns_top_snippet(self):
+        self.generate.side_effect = self.slow_generation
+        answer = vertex_rag.process_rag_query("pergunta", Deadline(0.1))
+        self.assertIn("Reinicie pelo painel.", answer)
+        fallback = self.exporter.get_finished_spans("rag.fallback")[0]
+        self.assertEqual(fallback.attributes["source"], "snippet")
+
+    def test_slow_generation_prefers_cached_answer(self):
+        self.assertEqual(vertex_rag.process_rag_query("Pergunta", Deadline(3.0)), "Resposta completa")
+
+        self.generate.side_effect = self.slow_generation
+        self.assertEqual(vertex_rag.process_rag_query("pergunta", Deadline(0.1)), "Resposta completa")
+
+    def test_slow_search_returns_timeout_message(self):
+        self.search_client.search.side_effect = lambda *a, **kw: time.sleep(0.3)
+        answer = vertex_rag.process_rag_query("pergunta", Deadline(0.1))
+        self.assertEqual(answer, vertex_rag.TIMEOUT_MESSAGE)
+        self.generate.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+# Os módulos da Cloud Function são importados diretamente (layout plano do diretório)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest import DOCUMENTS_FILE, Ingestor
+from local_index import LocalIndex
+
+
+class TestIngestor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "docs")
+        self.index_dir = os.path.join(self.tmp.name, "index")
+        os.makedirs(os.path.join(self.source, "manuais"))
+        self.write("servidor.txt", "O servidor de arquivos é reiniciado pelo painel.\n\n"
+                                   "Backups são feitos às 2h.")
+        self.write("manuais/vpn.md", "O cliente da VPN precisa estar na versão 5.2.")
+        self.write("ignorado.docx", "formato não suportado")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.source, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        # mtime explícito: alterações no mesmo tick do relógio também são detectadas
+        mtime = getattr(self, "_mtime", 1_700_000_000)
+        self._mtime = mtime + 10
+        os.utime(path, (mtime, mtime))
+
+    def ingest(self, **kwargs):
+        kwargs.setdefault("workers", 1)
+        return Ingestor(self.source, self.index_dir, **kwargs).run()
+
+    def test_first_run_indexes_everything(self):
+        stats = self.ingest()
+
+        self.assertEqual((stats.documents, stats.parsed, stats.embedded, stats.reused), (2, 2, 2, 0))
+        index = LocalIndex.load(self.index_dir)
+        self.assertEqual([c["source"] for c in index.chunks], ["manuais/vpn.md", "servidor.txt"])
+        self.assertTrue(all(len(c["hash"]) == 64 for c in index.chunks))
+        self.assertTrue(os.path.exists(os.path.join(self.index_dir, DOCUMENTS_FILE)))
+
+    def test_unchanged_documents_are_not_reprocessed(self):
+        self.ingest()
+        before = np.array(LocalIndex.load(self.index_dir).embeddings)
+
+        stats = self.ingest()
+
+        self.assertEqual((stats.parsed, stats.embedded, stats.reused), (0, 0, 2))
+        np.testing.assert_array_equal(np.array(LocalIndex.load(self.index_dir).embeddings), before)
+
+    def test_only_changed_chunks_are_embedded(self):
+        self.write("servidor.txt", "Texto antigo do primeiro parágrafo.\n\n" + "palavra " * 130)
+        self.ingest()
+
+        self.write("servidor.txt", "Texto novo do primeiro parágrafo.\n\n" + "palavra " * 130)
+        stats = self.ingest()
+
+        # Um documento lido; as duas janelas do parágrafo longo e o vpn.md mantêm hash e vetor
+        self.assertEqual(stats.parsed, 1)
+        self.assertEqual(stats.embedded, 1)
+        self.assertEqual(stats.reused, 3)
+        index = LocalIndex.load(self.index_dir)
+        self.assertIn("Texto novo", index.search("texto novo primeiro parágrafo", k=1)[0][1]["text"])
+
+    def test_removed_documents_leave_the_index(self):
+        self.ingest()
+        os.remove(os.path.join(self.source, "manuais", "vpn.md"))
+
+        stats = self.ingest()
+
+        self.assertEqual((stats.documents, stats.removed), (1, 1))
+        index = LocalIndex.load(self.index_dir)
+        self.assertEqual({c["source"] for c in index.chunks}, {"servidor.txt"})
+
+    def test_failed_reads_are_retried_on_the_next_run(self):
+        """Uma falha de leitura não fica registrada com o mtime atual do arquivo"""
+        self.ingest()
+        self.write("servidor.txt", "Texto novo sobre o servidor.")
+        self.write("manuais/senha.md", "Redefina a senha pelo portal.")
+
+        with patch("ingest.read_document", side_effect=OSError("arquivo travado")):
+            with self.assertLogs(level="ERROR"):
+                stats = self.ingest()
+        self.assertEqual((stats.parsed, stats.failed), (0, 2))
+        # Até a próxima leitura, a versão anterior do servidor.txt continua no índice
+        index = LocalIndex.load(self.index_dir)
+        self.assertEqual({c["source"] for c in index.chunks}, {"manuais/vpn.md", "servidor.txt"})
+        self.assertIn("Backups", " ".join(c["text"] for c in index.chunks))
+
+        stats = self.ingest()
+        self.assertEqual((stats.parsed, stats.failed), (2, 0))
+        sources = {c["source"]: c["text"] for c in LocalIndex.load(self.index_dir).chunks}
+        self.assertEqual(sources["servidor.txt"], "Texto novo sobre o servidor.")
+        self.assertIn("manuais/senha.md", sources)
+
+    def test_full_rebuild_ignores_previous_index(self):
+        self.ingest()
+        stats = self.ingest(full=True)
+        self.assertEqual((stats.parsed, stats.embedded, stats.reused), (2, 2, 0))
+
+    def test_process_pool_produces_the_same_index(self):
+        for i in range(6):
+            self.write(f"extra{i}.txt", f"Documento extra número {i} sobre impressoras.")
+        self.ingest(workers=1)
+        sequential = LocalIndex.load(self.index_dir, mmap=False)
+
+        stats = self.ingest(workers=2, full=True)
+
+        parallel = LocalIndex.load(self.index_dir, mmap=False)
+        self.assertEqual(stats.parsed, 8)
+        self.assertEqual(parallel.chunks, sequential.chunks)
+        np.testing.assert_allclose(parallel.embeddings, sequential.embeddings)
+
+
+if __name__ == "__main__":
+    unittest.main()
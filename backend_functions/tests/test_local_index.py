@@ -0,0 +1,193 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# Os módulos da Cloud Function são importados diretamente (layout plano do diretório)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context_builder import Snippet
+from local_index import HashingEmbedder, LocalIndex, chunk_text
+from retrieval import (
+    LocalRetriever,
+    RetrievalResult,
+    Retriever,
+    TieredRetriever,
+    build_retriever,
+)
+
+DOCUMENTS = {
+    "servidor.txt": "O servidor de arquivos é reiniciado pelo painel de administração "
+                    "em Serviços > Arquivos > Reiniciar.\n\nAvise os usuários antes do reinício.",
+    "vpn.md": "# VPN\n\nO cliente da VPN precisa estar na versão 5.2 ou superior.",
+    "senha.txt": "Para redefinir a senha, acesse o portal de autoatendimento e clique em Esqueci a senha.",
+}
+
+
+class FakeRemoteRetriever(Retriever):
+    name = "vertex"
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    def retrieve(self, query, k=5, deadline=None):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return RetrievalResult([Snippet("remoto", 1.0)], self.name)
+
+
+class TestChunking(unittest.TestCase):
+    def test_short_paragraphs_are_grouped(self):
+        self.assertEqual(chunk_text("um dois\n\ntrês quatro", max_words=10), ["um dois três quatro"])
+
+    def test_long_paragraph_is_split_with_overlap(self):
+        words = [f"p{i}" for i in range(25)]
+        chunks = chunk_text(" ".join(words), max_words=10, overlap=2)
+        self.assertEqual(chunks[0].split(), words[:10])
+        self.assertEqual(chunks[1].split()[:2], words[8:10])
+        self.assertEqual(chunks[-1].split()[-1], "p24")
+
+
+def build_documents_index():
+    chunks = [{"source": name, "text": chunk}
+              for name, text in DOCUMENTS.items() for chunk in chunk_text(text)]
+    return LocalIndex.build(chunks)
+
+
+class TestLocalIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_embedder_is_deterministic_and_normalized(self):
+        embedder = HashingEmbedder()
+        first, second = embedder.embed(["Reinicie o servidor", "reinicie o SERVIDOR!"])
+        np.testing.assert_allclose(first, second)
+        self.assertAlmostEqual(float(np.linalg.norm(first)), 1.0, places=5)
+        self.assertFalse(embedder.embed(["o de a"]).any())
+
+    def test_search_ranks_relevant_document_first(self):
+        index = build_documents_index()
+        results = index.search("Como reinicio o servidor de arquivos?", k=2)
+        self.assertEqual(results[0][1]["source"], "servidor.txt")
+        self.assertGreater(results[0][0], results[1][0])
+        self.assertEqual(index.search("o de a"), [])
+
+    def test_save_and_load_with_mmap(self):
+        index_dir = os.path.join(self.tmp.name, "index")
+        build_documents_index().save(index_dir)
+
+        loaded = LocalIndex.load(index_dir)
+
+        self.assertIsInstance(loaded.embeddings, np.memmap)
+        self.assertEqual(len(loaded), len(DOCUMENTS))
+        self.assertEqual(loaded.search("versão do cliente da VPN", k=1)[0][1]["source"], "vpn.md")
+
+    def test_ivf_search_matches_exact_search(self):
+        rng = np.random.default_rng(1)
+        topics = rng.normal(size=(20, 64))
+        vectors = np.repeat(topics, 30, axis=0) + rng.normal(scale=0.1, size=(600, 64))
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        chunks = [{"text": f"chunk {i}", "id": i} for i in range(len(vectors))]
+        embedder = HashingEmbedder(dim=64)
+
+        exact = LocalIndex.build(chunks, embedder, vectors=vectors, ivf_min_vectors=10 ** 6)
+        approximate = LocalIndex.build(chunks, embedder, vectors=vectors, ivf_min_vectors=100)
+        self.assertIsNone(exact.centroids)
+        self.assertEqual(len(approximate.centroids), 24)
+
+        hits = 0
+        for query_id in range(0, 600, 37):
+            exact.embedder.embed = approximate.embedder.embed = lambda texts: vectors[[query_id]]
+            expected = {chunk["id"] for _, chunk in exact.search("q", k=5)}
+            found = {chunk["id"] for _, chunk in approximate.search("q", k=5)}
+            hits += len(expected & found)
+        self.assertGreaterEqual(hits / (5 * len(range(0, 600, 37))), 0.9)
+
+    def test_ivf_index_round_trip(self):
+        index_dir = os.path.join(self.tmp.name, "ivf")
+        chunks = [{"text": f"documento {i} sobre o tema {i % 7}"} for i in range(300)]
+        LocalIndex.build(chunks, ivf_min_vectors=100).save(index_dir)
+        loaded = LocalIndex.load(index_dir)
+        self.assertIsNotNone(loaded.centroids)
+        self.assertIn("tema 3", loaded.search("tema 3", k=1)[0][1]["text"])
+
+
+class TestRetrievers(unittest.TestCase):
+    def setUp(self):
+        self.local = LocalRetriever(index=build_documents_index())
+
+    def test_local_retriever_returns_scored_snippets(self):
+        result = self.local.retrieve("redefinir a senha", k=2)
+        self.assertEqual(result.tier, "local")
+        self.assertIn("Esqueci a senha", result.snippets[0].text)
+        self.assertGreaterEqual(result.snippets[0].score, result.snippets[1].score)
+
+    def test_missing_index_is_retried_after_backoff(self):
+        """Uma falha ao carregar o índice não desativa o recuperador até o restart"""
+        now = [0.0]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index_dir = os.path.join(tmp_dir, "indice")
+            retriever = LocalRetriever(index_dir=index_dir, retry_seconds=10, retry_max=15,
+                                       clock=lambda: now[0])
+            with self.assertLogs(level="WARNING"):
+                self.assertEqual(retriever.retrieve("senha").snippets, [])
+
+            # Dentro do intervalo não há nova tentativa, mesmo com o índice já disponível
+            build_documents_index().save(index_dir)
+            now[0] = 9.0
+            self.assertEqual(retriever.retrieve("senha").snippets, [])
+
+            now[0] = 10.0
+            self.assertIn("Esqueci a senha", retriever.retrieve("redefinir a senha").snippets[0].text)
+
+    def test_backoff_grows_up_to_the_limit(self):
+        now = [0.0]
+        retriever = LocalRetriever(index_dir=os.path.join(tempfile.gettempdir(), "nao-existe"),
+                                   retry_seconds=10, retry_max=15, clock=lambda: now[0])
+        with self.assertLogs(level="WARNING") as logs:
+            for now[0] in (0.0, 10.0, 25.0, 39.0, 40.0):
+                retriever.retrieve("senha")
+        # Tentativas em 0, 10 (+10), 25 (+15, limite) e 40 (+15); 39 ainda está no intervalo
+        self.assertEqual(len(logs.records), 4)
+
+    def test_retriever_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            Retriever()
+
+    def test_tiered_uses_local_when_confident(self):
+        remote = FakeRemoteRetriever()
+        result = TieredRetriever(self.local, remote, min_score=0.3).retrieve("redefinir a senha")
+        self.assertEqual(result.tier, "local")
+        self.assertEqual(remote.calls, 0)
+
+    def test_tiered_falls_back_to_remote_below_min_score(self):
+        remote = FakeRemoteRetriever()
+        result = TieredRetriever(self.local, remote, min_score=0.99).retrieve("redefinir a senha")
+        self.assertEqual(result.tier, "vertex")
+        self.assertEqual(remote.calls, 1)
+
+    def test_tiered_uses_local_results_when_remote_fails(self):
+        remote = FakeRemoteRetriever(error=RuntimeError("503"))
+        with self.assertLogs(level="WARNING"):
+            result = TieredRetriever(self.local, remote, min_score=0.99).retrieve("redefinir a senha")
+        self.assertEqual(result.tier, "local")
+
+        with self.assertRaises(RuntimeError):
+            TieredRetriever(self.local, remote).retrieve("o de a")
+
+    def test_build_retriever_modes(self):
+        remote = FakeRemoteRetriever()
+        self.assertIs(build_retriever(remote, mode="vertex"), remote)
+        self.assertIsInstance(build_retriever(remote, mode="local"), LocalRetriever)
+        self.assertIsInstance(build_retriever(remote, mode="tiered"), TieredRetriever)
+
+
+if __name__ == "__main__":
+    unittest.main()
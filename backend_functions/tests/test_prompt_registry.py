@@ -0,0 +1,151 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+# Os módulos da Cloud Function são importados diretamente (layout plano do diretório)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Mock das bibliotecas do Google Cloud antes de importar vertex_rag
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.cloud", MagicMock())
+sys.modules.setdefault("google.cloud.discoveryengine_v1", MagicMock())
+sys.modules.setdefault("vertexai", MagicMock())
+sys.modules.setdefault("vertexai.generative_models", MagicMock())
+
+import prompt_registry
+import vertex_rag
+from answer_cache import AnswerCache
+from deadline import Deadline
+from prompt_registry import PromptRegistry, PromptVariant, compile_template
+from telemetry import InMemorySpanExporter, Tracer
+
+
+def make_variant(name="a", weight=50, template="C:{context} P:{question}", model="gemini-x"):
+    return PromptVariant("rag_answer", name, model, template,
+                         system_instruction="Seja breve.", weight=weight)
+
+
+class TestPromptVariant(unittest.TestCase):
+    def test_render_with_and_without_system_instruction(self):
+        variant = make_variant(template="Contexto: {context}\nPergunta: {question} {{ok}}")
+        self.assertEqual(variant.render(context="ctx", question="q?"),
+                         "Seja breve.\n\nContexto: ctx\nPergunta: q? {ok}")
+        self.assertEqual(variant.render(include_system_instruction=False, context="ctx", question="q?"),
+                         "Contexto: ctx\nPergunta: q? {ok}")
+
+    def test_version_changes_with_template_and_model(self):
+        base = make_variant()
+        self.assertEqual(base.version, make_variant(name="outro", weight=10).version)
+        self.assertNotEqual(base.version, make_variant(template="{question}").version)
+        self.assertNotEqual(base.version, make_variant(model="gemini-y").version)
+
+    def test_invalid_templates_fail_at_load(self):
+        with self.assertRaises(ValueError):
+            compile_template("{contexto}", ("context",))
+        with self.assertRaises(ValueError):
+            compile_template("{context!r}", ("context",))
+        with self.assertRaises(ValueError):
+            compile_template("{context", ("context",))
+
+
+class TestPromptRegistry(unittest.TestCase):
+    def test_selection_is_deterministic_per_session_and_follows_weights(self):
+        registry = PromptRegistry({"rag_answer": [make_variant("a", 80), make_variant("b", 20, "{question}")]})
+        self.assertIs(registry.select("rag_answer", "sessao-1"), registry.select("rag_answer", "sessao-1"))
+        self.assertEqual(registry.select("rag_answer").name, "a")
+
+        counts = {"a": 0, "b": 0}
+        for i in range(2000):
+            counts[registry.select("rag_answer", f"sessao-{i}").name] += 1
+        self.assertTrue(1450 < counts["a"] < 1750, counts)
+
+    def test_inactive_variants_are_never_selected(self):
+        registry = PromptRegistry({"rag_answer": [make_variant("a", 0), make_variant("b", 10)]})
+        self.assertEqual({registry.select("rag_answer", str(i)).name for i in range(50)}, {"b"})
+        with self.assertRaises(ValueError):
+            PromptRegistry({"rag_answer": [make_variant("a", 0)]})
+
+    def test_invalid_override_falls_back_to_bundled_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "prompts.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"prompts": {"rag_answer": {"variants": [
+                    {"name": "x", "model": "m", "template": "{desconhecido}"}]}}}, f)
+            with self.assertLogs(level="ERROR"):
+                registry = prompt_registry.load_registry(path)
+        self.assertEqual(registry.source, prompt_registry.BUNDLED_PROMPTS_PATH)
+
+    def test_bundled_prompts(self):
+        registry = PromptRegistry.load(prompt_registry.BUNDLED_PROMPTS_PATH)
+        variant = registry.select(prompt_registry.RAG_PROMPT_ID)
+        prompt = variant.render(context="Reinicie pelo painel.", question="Como reinicio?")
+        self.assertTrue(prompt.startswith("Você é o Nexus AI"))
+        self.assertIn("Reinicie pelo painel.", prompt)
+
+
+class TestRagPromptVersions(unittest.TestCase):
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        self.registry = PromptRegistry({"rag_answer": [make_variant("a", 50),
+                                                       make_variant("b", 50, "{question}")]})
+        self.patches = {
+            "tracer": Tracer(enabled=True, exporter=self.exporter),
+            "answer_cache": AnswerCache(),
+            "registry": self.registry,
+        }
+        self.originals = {name: getattr(vertex_rag, name) for name in self.patches}
+        for name, value in self.patches.items():
+            setattr(vertex_rag, name, value)
+
+        result = MagicMock()
+        result.document.derived_struct_data = {"snippets": [{"snippet": "Reinicie pelo painel."}]}
+        vertex_rag.discoveryengine.SearchServiceClient.return_value.search.return_value.results = [result]
+
+        generation = MagicMock()
+        generation.text = "Resposta"
+        generation.usage_metadata.prompt_token_count = 50
+        generation.usage_metadata.candidates_token_count = 10
+        self.generate = vertex_rag.GenerativeModel.return_value.generate_content
+        self.generate.reset_mock(side_effect=True)
+        self.generate.return_value = generation
+
+    def tearDown(self):
+        for name, value in self.originals.items():
+            setattr(vertex_rag, name, value)
+
+    def session_for(self, name):
+        return next(f"s{i}" for i in range(100) if self.registry.select("rag_answer", f"s{i}").name == name)
+
+    def test_session_variant_drives_prompt_cache_and_metrics(self):
+        session_b = self.session_for("b")
+        variant_b = self.registry.get("rag_answer", "b")
+        vertex_rag.process_rag_query("Como reinicio?", Deadline(3.0), session_b)
+
+        self.assertEqual(self.generate.call_args.args[0], "Seja breve.\n\nComo reinicio?")
+        generate = self.exporter.get_finished_spans("rag.generate")[0]
+        self.assertEqual(generate.attributes["prompt_version"], variant_b.version)
+
+        self.assertEqual(vertex_rag.answer_cache.get("como reinicio", version=variant_b.version), "Resposta")
+        self.assertIsNone(vertex_rag.answer_cache.get("como reinicio",
+                                                      version=self.registry.get("rag_answer", "a").version))
+
+        metrics = vertex_rag.tracer.render_metrics()
+        self.assertIn(f'rag_prompt_generation_seconds_count{{prompt="rag_answer",version="{variant_b.version}",'
+                      f'status="OK"}} 1', metrics)
+        self.assertIn(f'rag_prompt_tokens_count{{prompt="rag_answer",version="{variant_b.version}",'
+                      f'kind="output"}} 1', metrics)
+
+    def test_model_is_created_once_per_version(self):
+        vertex_rag._models.clear()
+        vertex_rag.GenerativeModel.reset_mock()
+        session_a = self.session_for("a")
+        for _ in range(3):
+            vertex_rag.process_rag_query("pergunta", Deadline(3.0), session_a)
+        vertex_rag.GenerativeModel.assert_called_once_with("gemini-x", generation_config=None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+# Os módulos da Cloud Function são importados diretamente (layout plano do diretório)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Mock das bibliotecas do Google Cloud antes de importar vertex_rag
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.cloud", MagicMock())
+sys.modules.setdefault("google.cloud.discoveryengine_v1", MagicMock())
+sys.modules.setdefault("vertexai", MagicMock())
+sys.modules.setdefault("vertexai.generative_models", MagicMock())
+
+import vertex_rag
+from answer_cache import AnswerCache
+from deadline import Deadline, DeadlineExceeded, Hedger
+from single_flight import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def run_concurrently(self, flight, fn, callers=8, key="k", deadline=None):
+        barrier = threading.Barrier(callers)
+
+        def call(_):
+            barrier.wait()
+            return flight.do(key, fn, deadline)
+
+        with ThreadPoolExecutor(max_workers=callers) as pool:
+            return list(pool.map(call, range(callers)))
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.1)
+            return "resposta"
+
+        results = self.run_concurrently(flight, slow)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({result for result, _ in results}, {"resposta"})
+        self.assertEqual(sum(shared for _, shared in results), 7)
+        self.assertEqual(flight.in_flight(), 0)
+
+        # Depois de concluída, a chave é executada de novo
+        self.assertEqual(flight.do("k", lambda: "nova"), ("nova", False))
+
+    def test_error_is_shared_with_waiters(self):
+        flight = SingleFlight()
+
+        def fail():
+            time.sleep(0.05)
+            raise ValueError("503")
+
+        with self.assertRaises(ValueError):
+            self.run_concurrently(flight, fail, callers=3)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_waiter_respects_its_deadline(self):
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            time.sleep(0.3)
+            return "lenta"
+
+        leader = threading.Thread(target=flight.do, args=("k", slow))
+        leader.start()
+        started.wait()
+        with self.assertRaises(DeadlineExceeded):
+            flight.do("k", slow, Deadline(0.05))
+        leader.join()
+
+
+class TestAsyncSingleFlight(unittest.TestCase):
+    def test_concurrent_coroutines_share_one_task(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "resposta"
+
+        async def main():
+            return await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+
+        results = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([shared for _, shared in results], [False, True, True, True, True])
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_cancelled_leader_does_not_cancel_waiters(self):
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "resposta"
+
+        async def main():
+            leader = asyncio.ensure_future(flight.do("k", fetch))
+            await asyncio.sleep(0)
+            waiter = asyncio.ensure_future(flight.do("k", fetch))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await waiter
+
+        self.assertEqual(asyncio.run(main()), ("resposta", True))
+
+    def test_deadline(self):
+        flight = AsyncSingleFlight()
+
+        async def main():
+            await flight.do("k", lambda: asyncio.sleep(0.3), Deadline(0.02))
+
+        with self.assertRaises(DeadlineExceeded):
+            asyncio.run(main())
+
+
+class TestRagCoalescing(unittest.TestCase):
+    def setUp(self):
+        self.patches = {
+            "answer_cache": AnswerCache(),
+            "inflight": SingleFlight(),
+            "search_hedger": Hedger("rag.search", default_delay=1.0, max_ratio=0),
+            "generate_hedger": Hedger("rag.generate", default_delay=1.0, max_ratio=0),
+        }
+        self.originals = {name: getattr(vertex_rag, name) for name in self.patches}
+        for name, value in self.patches.items():
+            setattr(vertex_rag, name, value)
+
+        result = MagicMock()
+        result.document.derived_struct_data = {"snippets": [{"snippet": "Reinicie pelo painel."}]}
+        self.search = vertex_rag.discoveryengine.SearchServiceClient.return_value.search
+        self.search.reset_mock(side_effect=True)
+        self.search.return_value.results = [result]
+
+        generation = MagicMock()
+        generation.text = "Pelo painel."
+        generation.usage_metadata = None
+        self.generate = vertex_rag.GenerativeModel.return_value.generate_content
+        self.generate.reset_mock(side_effect=True)
+
+        def slow_generation(*args, **kwargs):
+            time.sleep(0.1)
+            return generation
+
+        self.generate.side_effect = slow_generation
+
+    def tearDown(self):
+        for name, value in self.originals.items():
+            setattr(vertex_rag, name, value)
+        self.generate.side_effect = None
+
+    def test_identical_questions_share_search_and_generation(self):
+        questions = ["Como reinicio o servidor?", "como reinicio o servidor", "COMO REINICIO O SERVIDOR?!"]
+        barrier = threading.Barrier(len(questions))
+
+        def ask(question):
+            barrier.wait()
+            return vertex_rag.process_rag_query(question, Deadline(3.0))
+
+        with ThreadPoolExecutor(max_workers=len(questions)) as pool:
+            answers = list(pool.map(ask, questions))
+
+        self.assertEqual(answers, ["Pelo painel."] * 3)
+        self.assertEqual(self.search.call_count, 1)
+        self.assertEqual(self.generate.call_count, 1)
+
+    def test_missing_query_text_returns_default_answer(self):
+        """Sem queryText, a consulta não quebra na chave de coalescência nem chama a busca"""
+        for question in (None, "", "   "):
+            self.assertEqual(vertex_rag.process_rag_query(question, Deadline(3.0), "sessao-1"),
+                             vertex_rag.NO_CONTEXT_MESSAGE)
+        self.search.assert_not_called()
+        self.generate.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
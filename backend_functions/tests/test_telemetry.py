@@ -0,0 +1,135 @@
+import unittest
+import os
+import sys
+from unittest.mock import MagicMock
+
+# Os módulos da Cloud Function são importados diretamente (layout plano do diretório)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Mock das bibliotecas do Google Cloud antes de importar vertex_rag
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.cloud", MagicMock())
+sys.modules.setdefault("google.cloud.discoveryengine_v1", MagicMock())
+sys.modules.setdefault("vertexai", MagicMock())
+sys.modules.setdefault("vertexai.generative_models", MagicMock())
+
+import vertex_rag
+from telemetry import NOOP_SPAN, Histogram, InMemorySpanExporter, Tracer, metrics_authorized
+
+
+class TestTracer(unittest.TestCase):
+    def test_disabled_tracer_returns_shared_noop_span(self):
+        """Desligado, não cria spans nem registra métricas"""
+        exporter = InMemorySpanExporter()
+        tracer = Tracer(enabled=False, exporter=exporter)
+        with tracer.span("x", a=1) as span:
+            span.set_attribute("b", 2)
+        self.assertIs(tracer.span("y"), NOOP_SPAN)
+        self.assertEqual(exporter.get_finished_spans(), [])
+        self.assertEqual(tracer.span_duration.snapshot(), {})
+
+    def test_nested_spans_share_trace(self):
+        exporter = InMemorySpanExporter()
+        tracer = Tracer(enabled=True, exporter=exporter)
+        with tracer.span("parent"):
+            with tracer.span("child", k="v"):
+                pass
+        child, parent_span = exporter.get_finished_spans()
+        self.assertEqual(child.trace_id, parent_span.trace_id)
+        self.assertEqual(child.parent_span_id, parent_span.span_id)
+        self.assertEqual(child.attributes, {"k": "v"})
+        self.assertEqual(parent_span.status, "OK")
+        self.assertGreaterEqual(child.duration_seconds, 0)
+
+    def test_exception_marks_span_as_error(self):
+        exporter = InMemorySpanExporter()
+        tracer = Tracer(enabled=True, exporter=exporter)
+        with self.assertRaises(RuntimeError):
+            with tracer.span("falha"):
+                raise RuntimeError("boom")
+        span = exporter.get_finished_spans("falha")[0]
+        self.assertEqual(span.status, "ERROR")
+        self.assertEqual(span.attributes["exception.type"], "RuntimeError")
+
+    def test_histogram_prometheus_format(self):
+        histogram = Histogram("latency_seconds", "Latência", label_names=("span",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, span="a")
+        histogram.observe(0.5, span="a")
+        histogram.observe(3, span="a")
+        text = histogram.render()
+        self.assertIn('latency_seconds_bucket{span="a",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{span="a",le="1.0"} 2', text)
+        self.assertIn('latency_seconds_bucket{span="a",le="+Inf"} 3', text)
+        self.assertIn('latency_seconds_count{span="a"} 3', text)
+
+    def test_metrics_require_configured_token(self):
+        """GET /metrics: desativada sem token; com token, exige 'Bearer <token>'"""
+        self.assertFalse(metrics_authorized("Bearer x", token=""))
+        self.assertTrue(metrics_authorized("Bearer segredo", token="segredo"))
+        self.assertFalse(metrics_authorized("Bearer outro", token="segredo"))
+        self.assertFalse(metrics_authorized(None, token="segredo"))
+        self.assertFalse(metrics_authorized("Bearer ção", token="segredo"))
+
+
+class TestRagInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        self.original_tracer = vertex_rag.tracer
+        vertex_rag.tracer = Tracer(enabled=True, exporter=self.exporter)
+
+        # Busca simulada: 2 resultados com 1 snippet cada
+        result = MagicMock()
+        result.document.derived_struct_data = {"snippets": [{"snippet": "Reinicie o servidor."}]}
+        search_client = MagicMock()
+        search_client.search.return_value.results = [result, result]
+        vertex_rag.discoveryengine.SearchServiceClient.return_value = search_client
+
+        generation = MagicMock()
+        generation.text = "Resposta"
+        generation.usage_metadata.prompt_token_count = 120
+        generation.usage_metadata.candidates_token_count = 30
+        vertex_rag.GenerativeModel.return_value.generate_content.return_value = generation
+
+    def tearDown(self):
+        vertex_rag.tracer = self.original_tracer
+
+    def test_spans_per_stage(self):
+        """Cada etapa (busca, prompt, geração) gera um span filho do span raiz"""
+        self.assertEqual(vertex_rag.process_rag_query("Como reinicio o servidor?"), "Resposta")
+
+        names = [s.name for s in self.exporter.get_finished_spans()]
+        self.assertEqual(names, ["rag.search", "rag.build_context", "rag.build_prompt",
+                                 "rag.generate", "rag.process_query"])
+
+        search = self.exporter.get_finished_spans("rag.search")[0]
+        self.assertEqual(search.attributes["snippets"], 2)
+
+        # Os dois resultados trazem o mesmo snippet: apenas um vai para o prompt
+        context = self.exporter.get_finished_spans("rag.build_context")[0]
+        self.assertEqual(context.attributes["duplicates_removed"], 1)
+        self.assertEqual(context.attributes["context_chars"], len("Reinicie o servidor.\n"))
+
+        generate = self.exporter.get_finished_spans("rag.generate")[0]
+        self.assertEqual(generate.attributes["prompt_tokens"], 120)
+        self.assertEqual(generate.attributes["output_tokens"], 30)
+
+        metrics = vertex_rag.tracer.render_metrics()
+        self.assertIn('rag_span_duration_seconds_count{span="rag.generate",status="OK"} 1', metrics)
+        self.assertIn('rag_payload_size_count{metric="prompt_tokens"} 1', metrics)
+
+    def test_ticket_post_span(self):
+        response = MagicMock(status_code=201)
+        response.json.return_value = {"id": 7}
+        original_post = vertex_rag.requests.post
+        vertex_rag.requests.post = MagicMock(return_value=response)
+        try:
+            self.assertEqual(vertex_rag.create_ticket_in_django({"priority": "Urgente"}), 7)
+        finally:
+            vertex_rag.requests.post = original_post
+
+        span = self.exporter.get_finished_spans("ticket.create")[0]
+        self.assertEqual(span.attributes["http_status_code"], 201)
+
+
+if __name__ == '__main__':
+    unittest.main()
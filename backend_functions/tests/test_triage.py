@@ -0,0 +1,46 @@
+import unittest
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+# Os módulos da Cloud Function são importados diretamente (layout plano do diretório)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Mock das bibliotecas do Google Cloud antes de importar vertex_rag
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.cloud", MagicMock())
+sys.modules.setdefault("google.cloud.discoveryengine_v1", MagicMock())
+sys.modules.setdefault("vertexai", MagicMock())
+sys.modules.setdefault("vertexai.generative_models", MagicMock())
+
+import triage
+import vertex_rag
+
+
+class TestTriage(unittest.TestCase):
+    def test_compiled_model_classifies_description(self):
+        self.assertEqual(triage.triage_priority("Servidor fora do ar"), "CRITICAL")
+        self.assertEqual(triage.triage_priority("Impressora quebrada", "Alta"), "HIGH")
+        self.assertEqual(triage.triage_priority("Não é urgente, sem pressa", "Média"), "LOW")
+        self.assertEqual(triage.triage_priority("", "Urgente"), "CRITICAL")
+        self.assertEqual(triage.triage_priority("", None), "MEDIUM")
+
+    def test_without_model_uses_fallback(self):
+        with patch.object(triage, "_MODEL", None):
+            self.assertEqual(triage.triage_priority("Servidor fora do ar", fallback="LOW"), "LOW")
+        self.assertIsNone(triage._load_model("/caminho/inexistente.json"))
+
+    def test_ticket_payload_uses_triaged_priority(self):
+        response = MagicMock(status_code=201)
+        response.json.return_value = {"id": 9}
+        with patch.object(vertex_rag.requests, "post", return_value=response) as post:
+            ticket_id = vertex_rag.create_ticket_in_django({
+                "priority": "Baixa",
+                "problem_description": "Ransomware: arquivos criptografados no servidor",
+            })
+        self.assertEqual(ticket_id, 9)
+        self.assertEqual(post.call_args.kwargs["json"]["priority"], "CRITICAL")
+
+
+if __name__ == "__main__":
+    unittest.main()
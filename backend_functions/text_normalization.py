@@ -0,0 +1,28 @@
+import re
+import unicodedata
+
+# Normalização de texto usada pelos índices locais (sinônimos de entidades, triagem, classificador
+# de intenções, cache de respostas) e pelos webhooks.
+#
+# Origem: dialogflow_automation/core/text_normalization.py. A Cloud Function é publicada sozinha,
+# então backend_functions/text_normalization.py é uma cópia deste arquivo: os índices compilados
+# pela CLI só funcionam nos webhooks se as duas normalizações derem o mesmo resultado. Apenas a
+# biblioteca padrão é usada.
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize_text(text):
+    """
+    Normaliza um texto para comparação: minúsculas, sem acentos e sem pontuação.
+
+    Args:
+        text (str): Texto original (ex: 'Crítica!').
+
+    Returns:
+        str: Texto normalizado (ex: 'critica').
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    without_accents = "".join(
+        c for c in decomposed if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", without_accents).strip()
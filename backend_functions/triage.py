@@ -0,0 +1,108 @@
+# Triagem local da prioridade dos chamados (título/descrição + prioridade informada pelo usuário).
+# O modelo é compilado a partir do intents.json e de dialogflow_automation/config/triage.json:
+#   python dialogflow_automation/main.py compile-triage --output backend_functions/triage_model.json
+# e carregado uma única vez por instância. Mesma regra de dialogflow_automation/core/triage.py:
+# frases casadas pela mais longa, sem sobreposição; vence a maior pontuação (empate: a mais urgente).
+import os
+import json
+import logging
+
+from entities import normalize_text
+
+# Caminho do modelo compilado (pode ser sobrescrito por variável de ambiente)
+TRIAGE_MODEL_PATH = os.environ.get(
+    "TRIAGE_MODEL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "triage_model.json"))
+
+
+class TriageModel:
+    """Modelo de triagem compilado (somente leitura)."""
+
+    def __init__(self, data):
+        self.levels = data["levels"]
+        self.bias = data["bias"]
+        self.stated_weight = data["stated_weight"]
+        self.stated = {synonym: self.levels.index(level) for synonym, level in data["stated"].items()}
+        self.phrases = {phrase: (self.levels.index(level), weight)
+                        for phrase, (level, weight) in data["phrases"].items()}
+        self.max_words = max((len(phrase.split()) for phrase in self.phrases), default=0)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def match(self, text):
+        """Frases do modelo no texto (mais longa primeiro, sem sobreposição, sem repetição)."""
+        words = normalize_text(text or "").split()
+        found = []
+        start = 0
+        while start < len(words):
+            for size in range(min(self.max_words, len(words) - start), 0, -1):
+                phrase = " ".join(words[start:start + size])
+                if phrase in self.phrases:
+                    if phrase not in found:
+                        found.append(phrase)
+                    start += size
+                    break
+            else:
+                start += 1
+        return found
+
+    def stated_level(self, stated):
+        if not isinstance(stated, str):
+            return None
+        level = self.stated.get(normalize_text(stated))
+        if level is not None:
+            return level
+        for phrase in self.match(stated):
+            if phrase in self.stated:
+                return self.stated[phrase]
+        return None
+
+    def classify(self, text, stated=None):
+        """
+        Args:
+            text (str): Título e descrição do chamado.
+            stated (str, optional): Prioridade informada pelo usuário (ex: 'Urgente').
+
+        Returns:
+            str: 'LOW', 'MEDIUM', 'HIGH' ou 'CRITICAL'.
+        """
+        scores = list(self.bias)
+        for phrase in self.match(text):
+            level, weight = self.phrases[phrase]
+            scores[level] += weight
+        level = self.stated_level(stated)
+        if level is not None:
+            scores[level] += self.stated_weight
+        return self.levels[max(range(len(scores)), key=lambda index: (scores[index], index))]
+
+
+def _load_model(path):
+    """Carrega o modelo compilado; sem ele, a triagem usa apenas a prioridade informada."""
+    try:
+        return TriageModel.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logging.warning("Modelo de triagem indisponível (%s): %s", path, e)
+        return None
+
+
+# Carregado uma única vez por instância
+_MODEL = _load_model(TRIAGE_MODEL_PATH)
+
+
+def triage_priority(text, stated=None, fallback=None):
+    """
+    Prioridade do chamado a partir do texto e da prioridade informada.
+
+    Args:
+        text (str): Título e descrição do chamado.
+        stated (str, optional): Prioridade informada pelo usuário.
+        fallback (str, optional): Código usado se o modelo não estiver disponível.
+
+    Returns:
+        str: 'LOW', 'MEDIUM', 'HIGH' ou 'CRITICAL' (ou fallback sem modelo).
+    """
+    if _MODEL is None:
+        return fallback
+    return _MODEL.classify(text, stated)
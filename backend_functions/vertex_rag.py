@@ -2,11 +2,32 @@
 import os
 import requests
 import json
+import time
 import logging
-# Importação das bibliotecas do Google Cloud para Search e Generative AI
-from google.cloud import discoveryengine_v1 as discoveryengine
-import vertexai
-from vertexai.generative_models import GenerativeModel
+import datetime
+import threading
+# Resolução local de sinônimos das entidades (índice compilado do intents.json)
+from entities import normalize_text, resolve_priority
+# Triagem local de prioridade pelo texto do chamado
+from triage import triage_priority
+# Instrumentação de latência (spans + histogramas); custo nulo quando desligada
+from telemetry import NOOP_SPAN, tracer
+# Deduplicação e orçamento de tokens dos snippets antes do Gemini
+from context_builder import Snippet, build_context, estimate_tokens, rank_score, truncate_to_tokens
+# Recuperadores plugáveis (Vertex AI Search, índice vetorial local ou ambos em camadas)
+from retrieval import RetrievalResult, Retriever, build_retriever
+# Prazo da requisição e hedging das chamadas ao Vertex AI Search e ao Gemini
+from deadline import WEBHOOK_DEADLINE_SECONDS, Deadline, DeadlineExceeded, Hedger
+# Últimas respostas geradas, usadas como fallback quando o prazo acaba
+from answer_cache import AnswerCache
+# Respostas pré-calculadas das perguntas mais frequentes, para quedas do Vertex AI Search ou do Gemini
+from answer_pack import ANSWER_PACK_PATH, LazyAnswerPack
+# Templates e configuração do modelo, versionados e carregados uma vez no cold start
+from prompt_registry import RAG_PROMPT_ID, registry
+# Memória curta por sessão: reescrita de continuações e reaproveitamento de trechos
+from conversation_memory import ConversationMemory, MemoryPlan, build_memory_store, format_history
+# Coalescência de perguntas idênticas simultâneas (uma busca e uma geração para todas)
+from single_flight import SingleFlight
 
 # Configuração de variáveis de ambiente
 # Estas variáveis devem ser definidas no ambiente de execução (Cloud Functions)
@@ -20,98 +41,417 @@ DATA_STORE_ID = os.environ.get("DATA_STORE_ID", "nexus-docs-store")
 DJANGO_API_URL = os.environ.get(
     "DJANGO_API_URL", "https://api.nexus-ai.com/api/tickets/")
 
-# Inicialização do Vertex AI SDK
-# Prepara o ambiente para chamadas aos modelos Gemini
-vertexai.init(project=PROJECT_ID, location="us-central1")
+# SDKs do Google Cloud (Discovery Engine e Vertex AI): carregados no primeiro uso, e não na
+# importação, porque a cadeia de imports (grpc, protobuf, google.api_core...) domina o cold start
+# e requisições como 'abrir_chamado' não precisam dela. Ver load_sdks() e SDK_WARMUP.
+# Os nomes em SDK_NAMES só passam a existir no módulo depois de load_sdks().
+_sdk_loaded = False
+_sdk_lock = threading.Lock()
+SDK_NAMES = ("discoveryengine", "GenerativeModel", "context_caching")
 
+# Quando carregar os SDKs: 'background' (thread iniciada junto com a instância), 'lazy' (na
+# primeira dúvida técnica) ou 'eager' (na importação do main.py, antes da primeira requisição)
+SDK_WARMUP = os.environ.get("SDK_WARMUP", "background").lower()
 
-def process_rag_query(user_query):
+
+def load_sdks():
     """
-    Executa o fluxo RAG (Retrieval-Augmented Generation).
-    1. Busca documentos relevantes no Vertex AI Search (Data Store).
-    2. Envia o contexto encontrado + pergunta do usuário para o Gemini 1.5.
-    3. Retorna a resposta gerada.
+    Importa os SDKs do Google Cloud e inicializa o Vertex AI, uma única vez por instância.
+
+    Seguro para chamadas simultâneas (a thread de aquecimento e a primeira requisição esperam
+    o mesmo carregamento). Se a importação falhar, a próxima chamada tenta de novo.
     """
+    global discoveryengine, GenerativeModel, context_caching, _sdk_loaded
+    if _sdk_loaded:
+        return
+    with _sdk_lock:
+        if _sdk_loaded:
+            return
+        start = time.perf_counter()
+        # Importação das bibliotecas do Google Cloud para Search e Generative AI
+        from google.cloud import discoveryengine_v1 as discoveryengine
+        import vertexai
+        from vertexai.generative_models import GenerativeModel
+        # Cache de contexto do Gemini (versões mais novas do SDK); sem ele, a instrução vai no prompt
+        try:
+            from vertexai.preview import caching as context_caching
+        except ImportError:
+            context_caching = None
 
-    # Passo 1: Busca (Retrieval)
-    # Inicializa o cliente de busca do Discovery Engine
-    client = discoveryengine.SearchServiceClient()
-
-    # Constrói o caminho completo do recurso de configuração de serviço (serving config)
-    # O padrão geralmente é 'default_config'
-    serving_config = client.serving_config_path(
-        project=PROJECT_ID,
-        location=LOCATION,
-        data_store=DATA_STORE_ID,
-        serving_config="default_config",
-    )
-
-    # Configura a requisição de busca
-    # query: A pergunta original do usuário
-    # page_size: Número de trechos (snippets) a recuperar (5 é um bom equilíbrio)
-    request = discoveryengine.SearchRequest(
-        serving_config=serving_config,
-        query=user_query,
-        page_size=5,
-    )
+        # Inicialização do Vertex AI SDK
+        # Prepara o ambiente para chamadas aos modelos Gemini
+        vertexai.init(project=PROJECT_ID, location="us-central1")
+        _sdk_loaded = True
+        logging.info("SDKs do Google Cloud carregados em %.0f ms",
+                     (time.perf_counter() - start) * 1000.0)
 
+
+def _warm_up_sdks():
     try:
-        # Executa a busca no índice vetorial
-        response = client.search(request)
+        load_sdks()
+    except Exception as e:
+        logging.warning("Falha ao carregar os SDKs do Google Cloud em segundo plano: %s", e)
+
+
+def warm_up():
+    """
+    Aplica SDK_WARMUP no início da instância (chamada pelo main.py).
+
+    Returns:
+        threading.Thread ou None: Thread de aquecimento, no modo 'background'.
+    """
+    if SDK_WARMUP == "eager":
+        load_sdks()
+    elif SDK_WARMUP == "background" and not _sdk_loaded:
+        thread = threading.Thread(target=_warm_up_sdks, name="sdk-warmup", daemon=True)
+        thread.start()
+        return thread
+    return None
+
+
+def __getattr__(name):
+    # Acesso externo (ex: vertex_rag.GenerativeModel nos testes) antes do primeiro carregamento
+    if name in SDK_NAMES and not _sdk_loaded:
+        load_sdks()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Hedging: uma segunda chamada é disparada quando a primeira passa do p95 recente da operação.
+# Os valores abaixo são o atraso do hedge (segundos) enquanto ainda não há latências medidas.
+search_hedger = Hedger("rag.search", default_delay=float(os.environ.get("SEARCH_HEDGE_DELAY", "0.8")))
+generate_hedger = Hedger("rag.generate", default_delay=float(os.environ.get("GENERATE_HEDGE_DELAY", "2.5")))
+
+# Respostas de fallback quando o prazo do webhook acaba ou a busca/geração falham
+answer_cache = AnswerCache()
+# Aberto (mmap) apenas na primeira falha; sem o arquivo, o fallback segue sem ele
+answer_pack = LazyAnswerPack(ANSWER_PACK_PATH)
+# Últimos turnos de cada sessão do Dialogflow (Redis se REDIS_URL estiver configurado)
+memory_store = build_memory_store()
+# Consultas em andamento por (versão do prompt, pergunta normalizada)
+inflight = SingleFlight()
+RAG_COALESCE = os.environ.get("RAG_COALESCE", "true").lower() == "true"
+SNIPPET_FALLBACK_TOKENS = 100
+SNIPPET_FALLBACK_MESSAGE = ("Não consegui gerar uma resposta completa a tempo. "
+                            "Trecho mais relevante da base de conhecimento: {snippet}")
+TIMEOUT_MESSAGE = ("A consulta à base de conhecimento demorou mais que o esperado. "
+                   "Por favor, tente novamente em instantes.")
+SEARCH_ERROR_MESSAGE = "Ocorreu um erro ao consultar a base de conhecimento."
+GENERATION_ERROR_MESSAGE = "Desculpe, tive um problema ao processar sua resposta."
+NO_CONTEXT_MESSAGE = ("Desculpe, não encontrei informações suficientes na minha base de "
+                      "conhecimento para responder isso.")
+
+# Cache de contexto da instrução de sistema. O Gemini só aceita cachear conteúdos a partir de um
+# tamanho mínimo (32.768 tokens no Gemini 1.5); abaixo disso a instrução segue no início do
+# prompt, onde o prefixo fixo ainda aproveita o cache implícito do modelo.
+CONTEXT_CACHE_MIN_TOKENS = int(os.environ.get("CONTEXT_CACHE_MIN_TOKENS", "32768"))
+# Validade do cache de contexto, em segundos (é recriado um pouco antes de expirar)
+CONTEXT_CACHE_TTL = float(os.environ.get("CONTEXT_CACHE_TTL", "3600"))
+
+# Modelos Gemini por versão de prompt: (modelo, instrução em cache?, expiração ou None)
+_models = {}
+_models_lock = threading.Lock()
+
+
+def _create_model(variant):
+    """Instancia o modelo da variante, usando o cache de contexto quando disponível."""
+    if context_caching is not None and variant.system_instruction \
+            and estimate_tokens(variant.system_instruction) >= CONTEXT_CACHE_MIN_TOKENS:
+        try:
+            cached_content = context_caching.CachedContent.create(
+                model_name=variant.model,
+                system_instruction=variant.system_instruction,
+                ttl=datetime.timedelta(seconds=CONTEXT_CACHE_TTL),
+            )
+            model = GenerativeModel.from_cached_content(
+                cached_content=cached_content, generation_config=variant.generation_config or None)
+            logging.info("Cache de contexto criado para o prompt %s", variant)
+            return model, True, time.monotonic() + CONTEXT_CACHE_TTL * 0.9
+        except Exception as e:
+            logging.warning("Cache de contexto indisponível para %s: %s", variant, e)
+    model = GenerativeModel(variant.model, generation_config=variant.generation_config or None)
+    return model, False, None
+
+
+def get_model(variant):
+    """
+    Modelo Gemini da variante de prompt, criado na primeira requisição e reutilizado.
+
+    Returns:
+        tuple: (GenerativeModel, bool indicando se a instrução de sistema está no cache de contexto).
+    """
+    entry = _models.get(variant.version)
+    if entry is None or (entry[2] is not None and entry[2] <= time.monotonic()):
+        load_sdks()
+        with _models_lock:
+            entry = _models.get(variant.version)
+            if entry is None or (entry[2] is not None and entry[2] <= time.monotonic()):
+                entry = _models[variant.version] = _create_model(variant)
+    return entry[0], entry[1]
+
+
+class VertexSearchRetriever(Retriever):
+    """Busca no Data Store do Vertex AI Search (Discovery Engine)."""
+
+    name = "vertex"
+
+    def retrieve(self, query, k=5, deadline=None):
+        deadline = deadline or Deadline(WEBHOOK_DEADLINE_SECONDS)
+        load_sdks()
+        # Inicializa o cliente de busca do Discovery Engine
+        client = discoveryengine.SearchServiceClient()
+
+        # Constrói o caminho completo do recurso de configuração de serviço (serving config)
+        # O padrão geralmente é 'default_config'
+        serving_config = client.serving_config_path(
+            project=PROJECT_ID,
+            location=LOCATION,
+            data_store=DATA_STORE_ID,
+            serving_config="default_config",
+        )
+
+        # Configura a requisição de busca
+        # query: A pergunta original do usuário
+        # page_size: Número de trechos (snippets) a recuperar (5 é um bom equilíbrio)
+        request = discoveryengine.SearchRequest(
+            serving_config=serving_config,
+            query=query,
+            page_size=k,
+        )
+
+        # Executa a busca no índice vetorial (com hedge; o timeout do gRPC acompanha o prazo)
+        response = search_hedger.call(
+            lambda: client.search(request, timeout=max(deadline.remaining(), 0.001)), deadline)
 
         # Processa os resultados para extrair o texto relevante
-        context_text = ""
-        for result in response.results:
+        snippets = []
+        result_count = 0
+        for rank, result in enumerate(response.results):
+            result_count += 1
             # Extrai os dados do documento (assumindo documentos não estruturados/PDFs)
             # O campo 'derivedStructData' geralmente contém os snippets extraídos
             data = result.document.derived_struct_data
             if 'snippets' in data:
-                for snippet in data['snippets']:
-                    context_text += snippet.get('snippet', '') + "\n"
+                for position, snippet in enumerate(data['snippets']):
+                    snippets.append(Snippet(snippet.get('snippet', ''),
+                                            score=rank_score(rank, position)))
+        return RetrievalResult(snippets, self.name, results=result_count)
+
+
+# Recuperador configurado em RETRIEVER_MODE (Vertex AI Search, índice local ou ambos em camadas)
+retriever = build_retriever(VertexSearchRetriever())
+
+
+def process_rag_query(user_query, deadline=None, session_id=None):
+    """
+    Executa o fluxo RAG (Retrieval-Augmented Generation).
+    1. Busca documentos relevantes no Vertex AI Search (Data Store) e/ou no índice local
+       (ver RETRIEVER_MODE em retrieval.py).
+    2. Envia o contexto encontrado + pergunta do usuário para o Gemini, com o prompt e o
+       modelo da variante selecionada no registro de prompts (prompt_registry.py).
+    3. Retorna a resposta gerada.
+
+    Se o prazo acabar antes da resposta, retorna a última resposta gerada para a mesma
+    pergunta (cache) ou o trecho mais relevante encontrado na busca.
+
+    Args:
+        user_query (str): Pergunta do usuário.
+        deadline (Deadline, optional): Prazo da requisição (padrão: WEBHOOK_DEADLINE_SECONDS).
+        session_id (str, optional): Sessão do Dialogflow; define a variante do prompt em testes A/B.
+    """
+    deadline = deadline or Deadline(WEBHOOK_DEADLINE_SECONDS)
+    variant = registry.select(RAG_PROMPT_ID, session_id)
+    # Span raiz: permite separar o tempo de Vertex AI Search, Gemini e Django por requisição
+    with tracer.span("rag.process_query", query_chars=len(user_query or ""),
+                     prompt_version=variant.version) as span:
+        return _process_rag_query(user_query, deadline, variant, session_id, span)
+
+
+def _process_rag_query(user_query, deadline, variant, session_id=None, span=NOOP_SPAN):
+    """Memória da conversa e coalescência em torno da busca e da geração."""
+
+    # Sem queryText não há o que buscar (nem chave de coalescência): resposta padrão, sem erro
+    if not (user_query or "").strip():
+        logging.warning("Dúvida técnica sem texto da pergunta (queryText ausente).")
+        span.set_attribute("empty_query", True)
+        return NO_CONTEXT_MESSAGE
+
+    # Passo 0: Memória da conversa (continuações reaproveitam a pergunta e os trechos anteriores)
+    memory, plan = _plan_with_memory(user_query, session_id)
+
+    if plan.history or not RAG_COALESCE:
+        # Continuações levam o histórico da sessão no prompt: a resposta não é compartilhável
+        answer, snippets_used = _answer_query(user_query, plan, variant, deadline)
+    else:
+        # Perguntas iguais simultâneas (mesma versão de prompt) esperam a mesma busca e geração
+        key = (variant.version, normalize_text(plan.search_query))
+        try:
+            (answer, snippets_used), shared = inflight.do(
+                key, lambda: _answer_query(user_query, plan, variant, deadline), deadline)
+        except DeadlineExceeded as e:
+            logging.warning("Prazo esgotado aguardando consulta idêntica: %s", e)
+            return _fallback_answer(plan.search_query, variant)
+        span.set_attribute("coalesced", shared)
+
+    # Guarda o turno na memória da sessão (apenas respostas geradas pelo Gemini)
+    if memory is not None and snippets_used is not None:
+        memory.add_turn(user_query, answer, snippets_used)
+        memory_store.put(session_id, memory)
+    return answer
+
+
+def _answer_query(user_query, plan, variant, deadline):
+    """
+    Busca, montagem do contexto e geração, com um span por etapa.
+
+    Returns:
+        tuple: (resposta, trechos usados no prompt ou None se a resposta não veio do Gemini).
+    """
+    # Continuações dependem do histórico: o cache usa a pergunta reescrita
+    cache_query = plan.search_query
+
+    # Passo 1: Busca (Retrieval)
+    try:
+        with tracer.span("rag.search", page_size=5) as span:
+            if plan.snippets is not None:
+                retrieval = RetrievalResult(plan.snippets, "memory")
+            else:
+                retrieval = retriever.retrieve(plan.search_query, k=5, deadline=deadline)
+            snippets = retrieval.snippets
+
+            span.set_attributes({"retriever": retrieval.tier, "results": retrieval.results,
+                                 "snippets": len(snippets)})
+            tracer.record_size("snippets", len(snippets))
+
+        with tracer.span("rag.build_context") as context_span:
+            # Remove quase duplicados, ordena por relevância e corta no orçamento de tokens
+            context = build_context(snippets)
+            context_text = context.text
+            context_span.set_attributes({
+                "snippets_kept": len(context.snippets),
+                "duplicates_removed": context.duplicates,
+                "over_budget_removed": context.over_budget,
+                "context_tokens_estimate": context.tokens,
+                "context_chars": len(context_text),
+            })
+            tracer.record_size("context_chars", len(context_text))
+            tracer.record_size("context_tokens_estimate", context.tokens)
 
         # Caso nenhum contexto seja encontrado, retorna uma mensagem de fallback
         if not context_text:
-            return "Desculpe, não encontrei informações suficientes na minha base de conhecimento para responder isso."
+            return NO_CONTEXT_MESSAGE, None
 
+    except DeadlineExceeded as e:
+        logging.warning("Prazo esgotado na busca: %s", e)
+        return _fallback_answer(cache_query, variant), None
     except Exception as e:
         # Loga erros de busca (ex: problemas de permissão ou configuração)
-        logging.error(f"Erro ao buscar no Vertex AI Search: {e}")
-        return "Ocorreu um erro ao consultar a base de conhecimento."
+        logging.error("Erro ao buscar na base de conhecimento: %s", e)
+        return _fallback_answer(cache_query, variant, default=SEARCH_ERROR_MESSAGE), None
 
     # Passo 2: Geração (Generation)
-    # Instancia o modelo Gemini 1.5 Flash (otimizado para velocidade e custo)
-    model = GenerativeModel("gemini-1.5-flash-001")
-
-    # Constrói o prompt para o modelo
-    # Instrução clara para atuar como assistente técnico e usar apenas o contexto fornecido
-    prompt = f"""
-    Você é o Nexus AI, um assistente de suporte técnico especializado.
-    Use as informações de contexto abaixo para responder à pergunta do usuário.
-    Se a resposta não estiver no contexto, diga que não sabe. Não invente informações.
-    
-    Contexto:
-    {context_text}
-    
-    Pergunta do Usuário:
-    {user_query}
-    
-    Resposta:
-    """
+    with tracer.span("rag.build_prompt", prompt_version=variant.version) as span:
+        # Modelo e prompt vêm do registro (prompts.json): a variante define o modelo Gemini, a
+        # configuração de geração, a instrução de sistema e o template pré-compilado
+        model, instruction_cached = get_model(variant)
+        prompt = variant.render(include_system_instruction=not instruction_cached,
+                                context=context_text, question=user_query,
+                                history=format_history(plan.history))
+        span.set_attributes({"prompt_chars": len(prompt), "context_cached": instruction_cached})
 
+    start = time.perf_counter()
+    status = "OK"
     try:
-        # Envia o prompt para o modelo gerar a resposta
-        generation_response = model.generate_content(prompt)
-        # Retorna o texto gerado
-        return generation_response.text
+        with tracer.span("rag.generate", model=variant.model, prompt_variant=variant.name,
+                         prompt_version=variant.version) as span:
+            # Envia o prompt para o modelo gerar a resposta (com hedge, até o fim do prazo)
+            generation_response = generate_hedger.call(
+                lambda: model.generate_content(prompt), deadline, span)
+            _record_token_usage(span, generation_response, variant)
+            answer = generation_response.text
+    except DeadlineExceeded as e:
+        status = "DEADLINE_EXCEEDED"
+        logging.warning("Prazo esgotado na geração: %s", e)
+        return _fallback_answer(cache_query, variant, context), None
     except Exception as e:
-        logging.error(f"Erro ao gerar resposta com Gemini: {e}")
-        return "Desculpe, tive um problema ao processar sua resposta."
+        status = "ERROR"
+        logging.error("Erro ao gerar resposta com Gemini: %s", e)
+        return _fallback_answer(cache_query, variant, default=GENERATION_ERROR_MESSAGE), None
+    finally:
+        tracer.record_generation(variant, time.perf_counter() - start, status)
+
+    # Guarda a resposta (por versão do prompt) para uso como fallback
+    answer_cache.put(cache_query, answer, version=variant.version)
+    return answer, context.snippets
+
+
+def _plan_with_memory(user_query, session_id):
+    """
+    Carrega a memória da sessão e decide a consulta de busca.
+
+    Returns:
+        tuple: (ConversationMemory ou None sem sessão, MemoryPlan).
+    """
+    if not session_id:
+        return None, MemoryPlan(user_query)
+    with tracer.span("rag.memory") as span:
+        memory = memory_store.get(session_id) or ConversationMemory()
+        plan = memory.plan(user_query)
+        span.set_attributes({"turns": len(memory), "follow_up": plan.follow_up,
+                             "reused_snippets": len(plan.snippets or ())})
+    return memory, plan
+
+
+def _fallback_answer(user_query, variant, context=None, default=TIMEOUT_MESSAGE):
+    """
+    Resposta usada quando o prazo acaba ou a busca/geração falham: a última resposta gerada
+    para a mesma pergunta (com a mesma versão de prompt), a resposta do pacote pré-calculado,
+    o trecho mais relevante da busca ou a mensagem `default`.
+    """
+    answer = answer_cache.get(user_query, version=variant.version)
+    source = "cache"
+    if answer is None:
+        answer = answer_pack.lookup(user_query)
+        source = "answer_pack"
+    if answer is None and context is not None and context.snippets:
+        source = "snippet"
+        answer = SNIPPET_FALLBACK_MESSAGE.format(
+            snippet=truncate_to_tokens(context.snippets[0], SNIPPET_FALLBACK_TOKENS))
+    if answer is None:
+        source = "timeout_message" if default is TIMEOUT_MESSAGE else "error_message"
+        answer = default
+    with tracer.span("rag.fallback", source=source):
+        return answer
+
+
+def _record_token_usage(span, generation_response, variant):
+    """Registra no span e nos histogramas a contagem de tokens informada pelo Gemini."""
+    if not tracer.enabled:
+        return
+    usage = getattr(generation_response, "usage_metadata", None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    output_tokens = getattr(usage, "candidates_token_count", None)
+    span.set_attributes({
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+    })
+    tracer.record_size("prompt_tokens", prompt_tokens)
+    tracer.record_size("output_tokens", output_tokens)
+    tracer.record_prompt_tokens(variant, "prompt", prompt_tokens)
+    tracer.record_prompt_tokens(variant, "output", output_tokens)
 
 
 def create_ticket_in_django(parameters):
     """
     Envia os dados coletados pelo Dialogflow para a API do Django criar um chamado.
     """
+    description = parameters.get("problem_description", "Sem descrição")
+    stated_priority = parameters.get("priority")
+    # Triagem local: a descrição pode elevar ou rebaixar a prioridade informada pelo usuário.
+    # Sem o modelo compilado, vale só o sinônimo de TicketPriority (ex: "Urgente" -> CRITICAL)
+    priority = triage_priority(description, stated_priority, fallback=resolve_priority(stated_priority))
+
     # Prepara o payload (dados) para a requisição POST
     # Mapeia os parâmetros do Dialogflow para os campos esperados pela API Django
     payload = {
@@ -120,24 +460,26 @@ def create_ticket_in_django(parameters):
         # Tenta extrair empresa
         "company": parameters.get("organization", "Não informada"),
         # Descrição do problema
-        "description": parameters.get("problem_description", "Sem descrição"),
-        # Define prioridade padrão (pode ser ajustada por lógica de sentimento futura)
-        "priority": "MEDIUM"
+        "description": description,
+        "priority": priority
     }
 
     try:
         # Faz a requisição HTTP POST para o endpoint de criação de tickets
         # Timeout de 5 segundos para não travar a Cloud Function
-        response = requests.post(DJANGO_API_URL, json=payload, timeout=5)
+        with tracer.span("ticket.create", http_method="POST") as span:
+            response = requests.post(DJANGO_API_URL, json=payload, timeout=5)
+            span.set_attribute("http_status_code", response.status_code)
 
-        # Verifica se a criação foi bem sucedida (Status 201 Created)
-        if response.status_code == 201:
-            # Retorna o ID do ticket criado
+        # Verifica se a criação foi bem sucedida (Status 201 Created). Com DUPLICATE_TICKETS=merge,
+        # um chamado repetido é anexado ao que já está aberto e a API responde 200 com ele
+        if response.status_code in (200, 201):
+            # Retorna o ID do ticket criado (ou do original)
             return response.json().get("id")
         else:
-            logging.error(f"Falha ao criar ticket: {response.text}")
+            logging.error("Falha ao criar ticket: %s", response.text)
             return "ERRO-API"
 
     except Exception as e:
-        logging.error(f"Erro de conexão com Django API: {e}")
+        logging.error("Erro de conexão com Django API: %s", e)
         return "ERRO-CONEXAO"
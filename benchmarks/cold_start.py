@@ -0,0 +1,208 @@
+"""
+Benchmark do cold start da Cloud Function (backend_functions/main.py).
+
+Cada medição roda num interpretador novo com `python -X importtime`, como a primeira requisição
+de uma instância: importa o main.py e percorre o caminho de uma intent.
+
+    abrir_chamado    primeira requisição atendida (POST na API de tickets fake)
+    duvida_tecnica   carregamento dos SDKs do Google Cloud que a primeira dúvida técnica espera
+                     (vertex_rag.load_sdks(); as chamadas remotas não são feitas)
+
+E compara os modos de SDK_WARMUP: 'eager' (SDKs importados antes da primeira requisição, como
+era antes), 'lazy' (no primeiro uso) e 'background' (thread iniciada com a instância).
+
+Os números só são representativos com google-cloud-aiplatform e google-cloud-discoveryengine
+instalados (--sdk real, o padrão quando estão disponíveis). Com --sdk fake os SDKs são os
+módulos mínimos de benchmarks/fakes.py, de custo quase nulo (útil para validar o roteiro).
+
+Exemplo:
+    python -m benchmarks.cold_start --repeat 5 --output benchmarks/results/cold_start.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.fakes import FakeTicketsServer
+from benchmarks.report import build_results, write_results
+from benchmarks.run import TICKET_PARAMETERS
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_FUNCTIONS_DIR = os.path.join(REPO_ROOT, "backend_functions")
+
+INTENTS = ["abrir_chamado", "duvida_tecnica"]
+MODES = ["eager", "lazy", "background"]
+
+# Delimitam, na saída do -X importtime, os imports feitos pelo código medido
+START_MARKER = "cold-start:begin"
+END_MARKER = "cold-start:end"
+
+# Executado no processo filho (argv: intent, sdk). Só importa o mínimo antes do marcador.
+CHILD_SCRIPT = """
+import os, sys, time
+sys.path[:0] = [os.environ["COLD_START_FUNCTIONS_DIR"], os.environ["COLD_START_REPO_ROOT"]]
+intent, sdk = sys.argv[1], sys.argv[2]
+if sdk == "fake":
+    from benchmarks.fakes import install_fake_google_sdk
+    install_fake_google_sdk("http://127.0.0.1:9", "http://127.0.0.1:9")
+import json
+payload = json.loads(os.environ["COLD_START_PAYLOAD"])
+sys.stderr.write("%s\\n" % os.environ["COLD_START_BEGIN"])
+sys.stderr.flush()
+
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+import vertex_rag
+if intent == "duvida_tecnica":
+    vertex_rag.load_sdks()
+    ok = True
+else:
+    from flask import Flask
+    with Flask("cold_start").test_request_context():
+        response = main.handle_dialogflow_request(payload)
+        ok = response.status_code == 200 and "sucesso" in response.get_json()["fulfillmentText"]
+done = time.perf_counter()
+
+sys.stderr.write("%s\\n" % os.environ["COLD_START_END"])
+sys.stderr.flush()
+print(json.dumps({
+    "ok": ok,
+    "import_ms": (imported - start) * 1000.0,
+    "path_ms": (done - imported) * 1000.0,
+    "sdk_loaded": vertex_rag._sdk_loaded,
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Lê a saída do -X importtime entre os marcadores.
+
+    Returns:
+        dict: {"total_ms": tempo total de imports, "modules": {pacote raiz: ms}}. O tempo de cada
+        pacote é a soma do tempo próprio dos seus módulos (ex: 'google' inclui todo o SDK).
+    """
+    modules = {}
+    inside = False
+    for line in stderr.splitlines():
+        if line == START_MARKER:
+            inside = True
+        elif line == END_MARKER:
+            break
+        elif inside and line.startswith("import time:"):
+            self_us, _, name = line[len("import time:"):].split("|", 2)
+            if self_us.strip().isdigit():
+                package = name.strip().split(".")[0]
+                modules[package] = modules.get(package, 0.0) + int(self_us) / 1000.0
+    return {"total_ms": round(sum(modules.values()), 2), "modules": modules}
+
+
+def run_child(intent, mode, sdk, tickets_url):
+    """Uma medição num interpretador novo."""
+    payload = {"queryResult": {"intent": {"displayName": intent}, "parameters": TICKET_PARAMETERS,
+                               "queryText": "Quero abrir um chamado"}}
+    env = dict(os.environ,
+               SDK_WARMUP=mode,
+               DJANGO_API_URL=tickets_url,
+               LOG_LEVEL="WARNING",
+               PYTHONDONTWRITEBYTECODE="1",
+               COLD_START_FUNCTIONS_DIR=BACKEND_FUNCTIONS_DIR,
+               COLD_START_REPO_ROOT=REPO_ROOT,
+               COLD_START_PAYLOAD=json.dumps(payload),
+               COLD_START_BEGIN=START_MARKER,
+               COLD_START_END=END_MARKER)
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT, intent, sdk],
+        cwd=BACKEND_FUNCTIONS_DIR, env=env, capture_output=True, text=True, timeout=300)
+    if process.returncode != 0:
+        raise RuntimeError(f"Processo de medição falhou ({intent}, {mode}):\n"
+                           + "\n".join(process.stderr.splitlines()[-15:]))
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result["imports"] = parse_importtime(process.stderr)
+    return result
+
+
+def run_scenario(intent, mode, sdk, tickets_url, repeat=3, top=8):
+    """
+    Mede `repeat` cold starts de um caminho e resume pela mediana.
+
+    Returns:
+        dict: Tempos (ms) de import do main.py, do caminho da intent e total, tempo de imports
+        segundo o -X importtime, os imports mais pesados e se os SDKs foram carregados.
+    """
+    runs = [run_child(intent, mode, sdk, tickets_url) for _ in range(repeat)]
+    median = lambda values: round(statistics.median(values), 2)  # noqa: E731
+    modules = {}
+    for run in runs:
+        for name, ms in run["imports"]["modules"].items():
+            modules.setdefault(name, []).append(ms)
+    heaviest = sorted(((median(values), name) for name, values in modules.items()), reverse=True)
+    return {
+        "import_ms": median([run["import_ms"] for run in runs]),
+        "path_ms": median([run["path_ms"] for run in runs]),
+        "ready_ms": median([run["import_ms"] + run["path_ms"] for run in runs]),
+        "importtime_ms": median([run["imports"]["total_ms"] for run in runs]),
+        "heaviest_imports_ms": {name: ms for ms, name in heaviest[:top]},
+        "sdk_loaded": all(run["sdk_loaded"] for run in runs),
+        "errors": sum(1 for run in runs if not run["ok"]),
+        "runs": repeat,
+    }
+
+
+def detect_sdk():
+    """'real' se os SDKs do Google Cloud estiverem instalados; senão, 'fake'."""
+    try:
+        found = all(importlib.util.find_spec(name) is not None
+                    for name in ("vertexai", "google.cloud.discoveryengine_v1"))
+    except ImportError:
+        found = False
+    return "real" if found else "fake"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Mede o cold start da Cloud Function por intent e modo de SDK_WARMUP")
+    parser.add_argument("--intents", default=",".join(INTENTS))
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--sdk", choices=["auto", "real", "fake"], default="auto",
+                        help="SDKs do Google Cloud instalados (real) ou módulos fake")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Processos por cenário (o resumo usa a mediana)")
+    parser.add_argument("--top", type=int, default=8,
+                        help="Imports mais pesados listados por cenário")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", "cold_start.json"))
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sdk = detect_sdk() if args.sdk == "auto" else args.sdk
+    if sdk == "fake":
+        print("SDKs do Google Cloud não instalados: usando os módulos fake (custo de import quase nulo)")
+
+    scenarios = {}
+    with FakeTicketsServer() as tickets:
+        for intent in [name.strip() for name in args.intents.split(",") if name.strip()]:
+            for mode in [name.strip() for name in args.modes.split(",") if name.strip()]:
+                scenarios[f"{intent}/{mode}"] = run_scenario(
+                    intent, mode, sdk, f"{tickets.url}/api/tickets/", args.repeat, args.top)
+
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    config["sdk"] = sdk
+    write_results(build_results(config, scenarios, REPO_ROOT), args.output)
+
+    print(f"{'cenário':<28} {'import main':>12} {'caminho':>10} {'total':>10} {'importtime':>11} {'SDKs':>5}")
+    for name, summary in scenarios.items():
+        print(f"{name:<28} {summary['import_ms']:>12.1f} {summary['path_ms']:>10.1f}"
+              f" {summary['ready_ms']:>10.1f} {summary['importtime_ms']:>11.1f}"
+              f" {'sim' if summary['sdk_loaded'] else 'não':>5}")
+    print(f"\nResultados gravados em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Benchmark da montagem de contexto do RAG (backend_functions/context_builder.py).
+
+Compara, sobre consultas gravadas (benchmarks/data/recorded_queries.json), o contexto antigo
+(todos os snippets concatenados) com o contexto deduplicado e limitado ao orçamento de tokens:
+tokens estimados, caracteres, fatos esperados preservados e latência estimada do Gemini
+(mesmo modelo do FakeGeminiServer: base + custo por 1000 caracteres de prompt).
+
+Exemplo:
+    python -m benchmarks.context_budget --token-budget 1500 --output benchmarks/results/context.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from benchmarks.report import build_results, write_results
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILE = os.path.join(REPO_ROOT, "benchmarks", "data", "recorded_queries.json")
+
+# A Cloud Function tem layout plano (imports sem pacote)
+sys.path.insert(0, os.path.join(REPO_ROOT, "backend_functions"))
+
+from context_builder import Snippet, build_context, estimate_tokens, rank_score  # noqa: E402
+
+# Caracteres fixos do prompt de process_rag_query (instruções + pergunta), sem o contexto
+PROMPT_OVERHEAD_CHARS = 400
+
+
+def load_queries(path=DATA_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["queries"]
+
+
+def legacy_context(results):
+    """Contexto como era montado antes: todos os snippets, na ordem da busca."""
+    return "".join(snippet + "\n" for snippets in results for snippet in snippets)
+
+
+def to_snippets(results):
+    return [Snippet(text, rank_score(rank, position))
+            for rank, snippets in enumerate(results)
+            for position, text in enumerate(snippets)]
+
+
+def facts_retained(context_text, facts):
+    if not facts:
+        return 1.0
+    return sum(1 for fact in facts if fact in context_text) / len(facts)
+
+
+def estimated_generation_ms(context_text, base_ms, ms_per_1k_chars):
+    return base_ms + ms_per_1k_chars * (len(context_text) + PROMPT_OVERHEAD_CHARS) / 1000.0
+
+
+def measure(context_text, facts, args):
+    return {
+        "tokens": estimate_tokens(context_text),
+        "chars": len(context_text),
+        "facts_retained": facts_retained(context_text, facts),
+        "estimated_generation_ms": round(estimated_generation_ms(
+            context_text, args.gemini_latency_ms, args.gemini_ms_per_1k_chars), 2),
+    }
+
+
+def run_benchmark(queries, args):
+    """
+    Mede as duas estratégias em todas as consultas.
+
+    Returns:
+        dict: {"queries": [...], "totals": {"legacy": {...}, "budgeted": {...}}}
+    """
+    rows = []
+    for item in queries:
+        results = item["results"]
+        facts = item.get("expected_facts", [])
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            context = build_context(to_snippets(results), token_budget=args.token_budget,
+                                    dedup_threshold=args.dedup_threshold)
+        build_ms = (time.perf_counter() - start) * 1000.0 / args.repeat
+
+        budgeted = measure(context.text, facts, args)
+        budgeted.update({
+            "build_ms": round(build_ms, 4),
+            "duplicates_removed": context.duplicates,
+            "over_budget_removed": context.over_budget,
+            "truncated": context.truncated,
+        })
+        rows.append({
+            "query": item["query"],
+            "legacy": measure(legacy_context(results), facts, args),
+            "budgeted": budgeted,
+        })
+
+    totals = {}
+    for strategy in ("legacy", "budgeted"):
+        values = [row[strategy] for row in rows]
+        count = len(values) or 1
+        totals[strategy] = {
+            "tokens": sum(v["tokens"] for v in values),
+            "chars": sum(v["chars"] for v in values),
+            "facts_retained": round(sum(v["facts_retained"] for v in values) / count, 4),
+            "estimated_generation_ms": round(
+                sum(v["estimated_generation_ms"] for v in values) / count, 2),
+        }
+    legacy_tokens = totals["legacy"]["tokens"] or 1
+    totals["token_reduction"] = round(1 - totals["budgeted"]["tokens"] / legacy_tokens, 4)
+    return {"queries": rows, "totals": totals}
+
+
+def format_report(report):
+    lines = [f"{'consulta':<45} {'tokens':>15} {'fatos':>11} {'geração (ms)':>17}"]
+    for row in report["queries"]:
+        legacy, budgeted = row["legacy"], row["budgeted"]
+        lines.append(
+            f"{row['query'][:45]:<45} {legacy['tokens']:>6} -> {budgeted['tokens']:<6}"
+            f" {legacy['facts_retained']:>4.0%} -> {budgeted['facts_retained']:<4.0%}"
+            f" {legacy['estimated_generation_ms']:>7.1f} -> {budgeted['estimated_generation_ms']:<7.1f}")
+    totals = report["totals"]
+    lines.append(
+        f"\nTotal: {totals['legacy']['tokens']} -> {totals['budgeted']['tokens']} tokens "
+        f"({totals['token_reduction']:.0%} a menos), fatos preservados "
+        f"{totals['legacy']['facts_retained']:.0%} -> {totals['budgeted']['facts_retained']:.0%}")
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Compara o contexto concatenado com o contexto deduplicado e limitado")
+    parser.add_argument("--data", default=DATA_FILE, help="Consultas gravadas (JSON)")
+    parser.add_argument("--token-budget", type=int, default=1500)
+    parser.add_argument("--dedup-threshold", type=float, default=0.8)
+    parser.add_argument("--gemini-latency-ms", type=float, default=600)
+    parser.add_argument("--gemini-ms-per-1k-chars", type=float, default=20,
+                        help="Latência adicional do Gemini por 1000 caracteres de prompt")
+    parser.add_argument("--repeat", type=int, default=200,
+                        help="Repetições por consulta na medição do tempo de montagem")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", "context.json"),
+                        help="Arquivo JSON de resultados")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    report = run_benchmark(load_queries(args.data), args)
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    write_results(build_results(config, {"context_budget": report}, REPO_ROOT), args.output)
+    print(format_report(report))
+    print(f"\nResultados gravados em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+"""
+Substitutos locais (fakes) dos serviços do Google Cloud usados pelo Nexus AI.
+
+Cada fake é um servidor HTTP real, em uma thread, com latência configurável, para que o
+benchmark inclua o custo de rede/serialização de uma chamada externa:
+- FakeDiscoveryEngineServer: Vertex AI Search (SearchService.Search).
+- FakeGeminiServer: Gemini (GenerativeModel.generate_content), com contagem de tokens.
+- FakeDialogflowServer: Dialogflow ES (DetectIntent), que chama o webhook configurado
+  exatamente como o Dialogflow faz em produção.
+- FakeTicketsServer: API de tickets do Django, para isolar o webhook do banco de dados.
+
+install_fake_google_sdk() registra módulos google.cloud.discoveryengine_v1 e vertexai
+mínimos, cujos clientes falam com esses servidores, permitindo importar o vertex_rag
+sem as bibliotecas do Google Cloud.
+"""
+import json
+import random
+import sys
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# Trechos retornados pela busca simulada (formato derived_struct_data do Discovery Engine)
+DEFAULT_SNIPPETS = [
+    "Para reiniciar o servidor, acesse o painel e clique em Reiniciar.",
+    "A VPN exige o cliente atualizado e autenticação em dois fatores.",
+    "Impressoras de rede são configuradas pelo IP informado na etiqueta.",
+    "Senhas expiram a cada 90 dias e podem ser redefinidas no portal.",
+    "O backup diário é executado às 2h e mantido por 30 dias.",
+]
+
+
+class LatencyModel:
+    """
+    Latência simulada de um serviço: valor base em milissegundos com variação (jitter)
+    uniforme, de forma reprodutível a partir da semente.
+    """
+
+    def __init__(self, base_ms=0.0, jitter_ms=0.0, seed=None):
+        self.base_ms = base_ms
+        self.jitter_ms = jitter_ms
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        """Retorna a próxima latência em segundos."""
+        if not self.jitter_ms:
+            return self.base_ms / 1000.0
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.base_ms + jitter) / 1000.0
+
+    def wait(self):
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+
+
+class FakeServer:
+    """
+    Servidor HTTP local mínimo que responde JSON.
+    As subclasses implementam handle(method, path, body) -> (status, dict).
+    """
+
+    def __init__(self, latency=None, host="127.0.0.1", port=0):
+        self.latency = latency or LatencyModel()
+        self.requests_served = 0
+        self._counter_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._build_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def handle(self, method, path, body):
+        raise NotImplementedError
+
+    def _dispatch(self, method, path, body):
+        with self._counter_lock:
+            self.requests_served += 1
+        self.latency.wait()
+        return self.handle(method, path, body)
+
+    def _build_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 mantém a conexão aberta entre requisições (keep-alive)
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                body = json.loads(raw) if raw else {}
+                status, payload = server._dispatch(self.command, self.path, body)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = _respond
+            do_POST = _respond
+
+            def log_message(self, format, *args):
+                # Silencia o log por requisição (distorceria as medições)
+                pass
+
+        return Handler
+
+
+class FakeDiscoveryEngineServer(FakeServer):
+    """Imita o endpoint de busca do Vertex AI Search, retornando snippets fixos."""
+
+    def __init__(self, latency=None, snippets=None, results=5, **kwargs):
+        super().__init__(latency, **kwargs)
+        self.snippets = snippets or DEFAULT_SNIPPETS
+        self.results = results
+
+    def handle(self, method, path, body):
+        page_size = min(int(body.get("pageSize") or self.results), self.results)
+        results = [
+            {"document": {"derivedStructData": {
+                "snippets": [{"snippet": self.snippets[i % len(self.snippets)]}]}}}
+            for i in range(page_size)
+        ]
+        return 200, {"results": results}
+
+
+class FakeGeminiServer(FakeServer):
+    """
+    Imita o generateContent do Gemini.
+    A latência pode crescer com o tamanho do prompt (ms_per_1k_chars) e a resposta
+    informa uma contagem de tokens aproximada (~4 caracteres por token).
+    """
+
+    def __init__(self, latency=None, ms_per_1k_chars=0.0, answer=None, **kwargs):
+        super().__init__(latency, **kwargs)
+        self.ms_per_1k_chars = ms_per_1k_chars
+        self.answer = answer or "Reinicie o servidor pelo painel administrativo."
+
+    def handle(self, method, path, body):
+        prompt = body.get("prompt", "")
+        if self.ms_per_1k_chars:
+            time.sleep(len(prompt) / 1000.0 * self.ms_per_1k_chars / 1000.0)
+        return 200, {
+            "text": self.answer,
+            "usageMetadata": {
+                "promptTokenCount": max(1, len(prompt) // 4),
+                "candidatesTokenCount": max(1, len(self.answer) // 4),
+            },
+        }
+
+
+class FakeTicketsServer(FakeServer):
+    """Imita o POST /api/tickets/ do Django, devolvendo IDs sequenciais."""
+
+    def __init__(self, latency=None, **kwargs):
+        super().__init__(latency, **kwargs)
+        self._next_id = 0
+        self._id_lock = threading.Lock()
+
+    def handle(self, method, path, body):
+        with self._id_lock:
+            self._next_id += 1
+            ticket_id = self._next_id
+        return 201, dict(body, id=ticket_id)
+
+
+class FakeDialogflowServer(FakeServer):
+    """
+    Imita o DetectIntent do Dialogflow ES com fulfillment habilitado.
+
+    A latência configurada representa o NLU do Dialogflow; em seguida o webhook de
+    fulfillment é chamado com um WebhookRequest e o fulfillmentText é devolvido no
+    DetectIntentResponse. O fake não classifica o texto: a intenção e os parâmetros
+    "detectados" vêm de queryParams.payload ({"intent": ..., "parameters": {...}}).
+    """
+
+    def __init__(self, fulfillment_url, fulfillment_headers=None, latency=None,
+                 webhook_timeout=5.0, **kwargs):
+        super().__init__(latency, **kwargs)
+        self.fulfillment_url = fulfillment_url
+        self.fulfillment_headers = dict(fulfillment_headers or {})
+        self.webhook_timeout = webhook_timeout
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def handle(self, method, path, body):
+        session_path = path.split(":detectIntent")[0].lstrip("/")
+        text = body.get("queryInput", {}).get("text", {}).get("text", "")
+        detected = body.get("queryParams", {}).get("payload", {})
+        query_result = {
+            "queryText": text,
+            "intent": {"displayName": detected.get("intent")},
+            "parameters": detected.get("parameters", {}),
+            "languageCode": "pt-br",
+        }
+
+        webhook_request = {
+            "responseId": f"fake-{random.getrandbits(32):08x}",
+            "session": session_path,
+            "queryResult": query_result,
+        }
+        try:
+            response = self._session().post(
+                self.fulfillment_url, json=webhook_request,
+                headers=self.fulfillment_headers, timeout=self.webhook_timeout)
+        except requests.RequestException as e:
+            # O Dialogflow responde 200 com webhookStatus de erro quando o webhook falha
+            return 200, {"queryResult": query_result,
+                         "webhookStatus": {"code": 4, "message": str(e)}}
+
+        query_result = dict(query_result)
+        if response.ok:
+            query_result["fulfillmentText"] = response.json().get("fulfillmentText", "")
+            webhook_status = {"code": 0}
+        else:
+            webhook_status = {"code": 13, "message": f"HTTP {response.status_code}"}
+        return 200, {"queryResult": query_result, "webhookStatus": webhook_status}
+
+
+def detect_intent_url(dialogflow_url, project="nexus-ai-project", session_id="bench"):
+    """URL do DetectIntent no fake (mesmo formato da API REST v2)."""
+    return f"{dialogflow_url}/v2/projects/{project}/agent/sessions/{session_id}:detectIntent"
+
+
+def detect_intent_body(text, intent, parameters=None):
+    """Corpo de uma chamada DetectIntent para o FakeDialogflowServer."""
+    return {
+        "queryInput": {"text": {"text": text, "languageCode": "pt-br"}},
+        "queryParams": {"payload": {"intent": intent, "parameters": parameters or {}}},
+    }
+
+
+def install_fake_google_sdk(search_url, gemini_url):
+    """
+    Registra em sys.modules versões mínimas do SDK do Google usadas pelo vertex_rag,
+    cujos clientes chamam os servidores fake via HTTP.
+
+    Deve ser chamada antes de importar o vertex_rag. Uso exclusivo do benchmark.
+
+    Args:
+        search_url (str): URL do FakeDiscoveryEngineServer.
+        gemini_url (str): URL do FakeGeminiServer.
+    """
+    local = threading.local()
+
+    def session():
+        s = getattr(local, "session", None)
+        if s is None:
+            s = local.session = requests.Session()
+        return s
+
+    class SearchRequest:
+        def __init__(self, serving_config=None, query=None, page_size=10, **kwargs):
+            self.serving_config = serving_config
+            self.query = query
+            self.page_size = page_size
+
+    class SearchServiceClient:
+        def serving_config_path(self, project, location, data_store, serving_config):
+            return (f"projects/{project}/locations/{location}/collections/default_collection/"
+                    f"dataStores/{data_store}/servingConfigs/{serving_config}")
+
+        def search(self, request, timeout=None, **kwargs):
+            response = session().post(
+                f"{search_url}/v1/{request.serving_config}:search",
+                json={"query": request.query, "pageSize": request.page_size}, timeout=timeout or 30)
+            response.raise_for_status()
+            results = [
+                types.SimpleNamespace(document=types.SimpleNamespace(
+                    derived_struct_data=item["document"]["derivedStructData"]))
+                for item in response.json().get("results", [])
+            ]
+            return types.SimpleNamespace(results=results)
+
+    class GenerativeModel:
+        def __init__(self, model_name, **kwargs):
+            self.model_name = model_name
+
+        def generate_content(self, prompt, **kwargs):
+            response = session().post(
+                f"{gemini_url}/v1/models/{self.model_name}:generateContent",
+                json={"prompt": prompt}, timeout=30)
+            response.raise_for_status()
+            data = response.json()
+            usage = data.get("usageMetadata", {})
+            return types.SimpleNamespace(
+                text=data["text"],
+                usage_metadata=types.SimpleNamespace(
+                    prompt_token_count=usage.get("promptTokenCount"),
+                    candidates_token_count=usage.get("candidatesTokenCount")))
+
+    discoveryengine = types.ModuleType("google.cloud.discoveryengine_v1")
+    discoveryengine.SearchServiceClient = SearchServiceClient
+    discoveryengine.SearchRequest = SearchRequest
+
+    generative_models = types.ModuleType("vertexai.generative_models")
+    generative_models.GenerativeModel = GenerativeModel
+
+    vertexai = types.ModuleType("vertexai")
+    vertexai.init = lambda **kwargs: None
+    vertexai.generative_models = generative_models
+
+    # Reaproveita o namespace 'google' real, se existir (ex: protobuf instalado)
+    try:
+        import google.cloud  # noqa: F401
+        cloud = sys.modules["google.cloud"]
+    except ImportError:
+        google = sys.modules.setdefault("google", types.ModuleType("google"))
+        cloud = types.ModuleType("google.cloud")
+        google.cloud = cloud
+        sys.modules["google.cloud"] = cloud
+    cloud.discoveryengine_v1 = discoveryengine
+
+    sys.modules.update({
+        "google.cloud.discoveryengine_v1": discoveryengine,
+        "vertexai": vertexai,
+        "vertexai.generative_models": generative_models,
+    })
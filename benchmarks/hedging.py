@@ -0,0 +1,124 @@
+"""
+Benchmark do hedging e do prazo das chamadas remotas (backend_functions/deadline.py).
+
+Simula uma dependência com cauda longa (a maior parte das chamadas rápida e uma fração lenta,
+como o Gemini sob carga) e compara, com e sem hedging: p50/p95/p99, chamadas extras (custo) e
+respostas que estourariam o prazo do webhook.
+
+Exemplo:
+    python -m benchmarks.hedging --calls 400 --slow-fraction 0.05 --output benchmarks/results/hedging.json
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.loadgen import percentile
+from benchmarks.report import build_results, write_results
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A Cloud Function tem layout plano (imports sem pacote)
+sys.path.insert(0, os.path.join(REPO_ROOT, "backend_functions"))
+
+from deadline import Deadline, DeadlineExceeded, Hedger  # noqa: E402
+
+
+class TailLatencyService:
+    """Dependência simulada: latência base com jitter e uma fração de chamadas lentas."""
+
+    def __init__(self, base_ms, slow_ms, slow_fraction, seed):
+        self.base_ms = base_ms
+        self.slow_ms = slow_ms
+        self.slow_fraction = slow_fraction
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            slow = self.random.random() < self.slow_fraction
+            delay_ms = (self.slow_ms if slow else self.base_ms) * self.random.uniform(0.8, 1.2)
+        time.sleep(delay_ms / 1000.0)
+        return "ok"
+
+
+def run_mode(args, max_ratio):
+    """Executa as chamadas com o hedging configurado e resume as latências."""
+    service = TailLatencyService(args.base_ms, args.slow_ms, args.slow_fraction, args.seed)
+    hedger = Hedger("benchmark", default_delay=args.default_delay_ms / 1000.0,
+                    max_ratio=max_ratio, executor=ThreadPoolExecutor(max_workers=args.concurrency * 2))
+    latencies = []
+    deadline_misses = 0
+    lock = threading.Lock()
+
+    def one_call(_):
+        nonlocal deadline_misses
+        start = time.monotonic()
+        try:
+            hedger.call(service, Deadline(args.deadline_ms / 1000.0))
+        except DeadlineExceeded:
+            with lock:
+                deadline_misses += 1
+        with lock:
+            latencies.append((time.monotonic() - start) * 1000.0)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one_call, range(args.calls)))
+    hedger.executor.shutdown(wait=True)
+
+    values = sorted(latencies)
+    return {
+        "latency_ms": {p: round(percentile(values, q), 1)
+                       for p, q in (("p50", 50), ("p95", 95), ("p99", 99))},
+        "calls": args.calls,
+        "upstream_calls": service.calls,
+        "extra_calls_pct": round(100.0 * (service.calls - args.calls) / args.calls, 1),
+        "deadline_misses": deadline_misses,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Compara chamadas remotas com e sem hedging")
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--base-ms", type=float, default=80,
+                        help="Latência típica da dependência simulada")
+    parser.add_argument("--slow-ms", type=float, default=800,
+                        help="Latência das chamadas lentas (cauda)")
+    parser.add_argument("--slow-fraction", type=float, default=0.05)
+    parser.add_argument("--deadline-ms", type=float, default=600,
+                        help="Prazo de cada chamada")
+    parser.add_argument("--default-delay-ms", type=float, default=250,
+                        help="Atraso do hedge antes de haver p95 medido")
+    parser.add_argument("--max-ratio", type=float, default=0.1,
+                        help="Proporção máxima de hedges no modo com hedging")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", "hedging.json"))
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    scenarios = {
+        "without_hedging": run_mode(args, max_ratio=0),
+        "with_hedging": run_mode(args, max_ratio=args.max_ratio),
+    }
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    write_results(build_results(config, scenarios, REPO_ROOT), args.output)
+
+    print(f"{'modo':<18} {'p50':>8} {'p95':>8} {'p99':>8} {'extras':>8} {'prazo':>6}")
+    for name, summary in scenarios.items():
+        latency = summary["latency_ms"]
+        print(f"{name:<18} {latency['p50']:>8.1f} {latency['p95']:>8.1f} {latency['p99']:>8.1f}"
+              f" {summary['extra_calls_pct']:>7.1f}% {summary['deadline_misses']:>6}")
+    print(f"\nResultados gravados em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
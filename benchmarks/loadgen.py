@@ -0,0 +1,191 @@
+"""
+Gerador de carga em malha aberta (open-loop) e cálculo das estatísticas do benchmark.
+
+As requisições são disparadas em uma taxa fixa (RPS alvo), independentemente de as
+anteriores terem terminado. A latência é medida a partir do horário agendado de cada
+requisição, e não do momento em que uma thread ficou livre: assim a fila formada quando o
+alvo satura aparece nos percentis (evita o "coordinated omission").
+"""
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class RequestFailed(Exception):
+    """
+    Falha de uma requisição do benchmark (status HTTP inesperado, erro do webhook etc.).
+
+    Args:
+        error_type (str): Categoria agregada no relatório (ex: 'HTTP 500').
+    """
+
+    def __init__(self, error_type, message=""):
+        super().__init__(message or error_type)
+        self.error_type = error_type
+
+
+def percentile(sorted_values, pct):
+    """
+    Percentil pelo método nearest-rank.
+
+    Args:
+        sorted_values (list): Valores em ordem crescente.
+        pct (float): Percentil entre 0 e 100.
+
+    Returns:
+        float: Valor do percentil (0.0 para lista vazia).
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def current_rss_mb():
+    """Memória residente atual do processo em MB (None se indisponível)."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo em MB (None se indisponível)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS em bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class LoadResult:
+    """Medições brutas de uma execução de carga."""
+
+    def __init__(self, target_rps, duration):
+        self.target_rps = target_rps
+        self.duration = duration
+        self.latencies = []
+        self.service_times = []
+        self.errors = {}
+        self.elapsed = 0.0
+        self.rss_before_mb = None
+        self.rss_after_mb = None
+        self._lock = threading.Lock()
+
+    def record(self, latency, service_time, error=None):
+        with self._lock:
+            if error is None:
+                self.latencies.append(latency)
+                self.service_times.append(service_time)
+            else:
+                self.errors[error] = self.errors.get(error, 0) + 1
+
+    def summary(self):
+        """
+        Resumo serializável em JSON (tempos em milissegundos).
+
+        Returns:
+            dict: Percentis, vazão, erros e memória.
+        """
+        latencies = sorted(self.latencies)
+        service_times = sorted(self.service_times)
+        completed = len(latencies)
+        error_count = sum(self.errors.values())
+        total = completed + error_count
+
+        def ms(value):
+            return round(value * 1000.0, 3)
+
+        return {
+            "target_rps": self.target_rps,
+            "duration_s": self.duration,
+            "requests": total,
+            "completed": completed,
+            "errors": error_count,
+            "error_rate": round(error_count / total, 4) if total else 0.0,
+            "error_types": dict(self.errors),
+            "throughput_rps": round(completed / self.elapsed, 2) if self.elapsed else 0.0,
+            "latency_ms": {
+                "p50": ms(percentile(latencies, 50)),
+                "p95": ms(percentile(latencies, 95)),
+                "p99": ms(percentile(latencies, 99)),
+                "mean": ms(sum(latencies) / completed) if completed else 0.0,
+                "max": ms(latencies[-1]) if latencies else 0.0,
+            },
+            # Tempo de serviço puro (sem a espera na fila do gerador de carga)
+            "service_time_ms": {
+                "p50": ms(percentile(service_times, 50)),
+                "p95": ms(percentile(service_times, 95)),
+                "p99": ms(percentile(service_times, 99)),
+            },
+            "memory_mb": {
+                "rss_before": _round(self.rss_before_mb),
+                "rss_after": _round(self.rss_after_mb),
+                "rss_peak": _round(peak_rss_mb()),
+            },
+        }
+
+
+def _round(value):
+    return round(value, 1) if value is not None else None
+
+
+def run_load(request_fn, rps, duration, concurrency=32, warmup=0):
+    """
+    Executa request_fn na taxa alvo durante o tempo informado.
+
+    Args:
+        request_fn (callable): Função sem argumentos que executa uma requisição.
+            Deve lançar exceção em caso de erro: RequestFailed.error_type ou o nome da
+            classe da exceção vira o tipo de erro no relatório.
+        rps (float): Requisições por segundo desejadas.
+        duration (float): Duração da medição em segundos.
+        concurrency (int): Máximo de requisições simultâneas (threads).
+        warmup (int): Requisições executadas antes da medição (não contabilizadas).
+
+    Returns:
+        LoadResult: Medições da execução.
+    """
+    for _ in range(warmup):
+        try:
+            request_fn()
+        except Exception:
+            pass
+
+    result = LoadResult(rps, duration)
+    result.rss_before_mb = current_rss_mb()
+    total = max(1, int(rps * duration))
+    interval = 1.0 / rps
+
+    def task(scheduled):
+        started = time.perf_counter()
+        try:
+            request_fn()
+        except Exception as e:
+            result.record(None, None, error=getattr(
+                e, "error_type", type(e).__name__))
+            return
+        finished = time.perf_counter()
+        result.record(finished - scheduled, finished - started)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load") as executor:
+        start = time.perf_counter()
+        for i in range(total):
+            scheduled = start + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(task, scheduled)
+    result.elapsed = time.perf_counter() - start
+    result.rss_after_mb = current_rss_mb()
+    return result
@@ -0,0 +1,153 @@
+"""
+Gravação dos resultados em JSON e comparação entre execuções (detecção de regressões).
+"""
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+# Versão do formato do arquivo de resultados
+RESULTS_FORMAT_VERSION = 1
+
+# (caminho da métrica no resumo, True se valores maiores são piores)
+COMPARED_METRICS = [
+    (("latency_ms", "p50"), True),
+    (("latency_ms", "p95"), True),
+    (("latency_ms", "p99"), True),
+    (("throughput_rps",), False),
+    (("error_rate",), True),
+]
+
+# Aumento absoluto tolerado na taxa de erro (1 ponto percentual)
+ERROR_RATE_TOLERANCE = 0.01
+
+
+def _git_commit(repo_root):
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=repo_root,
+            capture_output=True, text=True, timeout=5, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def build_results(config, scenarios, repo_root):
+    """
+    Monta o documento de resultados de uma execução.
+
+    Args:
+        config (dict): Parâmetros da execução (RPS, duração, latências dos fakes...).
+        scenarios (dict): {nome do cenário: resumo de LoadResult.summary()}.
+        repo_root (str): Raiz do repositório (para registrar o commit).
+
+    Returns:
+        dict: Documento serializável em JSON.
+    """
+    return {
+        "version": RESULTS_FORMAT_VERSION,
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(repo_root),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": config,
+        "scenarios": scenarios,
+    }
+
+
+def write_results(results, path):
+    """Grava os resultados em JSON (cria o diretório se necessário)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def load_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _metric(summary, keys):
+    value = summary
+    for key in keys:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def compare_results(current, baseline, tolerance=0.10):
+    """
+    Compara duas execuções cenário a cenário.
+
+    Uma métrica é considerada regressão quando piora mais que a tolerância relativa
+    (ex: p95 10% maior ou vazão 10% menor). A taxa de erro usa diferença absoluta
+    (ERROR_RATE_TOLERANCE).
+
+    Args:
+        current (dict): Resultados atuais.
+        baseline (dict): Resultados de referência.
+        tolerance (float): Piora relativa tolerada (0.10 = 10%).
+
+    Returns:
+        list: Linhas {scenario, metric, baseline, current, change_pct, regression}.
+    """
+    rows = []
+    for name, summary in current.get("scenarios", {}).items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if reference is None:
+            continue
+        for keys, higher_is_worse in COMPARED_METRICS:
+            new, old = _metric(summary, keys), _metric(reference, keys)
+            if new is None or old is None:
+                continue
+            if keys == ("error_rate",):
+                change = new - old
+                regression = change > ERROR_RATE_TOLERANCE
+                change_pct = round(change * 100, 2)
+            else:
+                change = (new - old) / old if old else 0.0
+                regression = change > tolerance if higher_is_worse else change < -tolerance
+                change_pct = round(change * 100, 1)
+            rows.append({
+                "scenario": name,
+                "metric": ".".join(keys),
+                "baseline": old,
+                "current": new,
+                "change_pct": change_pct,
+                "regression": regression,
+            })
+    return rows
+
+
+def format_summary(results):
+    """Tabela de texto com os principais números de cada cenário."""
+    lines = [
+        f"{'cenário':<18} {'rps alvo':>8} {'vazão':>8} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'p99 ms':>9} {'erros':>6} {'rss MB':>7}"
+    ]
+    for name, s in results["scenarios"].items():
+        latency = s["latency_ms"]
+        rss = s["memory_mb"]["rss_after"]
+        lines.append(
+            f"{name:<18} {s['target_rps']:>8} {s['throughput_rps']:>8} {latency['p50']:>9} "
+            f"{latency['p95']:>9} {latency['p99']:>9} {s['errors']:>6} "
+            f"{rss if rss is not None else '-':>7}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows):
+    """Tabela de texto da comparação, marcando as regressões."""
+    if not rows:
+        return "Nenhum cenário em comum com a referência."
+    lines = [f"{'cenário':<18} {'métrica':<16} {'ref':>10} {'atual':>10} {'variação':>9}"]
+    for row in rows:
+        flag = "  << REGRESSÃO" if row["regression"] else ""
+        lines.append(
+            f"{row['scenario']:<18} {row['metric']:<16} {row['baseline']:>10} "
+            f"{row['current']:>10} {row['change_pct']:>8}%{flag}")
+    return "\n".join(lines)
@@ -0,0 +1,243 @@
+"""
+Suíte de benchmark do Nexus AI.
+
+Exemplo:
+    python -m benchmarks.run --rps 20 --duration 10 --output benchmarks/results/atual.json
+    python -m benchmarks.run --compare benchmarks/results/base.json --fail-on-regression
+
+Cenários:
+    webhook_rag      Dialogflow (fake) -> dialogflow_webhook -> Discovery Engine + Gemini (fakes)
+    webhook_ticket   Dialogflow (fake) -> dialogflow_webhook -> API de tickets (fake)
+    fulfillment      Dialogflow (fake) -> DialogflowFulfillmentView (Django + SQLite)
+    tickets_list     GET /api/tickets/ autenticado
+    tickets_create   POST /api/tickets/ autenticado
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+
+import requests
+
+from benchmarks import targets
+from benchmarks.fakes import (
+    FakeDialogflowServer,
+    FakeDiscoveryEngineServer,
+    FakeGeminiServer,
+    FakeTicketsServer,
+    LatencyModel,
+    detect_intent_body,
+    detect_intent_url,
+    install_fake_google_sdk,
+)
+from benchmarks.loadgen import RequestFailed, run_load
+from benchmarks.report import (
+    build_results,
+    compare_results,
+    format_comparison,
+    format_summary,
+    load_results,
+    write_results,
+)
+
+SCENARIOS = ["webhook_rag", "webhook_ticket",
+             "fulfillment", "tickets_list", "tickets_create"]
+
+# Token do webhook do Django usado apenas no banco temporário do benchmark
+WEBHOOK_TOKEN = "benchmark-token"
+
+TICKET_PARAMETERS = {
+    "person_name": {"name": "Cliente Benchmark"},
+    "department": "TI",
+    "ticket_title": "Sem acesso à VPN",
+    "ticket_type": "Incidente",
+    "category": "Rede",
+    "priority": "urgente",
+    "description": "A VPN desconecta a cada cinco minutos.",
+    "location": "Matriz",
+}
+
+
+class ThreadLocalSession:
+    """requests.Session por thread do gerador de carga (keep-alive sem compartilhar estado)."""
+
+    def __init__(self, cookies=None, headers=None):
+        self.cookies = cookies or {}
+        self.headers = headers or {}
+        self._local = threading.local()
+
+    def get(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.cookies.update(self.cookies)
+            session.headers.update(self.headers)
+        return session
+
+
+def check_status(response, expected):
+    if response.status_code != expected:
+        raise RequestFailed(f"HTTP {response.status_code}")
+    return response
+
+
+def detect_intent_fn(dialogflow, text, intent, parameters=None):
+    """Requisição de carga: DetectIntent no Dialogflow fake, exigindo o webhook sem erro."""
+    sessions = ThreadLocalSession()
+    url = detect_intent_url(dialogflow.url)
+    body = detect_intent_body(text, intent, parameters)
+
+    def request():
+        response = check_status(sessions.get().post(url, json=body, timeout=30), 200)
+        webhook_status = response.json().get("webhookStatus", {})
+        if webhook_status.get("code", 0) != 0:
+            raise RequestFailed(f"webhook {webhook_status.get('message', webhook_status.get('code'))}")
+    return request
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Benchmark do webhook e do backend Django com fakes locais do Google Cloud")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Cenários separados por vírgula ({', '.join(SCENARIOS)})")
+    parser.add_argument("--rps", type=float, default=20,
+                        help="Requisições por segundo por cenário")
+    parser.add_argument("--duration", type=float, default=10,
+                        help="Duração de cada cenário em segundos")
+    parser.add_argument("--concurrency", type=int, default=64,
+                        help="Máximo de requisições simultâneas")
+    parser.add_argument("--warmup", type=int, default=5,
+                        help="Requisições de aquecimento por cenário (não medidas)")
+    parser.add_argument("--search-latency-ms", type=float, default=120)
+    parser.add_argument("--gemini-latency-ms", type=float, default=600)
+    parser.add_argument("--gemini-ms-per-1k-chars", type=float, default=20,
+                        help="Latência adicional do Gemini por 1000 caracteres de prompt")
+    parser.add_argument("--dialogflow-latency-ms", type=float, default=40)
+    parser.add_argument("--tickets-latency-ms", type=float, default=30,
+                        help="Latência da API de tickets fake usada pelo webhook")
+    parser.add_argument("--jitter-pct", type=float, default=20,
+                        help="Variação das latências dos fakes (%% do valor base)")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Semente das variações de latência (execuções reprodutíveis)")
+    parser.add_argument("--seed-tickets", type=int, default=200,
+                        help="Tickets pré-existentes no banco temporário")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", "latest.json"),
+                        help="Arquivo JSON de resultados")
+    parser.add_argument("--compare",
+                        help="Resultados de referência (JSON) para comparação")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Piora relativa tolerada na comparação (0.10 = 10%%)")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Retorna código 1 se houver regressão em relação à referência")
+    return parser
+
+
+def latency(base_ms, args, offset):
+    return LatencyModel(base_ms, base_ms * args.jitter_pct / 100.0, seed=args.seed + offset)
+
+
+def run(args):
+    """
+    Executa os cenários selecionados e grava o JSON de resultados.
+
+    Returns:
+        int: Código de saída (1 se --fail-on-regression e houver regressão).
+    """
+    selected = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(selected) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Cenários desconhecidos: {', '.join(sorted(unknown))}")
+
+    search = FakeDiscoveryEngineServer(latency(args.search_latency_ms, args, 1)).start()
+    gemini = FakeGeminiServer(latency(args.gemini_latency_ms, args, 2),
+                              ms_per_1k_chars=args.gemini_ms_per_1k_chars).start()
+    tickets_api = FakeTicketsServer(latency(args.tickets_latency_ms, args, 3)).start()
+    install_fake_google_sdk(search.url, gemini.url)
+
+    servers = [search, gemini, tickets_api]
+    scenarios = {}
+    with tempfile.TemporaryDirectory(prefix="nexus-bench-") as tmp:
+        try:
+            requests_by_scenario = {}
+            if {"webhook_rag", "webhook_ticket"} & set(selected):
+                webhook = targets.start_webhook(f"{tickets_api.url}/api/tickets/")
+                servers.append(webhook)
+                dialogflow_webhook = FakeDialogflowServer(
+                    f"{webhook.url}/", latency=latency(args.dialogflow_latency_ms, args, 4)).start()
+                servers.append(dialogflow_webhook)
+                requests_by_scenario["webhook_rag"] = detect_intent_fn(
+                    dialogflow_webhook, "Como reinicio o servidor?", "duvida_tecnica")
+                requests_by_scenario["webhook_ticket"] = detect_intent_fn(
+                    dialogflow_webhook, "Quero abrir um chamado", "abrir_chamado",
+                    {"person": {"name": "Cliente Benchmark"}, "organization": "Nexus",
+                     "problem_description": "Sem VPN", "priority": "urgente"})
+
+            if {"fulfillment", "tickets_list", "tickets_create"} & set(selected):
+                targets.setup_django(os.path.join(tmp, "bench.sqlite3"),
+                                     WEBHOOK_TOKEN, seed_tickets=args.seed_tickets)
+                django_server = targets.start_django()
+                servers.append(django_server)
+
+                dialogflow_django = FakeDialogflowServer(
+                    f"{django_server.url}/api/dialogflow/fulfillment/",
+                    fulfillment_headers={"Authorization": WEBHOOK_TOKEN},
+                    latency=latency(args.dialogflow_latency_ms, args, 5)).start()
+                servers.append(dialogflow_django)
+                requests_by_scenario["fulfillment"] = detect_intent_fn(
+                    dialogflow_django, "Quero abrir um chamado", "abrir_chamado", TICKET_PARAMETERS)
+
+                cookies, headers = targets.login_cookies(django_server.url)
+                sessions = ThreadLocalSession(cookies, headers)
+                tickets_url = f"{django_server.url}/api/tickets/"
+                ticket = {"customer_name": "Cliente Benchmark", "description": "Carga",
+                          "status": "OPEN", "priority": "MEDIUM"}
+                requests_by_scenario["tickets_list"] = lambda: check_status(
+                    sessions.get().get(tickets_url, timeout=30), 200)
+                requests_by_scenario["tickets_create"] = lambda: check_status(
+                    sessions.get().post(tickets_url, json=ticket, timeout=30), 201)
+
+            for name in selected:
+                print(f"Executando {name}: {args.rps} rps por {args.duration}s...", file=sys.stderr)
+                calls_before = {type(s).__name__: s.requests_served
+                                for s in (search, gemini, tickets_api)}
+                result = run_load(requests_by_scenario[name], args.rps, args.duration,
+                                  concurrency=args.concurrency, warmup=args.warmup)
+                summary = result.summary()
+                # Chamadas recebidas pelos fakes (inclui o aquecimento)
+                summary["upstream_calls"] = {
+                    type(s).__name__: s.requests_served - calls_before[type(s).__name__]
+                    for s in (search, gemini, tickets_api)}
+                scenarios[name] = summary
+        finally:
+            for server in reversed(servers):
+                server.stop()
+            if "django" in sys.modules:
+                from django.db import connections
+                connections.close_all()
+
+    config = {
+        key: value for key, value in vars(args).items()
+        if key not in ("output", "compare", "fail_on_regression")
+    }
+    results = build_results(config, scenarios, targets.REPO_ROOT)
+    write_results(results, args.output)
+    print(format_summary(results))
+    print(f"\nResultados gravados em {args.output}")
+
+    if not args.compare:
+        return 0
+    rows = compare_results(results, load_results(args.compare), args.tolerance)
+    print(f"\nComparação com {args.compare}:")
+    print(format_comparison(rows))
+    if args.fail_on_regression and any(row["regression"] for row in rows):
+        return 1
+    return 0
+
+
+def main(argv=None):
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
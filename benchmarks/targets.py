@@ -0,0 +1,143 @@
+"""
+Sobe os alvos do benchmark em servidores HTTP locais (threads do próprio processo):
+- A Cloud Function dialogflow_webhook, via functions_framework (mesmo app Flask do deploy).
+- O backend Django (nexus_admin) com um banco SQLite temporário.
+"""
+import os
+import sys
+import threading
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_FUNCTIONS_DIR = os.path.join(REPO_ROOT, "backend_functions")
+BACKEND_ADMIN_DIR = os.path.join(REPO_ROOT, "backend_admin")
+
+# Usuário criado no banco temporário para as rotas autenticadas de /api/tickets/
+BENCH_USERNAME = "benchmark"
+BENCH_PASSWORD = "benchmark-password"
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Handler do werkzeug sem log por requisição (distorceria as medições)."""
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class WSGIServerThread:
+    """Serve uma aplicação WSGI em uma thread, com uma thread por requisição."""
+
+    def __init__(self, app, host="127.0.0.1", port=0):
+        self._server = make_server(host, port, app, threaded=True,
+                                   request_handler=QuietRequestHandler)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="wsgi", daemon=True)
+
+    @property
+    def url(self):
+        return f"http://{self._server.host}:{self._server.port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def start_webhook(tickets_url):
+    """
+    Sobe a Cloud Function dialogflow_webhook.
+    install_fake_google_sdk() deve ter sido chamada antes (o vertex_rag carrega o SDK em segundo
+    plano ao iniciar e na primeira dúvida técnica).
+
+    Args:
+        tickets_url (str): URL usada como DJANGO_API_URL pela função.
+
+    Returns:
+        WSGIServerThread: Servidor iniciado.
+    """
+    import functions_framework
+
+    # Lido pelo vertex_rag na importação
+    os.environ["DJANGO_API_URL"] = tickets_url
+    app = functions_framework.create_app(
+        target="dialogflow_webhook",
+        source=os.path.join(BACKEND_FUNCTIONS_DIR, "main.py"))
+
+    # O main.py configura logging INFO por requisição; o benchmark mede apenas avisos e erros
+    import logging
+    logging.getLogger().setLevel(logging.WARNING)
+    return WSGIServerThread(app).start()
+
+
+def setup_django(db_path, webhook_token, seed_tickets=0):
+    """
+    Configura o Django com um banco SQLite temporário, cria as tabelas e o usuário do benchmark.
+
+    Args:
+        db_path (str): Caminho do arquivo SQLite (será criado).
+        webhook_token (str): Token aceito pelo DialogflowFulfillmentView.
+        seed_tickets (int): Tickets criados antes da medição (afeta a listagem).
+    """
+    for path in (BACKEND_ADMIN_DIR, REPO_ROOT):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "nexus_admin.settings")
+    os.environ.setdefault("DEBUG", "False")
+
+    import django
+    from django.conf import settings
+    django.setup()
+
+    # Antes da primeira conexão: o banco de desenvolvimento nunca é tocado
+    settings.DATABASES["default"]["NAME"] = db_path
+    settings.DATABASES["default"].setdefault("OPTIONS", {})["timeout"] = 30
+    settings.DIALOGFLOW_WEBHOOK_TOKEN = webhook_token
+    settings.METRICS_SLOW_REQUEST_SECONDS = 0
+
+    from django.core.management import call_command
+    call_command("migrate", run_syncdb=True, verbosity=0)
+
+    from django.contrib.auth.models import User
+    from core.models import Ticket
+    User.objects.create_user(username=BENCH_USERNAME, password=BENCH_PASSWORD)
+    Ticket.objects.bulk_create([
+        Ticket(customer_name=f"Cliente {i}", company="Benchmark",
+               description=f"Chamado de carga #{i}", priority="MEDIUM")
+        for i in range(seed_tickets)
+    ])
+
+    import logging
+    logging.getLogger("django").setLevel(logging.ERROR)
+    logging.getLogger("core").setLevel(logging.ERROR)
+
+
+def start_django():
+    """Sobe o WSGI do nexus_admin (setup_django() deve ter sido chamada antes)."""
+    from django.core.wsgi import get_wsgi_application
+    return WSGIServerThread(get_wsgi_application()).start()
+
+
+def login_cookies(base_url):
+    """
+    Autentica o usuário do benchmark pela API de login (sessão + CSRF, como o frontend).
+
+    Returns:
+        tuple: (cookies, headers) a reutilizar nas requisições autenticadas.
+    """
+    import requests
+
+    with requests.Session() as session:
+        session.get(f"{base_url}/api/auth/csrf/", timeout=10).raise_for_status()
+        response = session.post(
+            f"{base_url}/api/auth/login/",
+            json={"username": BENCH_USERNAME, "password": BENCH_PASSWORD},
+            headers={"X-CSRFToken": session.cookies.get("csrftoken", "")},
+            timeout=10)
+        response.raise_for_status()
+        cookies = session.cookies.get_dict()
+    # O login gira o token CSRF; o novo token vai no header dos POSTs
+    return cookies, {"X-CSRFToken": cookies.get("csrftoken", "")}
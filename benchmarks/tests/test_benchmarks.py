@@ -0,0 +1,164 @@
+import sys
+import time
+import unittest
+
+from benchmarks.cold_start import END_MARKER, START_MARKER, parse_importtime, run_child
+from benchmarks.fakes import (
+    FakeDialogflowServer,
+    FakeDiscoveryEngineServer,
+    FakeGeminiServer,
+    FakeTicketsServer,
+    LatencyModel,
+    detect_intent_body,
+    detect_intent_url,
+    install_fake_google_sdk,
+)
+from benchmarks.loadgen import RequestFailed, percentile, run_load
+from benchmarks.report import compare_results
+from benchmarks.triage import CONFIG_FILE, accuracy_report, load_tickets
+from dialogflow_automation.core.triage import TriageModel
+
+import requests
+
+FAKE_SDK_MODULES = ["google", "google.cloud", "google.cloud.discoveryengine_v1",
+                    "vertexai", "vertexai.generative_models"]
+
+
+class TestLoadGenerator(unittest.TestCase):
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 99), 0.0)
+
+    def test_run_load_counts_successes_and_errors(self):
+        calls = []
+
+        def request():
+            calls.append(1)
+            if len(calls) % 5 == 0:
+                raise RequestFailed("HTTP 500")
+            time.sleep(0.002)
+
+        summary = run_load(request, rps=200, duration=0.25, concurrency=8).summary()
+        self.assertEqual(summary["requests"], 50)
+        self.assertEqual(summary["errors"], 10)
+        self.assertEqual(summary["error_types"], {"HTTP 500": 10})
+        self.assertGreaterEqual(summary["latency_ms"]["p99"], summary["latency_ms"]["p50"])
+        self.assertGreaterEqual(summary["latency_ms"]["p50"], 2.0)
+
+    def test_compare_flags_regressions(self):
+        baseline = {"scenarios": {"a": {"latency_ms": {"p50": 10, "p95": 20, "p99": 30},
+                                        "throughput_rps": 100, "error_rate": 0.0}}}
+        current = {"scenarios": {"a": {"latency_ms": {"p50": 10.5, "p95": 30, "p99": 30},
+                                       "throughput_rps": 80, "error_rate": 0.05}}}
+        rows = {row["metric"]: row for row in compare_results(current, baseline, 0.10)}
+        self.assertFalse(rows["latency_ms.p50"]["regression"])
+        self.assertTrue(rows["latency_ms.p95"]["regression"])
+        self.assertTrue(rows["throughput_rps"]["regression"])
+        self.assertTrue(rows["error_rate"]["regression"])
+
+
+class TestFakes(unittest.TestCase):
+    def setUp(self):
+        # Os módulos fake do SDK não podem vazar para outros testes
+        self.saved_modules = {name: sys.modules.get(name) for name in FAKE_SDK_MODULES}
+
+    def tearDown(self):
+        for name, module in self.saved_modules.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+    def test_latency_model_is_reproducible(self):
+        a = LatencyModel(100, 20, seed=7)
+        b = LatencyModel(100, 20, seed=7)
+        samples = [a.sample() for _ in range(5)]
+        self.assertEqual(samples, [b.sample() for _ in range(5)])
+        self.assertTrue(all(0.08 <= s <= 0.12 for s in samples))
+
+    def test_fake_sdk_talks_to_fake_servers(self):
+        with FakeDiscoveryEngineServer(results=3) as search, FakeGeminiServer() as gemini:
+            install_fake_google_sdk(search.url, gemini.url)
+            from google.cloud import discoveryengine_v1 as discoveryengine
+            from vertexai.generative_models import GenerativeModel
+
+            client = discoveryengine.SearchServiceClient()
+            config = client.serving_config_path("p", "global", "ds", "default_config")
+            response = client.search(discoveryengine.SearchRequest(
+                serving_config=config, query="vpn", page_size=5))
+            self.assertEqual(len(response.results), 3)
+            self.assertIn("snippets", response.results[0].document.derived_struct_data)
+
+            generation = GenerativeModel("gemini").generate_content("x" * 400)
+            self.assertEqual(generation.usage_metadata.prompt_token_count, 100)
+            self.assertEqual(search.requests_served, 1)
+            self.assertEqual(gemini.requests_served, 1)
+
+    def test_dialogflow_calls_fulfillment_webhook(self):
+        with FakeTicketsServer() as webhook, \
+                FakeDialogflowServer(f"{webhook.url}/hook", {"Authorization": "t"}) as dialogflow:
+            response = requests.post(
+                detect_intent_url(dialogflow.url),
+                json=detect_intent_body("abrir chamado", "abrir_chamado", {"priority": "Alta"}),
+                timeout=5)
+            body = response.json()
+            self.assertEqual(body["webhookStatus"], {"code": 0})
+            self.assertEqual(body["queryResult"]["intent"]["displayName"], "abrir_chamado")
+            self.assertEqual(webhook.requests_served, 1)
+
+
+class TestColdStart(unittest.TestCase):
+    def test_parse_importtime_sums_self_time_per_package(self):
+        stderr = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       500 |        500 | json",
+            START_MARKER,
+            "import time:      1000 |       1000 |     requests.utils",
+            "import time:      2000 |       3000 |   requests",
+            "import time:       250 |       3250 | main",
+            END_MARKER,
+            "import time:       900 |        900 | json",
+        ])
+        imports = parse_importtime(stderr)
+        self.assertEqual(imports["modules"], {"requests": 3.0, "main": 0.25})
+        self.assertEqual(imports["total_ms"], 3.25)
+
+    def test_ticket_path_does_not_load_sdks(self):
+        """Um 'abrir_chamado' no cold start não importa os SDKs do Google Cloud nem o numpy"""
+        with FakeTicketsServer() as tickets:
+            url = f"{tickets.url}/api/tickets/"
+            lazy = run_child("abrir_chamado", "lazy", "fake", url)
+            eager = run_child("abrir_chamado", "eager", "fake", url)
+        self.assertTrue(lazy["ok"])
+        self.assertFalse(lazy["sdk_loaded"])
+        self.assertNotIn("numpy", lazy["imports"]["modules"])
+        self.assertIn("main", lazy["imports"]["modules"])
+        self.assertTrue(eager["sdk_loaded"])
+        self.assertEqual(tickets.requests_served, 2)
+
+
+class TestTriage(unittest.TestCase):
+    def test_accuracy_report(self):
+        report = accuracy_report(["CRITICAL", "HIGH", "LOW", "LOW"], ["MEDIUM", "HIGH", "LOW", "MEDIUM"])
+        self.assertEqual(report["accuracy"], 0.5)
+        self.assertEqual(report["urgent_underestimated"], 1)
+        self.assertEqual(report["confusion"]["CRITICAL"]["MEDIUM"], 1)
+        self.assertEqual(report["per_level"]["MEDIUM"]["precision"], 0.0)
+        self.assertEqual(report["per_level"]["LOW"], {"precision": 1.0, "recall": 0.5, "support": 2})
+
+    def test_labeled_sample_accuracy_does_not_regress(self):
+        """A triagem supera a regra anterior (só a prioridade informada) na amostra rotulada"""
+        tickets = load_tickets()
+        model = TriageModel.from_files(CONFIG_FILE)
+        expected = [ticket["priority"] for ticket in tickets]
+        triaged = accuracy_report(expected, model.classify_batch(
+            [ticket["text"] for ticket in tickets], [ticket["stated"] for ticket in tickets]))
+        self.assertGreaterEqual(triaged["accuracy"], 0.9)
+        self.assertLessEqual(triaged["urgent_underestimated"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+Benchmark da triagem de prioridade dos chamados (dialogflow_automation/core/triage.py).
+
+Sobre a amostra rotulada (benchmarks/data/triage_labeled.json) mede:
+
+    acurácia       matriz de confusão, precisão e revocação por prioridade, comparadas com a
+                   regra anterior (apenas a prioridade informada pelo usuário; MEDIUM sem ela)
+    latência       tempo por chamado de classify(), como no webhook: modelo do Django
+                   (compilado do intents.json) e modelo compilado da Cloud Function
+    lote           vazão de classify_batch() (reclassificação do backlog) contra o laço de classify()
+
+Exemplo:
+    python -m benchmarks.triage --batch-size 50000 --output benchmarks/results/triage.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from benchmarks.loadgen import percentile
+from benchmarks.report import build_results, write_results
+from dialogflow_automation.core.triage import DEFAULT_KEYWORDS_PATH, LEVELS, TriageModel
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILE = os.path.join(REPO_ROOT, "benchmarks", "data", "triage_labeled.json")
+CONFIG_FILE = os.path.join(REPO_ROOT, "dialogflow_automation", "config", "intents.json")
+
+# A Cloud Function tem layout plano (imports sem pacote)
+sys.path.insert(0, os.path.join(REPO_ROOT, "backend_functions"))
+
+import triage as function_triage  # noqa: E402
+
+
+def load_tickets(path=DATA_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["tickets"]
+
+
+def accuracy_report(expected, predicted):
+    """
+    Returns:
+        dict: Acurácia, matriz de confusão {esperada: {prevista: n}} e precisão/revocação por prioridade.
+    """
+    confusion = {level: {other: 0 for other in LEVELS} for level in LEVELS}
+    for truth, guess in zip(expected, predicted):
+        confusion[truth][guess] += 1
+    per_level = {}
+    for level in LEVELS:
+        hits = confusion[level][level]
+        predicted_count = sum(confusion[truth][level] for truth in LEVELS)
+        expected_count = sum(confusion[level].values())
+        per_level[level] = {
+            "precision": round(hits / predicted_count, 4) if predicted_count else 0.0,
+            "recall": round(hits / expected_count, 4) if expected_count else 0.0,
+            "support": expected_count,
+        }
+    correct = sum(1 for truth, guess in zip(expected, predicted) if truth == guess)
+    # Chamados urgentes (HIGH/CRITICAL) classificados abaixo do esperado: o erro mais caro
+    under = sum(1 for truth, guess in zip(expected, predicted)
+                if LEVELS.index(guess) < LEVELS.index(truth) and truth in ("HIGH", "CRITICAL"))
+    return {
+        "accuracy": round(correct / len(expected), 4) if expected else 0.0,
+        "urgent_underestimated": under,
+        "confusion": confusion,
+        "per_level": per_level,
+    }
+
+
+def latency_us(classify, tickets, repeat):
+    """Percentis do tempo (µs) de uma classificação, medida chamado a chamado."""
+    samples = []
+    for _ in range(repeat):
+        for ticket in tickets:
+            start = time.perf_counter()
+            classify(ticket["text"], ticket["stated"])
+            samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "p50": round(percentile(samples, 50), 2),
+        "p99": round(percentile(samples, 99), 2),
+        "max": round(samples[-1], 2) if samples else 0.0,
+    }
+
+
+def batch_throughput(model, tickets, batch_size):
+    """Chamados por segundo em classify_batch() e no laço de classify() sobre o mesmo lote."""
+    texts = [tickets[i % len(tickets)]["text"] for i in range(batch_size)]
+    stated = [tickets[i % len(tickets)]["stated"] for i in range(batch_size)]
+
+    start = time.perf_counter()
+    batched = model.classify_batch(texts, stated)
+    batch_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    looped = [model.classify(text, value) for text, value in zip(texts, stated)]
+    loop_s = time.perf_counter() - start
+
+    return {
+        "tickets": batch_size,
+        "batch_tickets_per_s": round(batch_size / batch_s, 1) if batch_s else 0.0,
+        "loop_tickets_per_s": round(batch_size / loop_s, 1) if loop_s else 0.0,
+        "same_result": batched == looped,
+    }
+
+
+def run_benchmark(tickets, model, args):
+    expected = [ticket["priority"] for ticket in tickets]
+    triaged = [model.classify(ticket["text"], ticket["stated"]) for ticket in tickets]
+    # Regra anterior: só a prioridade informada (sem ela, MEDIUM)
+    stated_only = [model.classify("", ticket["stated"]) for ticket in tickets]
+
+    function_model = function_triage.TriageModel.load(args.function_model)
+    return {
+        "accuracy": {
+            "triage": accuracy_report(expected, triaged),
+            "stated_only": accuracy_report(expected, stated_only),
+        },
+        "latency_us": {
+            "django": latency_us(model.classify, tickets, args.repeat),
+            "function": latency_us(function_model.classify, tickets, args.repeat),
+        },
+        "batch": batch_throughput(model, tickets, args.batch_size),
+        "mistakes": [
+            {"text": ticket["text"], "stated": ticket["stated"], "expected": truth, "predicted": guess}
+            for ticket, truth, guess in zip(tickets, expected, triaged) if truth != guess
+        ],
+    }
+
+
+def format_report(report):
+    lines = []
+    for name, result in report["accuracy"].items():
+        lines.append(f"{name}: acurácia {result['accuracy']:.1%}, "
+                     f"urgentes subestimados {result['urgent_underestimated']}")
+    triage = report["accuracy"]["triage"]
+    lines.append(f"\n{'esperada / prevista':<20}" + "".join(f"{level:>10}" for level in LEVELS)
+                 + f"{'precisão':>10}{'revocação':>11}")
+    for level in LEVELS:
+        row = triage["confusion"][level]
+        metrics = triage["per_level"][level]
+        lines.append(f"{level:<20}" + "".join(f"{row[other]:>10}" for other in LEVELS)
+                     + f"{metrics['precision']:>10.0%}{metrics['recall']:>11.0%}")
+    lines.append("")
+    for name, latency in report["latency_us"].items():
+        lines.append(f"latência {name:<9} p50 {latency['p50']:>8.1f} µs   p99 {latency['p99']:>8.1f} µs"
+                     f"   máx {latency['max']:>8.1f} µs")
+    batch = report["batch"]
+    lines.append(f"lote de {batch['tickets']}: {batch['batch_tickets_per_s']:.0f} chamados/s "
+                 f"(laço: {batch['loop_tickets_per_s']:.0f} chamados/s, mesmo resultado: "
+                 f"{'sim' if batch['same_result'] else 'NÃO'})")
+    if report["mistakes"]:
+        lines.append("\nErros da triagem:")
+        for mistake in report["mistakes"]:
+            lines.append(f"  {mistake['expected']:>8} -> {mistake['predicted']:<8} {mistake['text'][:70]}")
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Acurácia, latência e vazão da triagem de prioridade")
+    parser.add_argument("--data", default=DATA_FILE, help="Chamados rotulados (JSON)")
+    parser.add_argument("--config", default=CONFIG_FILE, help="intents.json (sinônimos de TicketPriority)")
+    parser.add_argument("--keywords", default=DEFAULT_KEYWORDS_PATH, help="Pesos das palavras-chave")
+    parser.add_argument("--function-model", default=function_triage.TRIAGE_MODEL_PATH,
+                        help="Modelo compilado distribuído com a Cloud Function")
+    parser.add_argument("--repeat", type=int, default=50,
+                        help="Repetições da amostra na medição de latência")
+    parser.add_argument("--batch-size", type=int, default=50000,
+                        help="Chamados no lote de reclassificação (a amostra é repetida)")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", "triage.json"),
+                        help="Arquivo JSON de resultados")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    model = TriageModel.from_files(args.config, args.keywords)
+    report = run_benchmark(load_tickets(args.data), model, args)
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    write_results(build_results(config, {"triage": report}, REPO_ROOT), args.output)
+    print(format_report(report))
+    print(f"\nResultados gravados em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,352 @@
+import io
+import json
+import zipfile
+from .logger import setup_logger
+
+# Inicializa o logger para este módulo
+logger = setup_logger("agent_archive")
+
+# Mapeamento entre o 'kind' do nosso JSON e a flag 'isEnum' do formato de exportação do Dialogflow ES
+# KIND_LIST (sem sinônimos) é exportado como isEnum=true
+KIND_TO_IS_ENUM = {
+    "KIND_MAP": False,
+    "KIND_LIST": True,
+}
+
+
+class AgentArchiveConverter:
+    """
+    Converte entre o formato ZIP de exportação do Dialogflow ES (ExportAgent/RestoreAgent)
+    e o formato JSON de configuração do projeto ({"entities": [...], "intents": [...]}).
+
+    A conversão é feita entrada a entrada: cada intenção/entidade é serializada diretamente
+    no arquivo de destino, sem montar o agente inteiro em memória.
+    """
+
+    def __init__(self, language_code="pt-br", agent_display_name="Nexus AI", time_zone="America/Sao_Paulo",
+                 webhook_url=None, webhook_headers=None):
+        """
+        Inicializa o conversor.
+
+        Args:
+            language_code (str): Idioma das frases de treinamento e respostas (ex: 'pt-br').
+            agent_display_name (str): Nome do agente gravado no agent.json.
+            time_zone (str): Fuso horário padrão do agente gravado no agent.json.
+            webhook_url (str, optional): URL do Fulfillment gravada no agent.json. Sem ela, o
+                webhook do agente fica desativado.
+            webhook_headers (dict, optional): Headers enviados pelo Dialogflow ao webhook (ex: token).
+        """
+        self.language_code = language_code
+        self.agent_display_name = agent_display_name
+        self.time_zone = time_zone
+        self.webhook_url = webhook_url
+        self.webhook_headers = dict(webhook_headers or {})
+        # Intenções com "webhook": true encontradas pelo último config_to_zip
+        self.webhook_intents = []
+
+    # --- JSON de configuração -> ZIP ---
+
+    def config_to_zip(self, entities, intents, fileobj):
+        """
+        Gera o ZIP no formato do Dialogflow ES a partir das definições do projeto.
+
+        Args:
+            entities (iterable): Iterável de dicionários de entidade (display_name, kind, entities).
+            intents (iterable): Iterável de dicionários de intenção (display_name, training_phrases, ...).
+            fileobj: Objeto arquivo binário (ou caminho) onde o ZIP será escrito.
+
+        Returns:
+            tuple: (quantidade de entidades, quantidade de intenções) gravadas.
+        """
+        entity_count = 0
+        intent_count = 0
+        self.webhook_intents = []
+
+        with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            self._write_json(zf, "agent.json", self._build_agent_json())
+            self._write_json(zf, "package.json", {"version": "1.0.0"})
+
+            for entity in entities:
+                name = entity["display_name"]
+                self._write_json(
+                    zf, f"entities/{name}.json", self._build_entity_json(entity))
+                self._write_json(
+                    zf, f"entities/{name}_entries_{self.language_code}.json", entity.get("entities", []))
+                entity_count += 1
+
+            for intent in intents:
+                name = intent["display_name"]
+                self._write_json(
+                    zf, f"intents/{name}.json", self._build_intent_json(intent))
+                self._write_json(
+                    zf, f"intents/{name}_usersays_{self.language_code}.json",
+                    self._build_usersays_json(intent.get("training_phrases", [])))
+                if intent.get("webhook"):
+                    self.webhook_intents.append(name)
+                intent_count += 1
+
+        logger.info(
+            f"ZIP do agente gerado: {entity_count} entidades, {intent_count} intenções.")
+        return entity_count, intent_count
+
+    def _build_agent_json(self):
+        """Monta o agent.json mínimo exigido pelo RestoreAgent."""
+        return {
+            "description": "",
+            "language": self.language_code,
+            "shortDescription": "",
+            "examples": "",
+            "linkToDocs": "",
+            "displayName": self.agent_display_name,
+            "disableInteractionLogs": False,
+            "disableStackdriverLogs": True,
+            "defaultTimezone": self.time_zone,
+            "isPrivate": True,
+            "mlMinConfidence": 0.3,
+            "supportedLanguages": [],
+            "enableOnePlatformResponses": True,
+            "onePlatformApiVersion": "v2",
+            "webhook": self._build_webhook_json(),
+        }
+
+    def _build_webhook_json(self):
+        """Configuração do Fulfillment do agent.json (o RestoreAgent substitui a do agente)."""
+        if not self.webhook_url:
+            return {"available": False, "useForDomains": False}
+        return {
+            "url": self.webhook_url,
+            "username": "",
+            "headers": self.webhook_headers,
+            "available": True,
+            "useForDomains": False,
+            "cloudFunctionsEnabled": False,
+            "cloudFunctionsInitialized": False,
+        }
+
+    def _build_entity_json(self, entity):
+        """Converte a definição de entidade do projeto para o entities/<nome>.json."""
+        return {
+            "name": entity["display_name"],
+            "isOverridable": True,
+            "isEnum": KIND_TO_IS_ENUM.get(entity.get("kind", "KIND_MAP"), False),
+            "isRegexp": False,
+            "automatedExpansion": False,
+            "allowFuzzyExtraction": False,
+        }
+
+    def _build_intent_json(self, intent):
+        """Converte a definição de intenção do projeto para o intents/<nome>.json."""
+        parameters = []
+        for param in intent.get("parameters", []) or []:
+            parameters.append({
+                "name": param["display_name"],
+                "required": param.get("mandatory", False),
+                "dataType": param["entity_type_display_name"],
+                "value": f"${param['display_name']}",
+                "prompts": [
+                    {"lang": self.language_code, "value": prompt}
+                    for prompt in param.get("prompts", [])
+                ],
+                "isList": False,
+            })
+
+        affected_contexts = [
+            {"name": ctx["name"], "lifespan": ctx.get("lifespan_count", 5)}
+            for ctx in intent.get("output_contexts", []) or []
+        ]
+
+        return {
+            "name": intent["display_name"],
+            "auto": True,
+            "contexts": list(intent.get("input_context_names", []) or []),
+            "responses": [{
+                "resetContexts": False,
+                "affectedContexts": affected_contexts,
+                "parameters": parameters,
+                "messages": [{
+                    "type": "0",
+                    "lang": self.language_code,
+                    "speech": list(intent.get("messages", [])),
+                }],
+            }],
+            "priority": 500000,
+            "webhookUsed": bool(intent.get("webhook", False)),
+            "fallbackIntent": False,
+            "events": [],
+        }
+
+    def _build_usersays_json(self, training_phrases):
+        """Converte as frases de treinamento para o formato intents/<nome>_usersays_<idioma>.json."""
+        return [
+            {"data": [{"text": phrase, "userDefined": False}],
+             "isTemplate": False, "count": 0}
+            for phrase in training_phrases
+        ]
+
+    def _write_json(self, zf, name, payload):
+        """Serializa um único documento JSON diretamente dentro do ZIP."""
+        with zf.open(name, "w") as raw:
+            with io.TextIOWrapper(raw, encoding="utf-8") as text:
+                json.dump(payload, text, ensure_ascii=False, indent=2)
+
+    # --- ZIP -> JSON de configuração ---
+
+    def iter_entities(self, zf):
+        """
+        Itera sobre as entidades contidas no ZIP, no formato do projeto.
+
+        Args:
+            zf (zipfile.ZipFile): ZIP do agente aberto para leitura.
+
+        Yields:
+            dict: Definição de entidade (display_name, kind, entities).
+        """
+        entries_suffix = f"_entries_{self.language_code}.json"
+        names = set(zf.namelist())
+        for name in zf.namelist():
+            if not name.startswith("entities/") or not name.endswith(".json"):
+                continue
+            if self._is_companion_file(name, "_entries_", names):
+                continue
+
+            entity_json = self._read_json(zf, name)
+            entries_name = name[:-len(".json")] + entries_suffix
+            entries = self._read_json(
+                zf, entries_name) if entries_name in zf.NameToInfo else []
+
+            yield {
+                "display_name": entity_json["name"],
+                "kind": "KIND_LIST" if entity_json.get("isEnum") else "KIND_MAP",
+                "entities": [
+                    {"value": entry["value"], "synonyms": list(
+                        entry.get("synonyms", []))}
+                    for entry in entries
+                ],
+            }
+
+    def iter_intents(self, zf):
+        """
+        Itera sobre as intenções contidas no ZIP, no formato do projeto.
+
+        Args:
+            zf (zipfile.ZipFile): ZIP do agente aberto para leitura.
+
+        Yields:
+            dict: Definição de intenção (display_name, training_phrases, messages, parameters, ...).
+        """
+        usersays_suffix = f"_usersays_{self.language_code}.json"
+        names = set(zf.namelist())
+        for name in zf.namelist():
+            if not name.startswith("intents/") or not name.endswith(".json"):
+                continue
+            if self._is_companion_file(name, "_usersays_", names):
+                continue
+
+            intent_json = self._read_json(zf, name)
+            usersays_name = name[:-len(".json")] + usersays_suffix
+            usersays = self._read_json(
+                zf, usersays_name) if usersays_name in zf.NameToInfo else []
+
+            yield self._parse_intent(intent_json, usersays)
+
+    def _is_companion_file(self, name, marker, names):
+        """
+        Indica se `name` é o arquivo de valores/frases de outro registro do ZIP
+        (<nome>_entries_<idioma>.json ou <nome>_usersays_<idioma>.json, em qualquer idioma).
+
+        Só conta como complemento quando <nome>.json existe, então registros cujo nome contém
+        o marcador (ex: 'tipo_entries_x') continuam sendo lidos.
+        """
+        base, sep, language = name[:-len(".json")].rpartition(marker)
+        return bool(sep and language and "/" not in language) and f"{base}.json" in names
+
+    def _parse_intent(self, intent_json, usersays):
+        """Converte um intents/<nome>.json (+ usersays) para o formato do projeto."""
+        # Frases de treinamento: concatena as partes (texto anotado vira texto simples)
+        training_phrases = [
+            "".join(part.get("text", "") for part in phrase.get("data", []))
+            for phrase in usersays
+        ]
+
+        messages = []
+        parameters = []
+        output_contexts = []
+        for response in intent_json.get("responses", []):
+            for message in response.get("messages", []):
+                if message.get("lang", self.language_code) != self.language_code:
+                    continue
+                speech = message.get("speech", [])
+                # O Dialogflow exporta 'speech' como string ou lista
+                messages.extend([speech] if isinstance(speech, str) else speech)
+
+            for param in response.get("parameters", []):
+                parameters.append({
+                    "display_name": param["name"],
+                    "entity_type_display_name": param.get("dataType", "@sys.any"),
+                    "mandatory": param.get("required", False),
+                    "prompts": [
+                        prompt["value"] for prompt in param.get("prompts", [])
+                        if prompt.get("lang", self.language_code) == self.language_code
+                    ],
+                })
+
+            for ctx in response.get("affectedContexts", []):
+                output_contexts.append(
+                    {"name": ctx["name"], "lifespan_count": ctx.get("lifespan", 5)})
+
+        intent = {
+            "display_name": intent_json["name"],
+            "training_phrases": training_phrases,
+            "messages": messages,
+        }
+        if parameters:
+            intent["parameters"] = parameters
+        if intent_json.get("contexts"):
+            intent["input_context_names"] = list(intent_json["contexts"])
+        if output_contexts:
+            intent["output_contexts"] = output_contexts
+        if intent_json.get("webhookUsed"):
+            intent["webhook"] = True
+        return intent
+
+    def zip_to_config(self, zip_fileobj, out_fp):
+        """
+        Converte o ZIP exportado para o JSON de configuração do projeto.
+        Cada entidade/intenção é lida do ZIP e escrita no destino individualmente.
+
+        Args:
+            zip_fileobj: Objeto arquivo binário (ou caminho) com o ZIP do agente.
+            out_fp: Objeto arquivo texto onde o JSON será escrito.
+
+        Returns:
+            tuple: (quantidade de entidades, quantidade de intenções) convertidas.
+        """
+        with zipfile.ZipFile(zip_fileobj, "r") as zf:
+            out_fp.write('{\n  "entities": [')
+            entity_count = self._write_json_array(
+                out_fp, self.iter_entities(zf))
+            out_fp.write('],\n  "intents": [')
+            intent_count = self._write_json_array(
+                out_fp, self.iter_intents(zf))
+            out_fp.write(']\n}\n')
+
+        logger.info(
+            f"ZIP do agente convertido: {entity_count} entidades, {intent_count} intenções.")
+        return entity_count, intent_count
+
+    def _write_json_array(self, out_fp, items):
+        """Escreve os itens de um array JSON um a um, retornando a quantidade escrita."""
+        count = 0
+        for item in items:
+            out_fp.write(",\n    " if count else "\n    ")
+            out_fp.write(json.dumps(item, ensure_ascii=False))
+            count += 1
+        if count:
+            out_fp.write("\n  ")
+        return count
+
+    def _read_json(self, zf, name):
+        """Lê um único documento JSON de dentro do ZIP."""
+        with zf.open(name) as raw:
+            # Exportações do Dialogflow podem conter BOM UTF-8
+            return json.load(io.TextIOWrapper(raw, encoding="utf-8-sig"))
@@ -39,11 +39,13 @@ class DialogflowClient:
         # Define o caminho "pai" (parent) padrão para o agente no projeto
         # Formato: projects/<Project ID>/agent
         self.parent = f"projects/{project_id}/agent"
+        # As operações de agente (Export/Restore/Import) usam o projeto como 'parent'
+        self.project_parent = f"projects/{project_id}"
 
         logger.info(
             f"Cliente Dialogflow inicializado para o projeto: {project_id}")
 
-    def create_intent(self, display_name, training_phrases_parts, message_texts, parameters=None, input_context_names=None, output_contexts=None):
+    def create_intent(self, display_name, training_phrases_parts, message_texts, parameters=None, input_context_names=None, output_contexts=None, webhook=False):
         """
         Cria uma nova intenção (Intent) no Dialogflow.
         Implementa idempotência verificando se a intenção já existe (pelo nome de exibição).
@@ -56,6 +58,7 @@ class DialogflowClient:
             parameters (list, optional): Lista de dicionários para extração de entidades (slots).
             input_context_names (list, optional): Lista de nomes de contextos de entrada.
             output_contexts (list, optional): Lista de dicionários definindo contextos de saída.
+            webhook (bool, optional): Se a intenção chama o webhook de Fulfillment do agente.
 
         Returns:
             google.cloud.dialogflow_v2.types.Intent: Objeto da intenção criada ou existente.
@@ -116,7 +119,9 @@ class DialogflowClient:
                 parameters=intent_parameters,
                 input_context_names=[
                     f"{self.parent}/sessions/-/contexts/{name}" for name in input_context_names] if input_context_names else [],
-                output_contexts=output_contexts_objects
+                output_contexts=output_contexts_objects,
+                webhook_state=(dialogflow.Intent.WebhookState.WEBHOOK_STATE_ENABLED if webhook
+                               else dialogflow.Intent.WebhookState.WEBHOOK_STATE_UNSPECIFIED)
             )
 
             # 6. Chama a API para criar a intenção
@@ -231,3 +236,53 @@ class DialogflowClient:
             logger.info(
                 f"Encontrada: {intent.display_name} (ID: {intent.name})")
         return intents
+
+    def export_agent(self, timeout=300):
+        """
+        Exporta o agente completo como um arquivo ZIP (ExportAgent).
+        Uma única operação de longa duração substitui a leitura objeto a objeto.
+
+        Args:
+            timeout (int): Tempo máximo (segundos) de espera pela operação.
+
+        Returns:
+            bytes: Conteúdo binário do ZIP do agente.
+        """
+        logger.info(f"Exportando agente do projeto: {self.project_id}")
+
+        try:
+            operation = self.agents_client.export_agent(
+                request={"parent": self.project_parent})
+            response = operation.result(timeout=timeout)
+            logger.info(
+                f"Agente exportado ({len(response.agent_content)} bytes).")
+            return response.agent_content
+        except GoogleAPICallError as e:
+            logger.error(f"Erro de API ao exportar agente: {e}")
+            raise
+
+    def restore_agent(self, agent_content, merge=False, timeout=300):
+        """
+        Envia um ZIP de agente para o Dialogflow em uma única operação.
+
+        Args:
+            agent_content (bytes): Conteúdo binário do ZIP do agente.
+            merge (bool): Se True, usa ImportAgent (mescla com o agente atual).
+                Se False, usa RestoreAgent (substitui intenções e entidades existentes).
+            timeout (int): Tempo máximo (segundos) de espera pela operação.
+        """
+        method_name = "import_agent" if merge else "restore_agent"
+        logger.info(
+            f"Enviando agente para o projeto {self.project_id} via {method_name} ({len(agent_content)} bytes)")
+
+        try:
+            method = getattr(self.agents_client, method_name)
+            operation = method(request={
+                "parent": self.project_parent,
+                "agent_content": agent_content,
+            })
+            operation.result(timeout=timeout)
+            logger.info("Agente restaurado com sucesso.")
+        except GoogleAPICallError as e:
+            logger.error(f"Erro de API ao restaurar agente: {e}")
+            raise
@@ -0,0 +1,188 @@
+import json
+import os
+from .parser import ConfigParser
+from .text_normalization import normalize_text
+
+# Índice de sinônimos das entidades (KIND_MAP) do Dialogflow.
+# Este módulo usa apenas a biblioteca padrão para poder ser importado pelos webhooks
+# (backend Django e Cloud Function) sem trazer as dependências da automação.
+
+# Versão do formato serializado (to_dict/from_dict)
+INDEX_FORMAT_VERSION = 1
+
+# Chave que marca o fim de um sinônimo dentro de um nó da trie
+_TERMINAL = "$"
+
+
+class EntityIndex:
+    """
+    Índice compilado dos sinônimos das entidades KIND_MAP da configuração.
+
+    Cada tipo de entidade possui:
+    - Um dicionário (hash) sinônimo normalizado -> valor canônico, para valores exatos.
+    - Uma trie por palavras, para encontrar o sinônimo mais longo dentro de um texto livre
+      (ex: 'acho que parou a empresa toda' -> 'Crítica').
+
+    Ambas as buscas custam O(tamanho do texto), independentemente do número de sinônimos.
+    """
+
+    def __init__(self, synonyms_by_type=None):
+        """
+        Args:
+            synonyms_by_type (dict, optional): {tipo: {sinônimo normalizado: valor canônico}}.
+        """
+        self._exact = {}
+        self._tries = {}
+        for entity_type, synonyms in (synonyms_by_type or {}).items():
+            for synonym, value in synonyms.items():
+                self._add(entity_type, synonym, value)
+
+    @classmethod
+    def from_entities(cls, entities):
+        """
+        Compila o índice a partir das definições de entidade da configuração.
+        Entidades KIND_LIST são ignoradas (não possuem sinônimos).
+
+        Args:
+            entities (iterable): Dicionários de entidade (display_name, kind, entities).
+
+        Returns:
+            EntityIndex: Índice compilado.
+        """
+        index = cls()
+        for entity in entities:
+            if entity.get("kind", "KIND_MAP") != "KIND_MAP":
+                continue
+            for entry in entity.get("entities", []):
+                value = entry["value"]
+                # O próprio valor canônico também resolve para si mesmo
+                for synonym in [value] + list(entry.get("synonyms", [])):
+                    index._add(entity["display_name"], normalize_text(synonym), value)
+        return index
+
+    @classmethod
+    def from_config(cls, config_path):
+        """
+        Compila o índice a partir da configuração, lida pelo loader incremental (ConfigParser),
+        uma entidade por vez e já validada.
+
+        Args:
+            config_path (str): Caminho do intents.json (ou do diretório com um arquivo por registro).
+
+        Returns:
+            EntityIndex: Índice compilado.
+
+        Raises:
+            ValueError: Se alguma entidade tiver schema inválido ou o JSON for inválido.
+        """
+        config_parser = ConfigParser(os.path.dirname(config_path) or ".")
+        return cls.from_entities(config_parser.iter_entities(os.path.basename(os.path.normpath(config_path))))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Carrega um índice previamente compilado (ver save()).
+
+        Args:
+            path (str): Caminho do arquivo JSON compilado.
+
+        Returns:
+            EntityIndex: Índice carregado.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_dict(cls, data):
+        """Reconstrói o índice a partir de to_dict()."""
+        if data.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(
+                f"Versão de índice de entidades não suportada: {data.get('version')}")
+        return cls(data.get("entity_types", {}))
+
+    def to_dict(self):
+        """Serializa o índice (apenas o dicionário; a trie é reconstruída no carregamento)."""
+        return {
+            "version": INDEX_FORMAT_VERSION,
+            "entity_types": {
+                entity_type: dict(sorted(synonyms.items()))
+                for entity_type, synonyms in sorted(self._exact.items())
+            },
+        }
+
+    def save(self, path):
+        """Grava o índice compilado em JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+    @property
+    def entity_types(self):
+        return list(self._exact)
+
+    def _add(self, entity_type, normalized_synonym, value):
+        """Insere um sinônimo já normalizado no dicionário e na trie do tipo."""
+        if not normalized_synonym:
+            return
+        self._exact.setdefault(entity_type, {})[normalized_synonym] = value
+
+        node = self._tries.setdefault(entity_type, {})
+        for word in normalized_synonym.split():
+            node = node.setdefault(word, {})
+        node[_TERMINAL] = value
+
+    def resolve(self, entity_type, raw_value, default=None):
+        """
+        Resolve um valor bruto para o valor canônico da entidade.
+
+        Tenta primeiro a correspondência exata (após normalização) e, se falhar,
+        procura o sinônimo mais longo contido no texto.
+
+        Args:
+            entity_type (str): Nome da entidade, com ou sem '@' (ex: 'TicketPriority').
+            raw_value (str): Valor recebido (ex: 'urgente', 'Parou a empresa!').
+            default: Valor retornado se nada for encontrado.
+
+        Returns:
+            str: Valor canônico (ex: 'Crítica') ou default.
+        """
+        if not isinstance(raw_value, str):
+            return default
+        entity_type = entity_type.lstrip("@")
+        normalized = normalize_text(raw_value)
+
+        value = self._exact.get(entity_type, {}).get(normalized)
+        if value is not None:
+            return value
+        return self.find(entity_type, normalized, default=default, normalized=True)
+
+    def find(self, entity_type, text, default=None, normalized=False):
+        """
+        Procura o sinônimo mais longo (em palavras) que aparece no texto.
+        Em caso de empate, vence a ocorrência mais à esquerda.
+
+        Args:
+            entity_type (str): Nome da entidade, com ou sem '@'.
+            text (str): Texto livre.
+            default: Valor retornado se nada for encontrado.
+            normalized (bool): Indica que o texto já está normalizado.
+
+        Returns:
+            str: Valor canônico ou default.
+        """
+        root = self._tries.get(entity_type.lstrip("@"))
+        if not root or not isinstance(text, str):
+            return default
+
+        words = (text if normalized else normalize_text(text)).split()
+        best_value, best_length = default, 0
+        for start in range(len(words)):
+            node = root
+            for offset in range(start, len(words)):
+                node = node.get(words[offset])
+                if node is None:
+                    break
+                length = offset - start + 1
+                if _TERMINAL in node and length > best_length:
+                    best_value, best_length = node[_TERMINAL], length
+        return best_value
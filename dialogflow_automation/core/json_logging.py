@@ -0,0 +1,209 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Logging estruturado (JSON) e não bloqueante compartilhado pela CLI de automação,
+# pelo backend Django e pela Cloud Function.
+#
+# Este módulo usa apenas a biblioteca padrão e não possui imports relativos: a Cloud Function
+# é publicada sozinha e leva uma cópia idêntica (backend_functions/json_logging.py).
+# Edite apenas dialogflow_automation/core/json_logging.py e copie; um teste verifica a igualdade.
+#
+# Modos (variável de ambiente LOG_MODE):
+# - text:  formato de texto atual, escrito de forma síncrona (padrão).
+# - json:  uma linha JSON por registro (Cloud Logging), escrita de forma síncrona.
+# - async: JSON escrito por uma thread de fundo (QueueHandler/QueueListener); a thread da
+#          requisição apenas enfileira o registro. A mensagem (msg % args) e o traceback só
+#          são formatados na thread de fundo.
+
+LOG_MODE_TEXT = "text"
+LOG_MODE_JSON = "json"
+LOG_MODE_ASYNC = "async"
+LOG_MODES = (LOG_MODE_TEXT, LOG_MODE_JSON, LOG_MODE_ASYNC)
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Capacidade da fila do modo async; registros excedentes são descartados (e contados)
+# em vez de bloquear a thread da requisição
+DEFAULT_QUEUE_SIZE = 10000
+
+# Identificador de correlação (ex: sessão do Dialogflow) da requisição em andamento.
+# ContextVar funciona tanto com threads quanto com asyncio.
+_correlation_id = contextvars.ContextVar("correlation_id", default=None)
+
+_state_lock = threading.Lock()
+_listener = None
+_configured_mode = None
+
+
+def get_log_mode():
+    """Modo de logging configurado na variável de ambiente LOG_MODE (padrão: text)."""
+    mode = os.environ.get("LOG_MODE", LOG_MODE_TEXT).lower()
+    return mode if mode in LOG_MODES else LOG_MODE_TEXT
+
+
+def session_id_from_dialogflow(session):
+    """
+    Extrai o ID da sessão do caminho enviado pelo Dialogflow.
+
+    Args:
+        session (str): Ex: 'projects/p/agent/sessions/abc-123' (ou apenas 'abc-123').
+
+    Returns:
+        str: ID da sessão (ex: 'abc-123') ou None.
+    """
+    if not isinstance(session, str) or not session:
+        return None
+    return session.rstrip("/").rsplit("/", 1)[-1] or None
+
+
+def get_correlation_id():
+    return _correlation_id.get()
+
+
+@contextmanager
+def correlation_scope(correlation_id):
+    """
+    Associa um ID de correlação a todos os logs emitidos dentro do bloco.
+
+    Uso: `with correlation_scope(session_id_from_dialogflow(body.get("session"))): ...`
+    """
+    token = _correlation_id.set(correlation_id)
+    try:
+        yield correlation_id
+    finally:
+        _correlation_id.reset(token)
+
+
+class CorrelationFilter(logging.Filter):
+    """
+    Copia o ID de correlação para o registro na thread que emitiu o log
+    (a thread de fundo do modo async não enxerga o contexto da requisição).
+    """
+
+    def filter(self, record):
+        if not hasattr(record, "correlation_id"):
+            record.correlation_id = _correlation_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formata cada registro como uma linha JSON no formato reconhecido pelo Cloud Logging
+    (campos 'severity', 'message' e 'time').
+
+    Campos adicionais podem ser enviados com extra={"json_fields": {...}}.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "severity": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        correlation_id = getattr(record, "correlation_id", None)
+        if correlation_id:
+            entry["correlation_id"] = correlation_id
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        fields = getattr(record, "json_fields", None)
+        if isinstance(fields, dict):
+            entry.update(fields)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler que não formata o registro na thread que emitiu o log e nunca bloqueia:
+    com a fila cheia, o registro é descartado e contabilizado em `dropped`.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # O padrão do QueueHandler chama self.format() aqui (na thread da requisição).
+        # A fila é local ao processo, então o registro original pode seguir sem formatação:
+        # msg % args e o traceback são montados pelo JsonFormatter na thread de fundo.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def build_stream_handler(mode, stream=None):
+    """Handler de saída (stdout) com o formatador do modo informado."""
+    handler = logging.StreamHandler(stream or sys.stdout)
+    if mode == LOG_MODE_TEXT:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    else:
+        handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def configure_logging(mode=None, level=None, stream=None, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Configura o logger raiz do processo (uma única vez; chamadas seguintes são ignoradas).
+
+    Args:
+        mode (str, optional): 'text', 'json' ou 'async'. Padrão: LOG_MODE.
+        level (str/int, optional): Nível do logger raiz. Padrão: LOG_LEVEL ou INFO.
+        stream (file, optional): Destino (padrão: sys.stdout).
+        queue_size (int): Capacidade da fila do modo async.
+
+    Returns:
+        str: Modo efetivamente configurado.
+    """
+    global _listener, _configured_mode
+
+    with _state_lock:
+        if _configured_mode is not None:
+            return _configured_mode
+
+        mode = mode or get_log_mode()
+        root = logging.getLogger()
+        root.setLevel(level or os.environ.get("LOG_LEVEL", "INFO").upper())
+
+        output = build_stream_handler(mode, stream)
+        if mode == LOG_MODE_ASYNC:
+            handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+            _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+            _listener.start()
+            # Escreve os registros pendentes antes de o processo terminar
+            atexit.register(shutdown_logging)
+        else:
+            handler = output
+        handler.addFilter(CorrelationFilter())
+        root.addHandler(handler)
+
+        _configured_mode = mode
+        return mode
+
+
+def shutdown_logging():
+    """Esvazia a fila do modo async e encerra a thread de fundo."""
+    global _listener
+    with _state_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def is_configured():
+    return _configured_mode is not None
@@ -0,0 +1,134 @@
+import json
+
+# Leitor incremental de JSON.
+# Lê o arquivo em blocos e decodifica um elemento de array por vez, de forma que apenas
+# o elemento corrente (uma intenção ou entidade) fica em memória, independentemente do
+# tamanho total do arquivo.
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+class _ChunkBuffer:
+    """
+    Buffer deslizante sobre um arquivo texto.
+    Mantém apenas a porção ainda não consumida do arquivo.
+    """
+
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, min_size=None):
+        """Lê mais um bloco do arquivo. Retorna False se o arquivo terminou."""
+        if self.eof:
+            return False
+        # Descarta a parte já consumida para manter o buffer pequeno
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.fp.read(max(self.chunk_size, min_size or 0))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def peek(self):
+        """Retorna o próximo caractere não-branco sem consumi-lo (ou '' no fim do arquivo)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars):
+        """Consome o próximo caractere não-branco, que deve estar em 'chars'."""
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(
+                f"Esperado um de {chars!r}", self.buf, self.pos)
+        self.pos += 1
+        return char
+
+    def decode_value(self):
+        """
+        Decodifica o próximo valor JSON completo do buffer.
+        Se o valor ainda não estiver inteiro no buffer, lê mais blocos e tenta de novo.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # Um valor que termina exatamente no fim do buffer pode estar truncado
+                # (ex: número '12' cujo restante '3' ainda não foi lido)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Dobra o tamanho da leitura para evitar re-decodificações repetidas em valores grandes
+            self.fill(min_size=len(self.buf) - self.pos)
+
+
+def iter_array_items(fp, chunk_size=65536):
+    """
+    Itera sobre os elementos dos arrays de um documento JSON sem carregá-lo inteiro.
+
+    Suporta os dois formatos de configuração do projeto:
+    - Lista no nível superior: [{...}, {...}]  -> chave None
+    - Objeto com arrays: {"entities": [...], "intents": [...]}  -> chave do array
+
+    Valores do objeto que não são arrays são lidos e descartados.
+
+    Args:
+        fp: Objeto arquivo texto aberto para leitura.
+        chunk_size (int): Quantidade de caracteres lidos por bloco.
+
+    Yields:
+        tuple: (chave, elemento) para cada elemento de cada array.
+
+    Raises:
+        json.JSONDecodeError: Se o documento for inválido.
+    """
+    reader = _ChunkBuffer(fp, chunk_size)
+    opening = reader.expect("[{")
+
+    if opening == "[":
+        yield from ((None, item) for item in _iter_array(reader))
+        return
+
+    # Objeto no nível superior: percorre pares chave/valor
+    if reader.peek() == "}":
+        reader.pos += 1
+        return
+    while True:
+        key = reader.decode_value()
+        if not isinstance(key, str):
+            raise json.JSONDecodeError(
+                "Chave de objeto inválida", reader.buf, reader.pos)
+        reader.expect(":")
+        if reader.peek() == "[":
+            reader.pos += 1
+            yield from ((key, item) for item in _iter_array(reader))
+        else:
+            reader.decode_value()
+        if reader.expect(",}") == "}":
+            return
+
+
+def _iter_array(reader):
+    """Decodifica os elementos de um array cujo '[' já foi consumido."""
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.decode_value()
+        if reader.expect(",]") == "]":
+            return
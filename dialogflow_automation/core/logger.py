@@ -1,9 +1,12 @@
 import logging
 import sys
+from .json_logging import LOG_MODE_TEXT, configure_logging, get_log_mode
 
 # Configuração de Logger Personalizado
 # Define o formato e o nível de logging para a ferramenta de automação.
 # Garante que as operações sejam rastreáveis e que erros sejam visíveis no console.
+# Com LOG_MODE=json ou async, os registros seguem para o logger raiz configurado
+# por core/json_logging.py (JSON estruturado, opcionalmente escrito em segundo plano).
 
 def setup_logger(name="dialogflow_automation"):
     """
@@ -18,6 +21,12 @@ def setup_logger(name="dialogflow_automation"):
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
 
+    mode = get_log_mode()
+    if mode != LOG_MODE_TEXT:
+        # Um único handler no logger raiz (configurado uma vez por processo)
+        configure_logging(mode)
+        return logger
+
     # Evita duplicação de handlers se a função for chamada múltiplas vezes
     if not logger.handlers:
         # Handler para saída no Console (stdout)
@@ -0,0 +1,363 @@
+import time
+import numpy as np
+from .logger import setup_logger
+from .text_normalization import normalize_text
+
+# Inicializa o logger para este módulo
+logger = setup_logger("intent_matcher")
+
+# Rótulo usado quando nenhuma intenção atinge o limiar de confiança
+FALLBACK_INTENT = "Default Fallback Intent"
+
+
+def char_ngrams(text, ngram_range=(2, 4)):
+    """
+    Gera n-gramas de caracteres por palavra, com espaços delimitando o início e o fim.
+    N-gramas de caracteres toleram variações de flexão e erros de digitação.
+
+    Args:
+        text (str): Texto já normalizado.
+        ngram_range (tuple): Tamanho mínimo e máximo dos n-gramas.
+
+    Returns:
+        list: Lista de n-gramas (com repetições).
+    """
+    min_n, max_n = ngram_range
+    grams = []
+    for word in text.split():
+        padded = f" {word} "
+        for n in range(min_n, max_n + 1):
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+class IntentMatcher:
+    """
+    Classificador local de intenções baseado em TF-IDF de n-gramas de caracteres.
+
+    Cada frase de treinamento vira um vetor TF-IDF normalizado. A pontuação de uma
+    consulta para uma intenção é a maior similaridade de cosseno entre a consulta e
+    as frases daquela intenção (vizinho mais próximo).
+
+    O índice é armazenado como listas invertidas (n-grama -> frases) em arrays NumPy,
+    então a pontuação de uma consulta custa proporcionalmente aos seus n-gramas, e não
+    ao vocabulário inteiro.
+    """
+
+    def __init__(self, ngram_range=(2, 4), threshold=0.0):
+        """
+        Args:
+            ngram_range (tuple): Tamanho mínimo e máximo dos n-gramas de caracteres.
+            threshold (float): Similaridade mínima; abaixo dela retorna FALLBACK_INTENT.
+        """
+        self.ngram_range = ngram_range
+        self.threshold = threshold
+        self.vocabulary = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.intents = []
+        self.phrase_count = 0
+
+    @classmethod
+    def from_config(cls, config_parser, filename="intents.json", **kwargs):
+        """
+        Constrói o classificador a partir das frases de treinamento da configuração.
+
+        Args:
+            config_parser (ConfigParser): Parser da configuração do Chatbot.
+            filename (str): Arquivo JSON ou diretório da configuração.
+
+        Returns:
+            IntentMatcher: Classificador treinado.
+        """
+        examples = (
+            (phrase, intent["display_name"])
+            for intent in config_parser.iter_intents(filename)
+            for phrase in intent["training_phrases"]
+        )
+        return cls(**kwargs).fit(examples)
+
+    def fit(self, examples):
+        """
+        Treina o índice a partir de pares (frase, intenção).
+
+        Args:
+            examples (iterable): Iterável de tuplas (texto, nome da intenção).
+
+        Returns:
+            IntentMatcher: A própria instância (permite encadeamento).
+        """
+        # Agrupa as frases por intenção: frases contíguas permitem np.maximum.reduceat
+        grouped = {}
+        for text, intent in examples:
+            grouped.setdefault(intent, []).append(text)
+
+        self.intents = list(grouped)
+        self.vocabulary = {}
+        rows = []
+        intent_starts = []
+        for intent in self.intents:
+            intent_starts.append(len(rows))
+            for text in grouped[intent]:
+                rows.append(self._count_ngrams(text, grow=True))
+
+        self.phrase_count = len(rows)
+        self._intent_starts = np.asarray(intent_starts, dtype=np.int64)
+
+        # IDF suavizado (mesma fórmula do scikit-learn)
+        df = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for counts in rows:
+            df[list(counts)] += 1
+        self.idf = np.log((1 + self.phrase_count) / (1 + df)) + 1
+
+        self._build_postings(rows)
+        logger.debug(
+            f"Índice local treinado: {len(self.intents)} intenções, {self.phrase_count} frases, {len(self.vocabulary)} n-gramas.")
+        return self
+
+    def _count_ngrams(self, text, grow=False):
+        """Conta os n-gramas do texto, mapeados para índices do vocabulário."""
+        counts = {}
+        for gram in char_ngrams(normalize_text(text), self.ngram_range):
+            idx = self.vocabulary.get(gram)
+            if idx is None:
+                if not grow:
+                    continue
+                idx = self.vocabulary[gram] = len(self.vocabulary)
+            counts[idx] = counts.get(idx, 0) + 1
+        return counts
+
+    def _vectorize(self, counts):
+        """Converte contagens em um vetor esparso TF-IDF normalizado (índices, pesos)."""
+        if not counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        weights = (1 + np.log(tf)) * self.idf[indices]
+        norm = np.linalg.norm(weights)
+        return indices, weights / norm if norm else weights
+
+    def _build_postings(self, rows):
+        """Monta as listas invertidas (formato CSC) a partir dos vetores das frases."""
+        phrase_ids, gram_ids, weights = [], [], []
+        for phrase_id, counts in enumerate(rows):
+            indices, values = self._vectorize(counts)
+            phrase_ids.append(np.full(len(indices), phrase_id, dtype=np.int64))
+            gram_ids.append(indices)
+            weights.append(values)
+
+        if rows:
+            phrase_ids = np.concatenate(phrase_ids)
+            gram_ids = np.concatenate(gram_ids)
+            weights = np.concatenate(weights)
+        else:
+            phrase_ids = gram_ids = np.zeros(0, dtype=np.int64)
+            weights = np.zeros(0, dtype=np.float32)
+
+        order = np.argsort(gram_ids, kind="stable")
+        self._posting_phrases = phrase_ids[order]
+        self._posting_weights = weights[order]
+        self._posting_ptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(gram_ids, minlength=len(self.vocabulary)),
+                  out=self._posting_ptr[1:])
+
+    def phrase_scores(self, text):
+        """
+        Calcula a similaridade de cosseno entre o texto e cada frase de treinamento.
+
+        Returns:
+            numpy.ndarray: Vetor (phrase_count,) de similaridades.
+        """
+        indices, weights = self._vectorize(self._count_ngrams(text))
+        if not len(indices):
+            return np.zeros(self.phrase_count, dtype=np.float32)
+
+        starts = self._posting_ptr[indices]
+        lengths = self._posting_ptr[indices + 1] - starts
+        # Concatena as listas invertidas de todos os n-gramas da consulta de uma vez
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + \
+            np.arange(lengths.sum())
+        contributions = self._posting_weights[positions] * \
+            np.repeat(weights, lengths)
+        return np.bincount(self._posting_phrases[positions], weights=contributions,
+                           minlength=self.phrase_count)
+
+    def intent_scores(self, text):
+        """
+        Pontuação de cada intenção (maior similaridade entre suas frases).
+
+        Returns:
+            numpy.ndarray: Vetor (len(intents),) alinhado com self.intents.
+        """
+        if not self.phrase_count:
+            return np.zeros(0, dtype=np.float32)
+        return np.maximum.reduceat(self.phrase_scores(text), self._intent_starts)
+
+    def predict_one(self, text):
+        """
+        Classifica um único texto.
+
+        Returns:
+            tuple: (nome da intenção ou FALLBACK_INTENT, pontuação).
+        """
+        scores = self.intent_scores(text)
+        if not len(scores):
+            return FALLBACK_INTENT, 0.0
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        if score <= 0 or score < self.threshold:
+            return FALLBACK_INTENT, score
+        return self.intents[best], score
+
+    def predict(self, texts):
+        """
+        Classifica uma lista de textos.
+
+        Returns:
+            list: Lista de tuplas (intenção, pontuação).
+        """
+        return [self.predict_one(text) for text in texts]
+
+
+def find_collisions(examples, min_similarity=0.8, **matcher_kwargs):
+    """
+    Encontra frases de treinamento muito parecidas que pertencem a intenções diferentes.
+    Essas colisões tendem a confundir o Dialogflow após edições em training_phrases.
+
+    Args:
+        examples (list): Lista de tuplas (texto, intenção).
+        min_similarity (float): Similaridade de cosseno mínima para reportar.
+
+    Returns:
+        list: Dicionários {phrase, intent, other_phrase, other_intent, similarity}, do mais similar ao menos.
+    """
+    matcher = IntentMatcher(**matcher_kwargs).fit(examples)
+    phrases = []
+    for intent in matcher.intents:
+        phrases.extend((text, intent)
+                       for text, label in examples if label == intent)
+
+    collisions = []
+    for i, (text, intent) in enumerate(phrases):
+        scores = matcher.phrase_scores(text)
+        # Considera cada par apenas uma vez (j > i)
+        for j in np.nonzero(scores[i + 1:] >= min_similarity)[0] + i + 1:
+            other_text, other_intent = phrases[j]
+            if other_intent != intent:
+                collisions.append({
+                    "phrase": text,
+                    "intent": intent,
+                    "other_phrase": other_text,
+                    "other_intent": other_intent,
+                    "similarity": round(float(scores[j]), 4),
+                })
+    collisions.sort(key=lambda c: c["similarity"], reverse=True)
+    return collisions
+
+
+def benchmark(examples, folds=5, test_examples=None, **matcher_kwargs):
+    """
+    Mede a qualidade e a vazão do classificador local.
+
+    Sem test_examples, usa validação cruzada em 'folds' partes determinísticas
+    (a frase i de cada intenção vai para a parte i % folds), de modo que cada frase
+    é avaliada exatamente uma vez por um índice que não a contém.
+
+    Args:
+        examples (list): Lista de tuplas (texto, intenção) de treinamento.
+        folds (int): Número de partes da validação cruzada.
+        test_examples (list, optional): Frases rotuladas reservadas (texto, intenção).
+
+    Returns:
+        dict: Relatório com acurácia, matriz de confusão, métricas por intenção e vazão.
+    """
+    runs = []
+    if test_examples is not None:
+        runs.append((examples, test_examples))
+    else:
+        position = {}
+        fold_of = []
+        for _, intent in examples:
+            fold_of.append(position.get(intent, 0) % folds)
+            position[intent] = position.get(intent, 0) + 1
+        for fold in range(folds):
+            train = [ex for ex, f in zip(examples, fold_of) if f != fold]
+            test = [ex for ex, f in zip(examples, fold_of) if f == fold]
+            if test:
+                runs.append((train, test))
+
+    labels = sorted({intent for _, intent in examples} |
+                    {intent for _, intent in (test_examples or [])})
+    labels.append(FALLBACK_INTENT)
+    label_index = {label: i for i, label in enumerate(labels)}
+    confusion = np.zeros((len(labels), len(labels)), dtype=np.int64)
+
+    fit_seconds = 0.0
+    predict_seconds = 0.0
+    total = 0
+    for train, test in runs:
+        start = time.perf_counter()
+        matcher = IntentMatcher(**matcher_kwargs).fit(train)
+        fit_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        predictions = matcher.predict([text for text, _ in test])
+        predict_seconds += time.perf_counter() - start
+
+        for (_, expected), (predicted, _) in zip(test, predictions):
+            confusion[label_index[expected], label_index[predicted]] += 1
+        total += len(test)
+
+    correct = int(np.trace(confusion))
+    per_intent = {}
+    for label, i in label_index.items():
+        predicted_as = int(confusion[:, i].sum())
+        actual = int(confusion[i, :].sum())
+        if not predicted_as and not actual:
+            continue
+        per_intent[label] = {
+            "precision": round(confusion[i, i] / predicted_as, 4) if predicted_as else 0.0,
+            "recall": round(confusion[i, i] / actual, 4) if actual else 0.0,
+            "support": actual,
+        }
+
+    return {
+        "examples": total,
+        "accuracy": round(correct / total, 4) if total else 0.0,
+        "labels": labels,
+        "confusion_matrix": confusion.tolist(),
+        "per_intent": per_intent,
+        "fit_seconds": round(fit_seconds, 6),
+        "predict_seconds": round(predict_seconds, 6),
+        "queries_per_second": round(total / predict_seconds, 1) if predict_seconds else None,
+    }
+
+
+def format_benchmark(report, collisions=None):
+    """Formata o relatório de benchmark para exibição no terminal."""
+    lines = [
+        f"Frases avaliadas: {report['examples']} | Acurácia: {report['accuracy']:.2%}",
+        f"Vazão: {report['queries_per_second']} consultas/s | Treino: {report['fit_seconds'] * 1000:.1f} ms",
+        "",
+        "Matriz de confusão (linhas = esperado, colunas = previsto):",
+    ]
+    labels = report["labels"]
+    width = max(len(label) for label in labels)
+    lines.append(" " * (width + 4) +
+                 " ".join(f"{i:>4}" for i in range(len(labels))))
+    for i, (label, row) in enumerate(zip(labels, report["confusion_matrix"])):
+        lines.append(f"{i:>2} {label:<{width}} " +
+                     " ".join(f"{v:>4}" for v in row))
+
+    lines.append("")
+    lines.append("Por intenção:")
+    for label, metrics in report["per_intent"].items():
+        lines.append(
+            f"  - {label}: precisão {metrics['precision']:.2f}, recall {metrics['recall']:.2f} (n={metrics['support']})")
+
+    if collisions:
+        lines.append("")
+        lines.append(f"{len(collisions)} colisão(ões) entre intenções:")
+        for c in collisions:
+            lines.append(
+                f"  - [{c['similarity']:.2f}] '{c['phrase']}' ({c['intent']}) ~ '{c['other_phrase']}' ({c['other_intent']})")
+    return "\n".join(lines)
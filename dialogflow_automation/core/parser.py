@@ -1,15 +1,30 @@
 import json
 import os
 from .logger import setup_logger
+from .json_stream import iter_array_items
+from .schema import validate_intent, validate_entity
 
 # Inicializa o logger para este módulo
 logger = setup_logger("config_parser")
 
+# Seções do arquivo de configuração e o rótulo usado nas mensagens de erro
+SECTION_INTENTS = "intents"
+SECTION_ENTITIES = "entities"
+SECTION_LABELS = {
+    SECTION_INTENTS: "Intenção",
+    SECTION_ENTITIES: "Entidade",
+}
+
 
 class ConfigParser:
     """
     Classe responsável por ler e validar arquivos de configuração (Intents, Entidades).
     Centraliza o acesso aos dados JSON que definem a estrutura do Chatbot.
+
+    Formatos suportados (todos lidos de forma incremental, um registro por vez):
+    - Arquivo com objeto: {"entities": [...], "intents": [...]} (formato do intents.json)
+    - Arquivo com lista de intenções: [{...}, {...}]
+    - Diretório com um arquivo por registro: <dir>/entities/*.json e <dir>/intents/*.json
     """
 
     def __init__(self, config_path):
@@ -30,38 +45,141 @@ class ConfigParser:
     def load_intents(self, filename="intents.json"):
         """
         Carrega e valida a lista de intenções do arquivo JSON.
+        Mantido para compatibilidade: prefira iter_intents() para arquivos grandes.
 
         Args:
-            filename (str): Nome do arquivo JSON contendo as intenções.
+            filename (str): Nome do arquivo JSON (ou diretório) contendo as intenções.
 
         Returns:
             list: Lista de dicionários contendo a definição das intenções.
         """
-        file_path = os.path.join(self.config_path, filename)
-        logger.info(f"Carregando intenções de: {file_path}")
+        intents = list(self.iter_intents(filename))
+        logger.info(f"{len(intents)} intenções carregadas com sucesso.")
+        return intents
 
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                intents = json.load(f)
+    def load_entities(self, filename="intents.json"):
+        """
+        Carrega e valida a lista de entidades do arquivo JSON.
+
+        Args:
+            filename (str): Nome do arquivo JSON (ou diretório) contendo as entidades.
+
+        Returns:
+            list: Lista de dicionários contendo a definição das entidades.
+        """
+        entities = list(self.iter_entities(filename))
+        logger.info(f"{len(entities)} entidades carregadas com sucesso.")
+        return entities
 
-            # Validação básica de esquema
-            if not isinstance(intents, list):
-                raise ValueError(
-                    "O arquivo de intents deve conter uma lista JSON.")
+    def iter_intents(self, filename="intents.json"):
+        """
+        Itera sobre as intenções da configuração, validando cada uma ao ser lida.
+
+        Args:
+            filename (str): Nome do arquivo JSON (ou diretório) contendo as intenções.
 
-            for index, intent in enumerate(intents):
-                self._validate_intent_schema(intent, index)
+        Yields:
+            dict: Definição de intenção válida.
 
-            logger.info(f"{len(intents)} intenções carregadas com sucesso.")
-            return intents
+        Raises:
+            ValueError: Na primeira intenção com schema inválido.
+        """
+        for index, intent in enumerate(self._iter_section(filename, SECTION_INTENTS)):
+            self._validate_intent_schema(intent, index)
+            yield intent
+
+    def iter_entities(self, filename="intents.json"):
+        """
+        Itera sobre as entidades da configuração, validando cada uma ao ser lida.
+
+        Args:
+            filename (str): Nome do arquivo JSON (ou diretório) contendo as entidades.
+
+        Yields:
+            dict: Definição de entidade válida.
+
+        Raises:
+            ValueError: Na primeira entidade com schema inválido.
+        """
+        for index, entity in enumerate(self._iter_section(filename, SECTION_ENTITIES)):
+            self._validate_entity_schema(entity, index)
+            yield entity
+
+    def resolve_path(self, filename):
+        """Resolve o caminho da fonte de configuração relativo ao diretório de configs."""
+        return os.path.join(self.config_path, filename)
+
+    def iter_raw_records(self, filename, section):
+        """
+        Itera sobre os registros de uma seção sem validá-los.
+        Usado por ferramentas que precisam reportar todos os erros (ver core/validator.py).
+
+        Args:
+            filename (str): Arquivo JSON ou diretório com um arquivo por registro.
+            section (str): 'intents' ou 'entities'.
+        """
+        return self._iter_section(filename, section)
+
+    def iter_raw_file(self, filename):
+        """
+        Itera uma única vez sobre os registros de todas as seções de um arquivo, na ordem em que
+        aparecem, sem validá-los. Um erro de sintaxe só interrompe a leitura no ponto em que ocorre.
+
+        Args:
+            filename (str): Arquivo JSON relativo ao diretório de configs (não aceita diretório).
+
+        Yields:
+            tuple: (seção, registro bruto).
+        """
+        path = self.resolve_path(filename)
+        logger.info(f"Carregando configuração de: {path}")
+        return self._iter_file(path)
+
+    def _iter_section(self, filename, section):
+        """
+        Itera sobre os registros brutos (não validados) de uma seção da configuração.
+
+        Args:
+            filename (str): Arquivo JSON ou diretório com um arquivo por registro.
+            section (str): 'intents' ou 'entities'.
+
+        Yields:
+            dict: Registro bruto da seção.
+        """
+        path = self.resolve_path(filename)
+        logger.info(f"Carregando {section} de: {path}")
+
+        if os.path.isdir(path):
+            yield from self._iter_directory(os.path.join(path, section))
+            return
+
+        for record_section, record in self._iter_file(path):
+            if record_section == section:
+                yield record
+
+    def _iter_file(self, path):
+        """Itera sobre (seção, registro) de um arquivo JSON, de forma incremental."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for key, record in iter_array_items(f):
+                    # Lista no nível superior é interpretada como lista de intenções
+                    yield key or SECTION_INTENTS, record
 
         except FileNotFoundError:
-            logger.error(f"Arquivo de intenções não encontrado: {file_path}")
+            logger.error(f"Arquivo de configuração não encontrado: {path}")
             raise
         except json.JSONDecodeError as e:
-            logger.error(f"Erro de sintaxe no JSON de intenções: {e}")
+            logger.error(f"Erro de sintaxe no JSON de {path}: {e}")
             raise
 
+    def _iter_directory(self, directory):
+        """
+        Itera sobre os arquivos JSON de um diretório (um registro, ou lista de registros, por arquivo).
+        Arquivos são lidos em ordem alfabética para garantir resultados determinísticos.
+        """
+        for file_path in list_record_files(directory):
+            yield from read_record_file(file_path)
+
     def _validate_intent_schema(self, intent, index):
         """
         Valida se um dicionário de intenção possui os campos obrigatórios e tipos corretos.
@@ -73,45 +191,68 @@ class ConfigParser:
         Raises:
             ValueError: Se o schema for inválido.
         """
-        required_fields = {
-            "display_name": str,
-            "training_phrases": list,
-            "messages": list
-        }
-
-        # Valida campos obrigatórios de nível superior
-        for field, expected_type in required_fields.items():
-            if field not in intent:
-                raise ValueError(
-                    f"Intenção #{index}: Campo obrigatório '{field}' ausente.")
-            if not isinstance(intent[field], expected_type):
-                raise ValueError(
-                    f"Intenção #{index}: Campo '{field}' deve ser do tipo {expected_type.__name__}.")
-
-        # Valida conteúdo das listas
-        if not all(isinstance(phrase, str) for phrase in intent["training_phrases"]):
-            raise ValueError(
-                f"Intenção #{index} ({intent['display_name']}): 'training_phrases' deve conter apenas strings.")
-
-        if not all(isinstance(msg, str) for msg in intent["messages"]):
-            raise ValueError(
-                f"Intenção #{index} ({intent['display_name']}): 'messages' deve conter apenas strings.")
-
-        # Valida parâmetros opcionais
-        if "parameters" in intent:
-            if not isinstance(intent["parameters"], list):
-                raise ValueError(
-                    f"Intenção #{index} ({intent['display_name']}): 'parameters' deve ser uma lista.")
-
-            for param_idx, param in enumerate(intent["parameters"]):
-                self._validate_parameter_schema(param, index, param_idx)
-
-    def _validate_parameter_schema(self, param, intent_index, param_index):
-        """Valida a estrutura de um parâmetro."""
-        required_param_fields = ["display_name",
-                                 "entity_type_display_name", "mandatory"]
-
-        for field in required_param_fields:
-            if field not in param:
-                raise ValueError(
-                    f"Intenção #{intent_index}, Parâmetro #{param_index}: Campo '{field}' ausente.")
+        self._raise_on_errors(validate_intent(
+            intent), intent, index, SECTION_INTENTS)
+
+    def _validate_entity_schema(self, entity, index):
+        """
+        Valida se um dicionário de entidade possui os campos obrigatórios e tipos corretos.
+
+        Args:
+            entity (dict): Dicionário representando a entidade.
+            index (int): Índice da entidade na lista (para logs de erro).
+
+        Raises:
+            ValueError: Se o schema for inválido.
+        """
+        self._raise_on_errors(validate_entity(
+            entity), entity, index, SECTION_ENTITIES)
+
+    def _raise_on_errors(self, errors, record, index, section):
+        """Converte o primeiro erro de validação em ValueError com o contexto do registro."""
+        if not errors:
+            return
+        label = SECTION_LABELS[section]
+        name = record.get("display_name") if isinstance(
+            record, dict) else None
+        prefix = f"{label} #{index} ({name})" if name else f"{label} #{index}"
+        raise ValueError(f"{prefix}: {errors[0]}")
+
+
+def list_record_files(directory):
+    """
+    Lista, em ordem alfabética, os arquivos JSON de um diretório de registros.
+
+    Args:
+        directory (str): Diretório (ex: <config>/intents).
+
+    Returns:
+        list: Caminhos dos arquivos .json (vazia se o diretório não existir).
+    """
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.endswith(".json")
+    ]
+
+
+def read_record_file(file_path):
+    """
+    Lê um arquivo de registro individual (um objeto ou uma lista de objetos).
+
+    Args:
+        file_path (str): Caminho do arquivo JSON.
+
+    Returns:
+        list: Registros contidos no arquivo.
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except json.JSONDecodeError as e:
+        logger.error(f"Erro de sintaxe no JSON {file_path}: {e}")
+        raise
+
+    return data if isinstance(data, list) else [data]
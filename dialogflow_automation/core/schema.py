@@ -0,0 +1,124 @@
+# Schemas das definições de configuração do Chatbot (Intenções e Entidades).
+# Cada schema é compilado uma única vez em uma função de validação, evitando
+# reinterpretar o dicionário de regras a cada registro validado.
+
+_TYPE_NAMES = {
+    str: "str",
+    list: "list",
+    dict: "dict",
+    bool: "bool",
+    int: "int",
+}
+
+PARAMETER_SCHEMA = {
+    "display_name": {"type": str, "required": True},
+    "entity_type_display_name": {"type": str, "required": True},
+    "mandatory": {"type": bool, "required": True},
+    "prompts": {"type": list, "required": False, "items": str},
+}
+
+OUTPUT_CONTEXT_SCHEMA = {
+    "name": {"type": str, "required": True},
+    "lifespan_count": {"type": int, "required": False},
+}
+
+INTENT_SCHEMA = {
+    "display_name": {"type": str, "required": True},
+    "training_phrases": {"type": list, "required": True, "items": str},
+    "messages": {"type": list, "required": True, "items": str},
+    "parameters": {"type": list, "required": False, "items": PARAMETER_SCHEMA, "label": "Parâmetro"},
+    "input_context_names": {"type": list, "required": False, "items": str},
+    "output_contexts": {"type": list, "required": False, "items": OUTPUT_CONTEXT_SCHEMA, "label": "Contexto"},
+    "webhook": {"type": bool, "required": False},
+}
+
+ENTITY_VALUE_SCHEMA = {
+    "value": {"type": str, "required": True},
+    "synonyms": {"type": list, "required": True, "items": str},
+}
+
+ENTITY_SCHEMA = {
+    "display_name": {"type": str, "required": True},
+    "kind": {"type": str, "required": True, "choices": ("KIND_MAP", "KIND_LIST")},
+    "entities": {"type": list, "required": True, "items": ENTITY_VALUE_SCHEMA, "label": "Valor"},
+}
+
+
+def compile_schema(schema):
+    """
+    Compila um schema declarativo em uma função de validação.
+
+    Args:
+        schema (dict): Mapeamento campo -> regras ('type', 'required', 'items', 'choices', 'label').
+
+    Returns:
+        callable: Função validate(record) que retorna a lista de mensagens de erro
+        (lista vazia se o registro for válido).
+    """
+    checks = [_compile_field(field, rules) for field, rules in schema.items()]
+
+    def validate(record):
+        if not isinstance(record, dict):
+            return ["Registro deve ser um objeto JSON."]
+        errors = []
+        for check in checks:
+            check(record, errors)
+        return errors
+
+    return validate
+
+
+def _compile_field(field, rules):
+    """Gera a função de verificação de um único campo."""
+    expected_type = rules["type"]
+    type_name = _TYPE_NAMES.get(expected_type, expected_type.__name__)
+    required = rules.get("required", False)
+    choices = rules.get("choices")
+    items = rules.get("items")
+    label = rules.get("label", "Item")
+
+    item_check = _compile_items(field, items, label) if items is not None else None
+
+    def check(record, errors):
+        if field not in record:
+            if required:
+                errors.append(f"Campo obrigatório '{field}' ausente.")
+            return
+        value = record[field]
+        # bool é subclasse de int: impede que True/False passem como inteiros
+        if not isinstance(value, expected_type) or (expected_type is int and isinstance(value, bool)):
+            errors.append(f"Campo '{field}' deve ser do tipo {type_name}.")
+            return
+        if choices and value not in choices:
+            errors.append(
+                f"Campo '{field}' deve ser um de: {', '.join(choices)}.")
+        if item_check:
+            item_check(value, errors)
+
+    return check
+
+
+def _compile_items(field, items, label):
+    """Gera a verificação dos itens de uma lista: schema aninhado (dict) ou tipo dos itens."""
+    if isinstance(items, dict):
+        nested = compile_schema(items)
+
+        def check_nested(values, errors):
+            for idx, value in enumerate(values):
+                for error in nested(value):
+                    errors.append(f"{label} #{idx}: {error}")
+        return check_nested
+
+    item_type_name = "strings" if items is str else _TYPE_NAMES.get(
+        items, items.__name__)
+
+    def check_types(values, errors):
+        if not all(isinstance(value, items) for value in values):
+            errors.append(
+                f"'{field}' deve conter apenas {item_type_name}.")
+    return check_types
+
+
+# Validadores pré-compilados no carregamento do módulo
+validate_intent = compile_schema(INTENT_SCHEMA)
+validate_entity = compile_schema(ENTITY_SCHEMA)
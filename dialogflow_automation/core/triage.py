@@ -0,0 +1,289 @@
+import json
+import os
+
+from .text_normalization import normalize_text
+
+# Triagem local de prioridade dos chamados: pontua o texto (título + descrição) com pesos de
+# palavras-chave e com os sinônimos da entidade TicketPriority do intents.json.
+# Usa apenas a biblioteca padrão para rodar dentro dos webhooks; com NumPy instalado, a
+# reclassificação em lote (classify_batch) soma as pontuações de todos os chamados de uma vez.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Códigos do modelo Ticket, do menos para o mais urgente (índices das colunas de pontuação)
+LEVELS = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+
+# Valores canônicos da entidade TicketPriority -> códigos (espelha Ticket.PRIORITY_CHOICES)
+PRIORITY_CODES = {
+    "Baixa": "LOW",
+    "Média": "MEDIUM",
+    "Alta": "HIGH",
+    "Crítica": "CRITICAL",
+}
+
+# Versão do formato serializado (to_dict/from_dict)
+MODEL_FORMAT_VERSION = 1
+
+DEFAULT_KEYWORDS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "triage.json")
+
+
+class TriageModel:
+    """
+    Modelo linear de prioridade sobre frases (1 a N palavras) do texto normalizado.
+
+    Cada frase conhecida soma seu peso à pontuação de uma prioridade; vence a maior pontuação
+    (bias + frases + prioridade informada pelo usuário). Empates favorecem a mais urgente.
+
+    As frases são casadas da esquerda para a direita pela mais longa, sem sobreposição: em
+    'nao e urgente' só conta a frase inteira (LOW), e não 'urgente' (CRITICAL). Cada frase
+    conta uma vez por texto. O custo é O(palavras x tamanho da maior frase) consultas a um
+    dicionário, independente do número de frases.
+    """
+
+    def __init__(self, phrases=None, bias=None, stated_weight=3.0):
+        """
+        Args:
+            phrases (dict, optional): {frase normalizada: (código da prioridade, peso)}.
+            bias (dict, optional): {código: pontuação inicial}, usada quando nada casa.
+            stated_weight (float): Peso da prioridade escolhida pelo usuário.
+        """
+        self.bias = [float((bias or {}).get(level, 0.0)) for level in LEVELS]
+        self.stated_weight = float(stated_weight)
+        self.phrases = {}
+        self.max_words = 0
+        for phrase, (level, weight) in (phrases or {}).items():
+            self.add(phrase, level, weight)
+        self.stated = {}
+        self._arrays = None
+
+    def add(self, phrase, level, weight):
+        """Adiciona (ou substitui) uma frase; o texto é normalizado aqui."""
+        normalized = normalize_text(phrase)
+        if not normalized:
+            return
+        if level not in LEVELS:
+            raise ValueError(f"Prioridade desconhecida na triagem: {level}")
+        self.phrases[normalized] = (LEVELS.index(level), float(weight))
+        self.max_words = max(self.max_words, len(normalized.split()))
+        self._arrays = None
+
+    @classmethod
+    def from_config(cls, entities, keywords):
+        """
+        Compila o modelo a partir das entidades do intents.json e do arquivo de palavras-chave.
+
+        Os sinônimos de TicketPriority entram como frases com `synonym_weight` (uma palavra-chave
+        explícita com o mesmo texto prevalece) e resolvem a prioridade informada pelo usuário.
+
+        Args:
+            entities (iterable): Dicionários de entidade (display_name, entities).
+            keywords (dict): Conteúdo do triage.json (bias, synonym_weight, stated_weight, keywords).
+
+        Returns:
+            TriageModel: Modelo compilado.
+        """
+        model = cls(bias=keywords.get("bias"), stated_weight=keywords.get("stated_weight", 3.0))
+        synonym_weight = keywords.get("synonym_weight", 1.5)
+        for entity in entities:
+            if entity.get("display_name") != "TicketPriority":
+                continue
+            for entry in entity.get("entities", []):
+                level = PRIORITY_CODES.get(entry["value"])
+                if level is None:
+                    continue
+                for synonym in [entry["value"]] + list(entry.get("synonyms", [])):
+                    model.add(synonym, level, synonym_weight)
+                    model.stated[normalize_text(synonym)] = LEVELS.index(level)
+        for level, phrases in keywords.get("keywords", {}).items():
+            for phrase, weight in phrases.items():
+                model.add(phrase, level, weight)
+        return model
+
+    @classmethod
+    def from_files(cls, config_path, keywords_path=None):
+        """
+        Compila o modelo a partir do intents.json e do triage.json (padrão: o da configuração).
+
+        Raises:
+            OSError: Se algum arquivo não puder ser lido.
+            ValueError: Se algum arquivo for inválido.
+        """
+        with open(config_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with open(keywords_path or DEFAULT_KEYWORDS_PATH, "r", encoding="utf-8") as f:
+            keywords = json.load(f)
+        entities = data.get("entities", []) if isinstance(data, dict) else []
+        return cls.from_config(entities, keywords)
+
+    @classmethod
+    def load(cls, path):
+        """Carrega um modelo previamente compilado (ver save())."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_dict(cls, data):
+        """Reconstrói o modelo a partir de to_dict()."""
+        if data.get("version") != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Versão de modelo de triagem não suportada: {data.get('version')}")
+        model = cls(bias=dict(zip(LEVELS, data["bias"])), stated_weight=data["stated_weight"])
+        for phrase, (level, weight) in data["phrases"].items():
+            model.add(phrase, level, weight)
+        model.stated = {synonym: LEVELS.index(level) for synonym, level in data["stated"].items()}
+        return model
+
+    def to_dict(self):
+        """Serializa o modelo (formato lido também pela Cloud Function, em backend_functions/triage.py)."""
+        return {
+            "version": MODEL_FORMAT_VERSION,
+            "levels": LEVELS,
+            "bias": self.bias,
+            "stated_weight": self.stated_weight,
+            "stated": {synonym: LEVELS[level] for synonym, level in sorted(self.stated.items())},
+            "phrases": {phrase: [LEVELS[level], weight]
+                        for phrase, (level, weight) in sorted(self.phrases.items())},
+        }
+
+    def save(self, path):
+        """Grava o modelo compilado em JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+    def match(self, text):
+        """
+        Frases do modelo encontradas no texto (mais longa primeiro, sem sobreposição).
+
+        Args:
+            text (str): Texto livre (título e descrição do chamado).
+
+        Returns:
+            list: Frases normalizadas distintas, na ordem em que aparecem.
+        """
+        words = normalize_text(text or "").split()
+        found = []
+        start = 0
+        while start < len(words):
+            for size in range(min(self.max_words, len(words) - start), 0, -1):
+                phrase = " ".join(words[start:start + size])
+                if phrase in self.phrases:
+                    if phrase not in found:
+                        found.append(phrase)
+                    start += size
+                    break
+            else:
+                start += 1
+        return found
+
+    def stated_level(self, stated):
+        """
+        Índice da prioridade escolhida pelo usuário ou None.
+
+        Aceita o sinônimo exato de TicketPriority ou um texto que o contenha
+        (ex: 'acho que parou a empresa').
+        """
+        if not isinstance(stated, str):
+            return None
+        level = self.stated.get(normalize_text(stated))
+        if level is not None:
+            return level
+        for phrase in self.match(stated):
+            if phrase in self.stated:
+                return self.stated[phrase]
+        return None
+
+    def scores(self, text, stated=None):
+        """
+        Returns:
+            list: Pontuação de cada prioridade, na ordem de LEVELS.
+        """
+        scores = list(self.bias)
+        for phrase in self.match(text):
+            level, weight = self.phrases[phrase]
+            scores[level] += weight
+        level = self.stated_level(stated)
+        if level is not None:
+            scores[level] += self.stated_weight
+        return scores
+
+    def classify(self, text, stated=None):
+        """
+        Prioridade de um chamado.
+
+        Args:
+            text (str): Título e descrição do chamado.
+            stated (str, optional): Prioridade informada pelo usuário (ex: 'Urgente').
+
+        Returns:
+            str: 'LOW', 'MEDIUM', 'HIGH' ou 'CRITICAL'.
+        """
+        scores = self.scores(text, stated)
+        return LEVELS[max(range(len(LEVELS)), key=lambda level: (scores[level], level))]
+
+    def _weight_arrays(self):
+        """Frases numeradas e seus pesos como arrays (montados na primeira chamada em lote)."""
+        if self._arrays is None:
+            ids = {phrase: index for index, phrase in enumerate(self.phrases)}
+            levels = np.array([level for level, _ in self.phrases.values()], dtype=np.int64)
+            weights = np.array([weight for _, weight in self.phrases.values()], dtype=np.float64)
+            self._arrays = (ids, levels, weights)
+        return self._arrays
+
+    def score_batch(self, texts, stated=None):
+        """
+        Pontuações de vários chamados.
+
+        O casamento de frases é feito texto a texto; a soma dos pesos é uma única operação
+        vetorizada sobre os pares (chamado, frase) de todo o lote.
+
+        Args:
+            texts (list): Textos dos chamados.
+            stated (list, optional): Prioridade informada de cada chamado (None se não houver).
+
+        Returns:
+            numpy.ndarray ou list: Matriz (chamados x LEVELS); lista de listas sem NumPy.
+        """
+        stated = stated if stated is not None else [None] * len(texts)
+        if np is None:
+            return [self.scores(text, value) for text, value in zip(texts, stated)]
+
+        ids, levels, weights = self._weight_arrays()
+        rows, features = [], []
+        for row, text in enumerate(texts):
+            for phrase in self.match(text):
+                rows.append(row)
+                features.append(ids[phrase])
+        rows = np.array(rows, dtype=np.int64)
+        features = np.array(features, dtype=np.int64)
+
+        # Cada par (chamado, frase) soma o peso da frase na célula (chamado, prioridade da frase)
+        cells = rows * len(LEVELS) + levels[features]
+        scores = np.bincount(cells, weights=weights[features], minlength=len(texts) * len(LEVELS))
+        scores = scores.reshape(len(texts), len(LEVELS)) + np.array(self.bias)
+
+        stated_levels = [(row, self.stated_level(value)) for row, value in enumerate(stated)]
+        known = [(row, level) for row, level in stated_levels if level is not None]
+        if known:
+            known_rows, known_levels = zip(*known)
+            scores[list(known_rows), list(known_levels)] += self.stated_weight
+        return scores
+
+    def classify_batch(self, texts, stated=None):
+        """
+        Prioridades de vários chamados (ex: reclassificação do backlog).
+
+        Returns:
+            list: Códigos de prioridade, na ordem dos textos.
+        """
+        scores = self.score_batch(texts, stated)
+        if np is None:
+            return [LEVELS[max(range(len(LEVELS)), key=lambda level: (row[level], level))]
+                    for row in scores]
+        if len(texts) == 0:
+            return []
+        # argmax devolve o primeiro máximo: invertendo as colunas, o empate fica com a mais urgente
+        best = len(LEVELS) - 1 - np.argmax(scores[:, ::-1], axis=1)
+        return [LEVELS[level] for level in best]
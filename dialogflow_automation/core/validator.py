@@ -0,0 +1,286 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .logger import setup_logger
+from .parser import (
+    SECTION_ENTITIES,
+    SECTION_INTENTS,
+    SECTION_LABELS,
+    list_record_files,
+    read_record_file,
+)
+from .schema import validate_intent, validate_entity
+
+# Inicializa o logger para este módulo
+logger = setup_logger("config_validator")
+
+# Prefixo dos tipos de entidade de sistema do Dialogflow (ex: @sys.any, @sys.number)
+SYSTEM_ENTITY_PREFIX = "sys."
+
+# Abaixo deste número de arquivos, o custo de iniciar processos supera o ganho
+PARALLEL_MIN_FILES = 200
+
+_SCHEMA_VALIDATORS = {
+    SECTION_INTENTS: validate_intent,
+    SECTION_ENTITIES: validate_entity,
+}
+
+
+class ValidationReport:
+    """
+    Resultado agregado da validação de uma configuração.
+    Reúne todos os erros encontrados, em vez de interromper no primeiro.
+    """
+
+    def __init__(self, source):
+        """
+        Args:
+            source (str): Caminho da configuração validada.
+        """
+        self.source = source
+        self.errors = []
+        self.counts = {SECTION_ENTITIES: 0, SECTION_INTENTS: 0}
+
+    @property
+    def is_valid(self):
+        return not self.errors
+
+    def add_error(self, section, location, display_name, message):
+        """
+        Registra um erro de validação.
+
+        Args:
+            section (str): 'intents' ou 'entities'.
+            location (str): Origem do registro (ex: 'intents.json#3' ou 'intents/a.json#0').
+            display_name (str): Nome do registro (pode ser None se ausente).
+            message (str): Descrição do erro.
+        """
+        self.errors.append({
+            "section": section,
+            "location": location,
+            "display_name": display_name,
+            "message": message,
+        })
+
+    def to_dict(self):
+        return {
+            "source": self.source,
+            "valid": self.is_valid,
+            "counts": dict(self.counts),
+            "error_count": len(self.errors),
+            "errors": list(self.errors),
+        }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+    def format_text(self):
+        """Formata o relatório para exibição no terminal."""
+        lines = [
+            f"Validação de: {self.source}",
+            f"Entidades: {self.counts[SECTION_ENTITIES]} | Intenções: {self.counts[SECTION_INTENTS]}",
+        ]
+        if self.is_valid:
+            lines.append("Nenhum erro encontrado. ✅")
+            return "\n".join(lines)
+
+        lines.append(f"{len(self.errors)} erro(s) encontrado(s):")
+        for error in self.errors:
+            label = SECTION_LABELS[error["section"]]
+            name = f" ({error['display_name']})" if error["display_name"] else ""
+            lines.append(
+                f"  - {label} {error['location']}{name}: {error['message']}")
+        return "\n".join(lines)
+
+
+class ConfigValidator:
+    """
+    Motor de validação completo da configuração do Chatbot.
+
+    Diferente do ConfigParser (que interrompe no primeiro erro), valida todas as
+    intenções e entidades e retorna todos os problemas de uma vez:
+    - Schema de cada registro (schemas pré-compilados).
+    - Nomes de exibição duplicados (índices hash, em uma única passada).
+    - Referências de parâmetros a entidades não declaradas (exceto @sys.*).
+
+    Diretórios grandes (um arquivo por registro) são validados em paralelo por processos.
+    """
+
+    def __init__(self, config_parser, workers=None):
+        """
+        Args:
+            config_parser (ConfigParser): Parser que resolve e lê as fontes de configuração.
+            workers (int, optional): Número de processos. None usa os.cpu_count(); 1 desativa o paralelismo.
+        """
+        self.config_parser = config_parser
+        self.workers = workers or os.cpu_count() or 1
+
+    def validate(self, filename="intents.json"):
+        """
+        Valida a configuração completa.
+
+        Args:
+            filename (str): Arquivo JSON ou diretório relativo ao diretório de configs.
+
+        Returns:
+            ValidationReport: Relatório com todos os erros encontrados.
+        """
+        path = self.config_parser.resolve_path(filename)
+        report = ValidationReport(path)
+
+        summaries = []
+        try:
+            self._collect_summaries(filename, path, summaries)
+        except FileNotFoundError:
+            report.add_error(SECTION_INTENTS, path, None,
+                             "Arquivo de configuração não encontrado.")
+        except json.JSONDecodeError as e:
+            report.add_error(SECTION_INTENTS, path, None,
+                             f"Erro de sintaxe JSON: {e}")
+            # Os registros lidos antes do erro continuam sendo verificados. As referências a
+            # entidades só são confiáveis se a lista de entidades foi lida até o fim.
+            self._check_summaries(summaries, report, check_references=_entities_complete(summaries))
+        else:
+            self._check_summaries(summaries, report)
+
+        logger.info(
+            f"Validação concluída: {len(report.errors)} erro(s) em {path}")
+        return report
+
+    def _collect_summaries(self, filename, path, summaries):
+        """
+        Lê os registros e acrescenta em `summaries`, para cada um, um resumo compacto já validado
+        no schema. Somente o resumo (nome, erros, referências) é mantido em memória.
+
+        Um arquivo é lido em uma única passada, na ordem dos registros: se houver um erro de
+        sintaxe no meio dele, os resumos anteriores ao erro já estão em `summaries`.
+        """
+        if os.path.isdir(path):
+            summaries.extend(self._collect_directory(path))
+            return
+
+        source = os.path.basename(path)
+        indexes = {SECTION_ENTITIES: 0, SECTION_INTENTS: 0}
+        for section, record in self.config_parser.iter_raw_file(filename):
+            # Como no loader, outras chaves do objeto raiz (ex: "tags") são ignoradas
+            if section not in indexes:
+                continue
+            summaries.append(_summarize(section, f"{source}#{indexes[section]}", record))
+            indexes[section] += 1
+
+    def _collect_directory(self, path):
+        """Valida um diretório de registros, distribuindo os arquivos entre processos se valer a pena."""
+        tasks = []
+        for section in (SECTION_ENTITIES, SECTION_INTENTS):
+            for file_path in list_record_files(os.path.join(path, section)):
+                tasks.append((section, file_path, os.path.relpath(file_path, path)))
+
+        if self.workers <= 1 or len(tasks) < PARALLEL_MIN_FILES:
+            return [summary for task in tasks for summary in _summarize_file(task)]
+
+        # Lotes grandes reduzem o overhead de serialização entre processos
+        chunksize = max(1, len(tasks) // (self.workers * 4))
+        summaries = []
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for file_summaries in executor.map(_summarize_file, tasks, chunksize=chunksize):
+                summaries.extend(file_summaries)
+        return summaries
+
+    def _check_summaries(self, summaries, report, check_references=True):
+        """Aplica as verificações globais (duplicidade e referências) sobre os resumos."""
+        seen = {SECTION_ENTITIES: {}, SECTION_INTENTS: {}}
+        declared_entities = set()
+        references = []
+
+        for section, location, display_name, errors, entity_refs in summaries:
+            report.counts[section] += 1
+            for message in errors:
+                report.add_error(section, location, display_name, message)
+
+            if display_name is None:
+                continue
+            first_location = seen[section].setdefault(display_name, location)
+            if first_location != location:
+                report.add_error(section, location, display_name,
+                                 f"Nome de exibição duplicado (já definido em {first_location}).")
+            if section == SECTION_ENTITIES:
+                declared_entities.add(display_name)
+            else:
+                references.append((location, display_name, entity_refs))
+
+        # Referências só podem ser verificadas após conhecer todas as entidades declaradas
+        if not check_references:
+            return
+        for location, display_name, entity_refs in references:
+            for param_name, entity_type in entity_refs:
+                entity_name = entity_type[1:] if entity_type.startswith(
+                    "@") else entity_type
+                if entity_name.startswith(SYSTEM_ENTITY_PREFIX) or entity_name in declared_entities:
+                    continue
+                report.add_error(SECTION_INTENTS, location, display_name,
+                                 f"Parâmetro '{param_name}' referencia a entidade inexistente '{entity_type}'.")
+
+
+def _entities_complete(summaries):
+    """
+    Indica se a lista de entidades foi lida até o fim antes de um erro de sintaxe:
+    somente quando alguma intenção aparece depois da última entidade lida.
+    """
+    sections = [summary[0] for summary in summaries]
+    if SECTION_ENTITIES not in sections:
+        return False
+    last_entity = len(sections) - 1 - sections[::-1].index(SECTION_ENTITIES)
+    return SECTION_INTENTS in sections[last_entity + 1:]
+
+
+def _summarize_file(task):
+    """
+    Resume todos os registros de um arquivo (executado nos processos de trabalho).
+
+    Args:
+        task (tuple): (seção, caminho do arquivo, nome relativo para o relatório).
+
+    Returns:
+        list: Resumos dos registros do arquivo.
+    """
+    section, file_path, relative_name = task
+    try:
+        records = read_record_file(file_path)
+    except json.JSONDecodeError as e:
+        return [(section, relative_name, None, [f"Erro de sintaxe JSON: {e}"], [])]
+    return [
+        _summarize(section, f"{relative_name}#{index}", record)
+        for index, record in enumerate(records)
+    ]
+
+
+def _summarize(section, location, record):
+    """
+    Valida o schema de um registro e extrai apenas o necessário para as verificações globais.
+
+    Returns:
+        tuple: (seção, origem, nome de exibição, erros de schema, [(parâmetro, tipo de entidade)]).
+    """
+    errors = _SCHEMA_VALIDATORS[section](record)
+    if not isinstance(record, dict):
+        return (section, location, None, errors, [])
+
+    display_name = record.get("display_name")
+    if not isinstance(display_name, str):
+        display_name = None
+
+    entity_refs = []
+    if section == SECTION_INTENTS and isinstance(record.get("parameters"), list):
+        param_names = set()
+        for param in record["parameters"]:
+            if not isinstance(param, dict):
+                continue
+            param_name = param.get("display_name")
+            if param_name in param_names:
+                errors.append(f"Parâmetro '{param_name}' duplicado.")
+            param_names.add(param_name)
+            entity_type = param.get("entity_type_display_name")
+            if isinstance(entity_type, str):
+                entity_refs.append((param_name, entity_type))
+
+    return (section, location, display_name, errors, entity_refs)
@@ -1,5 +1,7 @@
 import os
 import sys
+import io
+import json
 import argparse
 from dotenv import load_dotenv
 
@@ -10,6 +12,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from dialogflow_automation.core.logger import setup_logger
 from dialogflow_automation.core.parser import ConfigParser
 from dialogflow_automation.core.client import DialogflowClient
+from dialogflow_automation.core.agent_archive import AgentArchiveConverter
+from dialogflow_automation.core.validator import ConfigValidator
+from dialogflow_automation.core.matcher import benchmark, find_collisions, format_benchmark
+from dialogflow_automation.core.entity_index import EntityIndex
+from dialogflow_automation.core.triage import DEFAULT_KEYWORDS_PATH, TriageModel
 
 # Inicializa o logger principal da aplicação
 logger = setup_logger("main")
@@ -31,6 +38,12 @@ def main():
         default="dialogflow_automation/config",
         help="Caminho para o diretório de configurações (JSONs)"
     )
+    parser.add_argument(
+        "--source",
+        type=str,
+        default="intents.json",
+        help="Arquivo JSON ou diretório (entities/*.json, intents/*.json) relativo a --config-dir"
+    )
     parser.add_argument(
         "--project-id", 
         type=str, 
@@ -41,9 +54,131 @@ def main():
         type=str, 
         help="Caminho para o JSON da Service Account (sobrescreve env var GOOGLE_APPLICATION_CREDENTIALS)"
     )
-    
+
+    # Subcomandos: 'sync' (padrão, objeto a objeto), 'export' e 'restore' (operação única via ZIP)
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("sync", help="Sincroniza intenções e entidades objeto a objeto (padrão)")
+
+    export_parser = subparsers.add_parser(
+        "export", help="Exporta o agente (ExportAgent) para ZIP ou JSON de configuração")
+    export_parser.add_argument(
+        "--output",
+        type=str,
+        required=True,
+        help="Arquivo de destino (.zip mantém o formato do Dialogflow, .json converte para o formato do projeto)"
+    )
+
+    restore_parser = subparsers.add_parser(
+        "restore", help="Restaura o agente (RestoreAgent/ImportAgent) a partir de ZIP ou JSON de configuração")
+    restore_parser.add_argument(
+        "--input",
+        type=str,
+        help="Arquivo de origem (.zip ou .json). Padrão: <config-dir>/intents.json"
+    )
+    restore_parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="Usa ImportAgent (mescla) em vez de RestoreAgent (substitui o agente)"
+    )
+    restore_parser.add_argument(
+        "--webhook-url",
+        type=str,
+        default=None,
+        help="URL do Fulfillment do agente (padrão: env var DIALOGFLOW_WEBHOOK_URL). "
+             "O token enviado ao webhook vem de DIALOGFLOW_WEBHOOK_TOKEN"
+    )
+    validate_parser = subparsers.add_parser(
+        "validate", help="Valida toda a configuração e reporta todos os erros de uma vez (não requer credenciais)")
+    validate_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Número de processos para diretórios grandes (padrão: número de CPUs)"
+    )
+
+    benchmark_parser = subparsers.add_parser(
+        "benchmark", help="Avalia colisões entre intenções com um classificador local (não requer credenciais)")
+    benchmark_parser.add_argument(
+        "--folds",
+        type=int,
+        default=5,
+        help="Número de partes da validação cruzada sobre as training_phrases"
+    )
+    benchmark_parser.add_argument(
+        "--test-file",
+        type=str,
+        default=None,
+        help="JSON com frases reservadas [{\"text\": ..., \"intent\": ...}] (substitui a validação cruzada)"
+    )
+    benchmark_parser.add_argument(
+        "--collision-threshold",
+        type=float,
+        default=0.8,
+        help="Similaridade mínima para reportar frases de intenções diferentes como colisão"
+    )
+
+    compile_parser = subparsers.add_parser(
+        "compile-entities", help="Compila o índice de sinônimos das entidades para os webhooks (não requer credenciais)")
+    compile_parser.add_argument(
+        "--output",
+        type=str,
+        default="backend_functions/entity_index.json",
+        help="Arquivo de destino do índice compilado (distribuído junto com a Cloud Function)"
+    )
+
+    triage_parser = subparsers.add_parser(
+        "compile-triage", help="Compila o modelo de triagem de prioridade dos chamados (não requer credenciais)")
+    triage_parser.add_argument(
+        "--keywords",
+        type=str,
+        default=DEFAULT_KEYWORDS_PATH,
+        help="Pesos das palavras-chave por prioridade (JSON)"
+    )
+    triage_parser.add_argument(
+        "--output",
+        type=str,
+        default="backend_functions/triage_model.json",
+        help="Arquivo de destino do modelo compilado (distribuído junto com a Cloud Function)"
+    )
+
+    for sub in (validate_parser, benchmark_parser):
+        sub.add_argument(
+            "--format",
+            choices=["text", "json"],
+            default="text",
+            help="Formato do relatório"
+        )
+        sub.add_argument(
+            "--output",
+            type=str,
+            default=None,
+            help="Grava o relatório em arquivo em vez de imprimir no terminal"
+        )
+
+    for sub in (export_parser, restore_parser):
+        sub.add_argument(
+            "--language",
+            type=str,
+            default="pt-br",
+            help="Idioma das frases de treinamento no ZIP do agente"
+        )
+
     args = parser.parse_args()
 
+    # Validação e benchmark são puramente locais: não exigem Project ID nem credenciais
+    if args.command == "validate":
+        run_validate(args)
+        return
+    if args.command == "benchmark":
+        run_benchmark(args)
+        return
+    if args.command == "compile-entities":
+        run_compile_entities(args)
+        return
+    if args.command == "compile-triage":
+        run_compile_triage(args)
+        return
+
     logger.info("Iniciando processo de automação do Dialogflow...")
 
     # --- 1. Validação de Credenciais e Parâmetros ---
@@ -67,53 +202,65 @@ def main():
     # --- 2. Inicialização dos Componentes ---
 
     try:
-        # Inicializa o parser de configuração
-        config_parser = ConfigParser(args.config_dir)
-        
         # Inicializa o cliente do Dialogflow
         df_client = DialogflowClient(project_id, credentials_path)
-        
+
     except Exception as e:
         logger.critical(f"Falha na inicialização dos componentes: {e}")
         sys.exit(1)
 
-    # --- 3. Execução da Automação (Sync) ---
+    # --- 3. Execução do Subcomando ---
+
+    if args.command == "export":
+        run_export(df_client, args)
+    elif args.command == "restore":
+        run_restore(df_client, args)
+    else:
+        run_sync(df_client, args)
 
+
+def run_sync(df_client, args):
+    """
+    Sincroniza intenções e entidades objeto a objeto (fluxo original).
+
+    A configuração inteira é validada (em uma passada streaming) antes da primeira chamada à API:
+    um registro inválido no fim do arquivo não pode deixar o agente sincronizado pela metade.
+    """
     try:
-        # Carrega a definição de intenções do arquivo JSON
-        # O parser valida a estrutura do JSON antes de retornar
-        intents_list = config_parser.load_intents()
-        
-        # Simulação de carregamento de Entidades (poderia vir de entities.json)
-        # Aqui definimos hardcoded para exemplo, mas deveria estar em config/
-        entities_config = [
-            {
-                "display_name": "TipoServico",
-                "kind": "KIND_MAP",
-                "entities": [
-                    {"value": "Consultoria Padrão", "synonyms": ["padrão", "básica", "standard"]},
-                    {"value": "Consultoria Premium", "synonyms": ["premium", "completa", "avançada"]}
-                ]
-            }
-        ]
+        # Inicializa o parser de configuração
+        config_parser = ConfigParser(args.config_dir)
+
+        report = ConfigValidator(config_parser, workers=getattr(args, "workers", None)).validate(args.source)
+        if not report.is_valid:
+            logger.error(report.format_text())
+            logger.error("Configuração inválida: nada foi enviado ao Dialogflow.")
+            sys.exit(1)
 
+        # Entidades primeiro: intenções referenciam as entidades em seus parâmetros
+        # Cada registro é lido individualmente (streaming), sem carregar o arquivo inteiro
         logger.info("Iniciando criação de Entidades...")
-        for ent in entities_config:
+        entity_count = 0
+        for ent in config_parser.iter_entities(args.source):
             df_client.create_entity_type(ent['display_name'], ent['kind'], ent['entities'])
-        
-        logger.info(f"Iniciando sincronização de {len(intents_list)} intenções...")
+            entity_count += 1
+
+        logger.info("Iniciando sincronização de intenções...")
+        intent_count = 0
 
         # Itera sobre cada intenção definida e cria no Dialogflow
-        for intent_data in intents_list:
+        for intent_data in config_parser.iter_intents(args.source):
             df_client.create_intent(
                 display_name=intent_data['display_name'],
                 training_phrases_parts=intent_data['training_phrases'],
                 message_texts=intent_data['messages'],
                 parameters=intent_data.get('parameters'),
                 input_context_names=intent_data.get('input_context_names'),
-                output_contexts=intent_data.get('output_contexts')
+                output_contexts=intent_data.get('output_contexts'),
+                webhook=intent_data.get('webhook', False)
             )
-            
+            intent_count += 1
+
+        logger.info(f"{entity_count} entidades e {intent_count} intenções sincronizadas.")
         logger.info("Processo de sincronização concluído com sucesso! 🚀")
         logger.info("Verifique o agente no console: https://dialogflow.cloud.google.com/#/agent/nexus-ai-aws-v1-ahuj/intents")
 
@@ -121,5 +268,171 @@ def main():
         logger.error(f"Erro durante o processo de execução: {e}")
         sys.exit(1)
 
+
+def run_validate(args):
+    """
+    Valida toda a configuração e imprime o relatório agregado (texto ou JSON).
+    Encerra com código 1 se houver erros, para uso em pipelines de CI.
+    """
+    try:
+        config_parser = ConfigParser(args.config_dir)
+    except FileNotFoundError:
+        sys.exit(1)
+
+    report = ConfigValidator(config_parser, workers=args.workers).validate(args.source)
+
+    content = report.to_json() if args.format == "json" else report.format_text()
+    write_report(content, args.output)
+
+    if not report.is_valid:
+        sys.exit(1)
+
+
+def run_benchmark(args):
+    """
+    Treina o classificador local com as training_phrases e mede acurácia, confusão e vazão.
+    Permite detectar, sem acesso ao Dialogflow, edições que fazem intenções colidirem.
+    """
+    try:
+        config_parser = ConfigParser(args.config_dir)
+        examples = [
+            (phrase, intent["display_name"])
+            for intent in config_parser.iter_intents(args.source)
+            for phrase in intent["training_phrases"]
+        ]
+
+        test_examples = None
+        if args.test_file:
+            with open(args.test_file, "r", encoding="utf-8") as f:
+                test_examples = [(item["text"], item["intent"]) for item in json.load(f)]
+
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(f"Erro ao carregar dados do benchmark: {e}")
+        sys.exit(1)
+
+    report = benchmark(examples, folds=args.folds, test_examples=test_examples)
+    collisions = find_collisions(examples, min_similarity=args.collision_threshold)
+
+    if args.format == "json":
+        content = json.dumps({**report, "collisions": collisions}, ensure_ascii=False, indent=2)
+    else:
+        content = format_benchmark(report, collisions)
+    write_report(content, args.output)
+
+
+def run_compile_entities(args):
+    """
+    Compila os sinônimos das entidades KIND_MAP em um índice JSON normalizado.
+    O arquivo gerado é carregado uma única vez pelos webhooks na inicialização.
+    """
+    try:
+        config_parser = ConfigParser(args.config_dir)
+        index = EntityIndex.from_entities(config_parser.iter_entities(args.source))
+        index.save(args.output)
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(f"Erro ao compilar índice de entidades: {e}")
+        sys.exit(1)
+
+    logger.info(f"Índice de entidades ({len(index.entity_types)} tipos) gravado em: {args.output}")
+
+
+def run_compile_triage(args):
+    """
+    Compila o modelo de triagem (palavras-chave + sinônimos de TicketPriority) para os webhooks.
+    """
+    try:
+        config_parser = ConfigParser(args.config_dir)
+        with open(args.keywords, "r", encoding="utf-8") as f:
+            keywords = json.load(f)
+        model = TriageModel.from_config(config_parser.iter_entities(args.source), keywords)
+        model.save(args.output)
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(f"Erro ao compilar modelo de triagem: {e}")
+        sys.exit(1)
+
+    logger.info(f"Modelo de triagem ({len(model.phrases)} frases) gravado em: {args.output}")
+
+
+def write_report(content, output_path=None):
+    """Imprime o relatório ou grava em arquivo, se um caminho for informado."""
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(content + "\n")
+    else:
+        print(content)
+
+
+def run_export(df_client, args):
+    """
+    Exporta o agente em uma única operação (ExportAgent).
+    Se o destino for .json, converte o ZIP para o formato de configuração do projeto.
+    """
+    try:
+        agent_content = df_client.export_agent()
+
+        if args.output.endswith(".zip"):
+            with open(args.output, "wb") as f:
+                f.write(agent_content)
+        else:
+            converter = AgentArchiveConverter(language_code=args.language)
+            with open(args.output, "w", encoding="utf-8") as f:
+                converter.zip_to_config(io.BytesIO(agent_content), f)
+
+        logger.info(f"Agente exportado para: {args.output}")
+
+    except Exception as e:
+        logger.error(f"Erro ao exportar agente: {e}")
+        sys.exit(1)
+
+
+def webhook_headers_from_env():
+    """
+    Headers do Fulfillment a partir de DIALOGFLOW_WEBHOOK_TOKEN (o mesmo token validado pelos
+    webhooks). Com vários tokens separados por vírgula (rotação), usa o primeiro.
+    """
+    tokens = [token.strip() for token in os.getenv("DIALOGFLOW_WEBHOOK_TOKEN", "").split(",") if token.strip()]
+    return {"x-dialogflow-token": tokens[0]} if tokens else {}
+
+
+def run_restore(df_client, args):
+    """
+    Restaura o agente em uma única operação (RestoreAgent/ImportAgent).
+    Se a origem for .json, gera o ZIP no formato do Dialogflow antes do envio.
+    """
+    input_path = args.input or os.path.join(args.config_dir, args.source)
+
+    try:
+        if input_path.endswith(".zip"):
+            with open(input_path, "rb") as f:
+                agent_content = f.read()
+        else:
+            # O loader unificado aceita o objeto {"entities", "intents"}, a lista de intenções
+            # ou um diretório com um arquivo por registro, validando cada registro ao ler
+            config_parser = ConfigParser(os.path.dirname(input_path) or ".")
+            source = os.path.basename(os.path.normpath(input_path))
+
+            buffer = io.BytesIO()
+            converter = AgentArchiveConverter(
+                language_code=args.language,
+                webhook_url=getattr(args, "webhook_url", None) or os.getenv("DIALOGFLOW_WEBHOOK_URL"),
+                webhook_headers=webhook_headers_from_env())
+            converter.config_to_zip(
+                config_parser.iter_entities(source), config_parser.iter_intents(source), buffer)
+            # O RestoreAgent substitui o Fulfillment do agente: sem URL, as intenções com
+            # webhook deixariam de chamá-lo
+            if converter.webhook_intents and not converter.webhook_url:
+                logger.error(
+                    f"As intenções {', '.join(converter.webhook_intents)} usam webhook. "
+                    f"Informe --webhook-url (ou DIALOGFLOW_WEBHOOK_URL) para restaurar o agente.")
+                sys.exit(1)
+            agent_content = buffer.getvalue()
+
+        df_client.restore_agent(agent_content, merge=args.merge)
+        logger.info(f"Agente restaurado a partir de: {input_path} 🚀")
+
+    except Exception as e:
+        logger.error(f"Erro ao restaurar agente: {e}")
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()
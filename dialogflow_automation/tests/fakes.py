@@ -0,0 +1,46 @@
+"""
+Substitutos locais (fakes) para os clientes gRPC do Dialogflow.
+Permitem exercitar os fluxos de Export/Restore sem acesso à API do Google Cloud.
+"""
+
+
+class FakeOperation:
+    """Imita uma operação de longa duração (google.api_core.operation.Operation)."""
+
+    def __init__(self, result=None):
+        self._result = result
+
+    def result(self, timeout=None):
+        return self._result
+
+
+class FakeExportAgentResponse:
+    """Imita dialogflow_v2.ExportAgentResponse."""
+
+    def __init__(self, agent_content):
+        self.agent_content = agent_content
+
+
+class FakeAgentsClient:
+    """
+    Imita dialogflow_v2.AgentsClient guardando o ZIP do agente em memória.
+    RestoreAgent substitui o conteúdo; ImportAgent registra a chamada como mesclagem.
+    """
+
+    def __init__(self, agent_content=b""):
+        self.agent_content = agent_content
+        self.calls = []
+
+    def export_agent(self, request):
+        self.calls.append(("export_agent", request["parent"]))
+        return FakeOperation(FakeExportAgentResponse(self.agent_content))
+
+    def restore_agent(self, request):
+        self.calls.append(("restore_agent", request["parent"]))
+        self.agent_content = request["agent_content"]
+        return FakeOperation()
+
+    def import_agent(self, request):
+        self.calls.append(("import_agent", request["parent"]))
+        self.agent_content = request["agent_content"]
+        return FakeOperation()
@@ -0,0 +1,147 @@
+import unittest
+import sys
+import io
+import json
+import os
+import zipfile
+from unittest.mock import MagicMock
+
+# Mock google.cloud.dialogflow_v2 e google.api_core antes de importar o client
+# (mesma estratégia de test_client.py para ambientes sem as bibliotecas do Google)
+mock_exceptions = MagicMock()
+mock_exceptions.AlreadyExists = Exception
+mock_exceptions.GoogleAPICallError = Exception
+mock_exceptions.NotFound = Exception
+sys.modules.setdefault("google.cloud", MagicMock())
+sys.modules.setdefault("google.cloud.dialogflow_v2", MagicMock())
+sys.modules.setdefault("google.api_core", MagicMock())
+sys.modules.setdefault("google.api_core.exceptions", mock_exceptions)
+
+from dialogflow_automation.core.agent_archive import AgentArchiveConverter
+from dialogflow_automation.core.client import DialogflowClient
+from dialogflow_automation.tests.fakes import FakeAgentsClient
+
+CONFIG_PATH = os.path.join(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))), "config", "intents.json")
+
+
+class TestAgentArchiveConverter(unittest.TestCase):
+    def setUp(self):
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.converter = AgentArchiveConverter(language_code="pt-br")
+
+    def _build_zip(self):
+        buffer = io.BytesIO()
+        self.converter.config_to_zip(
+            self.config["entities"], self.config["intents"], buffer)
+        buffer.seek(0)
+        return buffer
+
+    def test_config_to_zip_layout(self):
+        """O ZIP gerado segue o layout de exportação do Dialogflow ES"""
+        with zipfile.ZipFile(self._build_zip()) as zf:
+            names = set(zf.namelist())
+
+        self.assertIn("agent.json", names)
+        self.assertIn("entities/TicketPriority.json", names)
+        self.assertIn("entities/TicketPriority_entries_pt-br.json", names)
+        self.assertIn("intents/abrir_chamado.json", names)
+        self.assertIn("intents/abrir_chamado_usersays_pt-br.json", names)
+
+    def test_round_trip_preserves_config(self):
+        """Config -> ZIP -> Config mantém entidades, frases, respostas e parâmetros"""
+        out = io.StringIO()
+        entity_count, intent_count = self.converter.zip_to_config(
+            self._build_zip(), out)
+        restored = json.loads(out.getvalue())
+
+        self.assertEqual(entity_count, len(self.config["entities"]))
+        self.assertEqual(intent_count, len(self.config["intents"]))
+        self.assertEqual(restored["entities"], self.config["entities"])
+
+        original = {i["display_name"]: i for i in self.config["intents"]}
+        for intent in restored["intents"]:
+            source = original[intent["display_name"]]
+            self.assertEqual(intent["training_phrases"],
+                             source["training_phrases"])
+            self.assertEqual(intent["messages"], source["messages"])
+            self.assertEqual(intent.get("parameters", []),
+                             source.get("parameters", []))
+            self.assertEqual(intent.get("webhook", False),
+                             source.get("webhook", False))
+
+    def test_webhook_settings_survive_restore(self):
+        """O RestoreAgent substitui o agente: o ZIP leva a URL do Fulfillment e o webhookUsed"""
+        self.converter = AgentArchiveConverter(
+            language_code="pt-br", webhook_url="https://exemplo.com/webhook",
+            webhook_headers={"x-dialogflow-token": "segredo"})
+        with zipfile.ZipFile(self._build_zip()) as zf:
+            agent = json.loads(zf.read("agent.json"))
+            abrir = json.loads(zf.read("intents/abrir_chamado.json"))
+            consultar = json.loads(zf.read("intents/consultar_status_chamado.json"))
+
+        self.assertTrue(agent["webhook"]["available"])
+        self.assertEqual(agent["webhook"]["url"], "https://exemplo.com/webhook")
+        self.assertEqual(agent["webhook"]["headers"], {"x-dialogflow-token": "segredo"})
+        self.assertTrue(abrir["webhookUsed"])
+        self.assertFalse(consultar["webhookUsed"])
+        self.assertEqual(self.converter.webhook_intents, ["abrir_chamado", "duvida_tecnica"])
+
+    def test_entity_name_containing_entries_marker(self):
+        """Só o arquivo <nome>_entries_<idioma>.json de outra entidade é ignorado"""
+        entities = [
+            {"display_name": "Tipo", "kind": "KIND_MAP",
+             "entities": [{"value": "a", "synonyms": ["a"]}]},
+            {"display_name": "lista_entries_legadas", "kind": "KIND_LIST",
+             "entities": [{"value": "b", "synonyms": ["b"]}]},
+        ]
+        buffer = io.BytesIO()
+        self.converter.config_to_zip(entities, [], buffer)
+        # Exportações com outro idioma também trazem os valores nesse idioma
+        with zipfile.ZipFile(buffer, "a") as zf:
+            zf.writestr("entities/Tipo_entries_en.json", json.dumps([{"value": "a", "synonyms": []}]))
+        buffer.seek(0)
+
+        out = io.StringIO()
+        self.converter.zip_to_config(buffer, out)
+        self.assertEqual(json.loads(out.getvalue())["entities"], entities)
+
+    def test_empty_agent(self):
+        """ZIP sem intenções/entidades gera um JSON válido e vazio"""
+        buffer = io.BytesIO()
+        self.converter.config_to_zip([], [], buffer)
+        buffer.seek(0)
+        out = io.StringIO()
+        self.converter.zip_to_config(buffer, out)
+        self.assertEqual(json.loads(out.getvalue()),
+                         {"entities": [], "intents": []})
+
+
+class TestAgentExportRestore(unittest.TestCase):
+    def setUp(self):
+        self.client = DialogflowClient("test-project", "/path/to/credentials.json")
+        self.fake_agents = FakeAgentsClient(agent_content=b"zip-bytes")
+        self.client.agents_client = self.fake_agents
+
+    def test_export_agent(self):
+        """Export usa o projeto como parent e devolve o conteúdo do ZIP"""
+        content = self.client.export_agent()
+        self.assertEqual(content, b"zip-bytes")
+        self.assertEqual(self.fake_agents.calls, [
+                         ("export_agent", "projects/test-project")])
+
+    def test_restore_agent(self):
+        """Restore envia o ZIP em uma única operação"""
+        self.client.restore_agent(b"new-zip")
+        self.assertEqual(self.fake_agents.agent_content, b"new-zip")
+        self.assertEqual(self.fake_agents.calls[-1][0], "restore_agent")
+
+    def test_restore_agent_merge(self):
+        """Com merge=True, usa ImportAgent"""
+        self.client.restore_agent(b"new-zip", merge=True)
+        self.assertEqual(self.fake_agents.calls[-1][0], "import_agent")
+
+
+if __name__ == '__main__':
+    unittest.main()
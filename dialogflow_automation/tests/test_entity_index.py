@@ -0,0 +1,103 @@
+import unittest
+import importlib.util
+import json
+import os
+import tempfile
+
+from dialogflow_automation.core.entity_index import EntityIndex, normalize_text
+from dialogflow_automation.core.parser import ConfigParser
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_DIR = os.path.join(PACKAGE_DIR, "config")
+COMPILED_INDEX_PATH = os.path.join(
+    os.path.dirname(PACKAGE_DIR), "backend_functions", "entity_index.json")
+VENDORED_NORMALIZATION_PATH = os.path.join(
+    os.path.dirname(PACKAGE_DIR), "backend_functions", "text_normalization.py")
+
+# Textos com acentos, cedilha, ligaduras, caixa alta, pontuação e espaços variados
+NORMALIZATION_SAMPLES = [
+    "", "  Parou a EMPRESA! ", "Crítica", "não reinicia", "Conexão/VPN caiu?!",
+    "Ação—urgente…", "ﬁnanceiro", "Straße", "ÀÉÎÕÜ ç Ç", "e-mail_corporativo 2FA",
+    "\tlinha\nnova\u00a0espaço",
+]
+
+
+class TestEntityIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = EntityIndex.from_entities(
+            ConfigParser(CONFIG_DIR).iter_entities())
+
+    def test_exact_synonym_is_accent_and_case_insensitive(self):
+        self.assertEqual(self.index.resolve("TicketPriority", "URGENTE"), "Crítica")
+        self.assertEqual(self.index.resolve("@TicketPriority", "critica"), "Crítica")
+        self.assertEqual(self.index.resolve("TicketCategory", "Conexão!"), "Rede")
+
+    def test_longest_synonym_inside_free_text(self):
+        """Sinônimos de várias palavras são encontrados dentro de um texto maior"""
+        self.assertEqual(
+            self.index.resolve("TicketPriority", "acho que parou a empresa toda"), "Crítica")
+        self.assertEqual(
+            self.index.resolve("Department", "sou do recursos humanos"), "RH")
+
+    def test_unknown_values(self):
+        self.assertIsNone(self.index.resolve("TicketPriority", "talvez"))
+        self.assertEqual(self.index.resolve("Inexistente", "x", default="y"), "y")
+        self.assertIsNone(self.index.resolve("TicketPriority", None))
+
+    def test_kind_list_entities_are_skipped(self):
+        index = EntityIndex.from_entities([
+            {"display_name": "Lista", "kind": "KIND_LIST",
+             "entities": [{"value": "a", "synonyms": ["a"]}]}])
+        self.assertEqual(index.entity_types, [])
+
+    def test_save_and_load_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "index.json")
+            self.index.save(path)
+            loaded = EntityIndex.load(path)
+        self.assertEqual(loaded.to_dict(), self.index.to_dict())
+        self.assertEqual(loaded.resolve("TicketPriority", "parou a empresa"), "Crítica")
+
+    def test_from_config_uses_the_config_loader(self):
+        """from_config lê as entidades pelo ConfigParser (arquivo ou diretório)"""
+        index = EntityIndex.from_config(os.path.join(CONFIG_DIR, "intents.json"))
+        self.assertEqual(index.to_dict(), self.index.to_dict())
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.makedirs(os.path.join(tmp_dir, "entities"))
+            with open(os.path.join(tmp_dir, "entities", "Tipo.json"), "w", encoding="utf-8") as f:
+                json.dump({"display_name": "Tipo", "kind": "KIND_MAP",
+                           "entities": [{"value": "Rede", "synonyms": ["wifi"]}]}, f)
+            self.assertEqual(EntityIndex.from_config(tmp_dir).resolve("Tipo", "WIFI"), "Rede")
+
+            with open(os.path.join(tmp_dir, "entities", "Quebrada.json"), "w", encoding="utf-8") as f:
+                json.dump({"display_name": "Quebrada", "kind": "KIND_MAP"}, f)
+            with self.assertRaises(ValueError):
+                EntityIndex.from_config(tmp_dir)
+
+    def test_compiled_index_is_up_to_date(self):
+        """O índice distribuído com a Cloud Function corresponde ao intents.json atual"""
+        with open(COMPILED_INDEX_PATH, "r", encoding="utf-8") as f:
+            compiled = json.load(f)
+        self.assertEqual(compiled, self.index.to_dict(),
+                         "Execute: python dialogflow_automation/main.py compile-entities")
+
+    def test_normalize_text(self):
+        self.assertEqual(normalize_text("  Parou a EMPRESA! "), "parou a empresa")
+
+    def test_cloud_function_normalization_matches(self):
+        """
+        Os índices compilados aqui (entidades, triagem) são consultados pela Cloud Function com
+        a cópia de text_normalization.py: as duas precisam produzir o mesmo texto
+        """
+        spec = importlib.util.spec_from_file_location(
+            "vendored_text_normalization", VENDORED_NORMALIZATION_PATH)
+        vendored = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(vendored)
+
+        for text in NORMALIZATION_SAMPLES:
+            self.assertEqual(vendored.normalize_text(text), normalize_text(text), repr(text))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import io
+import json
+import logging
+import os
+import queue
+import threading
+import unittest
+from logging.handlers import QueueListener
+
+from dialogflow_automation.core.json_logging import (
+    CorrelationFilter,
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    correlation_scope,
+    get_correlation_id,
+    session_id_from_dialogflow,
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class RecordingArg:
+    """Argumento de log que registra em qual thread foi convertido para texto."""
+
+    def __init__(self):
+        self.rendered_in = []
+
+    def __str__(self):
+        self.rendered_in.append(threading.current_thread().name)
+        return "valor"
+
+
+class TestJsonLogging(unittest.TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        output = logging.StreamHandler(self.stream)
+        output.setFormatter(JsonFormatter())
+        self.handler = NonBlockingQueueHandler(queue.Queue(maxsize=100))
+        self.handler.addFilter(CorrelationFilter())
+        self.listener = QueueListener(self.handler.queue, output)
+        # Logger isolado (fora da hierarquia): não propaga para handlers do executor de testes
+        self.logger = logging.Logger("test_json_logging", logging.INFO)
+        self.logger.addHandler(self.handler)
+
+    def lines(self):
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_session_id_from_dialogflow(self):
+        self.assertEqual(session_id_from_dialogflow(
+            "projects/p/agent/sessions/abc-123"), "abc-123")
+        self.assertEqual(session_id_from_dialogflow("abc"), "abc")
+        self.assertIsNone(session_id_from_dialogflow(None))
+
+    def test_correlation_id_and_lazy_formatting(self):
+        """O ID da sessão acompanha o registro e a mensagem é montada na thread de fundo"""
+        arg = RecordingArg()
+        with correlation_scope("sessao-1"):
+            self.logger.info("Intent recebida: %s", arg, extra={"json_fields": {"intent": "x"}})
+        self.assertIsNone(get_correlation_id())
+        # Nada foi formatado na thread que emitiu o log
+        self.assertEqual(arg.rendered_in, [])
+
+        self.listener.start()
+        self.listener.stop()
+
+        entry = self.lines()[0]
+        self.assertEqual(entry["message"], "Intent recebida: valor")
+        self.assertEqual(entry["severity"], "INFO")
+        self.assertEqual(entry["correlation_id"], "sessao-1")
+        self.assertEqual(entry["intent"], "x")
+        self.assertEqual(len(arg.rendered_in), 1)
+        self.assertNotEqual(arg.rendered_in[0], threading.current_thread().name)
+
+    def test_disabled_level_is_never_formatted(self):
+        arg = RecordingArg()
+        self.logger.debug("Detalhe: %s", arg)
+        self.assertEqual(self.handler.queue.qsize(), 0)
+        self.assertEqual(arg.rendered_in, [])
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        for i in range(105):
+            self.logger.info("mensagem %d", i)
+        self.assertEqual(self.handler.dropped, 5)
+
+    def test_exception_is_serialized(self):
+        self.listener.start()
+        try:
+            raise ValueError("falhou")
+        except ValueError:
+            self.logger.exception("Erro")
+        self.listener.stop()
+        self.assertIn("ValueError: falhou", self.lines()[0]["exception"])
+
+    def test_cloud_function_copy_is_identical(self):
+        """A Cloud Function é publicada sozinha e leva uma cópia deste módulo"""
+        with open(os.path.join(REPO_ROOT, "dialogflow_automation", "core", "json_logging.py"), "rb") as f:
+            source = f.read()
+        with open(os.path.join(REPO_ROOT, "backend_functions", "json_logging.py"), "rb") as f:
+            copy = f.read()
+        self.assertEqual(source, copy,
+                         "Copie dialogflow_automation/core/json_logging.py para backend_functions/")
+
+
+if __name__ == '__main__':
+    unittest.main()
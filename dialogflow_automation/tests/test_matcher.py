@@ -0,0 +1,83 @@
+import unittest
+import os
+
+import numpy as np
+
+from dialogflow_automation.core.matcher import (
+    FALLBACK_INTENT,
+    IntentMatcher,
+    benchmark,
+    find_collisions,
+    normalize_text,
+)
+from dialogflow_automation.core.parser import ConfigParser
+
+CONFIG_DIR = os.path.join(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))), "config")
+
+EXAMPLES = [
+    ("Quero abrir um chamado", "abrir_chamado"),
+    ("Preciso de suporte técnico", "abrir_chamado"),
+    ("Registrar um incidente", "abrir_chamado"),
+    ("Qual o status do meu chamado?", "consultar_status"),
+    ("Acompanhar solicitação", "consultar_status"),
+    ("Status do ticket 54321", "consultar_status"),
+]
+
+
+class TestIntentMatcher(unittest.TestCase):
+    def test_normalize_text(self):
+        self.assertEqual(normalize_text("  Crítica!  Parou a EMPRESA. "),
+                         "critica parou a empresa")
+
+    def test_predicts_known_phrasing(self):
+        matcher = IntentMatcher().fit(EXAMPLES)
+        self.assertEqual(matcher.predict_one("quero abrir chamado")[0], "abrir_chamado")
+        self.assertEqual(matcher.predict_one("status do chamado")[0], "consultar_status")
+
+    def test_scores_match_dense_cosine(self):
+        """As listas invertidas produzem a mesma similaridade que o produto denso"""
+        matcher = IntentMatcher().fit(EXAMPLES)
+        query = "acompanhar o status"
+        dense_rows = np.zeros((matcher.phrase_count, len(matcher.vocabulary)))
+        for phrase_id, (text, _) in enumerate(EXAMPLES):
+            idx, w = matcher._vectorize(matcher._count_ngrams(text))
+            dense_rows[phrase_id, idx] = w
+        q_idx, q_w = matcher._vectorize(matcher._count_ngrams(query))
+        q = np.zeros(len(matcher.vocabulary))
+        q[q_idx] = q_w
+        np.testing.assert_allclose(matcher.phrase_scores(query), dense_rows @ q, rtol=1e-5)
+
+    def test_fallback_below_threshold(self):
+        matcher = IntentMatcher(threshold=0.5).fit(EXAMPLES)
+        self.assertEqual(matcher.predict_one("zzzz qqqq")[0], FALLBACK_INTENT)
+
+    def test_from_config(self):
+        matcher = IntentMatcher.from_config(ConfigParser(CONFIG_DIR))
+        self.assertIn("abrir_chamado", matcher.intents)
+        self.assertEqual(matcher.predict_one("Quero abrir um chamado")[0], "abrir_chamado")
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_cross_validation_evaluates_every_phrase_once(self):
+        report = benchmark(EXAMPLES, folds=3)
+        self.assertEqual(report["examples"], len(EXAMPLES))
+        self.assertEqual(sum(map(sum, report["confusion_matrix"])), len(EXAMPLES))
+        self.assertEqual(report["labels"][-1], FALLBACK_INTENT)
+        self.assertIsNotNone(report["queries_per_second"])
+
+    def test_held_out_file(self):
+        report = benchmark(EXAMPLES, test_examples=[("abrir um chamado", "abrir_chamado")])
+        self.assertEqual(report["examples"], 1)
+        self.assertEqual(report["accuracy"], 1.0)
+
+    def test_find_collisions(self):
+        examples = EXAMPLES + [("Quero abrir um chamado!", "outra_intencao")]
+        collisions = find_collisions(examples, min_similarity=0.9)
+        self.assertEqual(len(collisions), 1)
+        self.assertEqual({collisions[0]["intent"], collisions[0]["other_intent"]},
+                         {"abrir_chamado", "outra_intencao"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+import io
+import json
+import os
+import shutil
+import tempfile
+import tracemalloc
+
+from dialogflow_automation.core.json_stream import iter_array_items
+from dialogflow_automation.core.parser import ConfigParser
+
+CONFIG_DIR = os.path.join(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))), "config")
+
+
+def make_intent(name, phrases=3):
+    return {
+        "display_name": name,
+        "training_phrases": [f"{name} frase {i}" for i in range(phrases)],
+        "messages": [f"Resposta de {name}"],
+        "parameters": [
+            {"display_name": "ticket_id", "entity_type_display_name": "@sys.number",
+             "mandatory": True, "prompts": ["Qual o número?"]}
+        ],
+    }
+
+
+class TestJsonStream(unittest.TestCase):
+    def test_top_level_list(self):
+        """Lista no nível superior gera chave None"""
+        items = list(iter_array_items(io.StringIO('[{"a": 1}, {"b": 2}]')))
+        self.assertEqual(items, [(None, {"a": 1}), (None, {"b": 2})])
+
+    def test_object_with_arrays_and_scalars(self):
+        """Objeto com arrays: escalares são ignorados e a chave acompanha cada item"""
+        doc = '{"version": 2, "entities": [1, 23], "meta": {"x": [1]}, "intents": []}'
+        items = list(iter_array_items(io.StringIO(doc)))
+        self.assertEqual(items, [("entities", 1), ("entities", 23)])
+
+    def test_small_chunks(self):
+        """Valores que atravessam a fronteira dos blocos são decodificados corretamente"""
+        with open(os.path.join(CONFIG_DIR, "intents.json"), encoding="utf-8") as f:
+            expected = json.load(f)
+            f.seek(0)
+            items = list(iter_array_items(f, chunk_size=7))
+        self.assertEqual([i for k, i in items if k == "intents"], expected["intents"])
+        self.assertEqual([i for k, i in items if k == "entities"], expected["entities"])
+
+    def test_invalid_json(self):
+        """JSON truncado gera JSONDecodeError"""
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_array_items(io.StringIO('[{"a": 1}, {"b":')))
+
+
+class TestConfigParser(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmp_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        return path
+
+    def test_real_config_dict_format(self):
+        """O intents.json real (objeto com entities/intents) é carregado pelo mesmo loader"""
+        parser = ConfigParser(CONFIG_DIR)
+        intents = parser.load_intents()
+        entities = parser.load_entities()
+        self.assertIn("abrir_chamado", [i["display_name"] for i in intents])
+        self.assertIn("TicketPriority", [e["display_name"] for e in entities])
+
+    def test_list_format(self):
+        """Lista no nível superior continua sendo aceita como lista de intenções"""
+        self._write("intents.json", [make_intent("a"), make_intent("b")])
+        parser = ConfigParser(self.tmp_dir)
+        self.assertEqual(len(parser.load_intents()), 2)
+        self.assertEqual(parser.load_entities(), [])
+
+    def test_directory_format(self):
+        """Diretório com um arquivo por intenção/entidade"""
+        self._write("agent/intents/b.json", make_intent("b"))
+        self._write("agent/intents/a.json", make_intent("a"))
+        self._write("agent/entities/e.json", {
+            "display_name": "E", "kind": "KIND_MAP",
+            "entities": [{"value": "v", "synonyms": ["s"]}]})
+        parser = ConfigParser(self.tmp_dir)
+        names = [i["display_name"] for i in parser.iter_intents("agent")]
+        self.assertEqual(names, ["a", "b"])
+        self.assertEqual(len(parser.load_entities("agent")), 1)
+
+    def test_invalid_intent_raises(self):
+        """Intenção inválida gera ValueError identificando o registro"""
+        bad = make_intent("ruim")
+        bad["training_phrases"] = ["ok", 42]
+        self._write("intents.json", {"intents": [make_intent("bom"), bad]})
+        parser = ConfigParser(self.tmp_dir)
+        with self.assertRaisesRegex(ValueError, r"Intenção #1 \(ruim\).*training_phrases"):
+            parser.load_intents()
+
+    def test_invalid_entity_kind_raises(self):
+        """Entidade com kind desconhecido gera ValueError"""
+        self._write("intents.json", {"entities": [
+            {"display_name": "E", "kind": "KIND_REGEX", "entities": []}]})
+        parser = ConfigParser(self.tmp_dir)
+        with self.assertRaisesRegex(ValueError, "kind"):
+            parser.load_entities()
+
+    def test_missing_file(self):
+        parser = ConfigParser(self.tmp_dir)
+        with self.assertRaises(FileNotFoundError):
+            parser.load_intents("nao_existe.json")
+
+    def test_streaming_memory_is_flat(self):
+        """Iterar um arquivo grande mantém o pico de memória próximo ao de um único registro"""
+        path = os.path.join(self.tmp_dir, "big.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"intents": [')
+            for i in range(3000):
+                f.write(("," if i else "") + json.dumps(make_intent(f"intent_{i}", phrases=50)))
+            f.write("]}")
+
+        parser = ConfigParser(self.tmp_dir)
+        tracemalloc.start()
+        count = sum(1 for _ in parser.iter_intents("big.json"))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.assertEqual(count, 3000)
+        # O arquivo tem vários MB; o pico deve ficar muito abaixo disso
+        self.assertLess(peak, os.path.getsize(path) / 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
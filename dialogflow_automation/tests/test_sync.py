@@ -0,0 +1,90 @@
+import unittest
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import MagicMock, patch
+
+# Mock das bibliotecas do Google antes de importar main (que importa o cliente do Dialogflow)
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.cloud", MagicMock())
+sys.modules.setdefault("google.cloud.dialogflow_v2", MagicMock())
+sys.modules.setdefault("google.api_core", MagicMock())
+sys.modules.setdefault("google.api_core.exceptions", MagicMock())
+
+from dialogflow_automation.main import run_restore, run_sync
+from dialogflow_automation.tests.test_validator import make_entity, make_intent
+
+
+class TestRunSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.args = argparse.Namespace(config_dir=self.tmp_dir, source="intents.json", workers=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, data):
+        with open(os.path.join(self.tmp_dir, "intents.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def test_invalid_late_intent_prevents_any_api_call(self):
+        """Um registro inválido no fim do arquivo não deixa o agente sincronizado pela metade"""
+        bad_intent = make_intent("c")
+        del bad_intent["messages"]
+        self._write({"entities": [make_entity("E")],
+                     "intents": [make_intent("a"), make_intent("b", "@E"), bad_intent]})
+        df_client = MagicMock()
+
+        with self.assertRaises(SystemExit):
+            run_sync(df_client, self.args)
+
+        df_client.create_entity_type.assert_not_called()
+        df_client.create_intent.assert_not_called()
+
+    def test_valid_config_is_synced(self):
+        self._write({"entities": [make_entity("E")],
+                     "intents": [make_intent("a"), make_intent("b", "@E")]})
+        df_client = MagicMock()
+
+        run_sync(df_client, self.args)
+
+        df_client.create_entity_type.assert_called_once()
+        self.assertEqual(df_client.create_intent.call_count, 2)
+
+
+class TestRunRestore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.input = os.path.join(self.tmp_dir, "intents.json")
+        intent = make_intent("abrir_chamado")
+        intent["webhook"] = True
+        with open(self.input, "w", encoding="utf-8") as f:
+            json.dump({"entities": [], "intents": [intent]}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _args(self, webhook_url=None):
+        return argparse.Namespace(config_dir=self.tmp_dir, source="intents.json", input=self.input,
+                                  merge=False, language="pt-br", webhook_url=webhook_url)
+
+    def test_restore_without_webhook_url_keeps_agent_untouched(self):
+        """Substituir o agente sem a URL desligaria o Fulfillment das intenções com webhook"""
+        df_client = MagicMock()
+        with patch.dict(os.environ, {"DIALOGFLOW_WEBHOOK_URL": ""}):
+            with self.assertRaises(SystemExit):
+                run_restore(df_client, self._args())
+        df_client.restore_agent.assert_not_called()
+
+    def test_restore_with_webhook_url(self):
+        df_client = MagicMock()
+        with patch.dict(os.environ, {"DIALOGFLOW_WEBHOOK_TOKEN": "atual,antigo"}):
+            run_restore(df_client, self._args("https://exemplo.com/webhook"))
+        df_client.restore_agent.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from dialogflow_automation.core import triage
+from dialogflow_automation.core.parser import ConfigParser
+from dialogflow_automation.core.triage import DEFAULT_KEYWORDS_PATH, TriageModel
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_DIR = os.path.join(PACKAGE_DIR, "config")
+COMPILED_MODEL_PATH = os.path.join(
+    os.path.dirname(PACKAGE_DIR), "backend_functions", "triage_model.json")
+
+
+class TestTriageModel(unittest.TestCase):
+    def setUp(self):
+        with open(DEFAULT_KEYWORDS_PATH, "r", encoding="utf-8") as f:
+            keywords = json.load(f)
+        self.model = TriageModel.from_config(ConfigParser(CONFIG_DIR).iter_entities(), keywords)
+
+    def test_description_keywords(self):
+        self.assertEqual(self.model.classify("Servidor fora do ar, ninguém consegue trabalhar"), "CRITICAL")
+        self.assertEqual(self.model.classify("Minha senha bloqueada, não consigo acessar o ERP"), "HIGH")
+        self.assertEqual(self.model.classify("Impressora do 2º andar intermitente"), "MEDIUM")
+        self.assertEqual(self.model.classify("Sugestão: trocar o papel de parede, sem pressa"), "LOW")
+
+    def test_without_matches_defaults_to_medium(self):
+        self.assertEqual(self.model.classify(""), "MEDIUM")
+        self.assertEqual(self.model.classify(None), "MEDIUM")
+        self.assertEqual(self.model.classify("Olá"), "MEDIUM")
+
+    def test_priority_synonyms_from_intents(self):
+        """Sinônimos de TicketPriority valem no texto e como prioridade informada"""
+        self.assertEqual(self.model.classify("É urgente!"), "CRITICAL")
+        self.assertEqual(self.model.classify("", stated="Pode esperar"), "LOW")
+        self.assertEqual(self.model.classify("", stated="acho que parou a empresa"), "CRITICAL")
+        self.assertEqual(self.model.classify("", stated="valor desconhecido"), "MEDIUM")
+
+    def test_longest_phrase_wins(self):
+        """'não é urgente' conta como frase inteira, e não como 'urgente'"""
+        self.assertEqual(self.model.match("Não é urgente: instalar o Teams"), ["nao e urgente", "instalar"])
+        self.assertEqual(self.model.classify("Não é urgente"), "LOW")
+
+    def test_description_can_override_stated_priority(self):
+        self.assertEqual(self.model.classify("Impressora quebrada, não liga", stated="Alta"), "HIGH")
+        self.assertEqual(self.model.classify("Ransomware: arquivos criptografados", stated="Baixa"), "CRITICAL")
+        self.assertEqual(self.model.classify("Dúvida sobre o Excel", stated="Urgente"), "CRITICAL")
+
+    def test_batch_matches_single_classification(self):
+        texts = ["Servidor fora do ar", "", "Dúvida sobre o Excel", "Não liga", "Sem pressa, sugestão"]
+        stated = [None, "Alta", "Urgente", None, "Crítica"]
+        expected = [self.model.classify(text, value) for text, value in zip(texts, stated)]
+        self.assertEqual(self.model.classify_batch(texts, stated), expected)
+        self.assertEqual(self.model.classify_batch([]), [])
+        with patch.object(triage, "np", None):
+            self.assertEqual(self.model.classify_batch(texts, stated), expected)
+
+    def test_ties_favor_the_most_urgent(self):
+        model = TriageModel({"lento": ("MEDIUM", 1.0), "parado": ("CRITICAL", 1.0)})
+        self.assertEqual(model.classify("lento e parado"), "CRITICAL")
+        self.assertEqual(model.classify_batch(["lento e parado"]), ["CRITICAL"])
+
+    def test_unknown_level_is_rejected(self):
+        with self.assertRaises(ValueError):
+            TriageModel({"x": ("URGENTISSIMO", 1.0)})
+
+    def test_save_and_load_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "triage.json")
+            self.model.save(path)
+            loaded = TriageModel.load(path)
+        self.assertEqual(loaded.to_dict(), self.model.to_dict())
+        self.assertEqual(loaded.classify("", stated="Urgente"), "CRITICAL")
+
+    def test_compiled_model_is_up_to_date(self):
+        """O modelo distribuído com a Cloud Function corresponde à configuração atual"""
+        with open(COMPILED_MODEL_PATH, "r", encoding="utf-8") as f:
+            compiled = json.load(f)
+        self.assertEqual(compiled, self.model.to_dict(),
+                         "Execute: python dialogflow_automation/main.py compile-triage")
+
+
+if __name__ == '__main__':
+    unittest.main()
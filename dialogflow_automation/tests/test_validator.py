@@ -0,0 +1,146 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from dialogflow_automation.core.parser import ConfigParser
+from dialogflow_automation.core.validator import ConfigValidator
+
+CONFIG_DIR = os.path.join(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))), "config")
+
+
+def make_intent(name, entity_type="@sys.any"):
+    return {
+        "display_name": name,
+        "training_phrases": [f"{name} frase"],
+        "messages": ["ok"],
+        "parameters": [
+            {"display_name": "p", "entity_type_display_name": entity_type, "mandatory": True}
+        ],
+    }
+
+
+def make_entity(name):
+    return {"display_name": name, "kind": "KIND_MAP",
+            "entities": [{"value": "v", "synonyms": ["s"]}]}
+
+
+class TestConfigValidator(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmp_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def _validate(self, source="intents.json", workers=1):
+        return ConfigValidator(ConfigParser(self.tmp_dir), workers=workers).validate(source)
+
+    def test_real_config_is_valid(self):
+        """O intents.json do projeto não possui erros"""
+        report = ConfigValidator(ConfigParser(CONFIG_DIR), workers=1).validate()
+        self.assertTrue(report.is_valid, report.format_text())
+        self.assertEqual(report.counts, {"entities": 4, "intents": 4})
+
+    def test_reports_all_errors_at_once(self):
+        """Todos os erros são retornados juntos, não apenas o primeiro"""
+        bad_schema = make_intent("a")
+        del bad_schema["messages"]
+        bad_entity = make_entity("E")
+        bad_entity["kind"] = "KIND_X"
+        self._write("intents.json", {
+            "entities": [bad_entity, make_entity("E")],
+            "intents": [bad_schema, make_intent("b", "@Desconhecida"),
+                        make_intent("b"), make_intent("c", "@E")],
+        })
+
+        report = self._validate()
+        messages = [(e["display_name"], e["message"]) for e in report.errors]
+
+        self.assertFalse(report.is_valid)
+        self.assertEqual(len(report.errors), 5, report.format_text())
+        self.assertTrue(any(n == "a" and "messages" in m for n, m in messages))
+        self.assertTrue(any(n == "E" and "kind" in m for n, m in messages))
+        self.assertTrue(any(n == "E" and "duplicado" in m for n, m in messages))
+        self.assertTrue(any(n == "b" and "@Desconhecida" in m for n, m in messages))
+        # 'b' duplicado deve ser reportado além da referência inválida
+        self.assertEqual(sum(1 for n, m in messages if n == "b"), 2)
+
+    def test_duplicate_intents(self):
+        self._write("intents.json", {"intents": [make_intent("x"), make_intent("x")]})
+        report = self._validate()
+        self.assertEqual(len(report.errors), 1)
+        self.assertIn("intents.json#0", report.errors[0]["message"])
+
+    def test_directory_in_parallel(self):
+        """Diretórios grandes são validados por processos com o mesmo resultado"""
+        self._write("agent/entities/E.json", make_entity("E"))
+        for i in range(12):
+            self._write(f"agent/intents/i{i:02d}.json", make_intent(f"i{i}", "@E"))
+        self._write("agent/intents/zz.json", make_intent("i0", "@Nope"))
+
+        with patch("dialogflow_automation.core.validator.PARALLEL_MIN_FILES", 2):
+            parallel = self._validate("agent", workers=2)
+        sequential = self._validate("agent", workers=1)
+
+        self.assertEqual(parallel.to_dict()["errors"], sequential.to_dict()["errors"])
+        self.assertEqual(parallel.counts["intents"], 13)
+        self.assertEqual(len(parallel.errors), 2)
+
+    def test_unknown_top_level_keys_are_ignored(self):
+        """Chaves extras no objeto raiz são ignoradas, como no loader"""
+        self._write("intents.json", {"entities": [], "intents": [make_intent("a")], "tags": ["x"]})
+        report = self._validate()
+        self.assertTrue(report.is_valid, report.format_text())
+        self.assertEqual(report.counts, {"entities": 0, "intents": 1})
+
+    def test_json_report(self):
+        self._write("intents.json", {"intents": [make_intent("a", "@X")]})
+        data = json.loads(self._validate().to_json())
+        self.assertFalse(data["valid"])
+        self.assertEqual(data["error_count"], 1)
+        self.assertEqual(data["errors"][0]["location"], "intents.json#0")
+
+    def test_invalid_json_is_reported(self):
+        with open(os.path.join(self.tmp_dir, "intents.json"), "w") as f:
+            f.write('{"intents": [')
+        report = self._validate()
+        self.assertFalse(report.is_valid)
+        self.assertIn("sintaxe", report.errors[0]["message"])
+
+    def test_records_before_a_syntax_error_are_still_checked(self):
+        """Um erro de sintaxe no meio do arquivo não descarta o que foi lido antes dele"""
+        valid = json.dumps({"entities": [make_entity("E")],
+                            "intents": [make_intent("a", "@E"), make_intent("a"), make_intent("b", "@X")]})
+        with open(os.path.join(self.tmp_dir, "intents.json"), "w") as f:
+            f.write(valid[:-2] + ', {"display_name": ')
+
+        report = self._validate()
+        messages = [(e["display_name"], e["message"]) for e in report.errors]
+        self.assertEqual(report.counts, {"entities": 1, "intents": 3})
+        self.assertTrue(any("sintaxe" in m for _, m in messages))
+        self.assertTrue(any(n == "a" and "duplicado" in m for n, m in messages))
+        self.assertTrue(any(n == "b" and "'@X'" in m for n, m in messages))
+
+    def test_references_are_not_checked_when_entities_are_truncated(self):
+        """Entidades cortadas pelo erro de sintaxe não geram falsas referências inexistentes"""
+        valid = json.dumps({"intents": [make_intent("a", "@E")], "entities": [make_entity("D")]})
+        with open(os.path.join(self.tmp_dir, "intents.json"), "w") as f:
+            f.write(valid[:-2] + ', {"display_name": ')
+
+        report = self._validate()
+        self.assertEqual(report.counts, {"entities": 1, "intents": 1})
+        self.assertEqual(len(report.errors), 1, report.format_text())
+        self.assertIn("sintaxe", report.errors[0]["message"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 import React, { useState, useRef, useEffect } from 'react';
 
+const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+
 // Interface para tipagem das mensagens do chat
 interface Message {
   id: string;
@@ -44,10 +46,11 @@ export default function ChatInterface() {
     setIsLoading(true);
 
     try {
-      // Simulação de chamada à API do Dialogflow (via Proxy Next.js ou direta)
-      // Na produção, isso bateria em um endpoint /api/chat que proxyaria para o Dialogflow CX/ES
-      const response = await fetch('/api/chat', {
+      // Gateway do backend Django (/api/chat/) que repassa a mensagem ao Dialogflow ES.
+      // O cookie de sessão identifica a conversa, por isso as credenciais são enviadas.
+      const response = await fetch(`${API_URL}/api/chat/`, {
         method: 'POST',
+        credentials: 'include',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ message: userMsg.text }),
       });